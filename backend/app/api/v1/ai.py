@@ -3,6 +3,7 @@ AI analysis API endpoints
 """
 from fastapi import APIRouter, Query, HTTPException, Depends, Path, Body, BackgroundTasks # type: ignore
 from typing import List, Optional, Dict, Any, Union
+import asyncio
 import os
 import json
 import logging
@@ -15,9 +16,10 @@ from app.models.ai import (
     MarketPrediction, SentimentAnalysis, MarketInsight, 
     PortfolioRecommendation, AIAnalysisRequest
 )
+from app.core.container import container
 from app.core.logging import get_logger
-from app.services.ai import AIService
-from app.services.ai.openai_service import OpenAIService, get_openai_service
+from app import services
+from app.services.ai.openai_service import get_openai_service
 from app.services.ai.intent_classifier import IntentClassifier, IntentType
 from app.services.ai.prompt_templates import get_prompt_for_intent
 from app.services.ai.context_registry import ContextRegistry, ContextPriority
@@ -25,7 +27,12 @@ from app.services.news import crypto_news_service, macro_news_service, reddit_se
 from app.core.llm_provider import LLMProvider
 from app.models.ai.ai import ChatMessage
 from pydantic import BaseModel # type: ignore
-from app.services.ai.utils.keyword_extractor import extract_keywords_from_query
+from app.services.ai.utils.keyword_extractor import extract_keywords_from_query, get_nlp
+from app.api.v1.portfolio import MARKET_DATA_FILE
+from app.services.portfolio.ledgers import user_positions
+from app.services.portfolio.valuation import load_snapshot, value_positions
+from app.services.portfolio.risk_service import risk_service
+from app.services.ai.context_providers.risk import CONTEXT_SIMULATION_PATHS
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -33,13 +40,13 @@ logger = get_logger(__name__)
 # Create router
 router = APIRouter(prefix="/ai", tags=["AI Analysis"])
 
-# Initialize AI services
-ai_service = AIService()
-openai_service = OpenAIService()
-
-# Initialize intent classifier and context registry
-intent_classifier = IntentClassifier()
-context_registry = ContextRegistry()
+# AI services are built on first use or during startup warm-up
+ai_service = services.ai_service
+openai_service = container.register("openai", get_openai_service)
+intent_classifier = container.register("intent_classifier", IntentClassifier)
+context_registry = container.register("context_registry", ContextRegistry, warm_up=False)
+# Load the spaCy model for keyword extraction in the background too
+container.register("spacy", get_nlp)
 
 # Helper function to load market data directly from file
 def load_market_data():
@@ -49,7 +56,7 @@ def load_market_data():
     try:
         # Try both potential locations for market data
         potential_paths = [
-            os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data", "market_data.json"),
+            MARKET_DATA_FILE,
             os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "app", "data", "market_data.json")
         ]
         
@@ -136,6 +143,7 @@ class ChatRequest(BaseModel):
     conversation_id: Optional[str] = None
     model: Optional[str] = "gpt-4-turbo-preview"
     include_debug_info: Optional[bool] = False
+    user_id: Optional[str] = "user123"
 
 class ChatResponse(BaseModel):
     answer: str
@@ -260,7 +268,8 @@ async def chat(request: ChatRequest):
         response = await openai_service.process_query(
             query=request.query,
             conversation_id=request.conversation_id,
-            model=request.model
+            model=request.model,
+            user_id=request.user_id or "user123"
         )
         
         # Remove sensitive or excessive information from metadata if not requested
@@ -1118,18 +1127,36 @@ async def process_query(request: dict = Body(...)):
         # Step 3: Get portfolio data if relevant and available
         if user_id and intent_type in [IntentType.PORTFOLIO_ANALYSIS, IntentType.RISK_ASSESSMENT]:
             try:
-                # In a real implementation, this would load actual portfolio data
-                # For now, we'll use placeholder data
-                portfolio_data = {
-                    "total_value": 10000,
+                positions = user_positions(user_id)
+                snapshot = load_snapshot(MARKET_DATA_FILE)
+                valuation = value_positions(positions, snapshot)
+                context_data["portfolio"] = {
+                    "total_value": valuation["total_value_usd"],
+                    "unrealized_pnl": valuation["unrealized_pnl_usd"],
+                    "change_24h_pct": valuation["change_24h_pct"],
                     "assets": [
-                        {"symbol": "BTC", "name": "Bitcoin", "amount": 0.15, "value": 7500},
-                        {"symbol": "ETH", "name": "Ethereum", "amount": 1.5, "value": 3000}
+                        {
+                            "symbol": row["symbol"],
+                            "name": row["name"],
+                            "amount": row["quantity"],
+                            "value": row["value_usd"],
+                            "allocation_percentage": row["allocation_percentage"]
+                        }
+                        for row in valuation["positions"]
                     ]
                 }
-                context_data["portfolio"] = portfolio_data
                 context_sources.append("portfolio")
                 logger.info("Loaded portfolio data for context")
+                
+                if intent_type == IntentType.RISK_ASSESSMENT:
+                    # Volatility, beta and drawdown metrics from stored price history
+                    risk = await asyncio.to_thread(risk_service.assess_positions, positions, snapshot)
+                    if risk.get("available"):
+                        risk["value_at_risk"] = await asyncio.to_thread(
+                            risk_service.value_at_risk, positions, snapshot, CONTEXT_SIMULATION_PATHS
+                        )
+                        context_data["risk"] = risk
+                        context_sources.append("risk")
             except Exception as e:
                 logger.error(f"Error loading portfolio data: {str(e)}")
         
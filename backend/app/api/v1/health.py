@@ -0,0 +1,48 @@
+"""
+Operational endpoints
+
+Probes and scrape targets keep their conventional unversioned paths, so
+main.py includes this router without the /api/v1 prefix.
+"""
+from fastapi import APIRouter, Request # type: ignore
+from fastapi.responses import JSONResponse, PlainTextResponse # type: ignore
+from typing import Any, Dict
+
+from app.core import metrics
+from app.core.container import container
+from app.services.cluster import cluster
+
+# Create router
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/health/ready")
+async def readiness(request: Request):
+    """
+    Readiness probe: 503 with warm-up progress until services are built and background tasks run
+    """
+    status = container.status()
+    status["background_started"] = getattr(request.app.state, "background_started", False)
+    status["cluster"] = cluster.status()
+    status["ready"] = status["ready"] and status["background_started"]
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/health/tasks", response_model=Dict[str, Any])
+async def task_status():
+    """
+    Status of the scheduled background tasks
+    """
+    from app.services.scheduler_service import task_scheduler
+    return {
+        "scheduler_running": task_scheduler.is_running(),
+        "tasks": task_scheduler.get_all_task_statuses()
+    }
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Metrics of this worker process in the Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,17 +1,23 @@
 """
 Market data API endpoints
 """
-from fastapi import APIRouter, Query, HTTPException, Depends, Path, Body # type: ignore
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, Query, HTTPException, Depends, Path, Body, Request # type: ignore
+from typing import List, Optional, Dict, Any, Mapping
+import asyncio
 import os
 import json
 import logging
 from datetime import datetime, timedelta
 import random
 
-from app.models.market import MarketOverview, CryptoPrice, CryptoPriceHistory, TechnicalIndicator
+from app.models.market import MarketOverview, CryptoPrice, CryptoPriceHistory, TechnicalIndicator, MarketAlert
 from app.core.logging import get_logger
+from app.core.http_cache import cache_control
+from app.core.responses import payload_cache, payload_response
 from app.services.market.market_data_service import MarketDataService
+from app.services.alerts import alert_service
+from app.services.market.golden_cross import golden_cross_screener, STATUSES as GOLDEN_CROSS_STATUSES
+from app.services.portfolio.valuation import load_snapshot
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -29,6 +35,32 @@ def get_market_service():
         _market_service = MarketDataService()
     return _market_service
 
+def market_version(params: Mapping[str, Any]) -> Optional[str]:
+    """
+    Version stamp of the market data (its update time) for HTTP validators
+
+    Returns None once the data is due for a refresh, so the handler runs
+    and get_market_data fetches new data.
+    """
+    market_service = get_market_service()
+    version = load_snapshot(market_service.market_data_file).version
+    if not version:
+        return None
+    updated = datetime.fromisoformat(version).replace(tzinfo=None)
+    if datetime.now() - updated >= market_service.update_interval:
+        return None
+    return version
+
+def golden_cross_version(params: Mapping[str, Any]) -> Optional[str]:
+    """Time of the last golden cross screen; None when this request runs a new one"""
+    checked_at = golden_cross_screener.checked_at
+    if params.get("refresh") or checked_at is None:
+        return None
+    return checked_at.isoformat()
+
+# Market data changes with each 5-minute refresh
+market_cache = cache_control(market_version, max_age=30, stale_while_revalidate=270)
+
 # Helper to load mock data
 def load_mock_data(filename):
     try:
@@ -42,20 +74,28 @@ def load_mock_data(filename):
         return []
 
 @router.get("/data", response_model=Dict[str, Any])
-async def get_market_data():
+@market_cache
+async def get_market_data(request: Request):
     """
     Get current market data
     """
     try:
-        logger.info("Fetching market data from service")
+        logger.debug("Fetching market data from service")
         market_service = get_market_service()
-        return await market_service.get_market_data()
+        market_data = await market_service.get_market_data()
+        if "error" in market_data:
+            return market_data
+        # Encoded once per market data version
+        payload = payload_cache.get(("market.data",), market_service.data_version, lambda: market_data)
+        return payload_response(request, payload)
     except Exception as e:
         logger.error(f"Error fetching market data: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching market data: {str(e)}")
 
 @router.get("/prices", response_model=List[Dict[str, Any]])
+@market_cache
 async def get_crypto_prices(
+    request: Request,
     limit: int = Query(50, description="Number of items to return"),
     offset: int = Query(0, description="Offset for pagination")
 ):
@@ -63,15 +103,19 @@ async def get_crypto_prices(
     Get current crypto prices
     """
     try:
-        logger.info(f"Fetching crypto prices with limit={limit}, offset={offset}")
+        logger.debug("Fetching crypto prices with limit=%s, offset=%s", limit, offset)
         market_service = get_market_service()
         market_data = await market_service.get_market_data()
         
         if "prices" in market_data:
-            # Sort prices by market cap (highest first)
-            sorted_prices = sorted(market_data["prices"], key=lambda x: x.get("marketCap", 0), reverse=True)
-            paginated = sorted_prices[offset:offset + limit]
-            return paginated
+            def top_prices():
+                # Sort prices by market cap (highest first)
+                sorted_prices = sorted(market_data["prices"], key=lambda x: x.get("marketCap", 0), reverse=True)
+                return sorted_prices[offset:offset + limit]
+            
+            # Each page is encoded once per market data version
+            payload = payload_cache.get(("market.prices", limit, offset), market_service.data_version, top_prices)
+            return payload_response(request, payload)
         
         logger.warning("No price data found")
         return []
@@ -113,6 +157,7 @@ async def get_coin_price(
         raise HTTPException(status_code=500, detail=f"Error fetching coin price: {str(e)}")
 
 @router.get("/overview", response_model=Dict[str, Any])
+@market_cache
 async def get_market_overview():
     """
     Get market overview statistics
@@ -134,6 +179,7 @@ async def get_market_overview():
         raise HTTPException(status_code=500, detail=f"Error fetching market overview: {str(e)}")
 
 @router.get("/trending", response_model=List[Dict[str, Any]])
+@market_cache
 async def get_trending_coins(
     limit: int = Query(20, description="Number of items to return")
 ):
@@ -158,6 +204,7 @@ async def get_trending_coins(
         raise HTTPException(status_code=500, detail=f"Error fetching trending coins: {str(e)}")
 
 @router.get("/search", response_model=List[Dict[str, Any]])
+@market_cache
 async def search_coins(
     query: str = Query(..., description="Search query"),
     limit: int = Query(20, description="Number of items to return")
@@ -375,17 +422,13 @@ async def get_technical_indicators(
         else:
             indicator_list = [ind.strip().upper() for ind in indicators.split(",")]
         
-        # Load market data to validate symbol
-        market_data = load_mock_data(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "market_data.json"))
-        
-        # Find the specific cryptocurrency
-        crypto_data = next(
-            (p for p in market_data.get("prices", []) if p.get("symbol", "").upper() == symbol),
-            None
-        )
+        # Validate the symbol against the memory-mapped market snapshot
+        snapshot = load_snapshot(get_market_service().market_data_file)
+        column = snapshot.index.get(symbol)
         
-        if not crypto_data:
+        if column is None:
             raise HTTPException(status_code=404, detail=f"Data for {symbol} not found")
+        crypto_data = {"priceUsd": float(snapshot.prices[column])}
         
         # Generate mock indicator data
         result = []
@@ -574,4 +617,74 @@ async def get_top_coins(
         raise HTTPException(
             status_code=503, 
             detail=f"Error fetching market data: {str(e)}. Please try again later."
-        ) 
\ No newline at end of file
+        ) 
+@router.get("/golden-cross", response_model=Dict[str, Any])
+@cache_control(golden_cross_version, max_age=300, stale_while_revalidate=3600)
+async def get_golden_cross_screen(
+    status: Optional[str] = Query(None, description="Filter by status (golden_cross, death_cross, approaching, above, below)"),
+    limit: int = Query(20, ge=1, le=500, description="Number of coins to return"),
+    refresh: bool = Query(False, description="Run a new screen instead of returning the last one")
+):
+    """
+    Coins ranked by golden cross state, approaching crosses first
+    """
+    try:
+        if status and status not in GOLDEN_CROSS_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+        
+        # The screen normally runs on the scheduler; run it here on first use
+        if refresh or golden_cross_screener.checked_at is None:
+            await asyncio.to_thread(golden_cross_screener.run)
+        
+        return {
+            "checked_at": golden_cross_screener.checked_at.isoformat(),
+            "short_period": golden_cross_screener.short_period,
+            "long_period": golden_cross_screener.long_period,
+            "coins": golden_cross_screener.ranked(status, limit)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error running golden cross screen: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error running golden cross screen: {str(e)}")
+
+@router.post("/alerts", response_model=MarketAlert)
+async def create_alert(
+    alert: Dict[str, Any] = Body(..., description="Alert with user_id, symbol, alert_type and value")
+):
+    """
+    Create a price or signal alert
+    """
+    try:
+        record = await asyncio.to_thread(alert_service.create_alert, alert)
+        return MarketAlert(**record)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid alert: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error creating alert: {e}")
+        raise HTTPException(status_code=500, detail=f"Error creating alert: {str(e)}")
+
+@router.get("/alerts", response_model=List[MarketAlert])
+async def get_alerts(
+    user_id: str = Query(..., description="User ID"),
+    include_triggered: bool = Query(True, description="Include alerts that already fired")
+):
+    """
+    Get a user's alerts
+    """
+    try:
+        records = await asyncio.to_thread(alert_service.store.list_for_user, user_id, include_triggered)
+        return [MarketAlert(**record) for record in records]
+    except Exception as e:
+        logger.error(f"Error fetching alerts: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching alerts: {str(e)}")
+
+@router.delete("/alerts/{alert_id}", response_model=Dict[str, Any])
+async def delete_alert(alert_id: str = Path(..., description="Alert ID")):
+    """
+    Delete an alert
+    """
+    deleted = await asyncio.to_thread(alert_service.delete_alert, alert_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
+    return {"id": alert_id, "deleted": True}
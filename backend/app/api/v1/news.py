@@ -1,21 +1,27 @@
 """
 News API endpoints
 """
-from fastapi import APIRouter, Query, HTTPException, Depends, Path # type: ignore
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, Query, HTTPException, Depends, Path, Request # type: ignore
+from typing import List, Optional, Dict, Any, Callable, Mapping, Tuple
 import os
 import json
 import logging
 import random
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from app.models.news import (
     CryptoNewsItem, MacroNewsItem, NewsResponse, 
     CryptoNewsResponse, MacroNewsResponse, SocialMediaPost, SocialMediaResponse, RedditPost, TwitterPost
 )
 from app.services.news import crypto_news_service, macro_news_service, reddit_service, twitter_service
+from app.services.news.crypto_news_service import mentions_asset
+from app.services.news.snapshot import article_key
+from app.services.portfolio.ledgers import user_positions
 from app.core.logging import get_logger
+from app.core.http_cache import cache_control
+from app.core.pagination import MAX_PAGE_SIZE, Key, KeysetIndex, decode_cursor, encode_cursor
+from app.core.responses import payload_cache, payload_response
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -23,6 +29,24 @@ logger = get_logger(__name__)
 # Create router
 router = APIRouter(prefix="/news", tags=["News"])
 
+def crypto_news_version(params: Mapping[str, Any]) -> str:
+    """Stamp of the crypto news snapshot, for HTTP validators"""
+    return crypto_news_service.snapshot.stamp
+
+def macro_news_version(params: Mapping[str, Any]) -> str:
+    """Stamp of the macro news snapshot, for HTTP validators"""
+    return macro_news_service.snapshot.stamp
+
+def latest_news_version(params: Mapping[str, Any]) -> str:
+    """Combined stamp of every store /latest reads from"""
+    reddit = reddit_service.snapshot
+    reddit_updated = reddit.updated_at.timestamp() if reddit.updated_at else 0
+    return f"{crypto_news_service.snapshot.stamp}/{macro_news_service.snapshot.stamp}/{reddit.version}-{reddit_updated:.6f}"
+
+# News refreshes run every 10-30 minutes
+crypto_news_cache = cache_control(crypto_news_version, max_age=60, stale_while_revalidate=540)
+macro_news_cache = cache_control(macro_news_version, max_age=60, stale_while_revalidate=840)
+
 # Helper to load mock data when needed
 def load_mock_data(filename):
     try:
@@ -36,87 +60,164 @@ def load_mock_data(filename):
         return []
 
 @router.get("/crypto", response_model=CryptoNewsResponse)
+@crypto_news_cache
 async def get_crypto_news(
-    limit: int = Query(20, description="Number of news items to return"),
-    page: int = Query(1, description="Page number"),
+    request: Request,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Number of news items to return"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     query: Optional[str] = Query(None, description="Filter by keyword"),
     sentiment: Optional[str] = Query(None, description="Filter by sentiment"),
     symbol: Optional[str] = Query(None, description="Filter by related coin")
 ):
     """
     Get cryptocurrency news items
+
+    Pages are keyed by publication time and article id: pass a response's
+    next_cursor as cursor to get the following page. Unlike page numbers,
+    cursors stay stable while new articles arrive.
     """
     try:
-        logger.info(f"Fetching crypto news: limit={limit}, page={page}, query={query}, sentiment={sentiment}, symbol={symbol}")
-        
-        # Get news from the service
-        news_data = crypto_news_service.get_news(limit=limit, filter_term=query)
-        
-        # Apply additional filters
-        if sentiment:
-            news_data = [
-                item for item in news_data 
-                if item.get("sentiment") == sentiment.upper()
-            ]
-        
-        if symbol:
-            news_data = crypto_news_service.get_news_by_asset(symbol, limit=limit)
-        
-        # Calculate pagination
-        total_count = len(news_data)
-        start_idx = (page - 1) * limit
-        end_idx = min(start_idx + limit, total_count)
-        paginated_data = news_data[start_idx:end_idx]
-        
-        # Convert to Pydantic models
-        news_items = []
-        for item in paginated_data:
-            try:
-                news_items.append(CryptoNewsItem(
-                    id=item.get("id", f"crypto-{random.randint(1000, 9999)}"),
-                    title=item.get("title", ""),
-                    summary=item.get("summary", item.get("content", "")),
-                    source=item.get("source", ""),
-                    url=item.get("url", item.get("link", "https://example.com")),
-                    published_at=datetime.now(),  # RSS feed timestamp is already formatted
-                    timestamp=item.get("timestamp", datetime.now().strftime("%m/%d/%Y, %I:%M:%S %p")),
-                    sentiment=item.get("sentiment"),
-                    related_coins=item.get("relatedCoins", [])
-                ))
-            except Exception as e:
-                logger.error(f"Error converting news item: {e}")
+        logger.debug("Fetching crypto news: limit=%s, page=%s, cursor=%s, query=%s, sentiment=%s, symbol=%s",
+                     limit, page, cursor, query, sentiment, symbol)
+        after = _decode_cursor(cursor)
+        
+        # The unfiltered first page is what every client polls: encode it
+        # once per news snapshot and serve the bytes
+        if page == 1 and after is None and not (query or sentiment or symbol):
+            payload = payload_cache.get(
+                ("news.crypto", limit), crypto_news_service.snapshot.stamp,
+                lambda: _crypto_news_page(limit, page, query, sentiment, symbol)
+            )
+            return payload_response(request, payload)
         
-        return CryptoNewsResponse(
-            items=news_items,
-            total_count=total_count,
-            page=page,
-            page_size=limit
-        )
+        return _crypto_news_page(limit, page, query, sentiment, symbol, after)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching crypto news: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching crypto news: {str(e)}")
 
+def _decode_cursor(cursor: Optional[str]) -> Optional[Key]:
+    """Decode a cursor query parameter, rejecting malformed ones with 400"""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _article_filter(query: Optional[str], sentiment: Optional[str],
+                    symbol: Optional[str]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Predicate for the requested filters, or None if there are none"""
+    if not (query or sentiment or symbol):
+        return None
+    term = query.lower() if query else None
+    wanted = sentiment.upper() if sentiment else None
+
+    def matches(item: Dict[str, Any]) -> bool:
+        if term and not (term in item.get("title", "").lower() or
+                         term in item.get("content", "").lower() or
+                         term in item.get("summary", "").lower()):
+            return False
+        if wanted and item.get("sentiment") != wanted:
+            return False
+        return not symbol or mentions_asset(item, symbol)
+
+    return matches
+
+def _news_page(index: KeysetIndex, limit: int, page: int, after: Optional[Key],
+               predicate: Optional[Callable[[Dict[str, Any]], bool]]) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+    """
+    One page of articles from a snapshot's time-ordered index
+
+    Args:
+        index: Articles ordered newest first
+        limit: Page size
+        page: Page number, used when there is no cursor
+        after: Decoded cursor of the previous page
+        predicate: Only return articles it accepts
+
+    Returns:
+        Tuple of (articles, total matching count, next_cursor)
+    """
+    skip = 0 if after is not None else (page - 1) * limit
+    articles, next_key = index.page(limit, after=after, skip=skip, predicate=predicate)
+    return articles, index.count(predicate), encode_cursor(next_key) if next_key else None
+
+def _crypto_news_items(articles: List[Dict[str, Any]], source: str = "",
+                       related_coins: Optional[List[str]] = None) -> List[CryptoNewsItem]:
+    """Convert articles to CryptoNewsItem models, with defaults for missing fields"""
+    news_items = []
+    for item in articles:
+        try:
+            news_items.append(CryptoNewsItem(
+                id=item.get("id", f"crypto-{random.randint(1000, 9999)}"),
+                title=item.get("title", ""),
+                summary=item.get("summary", item.get("content", "")),
+                source=item.get("source", source),
+                url=item.get("url", item.get("link", "https://example.com")),
+                published_at=datetime.now(),  # RSS feed timestamp is already formatted
+                timestamp=item.get("timestamp", datetime.now().strftime("%m/%d/%Y, %I:%M:%S %p")),
+                sentiment=item.get("sentiment"),
+                related_coins=item.get("relatedCoins", related_coins or [])
+            ))
+        except Exception as e:
+            logger.error(f"Error converting news item: {e}")
+    return news_items
+
+def _crypto_news_page(limit: int, page: int, query: Optional[str], sentiment: Optional[str],
+                      symbol: Optional[str], after: Optional[Key] = None) -> CryptoNewsResponse:
+    """
+    Build one page of crypto news from the snapshot's time-ordered index
+
+    Args:
+        limit: Page size
+        page: Page number, used when there is no cursor
+        query: Keyword filter
+        sentiment: Sentiment filter
+        symbol: Asset filter
+        after: Decoded cursor of the previous page
+
+    Returns:
+        CryptoNewsResponse
+    """
+    paginated_data, total_count, next_cursor = _news_page(
+        crypto_news_service.snapshot.index, limit, page, after, _article_filter(query, sentiment, symbol)
+    )
+    return CryptoNewsResponse(
+        items=_crypto_news_items(paginated_data),
+        total_count=total_count,
+        page=page,
+        page_size=limit,
+        next_cursor=next_cursor
+    )
+
 @router.get("/macro", response_model=MacroNewsResponse)
+@macro_news_cache
 async def get_macro_news(
     category: str = Query("business", description="Economic news category"),
-    limit: int = Query(20, description="Number of news items to return"),
-    page: int = Query(1, description="Page number")
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Number of news items to return"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     Get macroeconomic news items
     """
     try:
-        logger.info(f"Fetching macro news: category={category}, limit={limit}, page={page}")
+        logger.info(f"Fetching macro news: category={category}, limit={limit}, page={page}, cursor={cursor}")
+        after = _decode_cursor(cursor)
         
-        # Get news from the service
-        news_data = macro_news_service.get_news(category=category, limit=limit)
+        # Last 24 hours, as before; keys start with the ISO publication time
+        cutoff = (datetime.now() - timedelta(hours=24)).isoformat()
         
-        # Calculate pagination
-        total_count = len(news_data)
-        start_idx = (page - 1) * limit
-        end_idx = min(start_idx + limit, total_count)
-        paginated_data = news_data[start_idx:end_idx]
+        def matches(item: Dict[str, Any]) -> bool:
+            return item.get("category") == category and article_key(item)[0] >= cutoff
+        
+        paginated_data, total_count, next_cursor = _news_page(
+            macro_news_service.snapshot.index, limit, page, after, matches
+        )
         
         # Convert to Pydantic models
         news_items = []
@@ -140,80 +241,72 @@ async def get_macro_news(
             items=news_items,
             total_count=total_count,
             page=page,
-            page_size=limit
+            page_size=limit,
+            next_cursor=next_cursor
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching macro news: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching macro news: {str(e)}")
 
 @router.get("/bitcoin", response_model=CryptoNewsResponse)
+@crypto_news_cache
 async def get_bitcoin_news(
-    limit: int = Query(20, description="Number of news items to return"),
-    page: int = Query(1, description="Page number")
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Number of news items to return"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     Get Bitcoin-specific news items
     """
     try:
-        logger.info(f"Fetching Bitcoin news: limit={limit}, page={page}")
+        logger.info(f"Fetching Bitcoin news: limit={limit}, page={page}, cursor={cursor}")
+        after = _decode_cursor(cursor)
         
         # Use dedicated Bitcoin news collection directly
-        bitcoin_news = crypto_news_service.bitcoin_news
+        snapshot = crypto_news_service.snapshot
         
-        if not bitcoin_news:
+        if not snapshot.subset("bitcoin"):
             # Fallback to filtering general crypto news if no dedicated Bitcoin news
             logger.info("No dedicated Bitcoin news found, falling back to filtered crypto news")
-            return await get_crypto_news(limit=limit, page=page, symbol="BTC")
-        
-        # Calculate pagination
-        total_count = len(bitcoin_news)
-        start_idx = (page - 1) * limit
-        end_idx = min(start_idx + limit, total_count)
-        paginated_data = bitcoin_news[start_idx:end_idx]
-        
-        # Convert to Pydantic models
-        news_items = []
-        for item in paginated_data:
-            try:
-                news_items.append(CryptoNewsItem(
-                    id=item.get("id", f"bitcoin-{random.randint(1000, 9999)}"),
-                    title=item.get("title", ""),
-                    summary=item.get("summary", item.get("content", "")),
-                    source=item.get("source", "Bitcoin News"),
-                    url=item.get("url", item.get("link", "https://example.com")),
-                    published_at=datetime.now(),
-                    timestamp=item.get("timestamp", datetime.now().strftime("%m/%d/%Y, %I:%M:%S %p")),
-                    sentiment=item.get("sentiment"),
-                    related_coins=item.get("relatedCoins", ["BTC"])
-                ))
-            except Exception as e:
-                logger.error(f"Error converting Bitcoin news item: {e}")
+            return _crypto_news_page(limit, page, None, None, "BTC", after)
         
+        paginated_data, total_count, next_cursor = _news_page(
+            snapshot.subset_index("bitcoin"), limit, page, after, None
+        )
         return CryptoNewsResponse(
-            items=news_items,
+            items=_crypto_news_items(paginated_data, source="Bitcoin News", related_coins=["BTC"]),
             total_count=total_count,
             page=page,
-            page_size=limit
+            page_size=limit,
+            next_cursor=next_cursor
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching Bitcoin news: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching Bitcoin news: {str(e)}")
 
 @router.get("/asset/{symbol}", response_model=CryptoNewsResponse)
+@crypto_news_cache
 async def get_asset_news(
     symbol: str = Path(..., description="Asset symbol"),
-    limit: int = Query(20, description="Number of news items to return"),
-    page: int = Query(1, description="Page number")
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Number of news items to return"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     Get news for a specific asset
     """
     try:
-        # Use the symbol filter on the crypto news endpoint
-        return await get_crypto_news(limit=limit, page=page, symbol=symbol)
+        # Same as the crypto news endpoint with a symbol filter
+        return _crypto_news_page(limit, page, None, None, symbol, _decode_cursor(cursor))
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching asset news for {symbol}: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching asset news: {str(e)}")
@@ -360,8 +453,8 @@ async def get_portfolio_news(
     Get news related to the user's portfolio holdings
     """
     try:
-        # Load portfolio holdings from file
-        portfolio_data = load_mock_data(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "user_portfolio_holdings.json"))
+        # Open positions from the user's ledger
+        portfolio_data = user_positions(user_id or "user123")
         
         # Get the symbols from the portfolio
         portfolio_symbols = []
@@ -444,144 +537,114 @@ async def get_watchlist_news(
         
         # For now, just return crypto news as we don't have a separate watchlist news service yet
         # In the future, we would want to filter crypto news specifically for watchlist tokens
-        return await get_crypto_news(limit=limit, page=page)
+        return _crypto_news_page(limit, page, None, None, None)
     
     except Exception as e:
         logger.error(f"Error fetching watchlist news: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching watchlist news: {str(e)}")
 
 @router.get("/rwa", response_model=CryptoNewsResponse)
+@crypto_news_cache
 async def get_rwa_news(
-    limit: int = Query(20, description="Number of news items to return"),
-    page: int = Query(1, description="Page number")
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Number of news items to return"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     Get Real World Asset (RWA) news
     """
     try:
-        logger.info(f"Fetching RWA news: limit={limit}, page={page}")
+        logger.info(f"Fetching RWA news: limit={limit}, page={page}, cursor={cursor}")
+        after = _decode_cursor(cursor)
         
         # Filter crypto news for RWA-related terms
         rwa_terms = ["real world asset", "rwa", "tokenized real estate", "tokenized asset"]
         
-        # Get all crypto news first
-        all_news = crypto_news_service.get_news(limit=100)
-        
-        # Filter for RWA-related news
-        rwa_news = []
-        for item in all_news:
+        def matches(item: Dict[str, Any]) -> bool:
             title_lower = item.get('title', '').lower()
             content_lower = item.get('content', '').lower()
-            
-            if any(term in title_lower or term in content_lower for term in rwa_terms):
-                item['relatedCoins'] = ['RWA']  # Add RWA tag
-                rwa_news.append(item)
+            return any(term in title_lower or term in content_lower for term in rwa_terms)
         
-        # Calculate pagination
-        total_count = len(rwa_news)
-        start_idx = (page - 1) * limit
-        end_idx = min(start_idx + limit, total_count)
-        paginated_data = rwa_news[start_idx:end_idx]
+        paginated_data, total_count, next_cursor = _news_page(
+            crypto_news_service.snapshot.index, limit, page, after, matches
+        )
         
-        # Convert to Pydantic models
-        news_items = []
-        for item in paginated_data:
-            try:
-                news_items.append(CryptoNewsItem(
-                    id=item.get("id", f"rwa-{random.randint(1000, 9999)}"),
-                    title=item.get("title", ""),
-                    summary=item.get("summary", item.get("content", "")),
-                    source=item.get("source", ""),
-                    url=item.get("url", item.get("link", "https://example.com")),
-                    published_at=datetime.now(),
-                    timestamp=item.get("timestamp", datetime.now().strftime("%m/%d/%Y, %I:%M:%S %p")),
-                    sentiment=item.get("sentiment"),
-                    related_coins=item.get("relatedCoins", ["RWA"])
-                ))
-            except Exception as e:
-                logger.error(f"Error converting RWA news item: {e}")
+        # Snapshot articles are read-only: tag the response items, not the articles
+        news_items = _crypto_news_items(paginated_data)
+        for item in news_items:
+            item.related_coins = ["RWA"]
         
         return CryptoNewsResponse(
             items=news_items,
             total_count=total_count,
             page=page,
-            page_size=limit
+            page_size=limit,
+            next_cursor=next_cursor
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching RWA news: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching RWA news: {str(e)}")
 
 @router.get("/messari", response_model=CryptoNewsResponse)
+@crypto_news_cache
 async def get_messari_news(
-    limit: int = Query(20, description="Number of news items to return"),
-    page: int = Query(1, description="Page number")
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Number of news items to return"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     Get Messari research news
     """
     try:
-        logger.info(f"Fetching Messari news: limit={limit}, page={page}")
+        logger.info(f"Fetching Messari news: limit={limit}, page={page}, cursor={cursor}")
+        after = _decode_cursor(cursor)
         
         # Use dedicated Messari news collection directly
-        messari_news = crypto_news_service.messari_news
+        snapshot = crypto_news_service.snapshot
         
-        if not messari_news:
+        if snapshot.subset("messari"):
+            paginated_data, total_count, next_cursor = _news_page(
+                snapshot.subset_index("messari"), limit, page, after, None
+            )
+            news_items = _crypto_news_items(paginated_data, source="Messari Research")
+        else:
             # Fallback to filtering general crypto news for Messari-related content
             logger.info("No dedicated Messari news found, falling back to filtered crypto news")
-            # Filter crypto news for Messari-related content
             messari_terms = ["messari", "research report", "crypto research"]
             
-            # Get all crypto news first
-            all_news = crypto_news_service.get_news(limit=100)
-            
-            # Filter for Messari-related news
-            messari_news = []
-            for item in all_news:
+            def matches(item: Dict[str, Any]) -> bool:
                 source_lower = item.get('source', '').lower()
                 title_lower = item.get('title', '').lower()
                 content_lower = item.get('content', '').lower()
-                
-                if "messari" in source_lower or any(term in title_lower or term in content_lower for term in messari_terms):
-                    item['source'] = "Messari Research" if "messari" in source_lower else item.get('source', '')
-                    messari_news.append(item)
-        
-        # Calculate pagination
-        total_count = len(messari_news)
-        start_idx = (page - 1) * limit
-        end_idx = min(start_idx + limit, total_count)
-        paginated_data = messari_news[start_idx:end_idx]
-        
-        # Convert to Pydantic models
-        news_items = []
-        for item in paginated_data:
-            try:
-                news_items.append(CryptoNewsItem(
-                    id=item.get("id", f"messari-{random.randint(1000, 9999)}"),
-                    title=item.get("title", ""),
-                    summary=item.get("summary", item.get("content", "")),
-                    source=item.get("source", "Messari Research"),
-                    url=item.get("url", item.get("link", "https://example.com")),
-                    published_at=datetime.now(),
-                    timestamp=item.get("timestamp", datetime.now().strftime("%m/%d/%Y, %I:%M:%S %p")),
-                    sentiment=item.get("sentiment"),
-                    related_coins=item.get("relatedCoins", [])
-                ))
-            except Exception as e:
-                logger.error(f"Error converting Messari news item: {e}")
+                return "messari" in source_lower or any(term in title_lower or term in content_lower for term in messari_terms)
+            
+            paginated_data, total_count, next_cursor = _news_page(
+                snapshot.index, limit, page, after, matches
+            )
+            news_items = _crypto_news_items(paginated_data, source="Messari Research")
+            for item in news_items:
+                if "messari" in item.source.lower():
+                    item.source = "Messari Research"
         
         return CryptoNewsResponse(
             items=news_items,
             total_count=total_count,
             page=page,
-            page_size=limit
+            page_size=limit,
+            next_cursor=next_cursor
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching Messari news: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching Messari news: {str(e)}")
 
 @router.get("/latest", response_model=Dict[str, Any])
+@cache_control(latest_news_version, max_age=60, stale_while_revalidate=540)
 async def get_latest_news(
     limit: int = Query(5, description="Number of news items to return per category")
 ):
@@ -740,24 +803,3 @@ async def get_user_tweets(
     except Exception as e:
         logger.error(f"Error fetching tweets from @{handle}: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching tweets: {str(e)}")
-
-@router.on_event("startup")
-async def start_news_services():
-    """Start news services when API starts"""
-    try:
-        logger.info("Starting news services")
-        
-        # Start the crypto news service update thread
-        if not crypto_news_service.is_running():
-            crypto_news_service.start_update_thread()
-        
-        # Start the macro news service update thread
-        if not macro_news_service.is_running():
-            macro_news_service.start_update_thread()
-        
-        # Start the reddit service update thread
-        if not reddit_service.is_running():
-            reddit_service.start_update_thread()
-            
-    except Exception as e:
-        logger.error(f"Error starting news services: {e}") 
\ No newline at end of file
@@ -1,15 +1,24 @@
 """
 Portfolio API endpoints
 """
-from fastapi import APIRouter, Query, HTTPException, Depends, Path, Body
-from typing import List, Optional, Dict, Any
-import json
+from fastapi import APIRouter, Query, HTTPException, Depends, Path, Body, Response
+from typing import List, Optional, Dict, Any, Mapping
+import asyncio
 import os
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 from app.models.portfolio import Portfolio, CryptoAsset, Transaction, Watchlist
+from app.services.portfolio.ledgers import find_ledger, get_ledger, is_valid_user_id, loaded_ledgers, user_positions
+from app.services.portfolio.valuation import MarketSnapshot, PositionBatch, load_snapshot, value_batch, value_positions
+from app.services.portfolio.risk_service import risk_service
+from app.services.portfolio.sync import ExchangeSyncSource, SyncEngine, WalletSyncSource
+from app.services.portfolio.var import DEFAULT_PATHS
+from app.services.realtime import push_hub, portfolio_topic
+from app.core.http_cache import cache_control
 from app.core.logging import get_logger
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.persistence import load_json, save_json
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -17,13 +26,22 @@ logger = get_logger(__name__)
 # Create router
 router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
 
+def checked_user_id(user_id: str) -> str:
+    """Reject user IDs that cannot name a ledger with 400"""
+    if not is_valid_user_id(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+    return user_id
+
+def user_id_param(user_id: str = Query("user123", description="User ID")) -> str:
+    """The validated user_id query parameter"""
+    return checked_user_id(user_id)
+
 # Helper to load mock data
 def load_mock_data(filename):
     try:
         if os.path.exists(filename):
             logger.info(f"Loading data from {filename}")
-            with open(filename, 'r') as f:
-                return json.load(f)
+            return load_json(filename, [])
         # Return empty list if file doesn't exist
         logger.warning(f"File not found: {filename}")
         return []
@@ -33,87 +51,90 @@ def load_mock_data(filename):
 
 def save_mock_data(filename, data):
     try:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
         logger.info(f"Saving data to {filename}")
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
-        return True
+        return save_json(filename, data, indent=2)
     except Exception as e:
         logger.error(f"Error saving mock data to {filename}: {e}")
         return False
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+MARKET_DATA_FILE = os.path.join(BACKEND_DIR, "data", "market_data.json")
+
+def ledger_version(params: Mapping[str, Any]) -> int:
+    """Version of the requested user's ledger, for HTTP validators"""
+    ledger = find_ledger(params["user_id"])
+    return ledger.version if ledger is not None else 0
+
+def valuation_version(params: Mapping[str, Any]):
+    """Ledger and market data versions a valuation depends on"""
+    return ledger_version(params), load_snapshot(MARKET_DATA_FILE).version
+
+# Largest transaction page; deeper history is read with cursors
+MAX_TRANSACTION_PAGE_SIZE = 500
+
+# Portfolio responses are per user and revalidated on every poll
+ledger_cache = cache_control(ledger_version, private=True)
+valuation_cache = cache_control(valuation_version, private=True)
+
+def build_portfolio(user_id: str) -> Portfolio:
+    """
+    Value a user's current positions against the cached market snapshot
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        Portfolio
+    """
+    # Current positions are maintained incrementally by the ledger
+    positions = user_positions(user_id)
+    
+    # Value the whole portfolio in one pass against the cached market snapshot
+    valuation = value_positions(positions, load_snapshot(MARKET_DATA_FILE))
+    now = datetime.now()
+    
+    assets = [
+        CryptoAsset(
+            symbol=row["symbol"],
+            name=row["name"],
+            quantity=row["quantity"],
+            price_usd=row["price_usd"],
+            value_usd=row["value_usd"],
+            allocation_percentage=row["allocation_percentage"],
+            cost_basis_usd=row["cost_basis_usd"],
+            unrealized_pnl_usd=row["unrealized_pnl_usd"],
+            realized_pnl_usd=row["realized_pnl_usd"],
+            change_24h_usd=row["change_24h_usd"],
+            change_7d_usd=row["change_7d_usd"],
+            change_30d_usd=row["change_30d_usd"],
+            last_updated=now
+        )
+        for row in valuation["positions"]
+    ]
+    
+    return Portfolio(
+        user_id=user_id,
+        assets=assets,
+        total_value_usd=valuation["total_value_usd"],
+        total_cost_usd=valuation["total_cost_usd"],
+        unrealized_pnl_usd=valuation["unrealized_pnl_usd"],
+        realized_pnl_usd=valuation["realized_pnl_usd"],
+        change_24h_pct=valuation["change_24h_pct"],
+        change_7d_pct=valuation["change_7d_pct"],
+        change_30d_pct=valuation["change_30d_pct"],
+        last_updated=now
+    )
+
 @router.get("/holdings", response_model=Portfolio)
+@valuation_cache
 async def get_portfolio_holdings(
-    user_id: str = Query("user123", description="User ID")
+    user_id: str = Depends(user_id_param)
 ):
     """
     Get portfolio holdings for a user
     """
     try:
-        # Load portfolio data from file - using the correct location
-        holdings_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data", "portfolio", "user_portfolio_holdings.json")
-        logger.info(f"Reading portfolio from {holdings_file}")
-        holdings_data = load_mock_data(holdings_file)
-        
-        # Load market data to get current prices
-        market_data_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data", "market_data.json")
-        logger.info(f"Reading market data from {market_data_file}")
-        market_data = load_mock_data(market_data_file)
-        
-        # Create a dictionary for quick price lookups
-        price_lookup = {}
-        # First use prices from market data
-        if market_data and "prices" in market_data:
-            for price in market_data["prices"]:
-                if "symbol" in price and "priceUsd" in price:
-                    price_lookup[price["symbol"].upper()] = price["priceUsd"]
-                    logger.info(f"Market price for {price['symbol']}: ${price['priceUsd']}")
-        
-        # Then use prices from holdings as fallback
-        for holding in holdings_data:
-            if "symbol" in holding and "price_usd" in holding:
-                symbol = holding["symbol"].upper()
-                if symbol not in price_lookup:
-                    price_lookup[symbol] = holding["price_usd"]
-                    logger.info(f"Holding price for {symbol}: ${holding['price_usd']}")
-        
-        # Convert to Pydantic models
-        assets = []
-        total_value = 0.0
-        
-        for holding in holdings_data:
-            symbol = holding.get("symbol", "").upper()
-            quantity = holding.get("quantity", 0.0)
-            
-            # Get current price for the asset
-            current_price = price_lookup.get(symbol, holding.get("price_usd", 0.0))
-            
-            # Calculate current value
-            value = quantity * current_price
-            total_value += value
-            
-            assets.append(CryptoAsset(
-                symbol=symbol,
-                name=holding.get("name", ""),
-                quantity=quantity,
-                price_usd=current_price,
-                value_usd=value,
-                last_updated=datetime.now()
-            ))
-        
-        # Calculate allocation percentages
-        if total_value > 0:
-            for asset in assets:
-                asset.allocation_percentage = (asset.value_usd / total_value) * 100
-        
-        return Portfolio(
-            user_id=user_id,
-            assets=assets,
-            total_value_usd=total_value,
-            last_updated=datetime.now()
-        )
+        return build_portfolio(user_id)
     
     except Exception as e:
         logger.error(f"Error fetching portfolio holdings: {e}")
@@ -127,114 +148,61 @@ async def add_transaction(
     Add a new transaction to the user's history
     """
     try:
-        # Load existing transactions
-        transactions_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "transaction_history.json")
-        transactions = load_mock_data(transactions_file)
-        
-        # Create new transaction
-        new_transaction = transaction.dict()
-        
-        # Generate ID if not provided
-        if not new_transaction.get("id"):
-            new_transaction["id"] = str(uuid.uuid4())
-        
-        # Add timestamp if not provided
-        if not new_transaction.get("timestamp"):
-            new_transaction["timestamp"] = datetime.now().isoformat()
+        ledger = get_ledger(checked_user_id(transaction.user_id))
         
-        # Add to transactions list
-        transactions.append(new_transaction)
+        if transaction.transaction_type == "sell" and ledger.get_position(transaction.symbol) is None:
+            # Cannot sell what you don't have
+            logger.warning(f"Attempted to sell {transaction.symbol.upper()} but no holdings found")
         
-        # Save transactions
-        save_mock_data(transactions_file, transactions)
+        # Append to the ledger; the position update is O(1) regardless of history size
+        entry = ledger.append(transaction.dict())
+        transaction.id = entry["id"]
         
-        # Update holdings
-        await update_holdings(transaction)
+        if push_hub.has_subscribers(portfolio_topic(transaction.user_id)):
+            publish_valuations([transaction.user_id])
         
         return transaction
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error adding transaction: {e}")
         raise HTTPException(status_code=500, detail=f"Error adding transaction: {str(e)}")
 
-async def update_holdings(transaction: Transaction):
-    """Update holdings based on a transaction"""
-    try:
-        # Load holdings
-        holdings_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data", "portfolio", "user_portfolio_holdings.json")
-        holdings = load_mock_data(holdings_file)
-        
-        # Find existing holding for this symbol
-        symbol = transaction.symbol.upper()
-        holding_idx = next((i for i, h in enumerate(holdings) if h.get("symbol", "").upper() == symbol), None)
-        
-        if transaction.transaction_type.lower() == "buy":
-            if holding_idx is not None:
-                # Update existing holding
-                current_qty = holdings[holding_idx].get("quantity", 0.0)
-                holdings[holding_idx]["quantity"] = current_qty + transaction.quantity
-                holdings[holding_idx]["last_updated"] = datetime.now().isoformat()
-            else:
-                # Add new holding
-                holdings.append({
-                    "symbol": symbol,
-                    "name": transaction.name or symbol,
-                    "quantity": transaction.quantity,
-                    "price_usd": transaction.price_usd,
-                    "last_updated": datetime.now().isoformat()
-                })
-        elif transaction.transaction_type.lower() == "sell":
-            if holding_idx is not None:
-                # Update existing holding
-                current_qty = holdings[holding_idx].get("quantity", 0.0)
-                new_qty = current_qty - transaction.quantity
-                
-                if new_qty <= 0:
-                    # Remove holding if quantity is zero or negative
-                    holdings.pop(holding_idx)
-                else:
-                    # Update quantity
-                    holdings[holding_idx]["quantity"] = new_qty
-                    holdings[holding_idx]["last_updated"] = datetime.now().isoformat()
-            else:
-                # Cannot sell what you don't have
-                logger.warning(f"Attempted to sell {symbol} but no holdings found")
-        
-        # Save updated holdings
-        save_mock_data(holdings_file, holdings)
-    
-    except Exception as e:
-        logger.error(f"Error updating holdings: {e}")
-        raise
-
 @router.get("/transactions", response_model=List[Transaction])
+@ledger_cache
 async def get_transactions(
-    user_id: str = Query("user123", description="User ID"),
+    response: Response,
+    user_id: str = Depends(user_id_param),
     symbol: Optional[str] = Query(None, description="Filter by symbol"),
-    limit: int = Query(50, description="Number of transactions to return"),
-    offset: int = Query(0, description="Offset for pagination")
+    limit: int = Query(50, ge=1, le=MAX_TRANSACTION_PAGE_SIZE, description="Number of transactions to return"),
+    offset: int = Query(0, ge=0, description="Offset for pagination (ignored when a cursor is given)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page")
 ):
     """
-    Get transaction history for a user
+    Get transaction history for a user, newest first
+
+    When more transactions follow, the X-Next-Cursor response header holds
+    the cursor of the next page.
     """
     try:
-        # Load transactions
-        transactions_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "transaction_history.json")
-        transactions = load_mock_data(transactions_file)
-        
-        # Filter by user ID
-        transactions = [t for t in transactions if t.get("user_id") == user_id]
-        
-        # Filter by symbol if provided
-        if symbol:
-            symbol = symbol.upper()
-            transactions = [t for t in transactions if t.get("symbol", "").upper() == symbol]
-        
-        # Sort by timestamp (newest first)
-        transactions.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        
-        # Apply pagination
-        transactions = transactions[offset:offset + limit]
+        after = None
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        ledger = find_ledger(user_id)
+        if ledger is None:
+            return []
+        
+        # Read only this page's entries, located through the ledger index
+        transactions, next_key = ledger.page(
+            limit, after=after, symbol=symbol, skip=0 if after is not None else offset
+        )
+        if next_key:
+            response.headers["X-Next-Cursor"] = encode_cursor(next_key)
         
         # Convert to Pydantic models
         result = []
@@ -264,10 +232,204 @@ async def get_transactions(
         
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching transactions: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching transactions: {str(e)}")
 
+def revalue_portfolios(user_ids: Optional[List[str]] = None,
+                       snapshot: Optional[MarketSnapshot] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Revalue portfolios against the current market snapshot
+
+    All users' positions are valued together in one vectorized batch, so this
+    is cheap enough to run on every market data update.
+
+    Args:
+        user_ids: Users to revalue (default: every loaded portfolio)
+        snapshot: Market snapshot (default: the cached market data file)
+    """
+    if user_ids is None:
+        ledgers = loaded_ledgers()
+    else:
+        # Users without a ledger have nothing to value
+        ledgers = {user_id: find_ledger(user_id) for user_id in user_ids}
+        ledgers = {user_id: ledger for user_id, ledger in ledgers.items() if ledger is not None}
+    batch = PositionBatch.build(
+        {user_id: ledger.get_positions() for user_id, ledger in ledgers.items()},
+        snapshot if snapshot is not None else load_snapshot(MARKET_DATA_FILE)
+    )
+    result = value_batch(batch)
+    return {
+        user_id: {
+            "total_value_usd": float(result["total_value"][row]),
+            "total_cost_usd": float(result["total_cost"][row]),
+            "unrealized_pnl_usd": float(result["total_unrealized_pnl"][row]),
+            "realized_pnl_usd": float(result["total_realized_pnl"][row]),
+            "change_24h_pct": float(result["total_change_24h_pct"][row])
+        }
+        for row, user_id in enumerate(batch.owners)
+    }
+
+def publish_valuations(user_ids: Optional[List[str]] = None, snapshot: Optional[MarketSnapshot] = None) -> int:
+    """
+    Push changed valuations to subscribers of the users' portfolio topics
+
+    Args:
+        user_ids: Users to publish (default: every user with subscribers)
+        snapshot: Market snapshot (default: the cached market data file)
+
+    Returns:
+        Number of valuations published
+    """
+    if user_ids is None:
+        user_ids = [topic.split(":", 1)[1] for topic in push_hub.subscribed_topics("portfolio:")]
+    if not user_ids:
+        return 0
+    published = 0
+    for user_id, totals in revalue_portfolios(user_ids, snapshot).items():
+        topic = push_hub.topics.get(portfolio_topic(user_id))
+        if topic is not None and topic.state == totals:
+            continue
+        push_hub.publish(portfolio_topic(user_id), totals)
+        published += 1
+    return published
+
+async def on_market_update(market_data: Dict[str, Any]):
+    """MarketDataService update listener that pushes new portfolio valuations"""
+    publish_valuations(snapshot=MarketSnapshot.from_market_data(market_data))
+
+@router.get("/valuations", response_model=Dict[str, Dict[str, float]])
+async def get_portfolio_valuations():
+    """
+    Get current totals for all loaded portfolios
+    """
+    try:
+        return revalue_portfolios()
+    except Exception as e:
+        logger.error(f"Error revaluing portfolios: {e}")
+        raise HTTPException(status_code=500, detail=f"Error revaluing portfolios: {str(e)}")
+
+@router.get("/risk", response_model=Dict[str, Any])
+@valuation_cache
+async def get_portfolio_risk(
+    user_id: str = Depends(user_id_param),
+    paths: int = Query(DEFAULT_PATHS, ge=1000, le=1_000_000, description="Monte Carlo paths per horizon"),
+    seed: Optional[int] = Query(None, description="Seed for reproducible simulations")
+):
+    """
+    Get risk metrics, VaR and CVaR (95/99%, 1d/7d) for a user's portfolio
+    """
+    try:
+        positions = user_positions(user_id)
+        snapshot = load_snapshot(MARKET_DATA_FILE)
+        # Simulation is CPU bound; keep it off the event loop
+        metrics = await asyncio.to_thread(risk_service.assess_positions, positions, snapshot)
+        var = await asyncio.to_thread(risk_service.value_at_risk, positions, snapshot, paths, seed=seed)
+        return {
+            "user_id": user_id,
+            "metrics": metrics,
+            "value_at_risk": var
+        }
+    except Exception as e:
+        logger.error(f"Error calculating portfolio risk: {e}")
+        raise HTTPException(status_code=500, detail=f"Error calculating portfolio risk: {str(e)}")
+
+@router.get("/ledger/check", response_model=Dict[str, Any])
+async def check_ledger_consistency(
+    user_id: str = Depends(user_id_param)
+):
+    """
+    Verify the incrementally maintained positions against a full ledger replay
+    """
+    try:
+        ledger = find_ledger(user_id)
+        if ledger is None:
+            raise HTTPException(status_code=404, detail=f"No ledger for user {user_id}")
+        return ledger.check_consistency()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error checking ledger consistency: {e}")
+        raise HTTPException(status_code=500, detail=f"Error checking ledger consistency: {str(e)}")
+
+# Exchange/wallet sync engines, one per user, created on first use
+_sync_engines: Dict[str, SyncEngine] = {}
+_sync_sources: Optional[Dict[str, Any]] = None
+
+def _market_price(symbol: str) -> float:
+    """USD price from the cached market snapshot (0 if unknown)"""
+    snapshot = load_snapshot(MARKET_DATA_FILE)
+    column = snapshot.index.get(symbol.upper())
+    return float(snapshot.prices[column]) if column is not None else 0.0
+
+def get_sync_sources() -> Dict[str, Any]:
+    """Configured sync sources: exchanges with API keys and wallets with an RPC endpoint"""
+    global _sync_sources
+    if _sync_sources is None:
+        from app.services.exchanges.binance import BinanceService
+        from app.services.exchanges.coinbase import CoinbaseService
+        from app.services.blockchain.eth import EthereumService
+        
+        _sync_sources = {}
+        for name, service in (("binance", BinanceService()), ("coinbase", CoinbaseService())):
+            if service.has_credentials:
+                _sync_sources[name] = ExchangeSyncSource(service, _market_price)
+        if os.getenv("ETH_WALLET_ADDRESSES"):
+            wallets = EthereumService()
+            # Wallet transfers come from the on-chain transfer index only
+            if wallets.scanner is not None:
+                _sync_sources["ethereum"] = WalletSyncSource(wallets, _market_price)
+            else:
+                logger.warning("ETH_WALLET_ADDRESSES is set but ETHEREUM_RPC_URL is not; wallet sync is disabled")
+    return _sync_sources
+
+def get_sync_engine(user_id: str) -> SyncEngine:
+    """Get or create the sync engine for a user's ledger"""
+    engine = _sync_engines.get(user_id)
+    if engine is None:
+        engine = _sync_engines[user_id] = SyncEngine(get_ledger(user_id), get_sync_sources(), user_id)
+    return engine
+
+@router.post("/sync", response_model=Dict[str, int])
+async def sync_portfolio(
+    user_id: str = Depends(user_id_param)
+):
+    """
+    Append new exchange trades and wallet transactions to the user's ledger
+    
+    Returns the number of new events per source (-1 if a source failed).
+    """
+    try:
+        counts = await get_sync_engine(user_id).sync_all()
+        if push_hub.has_subscribers(portfolio_topic(user_id)):
+            publish_valuations([user_id])
+        return counts
+    except Exception as e:
+        logger.error(f"Error syncing portfolio: {e}")
+        raise HTTPException(status_code=500, detail=f"Error syncing portfolio: {str(e)}")
+
+@router.get("/balances/history", response_model=List[Dict[str, Any]])
+@cache_control(lambda params: (ledger_version(params), date.today().isoformat()), private=True)
+async def get_balance_history(
+    user_id: str = Depends(user_id_param),
+    days: int = Query(30, ge=1, le=3650, description="Number of daily snapshots"),
+    source: Optional[str] = Query(None, description="Only include one source, e.g. binance or manual")
+):
+    """
+    Get daily end-of-day balances derived from the ledger
+    """
+    try:
+        if find_ledger(user_id) is None:
+            return []
+        engine = get_sync_engine(user_id)
+        engine.history.update(engine.ledger)
+        return engine.history.daily_balances(days, source=source)
+    except Exception as e:
+        logger.error(f"Error fetching balance history: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching balance history: {str(e)}")
+
 @router.get("/watchlist", response_model=Watchlist)
 async def get_watchlist(
     user_id: str = Query("user123", description="User ID")
@@ -326,7 +488,7 @@ async def update_watchlist(
 
 @router.get("", response_model=Dict[str, Any])
 async def get_complete_portfolio(
-    user_id: str = Query("user123", description="User ID")
+    user_id: str = Depends(user_id_param)
 ):
     """
     Get complete portfolio data including assets, total value, performance metrics
@@ -335,7 +497,7 @@ async def get_complete_portfolio(
         logger.info(f"Fetching complete portfolio data for user: {user_id}")
         
         # Get portfolio holdings
-        portfolio = await get_portfolio_holdings(user_id)
+        portfolio = build_portfolio(user_id)
         
         # Prepare asset data in the format expected by the frontend
         assets = []
@@ -467,63 +629,44 @@ async def update_portfolio_holdings(
     Update portfolio holdings (add, remove, or update assets)
     """
     try:
-        user_id = holdings_data.get("user_id", "user123")
+        user_id = checked_user_id(holdings_data.get("user_id", "user123"))
         assets = holdings_data.get("assets", [])
         
         if not assets:
             logger.warning("No assets provided for portfolio update")
             raise HTTPException(status_code=400, detail="No assets provided for update")
         
-        # Load existing holdings
-        holdings_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data", "portfolio", "user_portfolio_holdings.json")
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(holdings_file), exist_ok=True)
-        
-        # Load existing data
-        current_holdings = load_mock_data(holdings_file)
+        ledger = get_ledger(user_id)
         
-        # Update or add each asset
+        # Record each change as a deposit or withdrawal adjustment instead of rewriting the
+        # holdings file; a quantity edit is not a trade, so it must not realize P&L
         for asset in assets:
             symbol = asset.get("symbol", "").upper()
             if not symbol:
                 logger.warning("Asset missing symbol, skipping")
                 continue
-                
-            # Find existing asset
-            existing_index = next((i for i, h in enumerate(current_holdings) if h.get("symbol", "").upper() == symbol), None)
             
-            # Check if this is a delete operation
-            quantity = asset.get("quantity", 0)
-            if quantity == 0 and existing_index is not None:
-                # Remove the asset
-                logger.info(f"Removing asset {symbol} from portfolio")
-                current_holdings.pop(existing_index)
+            existing = ledger.get_position(symbol)
+            current_quantity = existing["quantity"] if existing else 0.0
+            delta = asset.get("quantity", 0) - current_quantity
+            if delta == 0:
                 continue
-                
-            # Prepare asset data
-            asset_data = {
-                "symbol": symbol,
-                "name": asset.get("name", symbol),
-                "quantity": quantity,
-                "price_usd": asset.get("price_usd", 0),
-                "last_updated": datetime.now().isoformat()
-            }
             
-            if existing_index is not None:
-                # Update existing asset
-                current_holdings[existing_index] = asset_data
-                logger.info(f"Updated asset {symbol} in portfolio")
-            else:
-                # Add new asset
-                current_holdings.append(asset_data)
-                logger.info(f"Added new asset {symbol} to portfolio")
-        
-        # Save updated holdings
-        save_mock_data(holdings_file, current_holdings)
+            # Added units enter at the given price, else the market price, not at zero cost
+            price = asset.get("price_usd") or _market_price(symbol)
+            ledger.append({
+                "user_id": user_id,
+                "symbol": symbol,
+                "name": asset.get("name"),
+                "transaction_type": "deposit" if delta > 0 else "withdrawal",
+                "quantity": abs(delta),
+                "price_usd": price,
+                "notes": "Holdings adjustment"
+            })
+            logger.info(f"Adjusted {symbol} in portfolio by {delta}")
         
         # Return updated portfolio
-        return await get_portfolio_holdings(user_id)
+        return build_portfolio(user_id)
     
     except HTTPException:
         raise
@@ -0,0 +1,164 @@
+"""
+Streaming API endpoints
+
+Clients subscribe to topics instead of polling:
+
+- "market": every coin; updates carry only the rows that changed
+- "market:<SYMBOL>": a single coin
+- "portfolio:<user_id>": a user's portfolio totals
+- "news:crypto", "news:macro": the latest articles; updates carry new articles
+
+Every frame is a JSON array of messages shaped like
+{"topic": ..., "type": "snapshot" | "delta", "version": ..., "data": ...}.
+"""
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect # type: ignore
+from fastapi.responses import StreamingResponse # type: ignore
+from typing import Any, Dict, List, Optional
+import asyncio
+
+from app.core.logging import get_logger
+from app.services.portfolio.ledgers import is_valid_user_id
+from app.services.portfolio.valuation import load_snapshot
+from app.services.realtime import Subscriber, frame, market_feed, push_hub
+from app.api.v1.portfolio import MARKET_DATA_FILE, publish_valuations
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Create router
+router = APIRouter(prefix="/stream", tags=["Streaming"])
+
+# Seconds a client may take to accept one frame before it is disconnected
+SEND_TIMEOUT = 10.0
+# Seconds between SSE keep-alive comments
+SSE_KEEPALIVE = 15.0
+
+TOPICS = ("market", "news:crypto", "news:macro")
+
+
+def parse_topics(topics: Optional[Any]) -> List[str]:
+    """
+    Parse a comma-separated string or list of topics, dropping unknown ones
+
+    Portfolio topics need a valid user ID; market symbols are checked
+    against the market snapshot on subscribe.
+    """
+    if not topics:
+        return []
+    if isinstance(topics, str):
+        topics = topics.split(",")
+    names = []
+    for name in topics:
+        name = str(name).strip()
+        if name.startswith("market:"):
+            name = name.upper().replace("MARKET:", "market:", 1)
+        if (name in TOPICS or (name.startswith("market:") and name.split(":", 1)[1])
+                or (name.startswith("portfolio:") and is_valid_user_id(name.split(":", 1)[1]))):
+            names.append(name)
+        else:
+            logger.warning(f"Ignoring unknown stream topic: {name}")
+    return names
+
+
+def subscribe(subscriber: Subscriber, topics: List[str]) -> List[str]:
+    """Subscribe to known topics and make sure market and portfolio topics have a state to send"""
+    if not market_feed.rows and any(name.startswith("market") for name in topics):
+        market_feed.publish(load_snapshot(MARKET_DATA_FILE))
+    unknown = [name for name in topics if name.startswith("market:") and name.split(":", 1)[1] not in market_feed.rows]
+    for name in unknown:
+        logger.warning(f"Ignoring stream topic for unknown symbol: {name}")
+    added = push_hub.subscribe(subscriber, [name for name in topics if name not in unknown])
+    # Per-symbol topics are dropped without subscribers and only published on change
+    for name in added:
+        if name.startswith("market:") and push_hub.topics[name].state is None:
+            push_hub.publish(name, market_feed.rows[name.split(":", 1)[1]])
+    user_ids = [name.split(":", 1)[1] for name in added
+                if name.startswith("portfolio:") and push_hub.topics[name].state is None]
+    if user_ids:
+        publish_valuations(user_ids)
+    return added
+
+
+async def _send_frames(websocket: WebSocket, subscriber: Subscriber):
+    """Forward batched messages to a WebSocket until the subscriber closes"""
+    while True:
+        batch = await subscriber.next_batch()
+        if not batch:
+            if subscriber.closed:
+                return
+            continue
+        try:
+            await asyncio.wait_for(websocket.send_text(frame(batch).decode("utf-8")), SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Closing stream client that stopped reading")
+            await websocket.close(code=1013)
+            return
+
+
+@router.websocket("/ws")
+async def stream_websocket(
+    websocket: WebSocket,
+    topics: Optional[str] = Query(None, description="Comma-separated topics to subscribe to")
+):
+    """
+    Push topic updates over a WebSocket
+
+    After connecting, clients can send {"action": "subscribe" | "unsubscribe", "topics": [...]}.
+    """
+    await websocket.accept()
+    subscriber = push_hub.connect()
+    sender = asyncio.create_task(_send_frames(websocket, subscriber))
+    try:
+        subscribe(subscriber, parse_topics(topics))
+        while True:
+            message = await websocket.receive_json()
+            names = parse_topics(message.get("topics"))
+            if message.get("action") == "subscribe":
+                subscribe(subscriber, names)
+            elif message.get("action") == "unsubscribe":
+                push_hub.unsubscribe(subscriber, names)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error in stream websocket: {str(e)}")
+    finally:
+        push_hub.disconnect(subscriber)
+        sender.cancel()
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    topics: str = Query(..., description="Comma-separated topics to subscribe to")
+):
+    """
+    Push topic updates as Server-Sent Events
+    """
+    subscriber = push_hub.connect()
+    subscribe(subscriber, parse_topics(topics))
+
+    async def events():
+        try:
+            while not subscriber.closed:
+                try:
+                    batch = await asyncio.wait_for(subscriber.next_batch(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": keepalive\n\n"
+                    continue
+                if batch:
+                    yield b"data: " + frame(batch) + b"\n\n"
+        finally:
+            push_hub.disconnect(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/stats", response_model=Dict[str, Any])
+async def get_stream_stats():
+    """
+    Get connected client and fan-out counters
+    """
+    return push_hub.stats()
@@ -0,0 +1,149 @@
+"""
+Lazy service container
+
+Services that are expensive to construct (they load JSON caches, NLP models
+or API clients in __init__) are registered here by name with a factory
+instead of being created at import time. A service is built the first time
+it is used, or earlier by the warm-up task the app starts on startup, so
+importing the app and answering /health never waits for them.
+
+Modules keep exposing their singletons under the usual names as
+LazyService proxies, so `from app.services.news import crypto_news_service`
+stays cheap and call sites do not change.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING, WARMING, READY, FAILED = "pending", "warming", "ready", "failed"
+
+
+class ServiceContainer:
+    """Builds registered services once, on first use or during warm-up"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._warm: List[str] = []
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self.warm_up_started: Optional[float] = None
+        self.warm_up_finished: Optional[float] = None
+
+    def register(self, name: str, factory: Callable[[], Any], warm_up: bool = True) -> "LazyService":
+        """
+        Register a service factory
+
+        Args:
+            name: Service name
+            factory: Callable returning the service instance
+            warm_up: Build the service in the startup warm-up task
+
+        Returns:
+            Proxy that builds the service on first attribute access
+        """
+        self._factories[name] = factory
+        self._locks.setdefault(name, threading.Lock())
+        self._state.setdefault(name, {"state": PENDING, "seconds": None, "error": None})
+        if warm_up and name not in self._warm:
+            self._warm.append(name)
+        return LazyService(self, name)
+
+    def get(self, name: str) -> Any:
+        """
+        The service instance, building it if needed
+
+        Raises:
+            KeyError: If no service of that name is registered
+        """
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        if name not in self._factories:
+            raise KeyError(f"Service '{name}' is not registered")
+
+        with self._locks[name]:
+            if name in self._instances:
+                return self._instances[name]
+            state = self._state[name]
+            state.update(state=WARMING, error=None)
+            started = time.perf_counter()
+            try:
+                instance = self._factories[name]()
+            except Exception as e:
+                state.update(state=FAILED, error=str(e), seconds=time.perf_counter() - started)
+                raise
+            self._instances[name] = instance
+            state.update(state=READY, seconds=time.perf_counter() - started)
+            logger.info(f"Service '{name}' ready in {state['seconds']:.2f}s")
+            return instance
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def set(self, name: str, instance: Any) -> None:
+        """Use an existing instance for a service (e.g. in tests)"""
+        self._locks.setdefault(name, threading.Lock())
+        self._instances[name] = instance
+        self._state[name] = {"state": READY, "seconds": 0.0, "error": None}
+
+    async def warm_up(self) -> None:
+        """Build every warm-up service in turn, off the event loop"""
+        self.warm_up_started = time.time()
+        for name in list(self._warm):
+            try:
+                await asyncio.to_thread(self.get, name)
+            except Exception as e:
+                logger.error(f"Error warming up service '{name}': {str(e)}")
+        self.warm_up_finished = time.time()
+
+    def is_ready(self) -> bool:
+        """
+        True once warm-up has finished
+
+        A service that failed to build does not hold back readiness: it is
+        reported in status() and built again on its next use.
+        """
+        return self.warm_up_finished is not None
+
+    def status(self) -> Dict[str, Any]:
+        """Warm-up progress for the readiness probe"""
+        done = sum(1 for name in self._warm if self._state[name]["state"] in (READY, FAILED))
+        return {
+            "ready": self.is_ready(),
+            "warm_up": {
+                "started": self.warm_up_started is not None,
+                "finished": self.warm_up_finished is not None,
+                "completed": done,
+                "total": len(self._warm)
+            },
+            "failed": [name for name, state in self._state.items() if state["state"] == FAILED],
+            "services": {name: dict(state) for name, state in self._state.items()}
+        }
+
+
+class LazyService:
+    """Stand-in for a registered service that builds it on first use"""
+    __slots__ = ("_container", "_name")
+
+    def __init__(self, container: ServiceContainer, name: str):
+        object.__setattr__(self, "_container", container)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._container.get(self._name), attribute)
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        setattr(self._container.get(self._name), attribute, value)
+
+    def __repr__(self) -> str:
+        state = "built" if self._container.is_built(self._name) else "not built"
+        return f"<LazyService '{self._name}' ({state})>"
+
+
+container = ServiceContainer()
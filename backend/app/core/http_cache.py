@@ -0,0 +1,222 @@
+"""
+HTTP caching for read endpoints
+
+The frontend polls market, news and portfolio endpoints whose data only
+changes when a refresh or a new transaction lands. Two pieces let it stop
+re-downloading identical payloads:
+
+- cache_control: decorator for a route. Its version function returns the
+  data version stamp the response depends on (market snapshot version, news
+  snapshot stamp, ledger version, ...). The strong ETag is derived from that
+  stamp, the route and its query string, so a conditional request that
+  still matches is answered with 304 before the handler body runs. Every
+  response gets the route's Cache-Control policy, e.g. a short max-age with
+  stale-while-revalidate.
+- CompressionMiddleware: compresses large JSON responses with brotli when
+  it is installed and accepted, gzip otherwise. Compressed representations
+  get their own ETag ("<tag>-br" / "<tag>-gzip"), which etag_matches maps
+  back to the version tag.
+"""
+import functools
+import gzip
+import hashlib
+import inspect
+import logging
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+
+from fastapi import Request, Response # type: ignore
+from starlette.datastructures import Headers, MutableHeaders # type: ignore
+from starlette.types import ASGIApp, Message, Receive, Scope, Send # type: ignore
+
+from app.core.responses import etag_matches
+
+try:
+    import brotli # type: ignore
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Names of the parameters cache_control adds to a route's signature
+_REQUEST_ARG = "_http_cache_request"
+_RESPONSE_ARG = "_http_cache_response"
+
+
+def cache_control_header(max_age: int = 0, stale_while_revalidate: int = 0, private: bool = False) -> str:
+    """
+    Build a Cache-Control header value
+
+    Args:
+        max_age: Seconds a response is fresh; 0 means revalidate every time
+        stale_while_revalidate: Seconds a stale response may be shown while
+            revalidating in the background
+        private: Response is per user and must not be stored by shared caches
+
+    Returns:
+        Header value
+    """
+    directives = ["private" if private else "public"]
+    directives.append(f"max-age={max_age}" if max_age else "no-cache")
+    if stale_while_revalidate:
+        directives.append(f"stale-while-revalidate={stale_while_revalidate}")
+    return ", ".join(directives)
+
+
+def version_etag(request: Request, version: Hashable) -> str:
+    """Strong ETag for a route, its query string and a data version"""
+    key = "|".join((request.url.path, str(sorted(request.query_params.multi_items())), repr(version)))
+    return '"' + hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+
+def _parameter_for(signature: inspect.Signature, annotation: type) -> Optional[str]:
+    """Name of the parameter annotated with a type, if any"""
+    for parameter in signature.parameters.values():
+        if parameter.annotation is annotation:
+            return parameter.name
+    return None
+
+
+def cache_control(version: Callable[[Mapping[str, Any]], Optional[Hashable]], max_age: int = 0,
+                  stale_while_revalidate: int = 0, private: bool = False) -> Callable:
+    """
+    Add validators and a Cache-Control policy to a route
+
+    Apply below the router decorator:
+
+        @router.get("/prices")
+        @cache_control(lambda params: market_version(), max_age=30)
+        async def get_crypto_prices(limit: int = Query(50)): ...
+
+    Args:
+        version: Called with the route's parameters; returns the version
+            stamp of the data behind the response, or None to skip
+            validation for this request
+        max_age: Seconds the response is fresh
+        stale_while_revalidate: Seconds a stale response may still be used
+            while the client revalidates
+        private: Per-user response
+    """
+    header = cache_control_header(max_age, stale_while_revalidate, private)
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        # FastAPI injects one Request and one Response parameter per route:
+        # reuse the route's own, or add ours
+        request_arg = _parameter_for(signature, Request) or _REQUEST_ARG
+        response_arg = _parameter_for(signature, Response) or _RESPONSE_ARG
+        added = [
+            inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation)
+            for name, annotation in ((_REQUEST_ARG, Request), (_RESPONSE_ARG, Response))
+            if name in (request_arg, response_arg)
+        ]
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if request_arg not in kwargs:
+                # Called directly rather than by FastAPI: nothing to validate
+                return await func(*args, **kwargs)
+            request: Request = kwargs[request_arg] if request_arg != _REQUEST_ARG else kwargs.pop(_REQUEST_ARG)
+            response: Response = kwargs[response_arg] if response_arg != _RESPONSE_ARG else kwargs.pop(_RESPONSE_ARG)
+            headers = {"Cache-Control": header}
+
+            try:
+                stamp = version(kwargs)
+            except Exception as e:
+                logger.error(f"Error getting data version for {request.url.path}: {str(e)}")
+                stamp = None
+            if stamp is not None:
+                headers["ETag"] = version_etag(request, stamp)
+                if etag_matches(request, headers["ETag"]):
+                    return Response(status_code=304, headers=headers)
+
+            result = await func(*args, **kwargs)
+            target = result if isinstance(result, Response) else response
+            for name, value in headers.items():
+                target.headers[name] = value
+            return result
+
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), *added])
+        return wrapper
+
+    return decorator
+
+
+def _accepted_encoding(headers: Headers) -> Optional[str]:
+    """Preferred encoding the client accepts: br (if installed), gzip or None"""
+    accepted = {}
+    for item in headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        # Quality 4 compresses JSON better than gzip at similar speed
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressionMiddleware:
+    """Compresses JSON responses of at least minimum_size bytes"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted_encoding(Headers(scope=scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Dict[str, Any] = {}
+
+        async def send_compressed(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if headers.get("content-type", "").startswith("application/json") \
+                        and "content-encoding" not in headers:
+                    # Hold the start message until the body shows its size
+                    start["message"] = message
+                    return
+                await send(message)
+                return
+
+            held = start.pop("message", None)
+            if held is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streamed or small: send unchanged
+                await send(held)
+                await send(message)
+                return
+
+            compressed = _compress(body, encoding)
+            headers = MutableHeaders(raw=list(held["headers"]))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            held["headers"] = headers.raw
+            await send(held)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,77 +1,211 @@
 """
 Centralized logging configuration for the application
+
+Handlers never run on the thread that logs. setup_logging installs a
+single QueueHandler on the root logger; a QueueListener thread drains the
+queue and does the slow part (formatting, console and rotating file I/O),
+so a log call on the event loop costs a queue put instead of a disk write.
+
+Files are written as JSON lines (one object per record, with any `extra`
+fields included); the console stays human-readable unless LOG_FORMAT=json.
+
+High-frequency debug events are sampled per call site: with DEBUG
+enabled, only every LOG_DEBUG_SAMPLE_RATE-th record of the same logger and
+message template is kept. Call sites should therefore use lazy %-style
+arguments (logger.debug("Matched %s", title)) rather than f-strings: the
+template stays constant for sampling, and the message is only built for
+records that are actually emitted.
 """
+import atexit
+import itertools
+import json
 import logging
 import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional, Tuple
+
+try:
+    import orjson # type: ignore
+except ImportError:
+    orjson = None
+
+# Console output format: "text" or "json"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+# Keep one in this many DEBUG records per call site (1 keeps all)
+LOG_DEBUG_SAMPLE_RATE = int(os.getenv("LOG_DEBUG_SAMPLE_RATE", "10"))
+# Call sites tracked before the sampling counters start over
+SAMPLING_MAX_CALL_SITES = 4096
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode()
+        return json.dumps(entry, default=str)
 
-def setup_logging(log_to_console=True, log_to_file=True, log_level=logging.INFO):
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every `rate` records per call site at or below `level`
+
+    A call site is identified by logger name and the unformatted message
+    template, so lazily formatted messages with different arguments count
+    as the same event. A pre-formatted (f-string) message is a new template
+    every time, so the counters are reset once max_call_sites are tracked.
+    """
+
+    def __init__(self, rate: int = LOG_DEBUG_SAMPLE_RATE, level: int = logging.DEBUG,
+                 max_call_sites: int = SAMPLING_MAX_CALL_SITES):
+        super().__init__()
+        self.rate = max(1, rate)
+        self.level = level
+        self.max_call_sites = max_call_sites
+        self._counters: Dict[Tuple[str, str], "itertools.count"] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate == 1 or record.levelno > self.level:
+            return True
+        key = (record.name, str(record.msg))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                if len(self._counters) >= self.max_call_sites:
+                    self._counters.clear()
+                counter = self._counters.setdefault(key, itertools.count())
+        return next(counter) % self.rate == 0
+
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener's handlers"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now (they may be mutated after the call returns)
+        # and render the traceback, which cannot cross the queue
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _file_handler(path: str, formatter: logging.Formatter, level: int = logging.NOTSET) -> RotatingFileHandler:
+    # Rotating file handler (10MB max, keep 5 backups)
+    handler = RotatingFileHandler(path, maxBytes=10*1024*1024, backupCount=5)
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def setup_logging(log_to_console=True, log_to_file=True, log_level=logging.INFO, logs_dir=None):
     """
     Set up logging configuration for the application
-    
+
     Args:
         log_to_console: If True, logs will be output to console
         log_to_file: If True, logs will be saved to file
         log_level: Logging level (default: INFO)
-        
+        logs_dir: Directory for log files (default: backend/logs)
+
     Returns:
         Logger: Configured logger instance
     """
+    global _listener
+
     # Create logs directory if it doesn't exist
-    logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "logs")
+    logs_dir = logs_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "logs")
     os.makedirs(logs_dir, exist_ok=True)
-    
+
+    # Stop the listener of an earlier call before replacing its handlers
+    shutdown_logging()
+
     # Configure the root logger
     logger = logging.getLogger()
     logger.setLevel(log_level)
-    
+
     # Clear existing handlers to avoid duplicate logs
     if logger.handlers:
         logger.handlers.clear()
-    
+
     # Create formatters
     standard_formatter = logging.Formatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
-    
+    json_formatter = JsonFormatter()
+
+    handlers = []
+
     # Create console handler if enabled
     if log_to_console:
         console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setFormatter(standard_formatter)
-        logger.addHandler(console_handler)
-    
+        console_handler.setFormatter(json_formatter if LOG_FORMAT == "json" else standard_formatter)
+        handlers.append(console_handler)
+
     # Create file handlers if enabled
     if log_to_file:
-        # Main API log file - rotating file handler (10MB max, keep 5 backups)
-        api_log_path = os.path.join(logs_dir, "api.log")
-        api_file_handler = RotatingFileHandler(
-            api_log_path, maxBytes=10*1024*1024, backupCount=5
-        )
-        api_file_handler.setFormatter(standard_formatter)
-        logger.addHandler(api_file_handler)
-        
+        # Main API log file
+        handlers.append(_file_handler(os.path.join(logs_dir, "api.log"), json_formatter))
+
         # Error log with higher level for important alerts
-        error_log_path = os.path.join(logs_dir, "error.log")
-        error_file_handler = RotatingFileHandler(
-            error_log_path, maxBytes=10*1024*1024, backupCount=5
-        )
-        error_file_handler.setLevel(logging.ERROR)
-        error_file_handler.setFormatter(standard_formatter)
-        logger.addHandler(error_file_handler)
-        
+        handlers.append(_file_handler(os.path.join(logs_dir, "error.log"), json_formatter, logging.ERROR))
+
         # Background tasks logs
-        background_log_path = os.path.join(logs_dir, "background.log")
-        background_handler = RotatingFileHandler(
-            background_log_path, maxBytes=10*1024*1024, backupCount=5
-        )
-        background_handler.setFormatter(standard_formatter)
-        background_logger = logging.getLogger('background')
-        background_logger.addHandler(background_handler)
-    
+        background_handler = _file_handler(os.path.join(logs_dir, "background.log"), json_formatter)
+        # Only records from the "background" logger and its children
+        background_handler.addFilter(logging.Filter("background"))
+        handlers.append(background_handler)
+
+    # One queue in front of all handlers; the listener thread does the I/O
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
     return logger
 
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(shutdown_logging)
+
 def get_logger(name):
     """Get a named logger instance"""
-    return logging.getLogger(name) 
\ No newline at end of file
+    return logging.getLogger(name)
@@ -0,0 +1,374 @@
+"""
+In-process metrics with a Prometheus text exposition
+
+Counters and histograms for request latency, AI pipeline stages, cache hits,
+upstream API calls and background jobs, rendered by GET /metrics in the
+Prometheus text format (version 0.0.4).
+
+Observations are on hot paths (every request, every cache lookup), so they
+take no lock: each thread records into its own shard, a plain list of
+numbers, and shards are only summed when the metrics are rendered. A
+histogram observation is one bisect over the bucket bounds and two list
+increments, well under a microsecond. Per-label children are cached, so
+hot code can call .labels() once and keep the child.
+
+Each worker process aggregates its own metrics; with several uvicorn
+workers every worker exposes its own /metrics, like any other
+per-process exporter.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Default latency buckets in seconds, from cache-speed to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Buckets for slow work: LLM calls and background jobs
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Sharded:
+    """Per-thread lists of numbers, summed on read"""
+    __slots__ = ("_size", "_local", "_shards", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> List[float]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0] * self._size
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._shards)
+        totals = [0] * self._size
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class CounterChild(_Sharded):
+    """One label combination of a counter"""
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self.totals()[0]
+
+
+class HistogramChild(_Sharded):
+    """One label combination of a histogram"""
+    __slots__ = ("_bounds",)
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        # One slot per bucket, one for +Inf, one for the sum
+        super().__init__(len(bounds) + 2)
+        self._bounds = bounds
+
+    def observe(self, value: float) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the with block, in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """
+        Current state of the histogram
+
+        Returns:
+            Tuple of (cumulative bucket counts including +Inf, count, sum)
+        """
+        totals = self.totals()
+        cumulative, running = [], 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _Sharded] = {}
+        # Children by the label values as passed (e.g. an int status code)
+        self._lookup: Dict[tuple, _Sharded] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> _Sharded:
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """
+        The child for one combination of label values
+
+        Args:
+            *values: Label values, in the order of labelnames
+
+        Returns:
+            Cached child metric
+        """
+        child = self._lookup.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            key = tuple(str(value) for value in values)
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+                self._lookup[values] = child
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], _Sharded]]:
+        with self._lock:
+            return sorted(self._children.items(), key=lambda item: item[0])
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._items()
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for values, child in self._items():
+            cumulative, count, total = child.snapshot()
+            for bound, bucket_count in zip(bounds, cumulative):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {bucket_count}")
+            labels = _label_text(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"))
+AI_STAGE_SECONDS = registry.histogram(
+    "ai_stage_duration_seconds", "Duration of AI query pipeline stages", ("stage",), SLOW_BUCKETS)
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit or miss)", ("cache", "result"))
+UPSTREAM_REQUEST_SECONDS = registry.histogram(
+    "upstream_request_duration_seconds", "Latency of calls to upstream APIs by host", ("host",))
+UPSTREAM_ERRORS = registry.counter(
+    "upstream_errors_total", "Failed upstream API calls (exceptions and HTTP errors) by host", ("host",))
+JOB_SECONDS = registry.histogram(
+    "background_job_duration_seconds", "Background job run time by job and outcome", ("job", "status"),
+    SLOW_BUCKETS)
+
+
+def render() -> str:
+    """The default registry in the Prometheus text format"""
+    return registry.render()
+
+
+def ai_stage(stage: str):
+    """
+    Time one AI pipeline stage
+
+    Args:
+        stage: Stage name, e.g. "intent_classification" or "context.market"
+
+    Returns:
+        Context manager observing the stage's duration
+    """
+    return AI_STAGE_SECONDS.labels(stage).time()
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    """Count one cache lookup"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def upstream_host(url) -> str:
+    """Host label for an upstream URL (str or yarl.URL)"""
+    host = getattr(url, "host", None)
+    if host is None:
+        host = urlsplit(str(url)).hostname
+    return host or "unknown"
+
+
+def count_upstream_error(url) -> None:
+    """Count a failed upstream call that did not raise, e.g. a non-200 reply"""
+    UPSTREAM_ERRORS.labels(upstream_host(url)).inc()
+
+
+@contextmanager
+def track_upstream(url) -> Iterator[None]:
+    """
+    Time a blocking upstream call
+
+    Exceptions raised in the with block are counted as errors for the host.
+
+    Args:
+        url: Request URL
+    """
+    host = upstream_host(url)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.labels(host).inc()
+        raise
+    finally:
+        UPSTREAM_REQUEST_SECONDS.labels(host).observe(time.perf_counter() - started)
+
+
+def upstream_trace_config():
+    """
+    aiohttp trace config recording upstream latency and errors
+
+    Pass it to a ClientSession (trace_configs=[upstream_trace_config()]) to
+    time every request the session makes. Replies with status >= 400 count
+    as errors.
+    """
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        host = upstream_host(params.url)
+        UPSTREAM_REQUEST_SECONDS.labels(host).observe(time.perf_counter() - context.started)
+        if params.response.status >= 400:
+            UPSTREAM_ERRORS.labels(host).inc()
+
+    async def on_request_exception(session, context, params):
+        host = upstream_host(params.url)
+        UPSTREAM_REQUEST_SECONDS.labels(host).observe(time.perf_counter() - context.started)
+        UPSTREAM_ERRORS.labels(host).inc()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
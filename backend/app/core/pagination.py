@@ -0,0 +1,128 @@
+"""
+Keyset pagination
+
+Offset pagination re-reads every item before the requested page and shifts
+when new items arrive at the top: a client paging through news during a
+refresh sees duplicates or misses articles. Listings are paged by key
+instead. Items are ordered newest first by a (timestamp, id) key, and a page
+is "the next limit items older than the last key the client saw". The
+client gets that key back as an opaque cursor.
+
+KeysetIndex keeps the keys sorted, so finding where a page starts is a
+binary search and a deep page costs the same as the first one.
+"""
+import base64
+import bisect
+import binascii
+import json
+from typing import Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+# Largest page any listing endpoint returns
+MAX_PAGE_SIZE = 100
+
+# (sortable timestamp, id)
+Key = Tuple[str, str]
+
+T = TypeVar("T")
+
+
+def encode_cursor(key: Key) -> str:
+    """
+    Encode a page key as an opaque, URL-safe cursor
+
+    Args:
+        key: (timestamp, id) of the last item on a page
+
+    Returns:
+        Cursor string
+    """
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Key:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        (timestamp, id) key
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(part, str) for part in key)):
+        raise ValueError("Invalid cursor")
+    return key[0], key[1]
+
+
+class KeysetIndex(Generic[T]):
+    """Values ordered newest first by (timestamp, id) key"""
+
+    def __init__(self, items: Iterable[Tuple[Key, T]] = ()):
+        # Ascending order, so appends of newer items go at the end
+        pairs = sorted(items, key=lambda pair: pair[0])
+        self._keys: List[Key] = [key for key, _ in pairs]
+        self._values: List[T] = [value for _, value in pairs]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: Key, value: T) -> None:
+        """Insert a value; O(1) when it is the newest, as ledger appends usually are"""
+        i = bisect.bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._values.insert(i, value)
+
+    def page(self, limit: int, after: Optional[Key] = None, skip: int = 0,
+             predicate: Optional[Callable[[T], bool]] = None) -> Tuple[List[T], Optional[Key]]:
+        """
+        One page of values, newest first
+
+        Args:
+            limit: Page size
+            after: Key of the last item of the previous page (None for the first page)
+            skip: Number of matching items to skip first (offset pagination)
+            predicate: Only return values it accepts
+
+        Returns:
+            Tuple of (values, key of the last value if more pages follow, else None)
+        """
+        end = len(self._keys) if after is None else bisect.bisect_left(self._keys, after)
+
+        if predicate is None:
+            end -= skip
+            start = max(end - limit, 0)
+            if end <= 0:
+                return [], None
+            values = self._values[start:end][::-1]
+            return values, (self._keys[start] if start > 0 else None)
+
+        values: List[T] = []
+        last: Optional[Key] = None
+        for i in range(end - 1, -1, -1):
+            value = self._values[i]
+            if not predicate(value):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            if len(values) == limit:
+                # One more match exists beyond this page
+                return values, last
+            values.append(value)
+            last = self._keys[i]
+        return values, None
+
+    def count(self, predicate: Optional[Callable[[T], bool]] = None) -> int:
+        """Number of values, or of values the predicate accepts"""
+        if predicate is None:
+            return len(self._values)
+        return sum(1 for value in self._values if predicate(value))
@@ -0,0 +1,235 @@
+"""
+Atomic, concurrent-safe JSON persistence
+
+All JSON files the app rewrites (portfolio, watchlist, news caches, market
+data) go through this module:
+
+- Writes go to a temporary file in the same directory and are moved into
+  place with os.replace, so readers never see a truncated file.
+- Each path has its own lock, so concurrent writers to the same file are
+  serialized while writes to different files proceed in parallel.
+- save_json_later coalesces bursts of writes from background threads into a
+  single flush after a short delay.
+- orjson is used for serialization when installed. Files only this app
+  reads can be written as msgpack with binary=True; load_json detects the
+  format, so switching a file between JSON and msgpack needs no migration.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson # type: ignore
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack # type: ignore
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# JSON serializer for new writes: "orjson" or "json"
+PERSISTENCE_SERIALIZER = os.getenv("PERSISTENCE_SERIALIZER", "orjson" if orjson else "json")
+
+# Default delay for coalesced background writes
+DEFAULT_FLUSH_DELAY = 2.0
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+_pending: Dict[str, Tuple[Any, Optional[int]]] = {}
+_timers: Dict[str, threading.Timer] = {}
+_pending_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    """Get the lock guarding a file path"""
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = threading.Lock()
+        return lock
+
+
+def dumps(data: Any, indent: Optional[int] = None, binary: bool = False) -> bytes:
+    """
+    Serialize data with the configured serializer
+
+    Args:
+        data: JSON-compatible data
+        indent: Pretty-print indentation (JSON only)
+        binary: Use msgpack if it is installed
+
+    Returns:
+        Serialized bytes
+    """
+    if binary and msgpack is not None:
+        return msgpack.packb(data, default=str, use_bin_type=True)
+    if PERSISTENCE_SERIALIZER == "orjson" and orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, default=str, option=option)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the stdlib handles these
+            pass
+    return json.dumps(data, indent=indent, default=str).encode("utf-8")
+
+
+def loads(raw: bytes) -> Any:
+    """
+    Deserialize bytes written by any supported serializer
+
+    JSON documents always start with whitespace, '{', '[', '"', a digit or a
+    literal, so anything else is treated as msgpack.
+
+    Args:
+        raw: Serialized bytes
+
+    Returns:
+        Deserialized data
+    """
+    stripped = raw.lstrip()
+    if stripped[:1] and stripped[:1] not in b'{["-0123456789tfn':
+        if msgpack is None:
+            raise ValueError("File is not JSON and msgpack is not installed")
+        return msgpack.unpackb(raw, raw=False)
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # Older files written by json.dump may contain NaN/Infinity
+            pass
+    return json.loads(raw)
+
+
+def save_bytes(path: str, payload: bytes) -> bool:
+    """
+    Atomically write raw bytes to a file
+
+    Args:
+        path: Destination path
+        payload: File contents
+
+    Returns:
+        True if successful, False otherwise
+    """
+    path = os.path.abspath(path)
+    try:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        with _lock_for(path):
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return True
+    except Exception as e:
+        logger.error(f"Error saving {path}: {str(e)}")
+        return False
+
+
+def save_json(path: str, data: Any, indent: Optional[int] = None, binary: bool = False) -> bool:
+    """
+    Atomically write data to a file
+
+    Args:
+        path: Destination path
+        data: JSON-compatible data
+        indent: Pretty-print indentation
+        binary: Write msgpack instead of JSON (only for files no other tool reads)
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        payload = dumps(data, indent, binary)
+    except Exception as e:
+        logger.error(f"Error saving {os.path.abspath(path)}: {str(e)}")
+        return False
+    return save_bytes(path, payload)
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    """
+    Read a file written by save_json (or any plain JSON file)
+
+    Args:
+        path: File path
+        default: Value returned if the file is missing or unreadable
+
+    Returns:
+        Deserialized data or default
+    """
+    path = os.path.abspath(path)
+    try:
+        if not os.path.exists(path):
+            return default
+        with open(path, "rb") as f:
+            raw = f.read()
+        return loads(raw)
+    except Exception as e:
+        logger.error(f"Error loading {path}: {str(e)}")
+        return default
+
+
+def save_json_later(path: str, data: Any, delay: float = DEFAULT_FLUSH_DELAY, indent: Optional[int] = None) -> None:
+    """
+    Schedule a coalesced write
+
+    Repeated calls for the same path within the delay replace the pending
+    data, so only the latest version is serialized and written.
+
+    Args:
+        path: Destination path
+        data: JSON-compatible data (must not be mutated in place afterwards)
+        delay: Seconds to wait before flushing
+        indent: Pretty-print indentation
+    """
+    path = os.path.abspath(path)
+    with _pending_guard:
+        _pending[path] = (data, indent)
+        if path not in _timers:
+            timer = threading.Timer(delay, _flush_path, args=(path,))
+            timer.daemon = True
+            _timers[path] = timer
+            timer.start()
+
+
+def _flush_path(path: str) -> None:
+    """Write the pending data for a path"""
+    with _pending_guard:
+        _timers.pop(path, None)
+        pending = _pending.pop(path, None)
+    if pending is not None:
+        data, indent = pending
+        save_json(path, data, indent)
+
+
+def flush_pending() -> None:
+    """Write all pending coalesced writes immediately"""
+    with _pending_guard:
+        paths = list(_pending)
+        for timer in _timers.values():
+            timer.cancel()
+        _timers.clear()
+    for path in paths:
+        _flush_path(path)
+
+
+atexit.register(flush_pending)
@@ -0,0 +1,162 @@
+"""
+Pre-serialized JSON responses
+
+Read endpoints such as /market/prices and the first page of /news/crypto
+return the same body for every request until the underlying data changes,
+yet each request rebuilt it: a Pydantic model per item, validation against
+the response model, then JSON encoding. PayloadCache encodes such a body
+once per data version (with orjson when installed) and keeps the bytes,
+together with a strong ETag derived from them.
+
+payload_response serves a cached payload as-is, bypassing response model
+validation, and answers a matching If-None-Match with 304 Not Modified and
+no body.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+from fastapi import Request, Response # type: ignore
+from pydantic import BaseModel # type: ignore
+
+from app.core.metrics import cache_lookup
+
+try:
+    import orjson # type: ignore
+except ImportError:
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode a response body
+
+    Args:
+        content: JSON-compatible data; Pydantic models are dumped in JSON mode
+
+    Returns:
+        UTF-8 JSON bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=_default,
+                                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the stdlib handles these
+            pass
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class Payload:
+    """An encoded response body and its entity tag"""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_content(cls, content: Any) -> "Payload":
+        body = encode_json(content)
+        return cls(body, '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"')
+
+
+# Suffixes CompressionMiddleware adds to the ETag of compressed responses
+_ENCODING_SUFFIXES = ('-gzip"', '-br"')
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match header matches an entity tag
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match. Tags of
+    compressed representations match the tag they were derived from.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in _ENCODING_SUFFIXES:
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)] + '"'
+                break
+        if candidate == opaque:
+            return True
+    return False
+
+
+def payload_response(request: Request, payload: Payload,
+                     headers: Optional[Mapping[str, str]] = None) -> Response:
+    """
+    Serve a payload, or 304 Not Modified if the client already has it
+
+    Args:
+        request: Incoming request
+        payload: Encoded body
+        headers: Extra response headers
+
+    Returns:
+        Response
+    """
+    response_headers = {"ETag": payload.etag}
+    if headers:
+        response_headers.update(headers)
+    if etag_matches(request, payload.etag):
+        return Response(status_code=304, headers=response_headers)
+    return Response(payload.body, media_type=JSON_MEDIA_TYPE, headers=response_headers)
+
+
+class PayloadCache:
+    """Encoded payloads by key, each kept for one data version"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[Hashable, Payload]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> Payload:
+        """
+        The payload for a key at a data version, built on first request
+
+        Args:
+            key: Identifies the response, e.g. route name and query parameters
+            version: Data version stamp; a different version rebuilds the payload
+            build: Returns the response content
+
+        Returns:
+            Payload
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            cache_lookup("payload", True)
+            return entry[1]
+        cache_lookup("payload", False)
+
+        payload = Payload.from_content(build())
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                # Drop the oldest key; arbitrary query parameters must not grow the cache
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (version, payload)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+payload_cache = PayloadCache()
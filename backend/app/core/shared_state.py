@@ -0,0 +1,155 @@
+"""
+Cross-process primitives for multi-worker deployments
+
+LeaderLock elects one process on the host through an exclusive, non-blocking
+flock on a lock file. The kernel releases the lock when its holder exits, so
+a crashed leader is replaced by whichever worker tries next.
+
+SharedSnapshot lets the leader publish a piece of state to every worker:
+
+- <name>.snap holds the payload, written atomically (temp file + rename)
+  with persistence.save_json, as msgpack when installed
+- <name>.version is a 16-byte counter file (version, publish time) that
+  every process memory-maps. The leader bumps it after each write, so a
+  worker checks for news by reading 8 bytes of shared memory, without a
+  system call, and only opens the snapshot file when the version moved.
+
+The payload records its own version, so a reader that races a publish
+(reads a new counter but an older file) just picks the change up on its
+next check.
+"""
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Any, Optional, Tuple
+
+try:
+    import fcntl # type: ignore
+except ImportError:
+    # Not available on Windows; multi-worker mode needs a POSIX host
+    fcntl = None
+
+from app.core.persistence import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+# Counter file layout: version (uint64), published at (float64 epoch seconds)
+COUNTER = struct.Struct("<Qd")
+
+
+class LeaderLock:
+    """Exclusive lock held by the leader process for as long as it runs"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """
+        Become the leader if no other process is
+
+        Returns:
+            True if this process holds the lock
+        """
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            raise RuntimeError("Leader election needs fcntl (POSIX)")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # Record the holder for operators; readers never rely on it
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        logger.info(f"Process {os.getpid()} acquired the leader lock {self.path}")
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SharedSnapshot:
+    """A versioned value published by one process and read by many"""
+
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        self.data_path = os.path.join(directory, f"{name}.snap")
+        self.counter_path = os.path.join(directory, f"{name}.version")
+        os.makedirs(directory, exist_ok=True)
+
+        fd = os.open(self.counter_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < COUNTER.size:
+                os.ftruncate(fd, COUNTER.size)
+            self._counter = mmap.mmap(fd, COUNTER.size)
+        finally:
+            # The mapping stays valid after the descriptor is closed
+            os.close(fd)
+
+        self._loaded_version = -1
+        self._data: Any = None
+
+    @property
+    def version(self) -> int:
+        """Latest published version (0 if nothing was published yet)"""
+        return COUNTER.unpack_from(self._counter, 0)[0]
+
+    @property
+    def published_at(self) -> Optional[float]:
+        published_at = COUNTER.unpack_from(self._counter, 0)[1]
+        return published_at or None
+
+    def publish(self, data: Any) -> int:
+        """
+        Write a new version
+
+        Args:
+            data: JSON-compatible value
+
+        Returns:
+            The new version number
+        """
+        version = self.version + 1
+        if not save_json(self.data_path, {"version": version, "data": data}, binary=True):
+            raise OSError(f"Could not write shared snapshot {self.data_path}")
+        COUNTER.pack_into(self._counter, 0, version, time.time())
+        return version
+
+    def changed(self) -> bool:
+        """True if a version newer than the last one read was published"""
+        version = self.version
+        return version != 0 and version != self._loaded_version
+
+    def read(self) -> Tuple[int, Any]:
+        """
+        The latest published value, loaded only when the version changed
+
+        Returns:
+            Tuple of (version, data); (0, None) if nothing was published
+        """
+        if self.version == 0:
+            return 0, None
+        if self.changed():
+            envelope = load_json(self.data_path)
+            if envelope is None:
+                return 0, None
+            self._loaded_version = envelope["version"]
+            self._data = envelope["data"]
+        return self._loaded_version, self._data
+
+    def close(self) -> None:
+        self._counter.close()
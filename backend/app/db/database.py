@@ -31,26 +31,22 @@ Base = declarative_base()
 MAIN_DB_URL = os.getenv("MAIN_DB_URL", "sqlite:///./data/crypto_portfolio.db")
 NEWS_DB_URL = os.getenv("NEWS_DB_URL", "sqlite:///./data/news_market.db")
 
+def _engine_options(url: str) -> dict:
+    """Pool settings for a database URL; SQLite keeps SQLAlchemy's default file pool"""
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "poolclass": QueuePool,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": 1800
+    }
+
 # Create synchronous engines for both databases
-main_engine = create_engine(
-    MAIN_DB_URL, 
-    echo=False,  
-    poolclass=QueuePool,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800
-)
+main_engine = create_engine(MAIN_DB_URL, echo=False, **_engine_options(MAIN_DB_URL))
 
-news_engine = create_engine(
-    NEWS_DB_URL,
-    echo=False,
-    poolclass=QueuePool,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800
-)
+news_engine = create_engine(NEWS_DB_URL, echo=False, **_engine_options(NEWS_DB_URL))
 
 # Create session factories
 MainSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=main_engine)
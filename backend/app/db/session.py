@@ -0,0 +1,86 @@
+"""
+Async database engine and session management for the crypto data models
+
+Engines are created lazily on first use so importing this module never
+touches the database. Each request gets its own AsyncSession through the
+get_async_db dependency, which is closed when the request finishes.
+"""
+import os
+import logging
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models.crypto_data import Base
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Reuse the legacy DB_PATH setting so the sync and async layers share one database
+DB_PATH = os.getenv("DB_PATH", "sqlite:///crypto_data.db")
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL", DB_PATH.replace("sqlite://", "sqlite+aiosqlite://", 1))
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+
+def _on_sqlite_connect(dbapi_con, connection_record):
+    """Configure SQLite for concurrent readers and a single writer"""
+    cursor = dbapi_con.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def get_async_engine() -> AsyncEngine:
+    """Get or create the async engine"""
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(ASYNC_DB_URL, echo=False)
+        if _engine.dialect.name == "sqlite":
+            event.listen(_engine.sync_engine, "connect", _on_sqlite_connect)
+        logger.info(f"Async database engine created for {ASYNC_DB_URL}")
+    return _engine
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Get or create the async session factory"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = async_sessionmaker(
+            get_async_engine(),
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return _session_factory
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding one session per request"""
+    async with get_session_factory()() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def init_async_db() -> None:
+    """Create the crypto data tables if they don't exist"""
+    engine = get_async_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    logger.info("Async database tables created successfully")
+
+
+async def dispose_async_engine() -> None:
+    """Close all pooled connections, e.g. on shutdown"""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _session_factory = None
+        logger.info("Async database engine disposed")
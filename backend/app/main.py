@@ -4,6 +4,7 @@ Main FastAPI application entry point
 from fastapi import FastAPI, Request # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
 from fastapi.staticfiles import StaticFiles # type: ignore
+import asyncio
 import os
 import logging
 from datetime import datetime
@@ -16,8 +17,11 @@ from app.api.v1.news import router as news_router
 from app.api.v1.ai import router as ai_router
 from app.api.v1.portfolio import router as portfolio_router
 from app.api.v1.social import router as social_router
+from app.api.v1.stream import router as stream_router
+from app.api.v1.health import router as health_router
 
-# Import services for direct initialization
+# Services are lazy: built by the warm-up task on startup or on first use
+from app.core.container import container
 from app.services.news import crypto_news_service, macro_news_service, reddit_service
 
 # Load environment variables
@@ -27,6 +31,11 @@ load_dotenv()
 from app.core.logging import setup_logging
 logger = setup_logging()
 
+from app.core import metrics
+from app.core.http_cache import CompressionMiddleware
+# Leader election and shared state for multi-worker deployments (DEPLOYMENT_MODE)
+from app.services.cluster import cluster, register_default_channels
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Crypto Portfolio Tracker API",
@@ -44,8 +53,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Compress large JSON responses (brotli if installed, else gzip)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
 # Mount static files if the directory exists
 static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "static")
 if os.path.exists(static_dir):
@@ -57,105 +70,145 @@ app.include_router(news_router, prefix="/api/v1", tags=["News"])
 app.include_router(ai_router, prefix="/api/v1", tags=["AI Analysis"])
 app.include_router(portfolio_router, prefix="/api/v1", tags=["Portfolio"])
 app.include_router(social_router, prefix="/api/v1", tags=["Social Media"])
+app.include_router(stream_router, prefix="/api/v1", tags=["Streaming"])
+# Probes and metrics keep their unversioned paths
+app.include_router(health_router)
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all incoming requests and their processing time"""
-    start_time = time.time()
+    """Log all incoming requests and record their latency by route"""
+    start_time = time.perf_counter()
     
     # Get client IP and request details
     client_host = request.client.host if request.client else "unknown"
     method = request.method
     url = request.url.path
     
-    logger.info(f"Request started: {method} {url} from {client_host}")
+    logger.debug("Request started: %s %s from %s", method, url, client_host)
     
     # Process the request
     response = await call_next(request)
     
     # Calculate and log processing time
-    process_time = time.time() - start_time
-    logger.info(f"Request completed: {method} {url} - Status: {response.status_code} - Time: {process_time:.4f}s")
+    process_time = time.perf_counter() - start_time
+    # Label by route template ("/api/v1/market/coins/{coin_id}"), not the raw path,
+    # so the number of series stays bounded
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", None) or "unmatched"
+    metrics.HTTP_REQUEST_SECONDS.labels(method, route_path, response.status_code).observe(process_time)
+    logger.info("Request completed: %s %s - Status: %s - Time: %.4fs", method, url, response.status_code, process_time)
     
     return response
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize services and start background tasks on startup"""
+    """Warm up services and start background tasks without delaying startup"""
+    app.state.background_started = False
+    app.state.warm_up_task = asyncio.create_task(warm_up_and_start())
+
+async def warm_up_and_start():
+    """Build the registered services off the event loop, then start background tasks"""
+    await container.warm_up()
+    await start_background_services()
+
+async def start_background_services():
+    """Wire service listeners and start the background refreshers (on the leader only in multi mode)"""
     try:
         # Start the market data service
         logger.info("Starting market data service")
-        from app.services.market.market_data_service import MarketDataService
         
         # Get the singleton instance
         market_service = get_market_service()
-        # Start the update loop
-        market_service._start_update_loop()
         
-        # Start the news services
-        logger.info("Starting news services from main application")
+        # Push market, portfolio and news updates to stream subscribers
+        from app.services.realtime import push_hub, market_feed, crypto_news_feed, macro_news_feed
+        from app.api.v1.portfolio import on_market_update as publish_portfolio_update
+        push_hub.bind_loop()
+        market_service.add_update_listener(market_feed.on_market_update)
+        market_service.add_update_listener(publish_portfolio_update)
+        crypto_news_feed.publish(crypto_news_service.news_database)
+        macro_news_feed.publish(macro_news_service.news_database)
+        crypto_news_service.add_update_listener(crypto_news_feed.on_news_update)
+        macro_news_service.add_update_listener(macro_news_feed.on_news_update)
         
-        try:
-            # Start crypto news service
-            logger.info("Attempting to start crypto news service")
-            if not crypto_news_service.is_running():
-                logger.info("Starting crypto news service")
-                crypto_news_service.start_update_thread()
-            else:
-                logger.info("Crypto news service already running")
-        except Exception as e:
-            logger.error(f"Error starting crypto news service: {str(e)}")
-            # Continue with other services
-            
-        try:
-            # Start macro news service
-            logger.info("Attempting to start macro news service")
-            if not macro_news_service.is_running():
-                logger.info("Starting macro news service")
-                macro_news_service.start_update_thread()
-            else:
-                logger.info("Macro news service already running")
-        except Exception as e:
-            logger.error(f"Error starting macro news service: {str(e)}")
-            # Continue with other services
-            
-        try:
-            # Start reddit service
-            logger.info("Attempting to start reddit service")
-            if not reddit_service.is_running():
-                logger.info("Starting reddit service")
-                reddit_service.start_update_thread()
-            else:
-                logger.info("Reddit service already running")
-        except Exception as e:
-            logger.error(f"Error starting reddit service: {str(e)}")
-            # Continue with other services
+        # In multi-worker mode one worker runs the refreshers and the others
+        # apply the state it publishes
+        if cluster.enabled:
+            register_default_channels(cluster, market_service)
+            if not cluster.lock.try_acquire():
+                logger.info(f"Worker {os.getpid()} following the leader for background state")
+                app.state.follower_task = asyncio.create_task(
+                    cluster.follow(on_promoted=lambda: start_refreshers(market_service))
+                )
+                app.state.background_started = True
+                return
+        
+        await start_refreshers(market_service)
         
         # Skip the initial feed update to avoid blocking startup
         logger.info("Skipping initial feed update during startup to avoid blocking")
         logger.info("Use the refresh_news.py script to manually update feeds")
         
+        app.state.background_started = True
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
         # Continue startup process even if there's an error
         # This avoids a completely failed server startup
 
+async def start_refreshers(market_service):
+    """Register the background refreshers with the scheduler and start it"""
+    from app.services.scheduler_service import task_scheduler
+    # The legacy holdings file becomes the default user's ledger (once, on the leader)
+    from app.services.portfolio.ledgers import migrate_legacy_holdings
+    await asyncio.to_thread(migrate_legacy_holdings)
+    # Evaluate price alerts on every market data update; followers also see
+    # the updates, so alerts would fire once per worker if they evaluated too
+    from app.services.alerts import alert_service
+    market_service.add_update_listener(alert_service.on_market_update)
+    # Each refresh's prices become the day's close for the golden cross screen
+    from app.services.market.golden_cross import golden_cross_screener
+    market_service.add_update_listener(golden_cross_screener.on_market_update)
+    # In multi mode each refresh publishes its result to the other workers
+    task_scheduler.add_task(
+        "market_data", cluster.publishing("market_data", market_service._update_market_data),
+        interval_seconds=market_service.update_interval.total_seconds(),
+        start_immediately=True
+    )
+    # News refreshes are async workers: cancelled immediately on shutdown
+    task_scheduler.add_task("crypto_news", cluster.publishing("crypto_news", crypto_news_service.refresh),
+                            interval_seconds=10 * 60, start_immediately=True, jitter_seconds=30)
+    task_scheduler.add_task("macro_news", cluster.publishing("macro_news", macro_news_service.refresh),
+                            interval_seconds=15 * 60, start_immediately=True, jitter_seconds=30)
+    task_scheduler.add_task("reddit", cluster.publishing("reddit", reddit_service.refresh),
+                            interval_seconds=30 * 60, start_immediately=True, jitter_seconds=60)
+    # Screen the coin universe for golden crosses once per check interval
+    from app.config import settings as app_settings
+    task_scheduler.add_task("golden_cross", cluster.publishing("golden_cross", golden_cross_screener.run),
+                            interval_seconds=app_settings.GOLDEN_CROSS_CHECK_INTERVAL,
+                            start_immediately=True, executor="thread", jitter_seconds=60)
+    await task_scheduler.start()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     try:
-        # Stop the news services
-        logger.info("Stopping news services")
+        # Stop the warm-up if it is still running
+        warm_up_task = getattr(app.state, "warm_up_task", None)
+        if warm_up_task is not None and not warm_up_task.done():
+            warm_up_task.cancel()
         
-        if crypto_news_service.is_running():
-            crypto_news_service.stop_update_thread()
-            
-        if macro_news_service.is_running():
-            macro_news_service.stop_update_thread()
-            
-        if reddit_service.is_running():
-            reddit_service.stop_update_thread()
+        # Stop following the leader, and hand over leadership if we hold it
+        follower_task = getattr(app.state, "follower_task", None)
+        if follower_task is not None and not follower_task.done():
+            follower_task.cancel()
+        cluster.close()
+        
+        # Stop the background refreshers
+        logger.info("Stopping background tasks")
+        from app.services.scheduler_service import task_scheduler
+        if task_scheduler.is_running():
+            await task_scheduler.stop()
             
         logger.info("Application shutting down")
     except Exception as e:
@@ -8,9 +8,16 @@ from app.models.news import NewsItem, CryptoNewsItem, MacroNewsItem, SocialMedia
 from app.models.news import NewsResponse, CryptoNewsResponse, MacroNewsResponse, SocialMediaResponse
 from app.models.ai import MarketPrediction, SentimentAnalysis, MarketInsight, PortfolioRecommendation, AIAnalysisRequest
 
-# SQLAlchemy ORM models for database
-from app.models.entities import (
-    User, PortfolioEntity, HoldingEntity, TransactionEntity, WatchlistEntity, 
-    WatchlistItemEntity, AlertEntity, CryptoNewsEntity, MacroNewsEntity, 
-    SocialMediaEntity, MarketDataEntity
-) 
\ No newline at end of file
+# SQLAlchemy ORM models for database; importing SQLAlchemy is slow and the API
+# models above do not need it, so these are imported on first access
+_ENTITIES = (
+    "User", "PortfolioEntity", "HoldingEntity", "TransactionEntity", "WatchlistEntity",
+    "WatchlistItemEntity", "AlertEntity", "CryptoNewsEntity", "MacroNewsEntity",
+    "SocialMediaEntity", "MarketDataEntity"
+)
+
+def __getattr__(name):
+    if name in _ENTITIES:
+        from app.models import entities
+        return getattr(entities, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
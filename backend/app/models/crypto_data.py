@@ -43,8 +43,9 @@ class PriceHistory(Base):
         UniqueConstraint('crypto_id', 'timestamp', name='uix_crypto_timestamp'),
     )
     
-    # Relationship with crypto data
-    crypto = relationship("CryptoData", back_populates="price_history")
+    # Relationship with crypto data, eagerly joined so iterating history
+    # rows never issues one extra query per row
+    crypto = relationship("CryptoData", back_populates="price_history", lazy="joined")
     
     def __str__(self):
         return f"{self.crypto.symbol} - {self.price} at {self.timestamp}" 
\ No newline at end of file
@@ -51,6 +51,7 @@ class CryptoNewsResponse(BaseModel):
     total_count: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # cursor of the following page, if any
 
 class MacroNewsResponse(BaseModel):
     """Model for paginated macro news response"""
@@ -58,6 +59,7 @@ class MacroNewsResponse(BaseModel):
     total_count: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # cursor of the following page, if any
 
 class SocialMediaResponse(BaseModel):
     """Model for paginated social media response"""
@@ -14,6 +14,12 @@ class CryptoAsset(BaseModel):
     price_usd: float
     value_usd: float
     allocation_percentage: Optional[float] = None
+    cost_basis_usd: Optional[float] = None
+    unrealized_pnl_usd: Optional[float] = None
+    realized_pnl_usd: Optional[float] = None
+    change_24h_usd: Optional[float] = None
+    change_7d_usd: Optional[float] = None
+    change_30d_usd: Optional[float] = None
     last_updated: Optional[datetime] = None
 
     @validator('price_usd', 'value_usd', 'quantity')
@@ -28,6 +34,12 @@ class Portfolio(BaseModel):
     user_id: str
     assets: List[CryptoAsset]
     total_value_usd: float
+    total_cost_usd: Optional[float] = None
+    unrealized_pnl_usd: Optional[float] = None
+    realized_pnl_usd: Optional[float] = None
+    change_24h_pct: Optional[float] = None
+    change_7d_pct: Optional[float] = None
+    change_30d_pct: Optional[float] = None
     last_updated: datetime = Field(default_factory=datetime.now)
     
     class Config:
@@ -65,7 +77,7 @@ class Transaction(BaseModel):
     user_id: str
     symbol: str
     name: Optional[str] = None
-    transaction_type: str  # "buy" or "sell"
+    transaction_type: str  # "buy", "sell", "deposit" or "withdrawal"
     quantity: float
     price_usd: float
     value_usd: float
@@ -75,8 +87,8 @@ class Transaction(BaseModel):
     @validator('transaction_type')
     def validate_transaction_type(cls, v):
         """Validate transaction type"""
-        if v.lower() not in ['buy', 'sell']:
-            raise ValueError('Transaction type must be "buy" or "sell"')
+        if v.lower() not in ['buy', 'sell', 'deposit', 'withdrawal']:
+            raise ValueError('Transaction type must be "buy", "sell", "deposit" or "withdrawal"')
         return v.lower()
 
 class Watchlist(BaseModel):
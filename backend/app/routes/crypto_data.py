@@ -4,12 +4,12 @@ Routes for managing cryptocurrency data
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from typing import List, Dict
 import logging
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.market_data.coingecko_service import CoinGeckoService
 from app.models.crypto_data import CryptoData, PriceHistory
-from app.database import get_db
+from app.db.session import get_async_db
 
 router = APIRouter(prefix="/crypto", tags=["crypto"])
 logger = logging.getLogger(__name__)
@@ -17,7 +17,7 @@ logger = logging.getLogger(__name__)
 coingecko_service = CoinGeckoService()
 
 @router.post("/initialize")
-async def initialize_crypto_data(db: Session = Depends(get_db)):
+async def initialize_crypto_data(db: AsyncSession = Depends(get_async_db)):
     """Initialize or update crypto data"""
     logger.info("Starting crypto data initialization")
     await coingecko_service.update_crypto_data(db)
@@ -25,10 +25,10 @@ async def initialize_crypto_data(db: Session = Depends(get_db)):
     return {"status": "success", "message": "Crypto data initialization completed"}
 
 @router.get("/initialization-status")
-async def get_initialization_status(db: Session = Depends(get_db)) -> Dict:
+async def get_initialization_status(db: AsyncSession = Depends(get_async_db)) -> Dict:
     """Get the current status of crypto data initialization"""
-    total_coins = db.query(CryptoData).count()
-    total_coins_with_history = db.query(func.count(func.distinct(PriceHistory.crypto_id))).scalar()
+    total_coins = await db.scalar(select(func.count(CryptoData.id)))
+    total_coins_with_history = await db.scalar(select(func.count(func.distinct(PriceHistory.crypto_id))))
     
     if total_coins == 0:
         return {
@@ -48,16 +48,15 @@ async def get_initialization_status(db: Session = Depends(get_db)) -> Dict:
     }
 
 @router.get("/completed-coins")
-async def get_completed_coins(db: Session = Depends(get_db)):
+async def get_completed_coins(db: AsyncSession = Depends(get_async_db)):
     """Get list of all coins that have completed historical data download"""
     try:
         logger.info("Fetching list of coins with completed historical data")
         
-        # First get all coins that have price history
-        subquery = db.query(func.distinct(PriceHistory.crypto_id)).subquery()
-        
-        # Then get the coin details for those coins
-        coins = db.query(CryptoData).filter(CryptoData.id.in_(subquery)).all()
+        # Get the coin details for all coins that have price history
+        subquery = select(PriceHistory.crypto_id).distinct()
+        result = await db.execute(select(CryptoData).where(CryptoData.id.in_(subquery)))
+        coins = result.scalars().all()
         
         logger.info(f"Found {len(coins)} coins with completed historical data")
         return [{
@@ -71,11 +70,12 @@ async def get_completed_coins(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/coins")
-async def get_coins(db: Session = Depends(get_db)):
+async def get_coins(db: AsyncSession = Depends(get_async_db)):
     """Get list of all tracked coins"""
     try:
         logger.info("Fetching list of all coins")
-        coins = db.query(CryptoData).all()
+        result = await db.execute(select(CryptoData))
+        coins = result.scalars().all()
         logger.info(f"Found {len(coins)} coins")
         return [{"id": coin.id, "symbol": coin.symbol, "name": coin.name} for coin in coins]
     except Exception as e:
@@ -85,12 +85,12 @@ async def get_coins(db: Session = Depends(get_db)):
 @router.get("/coins/{coin_id}")
 async def get_coin_details(
     coin_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detailed information for a specific coin"""
     try:
         logger.info(f"Fetching details for coin: {coin_id}")
-        coin = db.query(CryptoData).filter(CryptoData.coin_id == coin_id).first()
+        coin = await db.scalar(select(CryptoData).where(CryptoData.coin_id == coin_id))
         if not coin:
             logger.warning(f"Coin not found: {coin_id}")
             raise HTTPException(status_code=404, detail="Coin not found")
@@ -116,21 +116,24 @@ async def get_coin_details(
 async def get_coin_price_history(
     coin_id: str,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get price history for a specific coin"""
     try:
         logger.info(f"Fetching price history for coin: {coin_id}")
-        coin = db.query(CryptoData).filter(CryptoData.coin_id == coin_id).first()
+        coin = await db.scalar(select(CryptoData).where(CryptoData.coin_id == coin_id))
         if not coin:
             logger.warning(f"Coin not found: {coin_id}")
             raise HTTPException(status_code=404, detail="Coin not found")
         
-        history = db.query(PriceHistory)\
-            .filter(PriceHistory.crypto == coin)\
-            .order_by(PriceHistory.timestamp.desc())\
-            .limit(limit)\
-            .all()
+        # Only the needed columns, served from the (crypto_id, timestamp) unique index
+        result = await db.execute(
+            select(PriceHistory.price, PriceHistory.timestamp)
+            .where(PriceHistory.crypto_id == coin.id)
+            .order_by(PriceHistory.timestamp.desc())
+            .limit(limit)
+        )
+        history = result.all()
         
         logger.info(f"Found {len(history)} price records for {coin.name}")
         return [{
@@ -1,35 +1,50 @@
 """
 Services initialization module
-"""
-# Order of imports matters for dependency resolution
-from app.services.market_data import MarketDataService
-from app.services.database import DatabaseService
-from app.services.news import crypto_news_service, macro_news_service, reddit_service
-from app.services.ai import AIService
 
+Importing a submodule (e.g. app.services.news.feed_fetcher) runs this file,
+so it must stay cheap: the shared service instances are registered with the
+service container and resolved on attribute access.
+"""
+from app.core.container import container
 from app.core.settings import USE_DATABASE
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
-# Create singleton instances (order matters for dependencies)
-market_data_service = MarketDataService()
-logger.info("Market data service initialized")
 
-# Initialize database service
-if USE_DATABASE:
-    logger.info("Database operations enabled, initializing database service")
-    db_service = DatabaseService()
-else:
-    logger.info("Database operations disabled, using mock database service")
-    db_service = DatabaseService()  # This will be the MockDatabaseService
+def _market_data_service():
+    from app.services.market_data import MarketDataService
+    return MarketDataService()
+
+
+def _db_service():
+    # With USE_DATABASE off this is the MockDatabaseService
+    from app.services.database import DatabaseService
+    if not USE_DATABASE:
+        logger.info("Database operations disabled, using mock database service")
+    return DatabaseService()
+
+
+def _ai_service():
+    from app.services.ai import AIService
+    return AIService()
+
+
+_SERVICES = {
+    "market_data_service": container.register("market_data", _market_data_service, warm_up=False),
+    "db_service": container.register("database", _db_service),
+    "ai_service": container.register("ai", _ai_service, warm_up=False),
+}
+
 
-# News services are initialized in their own module
-logger.info("News services loaded")
+def __getattr__(name):
+    if name in _SERVICES:
+        return _SERVICES[name]
+    if name in ("crypto_news_service", "macro_news_service", "reddit_service"):
+        from app.services import news
+        return getattr(news, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# AI service initialization
-ai_service = AIService()
-logger.info("AI service initialized")
 
 # Export the services
 __all__ = [
@@ -7,11 +7,13 @@ from app.services.ai.context_providers.base import BaseContextProvider
 from app.services.ai.context_providers.market import MarketContextProvider
 from app.services.ai.context_providers.news import NewsContextProvider
 from app.services.ai.context_providers.portfolio import PortfolioContextProvider
+from app.services.ai.context_providers.risk import RiskContextProvider
 
 # Export all context providers
 __all__ = [
     "BaseContextProvider",
     "MarketContextProvider", 
     "NewsContextProvider", 
-    "PortfolioContextProvider"
+    "PortfolioContextProvider",
+    "RiskContextProvider"
 ] 
\ No newline at end of file
@@ -12,6 +12,7 @@ from datetime import datetime
 
 from app.core.logging import get_logger
 from app.services.ai.context_providers.base import BaseContextProvider
+from app.services.market.snapshot_file import MarketSnapshotFile, snapshot_path
 from app.services.market_data import MarketDataService
 from app.services.coingecko import CoinGeckoService
 from app.services.ai.utils.keyword_extractor import extract_keywords_from_query
@@ -393,6 +394,21 @@ class MarketContextProvider(BaseContextProvider):
             List of market data for matching symbols or all data
         """
         try:
+            # Prefer the memory-mapped snapshot: no JSON parse, only the
+            # requested rows are turned into dictionaries
+            snapshot_file = snapshot_path(self.market_data_file)
+            if os.path.exists(snapshot_file):
+                try:
+                    snapshot = MarketSnapshotFile(snapshot_file)
+                    if symbols and len(snapshot):
+                        coins = snapshot.records(snapshot.find(symbols))
+                        logger.info(f"Found {len(coins)} coins in market snapshot matching requested symbols/names")
+                        return coins
+                    if len(snapshot):
+                        return snapshot.records()
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not read market snapshot, using JSON: {str(e)}")
+            
             if os.path.exists(self.market_data_file):
                 with open(self.market_data_file, 'r') as f:
                     data = json.load(f)
@@ -221,7 +221,7 @@ class NewsContextProvider(BaseContextProvider):
         for source, ratio in ratios.items():
             self.token_budgets[source] = int(total_budget * ratio)
         
-        logger.debug(f"Adjusted token budgets: {self.token_budgets}")
+        logger.debug("Adjusted token budgets: %s", self.token_budgets)
     
     async def _get_crypto_news(self, keywords: List[str], token_budget: int) -> List[Dict[str, Any]]:
         """
@@ -601,17 +601,17 @@ class NewsContextProvider(BaseContextProvider):
         
         # Clean the query but keep special terms intact
         clean = re.sub(r'[^\w\s]', ' ', query.lower())
-        logger.info(f"After cleaning punctuation: '{clean}'")
+        logger.debug("After cleaning punctuation: '%s'", clean)
         
         # Add back special terms
         for term in special_terms:
             if term not in clean:
                 clean += " " + term
-                logger.info(f"Added back special term: '{term}' -> '{clean}'")
+                logger.debug("Added back special term: '%s' -> '%s'", term, clean)
         
         # Tokenize: extract words, keeping special terms
         words = [w.strip() for w in clean.split() if w.strip()]
-        logger.info(f"Tokenized words: {words}")
+        logger.debug("Tokenized words: %s", words)
         
         # Filter tokens
         filtered_words = []
@@ -619,13 +619,13 @@ class NewsContextProvider(BaseContextProvider):
             # Always keep crypto symbols regardless of length
             if word.lower() in crypto_symbols:
                 filtered_words.append(word.lower())
-                logger.info(f"Keeping crypto symbol: {word}")
+                logger.debug("Keeping crypto symbol: %s", word)
                 continue
                 
             # Always keep special terms with dots or hyphens
             if "." in word or "-" in word:
                 filtered_words.append(word.lower())
-                logger.info(f"Keeping special term with dot/hyphen: {word}")
+                logger.debug("Keeping special term with dot/hyphen: %s", word)
                 continue
                 
             # Keep words that are at least 3 chars and not stop words
@@ -705,7 +705,7 @@ class NewsContextProvider(BaseContextProvider):
             if is_match:
                 matches.append(article)
                 checked_urls.add(url)
-                logger.info(f"News match found for terms [{', '.join(matching_terms)}]: {title}")
+                logger.debug("News match found for terms %s: %s", matching_terms, title)
                 
         # Then check macro news
         for category, articles in self.macro_news.items():
@@ -740,7 +740,7 @@ class NewsContextProvider(BaseContextProvider):
                 if is_match:
                     matches.append(article)
                     checked_urls.add(url)
-                    logger.info(f"Macro news match found for terms [{', '.join(matching_terms)}] in category {category}: {title}")
+                    logger.debug("Macro news match found for terms %s in category %s: %s", matching_terms, category, title)
         
         return matches 
 
@@ -0,0 +1,95 @@
+"""
+Risk context provider for AI queries
+"""
+import asyncio
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+from app.core.logging import get_logger
+from app.services.ai.context_providers.base import BaseContextProvider
+from app.services.portfolio.portfolio_service import PortfolioService
+from app.services.portfolio.risk_service import RiskService, risk_service as default_risk_service
+from app.services.portfolio.valuation import load_snapshot
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Fewer paths than the API default keep AI responses fast
+CONTEXT_SIMULATION_PATHS = 20_000
+
+class RiskContextProvider(BaseContextProvider):
+    """
+    Context provider for portfolio risk metrics.
+
+    Supplies volatility, beta, drawdown, concentration and VaR/CVaR figures
+    for the portfolio so risk answers are grounded in computed numbers.
+    """
+
+    def __init__(self, portfolio_service: PortfolioService = None, risk_service: Optional[RiskService] = None):
+        """Initialize the risk context provider"""
+        super().__init__()
+        self.portfolio_service = portfolio_service or PortfolioService()
+        self.risk_service = risk_service or default_risk_service
+        logger.info("Risk context provider initialized")
+
+    def _user_positions(self, positions: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Positions passed by the caller, or the service user's ledger positions"""
+        if positions is not None:
+            return positions
+        return self.portfolio_service.get_positions()
+
+    async def get_context(self, query: str, token_budget: int = 1500,
+                          positions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Get risk context for a query.
+
+        Args:
+            query: User's query text
+            token_budget: Maximum tokens to use
+            positions: The user's ledger positions (defaults to the service user's ledger)
+
+        Returns:
+            Dictionary containing risk metrics and VaR/CVaR
+        """
+        logger.info(f"Getting risk context for query: '{query}' with token budget: {token_budget}")
+
+        positions = self._user_positions(positions)
+        snapshot = load_snapshot(self.portfolio_service.market_data_service.market_data_file)
+
+        metrics = await asyncio.to_thread(self.risk_service.assess_positions, positions, snapshot)
+        var = await asyncio.to_thread(
+            self.risk_service.value_at_risk, positions, snapshot, CONTEXT_SIMULATION_PATHS
+        )
+
+        context = {
+            "metrics": metrics,
+            "value_at_risk": var,
+            "metadata": {
+                "query_time": datetime.now().isoformat()
+            }
+        }
+
+        # Per-asset detail is the first thing to go when over budget
+        if self.estimate_tokens(str(context)) > token_budget and metrics.get("assets"):
+            metrics["assets"] = metrics["assets"][:5]
+            context["metadata"]["truncated"] = True
+
+        return context
+
+    async def get_fallback_context(self, query: str, token_budget: int = 500,
+                                   positions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Get minimal risk context for fallback use.
+
+        Args:
+            query: User's query
+            token_budget: Maximum tokens to use
+            positions: The user's ledger positions (defaults to the service user's ledger)
+
+        Returns:
+            Dictionary with portfolio-level risk metrics only
+        """
+        positions = self._user_positions(positions)
+        snapshot = load_snapshot(self.portfolio_service.market_data_service.market_data_file)
+        metrics = await asyncio.to_thread(self.risk_service.assess_positions, positions, snapshot)
+        return {key: metrics.get(key) for key in ("available", "volatility", "beta_btc", "beta_market", "max_weight")}
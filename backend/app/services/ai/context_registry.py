@@ -9,6 +9,7 @@ from typing import Dict, List, Optional, Any, Type
 from enum import Enum
 
 from app.core.logging import get_logger
+from app.core.metrics import ai_stage
 from app.services.ai.intent_classifier import IntentType
 
 # Initialize logger
@@ -150,7 +151,8 @@ class ContextRegistry:
             # Get context from this provider
             try:
                 logger.info(f"Fetching context from provider {provider['id']} with {token_allocation} tokens")
-                context_data = await provider["instance"].get_context(query, token_allocation)
+                with ai_stage(f"context.{provider['id']}"):
+                    context_data = await provider["instance"].get_context(query, token_allocation)
                 
                 # Add to combined context, allowing override of same keys based on priority
                 if context_data:
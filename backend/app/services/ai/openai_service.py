@@ -3,7 +3,6 @@ import logging
 import os
 import json
 from typing import Dict, List, Any, Optional, Tuple
-from openai import AsyncOpenAI, OpenAI # type: ignore
 from dotenv import load_dotenv # type: ignore
 import sys
 from datetime import datetime
@@ -12,11 +11,14 @@ from datetime import datetime
 from app.services.ai.context_providers import (
     MarketContextProvider, 
     NewsContextProvider, 
-    PortfolioContextProvider
+    PortfolioContextProvider,
+    RiskContextProvider
 )
 
 # Import keyword extractor
 from app.services.ai.utils.keyword_extractor import extract_keywords_from_query
+from app.core.metrics import ai_stage
+from app.services.portfolio.ledgers import user_positions
 
 # Add correct paths for imports
 try:
@@ -108,6 +110,7 @@ class OpenAIService:
         self.market_context_provider = MarketContextProvider()
         self.news_context_provider = NewsContextProvider()
         self.portfolio_context_provider = PortfolioContextProvider()
+        self.risk_context_provider = RiskContextProvider(self.portfolio_context_provider.portfolio_service)
         
         # Initialize the intent classifier
         self.intent_classifier = IntentClassifier()
@@ -121,6 +124,9 @@ class OpenAIService:
         """Initialize OpenAI client with API key"""
         try:
             if self.api_key:
+                # The openai package is slow to import; only load it when a client is needed
+                from openai import AsyncOpenAI, OpenAI # type: ignore
+                
                 # Initialize both async and sync clients
                 self.client = OpenAI(api_key=self.api_key)
                 self.async_client = AsyncOpenAI(api_key=self.api_key)
@@ -158,7 +164,8 @@ class OpenAIService:
         try:
             # Format the context as text for the prompt
             if context:
-                context_text = self._format_context_for_prompt(context)
+                with ai_stage("prompt_formatting"):
+                    context_text = self._format_context_for_prompt(context)
                 
                 # Add context to the system message if present, or create a new system message
                 if messages and messages[0]["role"] == "system":
@@ -176,12 +183,13 @@ class OpenAIService:
                     context_sources.append(key)
                 
             logger.info(f"Calling OpenAI with model {model} and context sources: {context_sources}")
-            response = await self.async_client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            with ai_stage("llm_call"):
+                response = await self.async_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
             
             # Extract the response
             answer = response.choices[0].message.content
@@ -259,7 +267,8 @@ class OpenAIService:
                            query: str, 
                            conversation_id: str = None,
                            model: str = "gpt-4-turbo-preview",
-                           token_budget: int = 6000) -> Dict[str, Any]:
+                           token_budget: int = 6000,
+                           user_id: str = "user123") -> Dict[str, Any]:
         """
         Process a user query with appropriate context based on intent
         
@@ -268,6 +277,7 @@ class OpenAIService:
             conversation_id: Optional ID for conversation tracking
             model: Model to use for completion
             token_budget: Maximum tokens for context
+            user_id: User whose portfolio grounds the context
             
         Returns:
             Dictionary with response and metadata
@@ -279,15 +289,17 @@ class OpenAIService:
         
         try:
             # Extract keywords from query for better context retrieval
-            keywords = extract_keywords_from_query(query)
+            with ai_stage("keyword_extraction"):
+                keywords = extract_keywords_from_query(query)
             logger.info(f"Extracted keywords: {keywords}")
             
             # Classify the query to determine the appropriate prompt and context
-            intent_type, confidence = self.intent_classifier.classify(query)
+            with ai_stage("intent_classification"):
+                intent_type, confidence = self.intent_classifier.classify(query)
             logger.info(f"Classified query as {intent_type.name} with confidence {confidence:.2f}")
             
             # Get context based on intent type
-            context_data, context_sources = await self._get_context_for_intent(query, intent_type, token_budget)
+            context_data, context_sources = await self._get_context_for_intent(query, intent_type, token_budget, user_id)
             
             # Check if we have valid context data - early exit if missing critical context
             debug_enabled = os.getenv('DEBUG_AI', 'false').lower() == 'true'
@@ -305,7 +317,8 @@ class OpenAIService:
                     )
             
             # Format the context as text for the prompt
-            context_text = self._format_context_for_prompt(context_data)
+            with ai_stage("prompt_formatting"):
+                context_text = self._format_context_for_prompt(context_data)
             
             # Check if context is empty
             if not context_text or context_text.strip() == "":
@@ -320,7 +333,7 @@ class OpenAIService:
             
             # Get the appropriate prompt for this intent
             system_prompt = get_prompt_for_intent(intent_type)
-            logger.debug(f"Using prompt template for intent {intent_type.name}")
+            logger.debug("Using prompt template for intent %s", intent_type.name)
             
             # Create messages for the chat completion
             messages = [
@@ -330,12 +343,13 @@ class OpenAIService:
             
             # Make the API call
             logger.info(f"Calling OpenAI with model {model}, intent {intent_type.name}, and {len(context_sources)} context sources")
-            response = await self.async_client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1000
-            )
+            with ai_stage("llm_call"):
+                response = await self.async_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=1000
+                )
             
             # Extract the response
             answer = response.choices[0].message.content
@@ -378,7 +392,8 @@ class OpenAIService:
     async def _get_context_for_intent(self, 
                                      query: str, 
                                      intent_type: IntentType, 
-                                     token_budget: int) -> Tuple[Dict[str, Any], List[str]]:
+                                     token_budget: int,
+                                     user_id: str = "user123") -> Tuple[Dict[str, Any], List[str]]:
         """
         Get appropriate context data based on intent type
         
@@ -386,6 +401,7 @@ class OpenAIService:
             query: User's query text
             intent_type: Classified intent type
             token_budget: Maximum tokens for context
+            user_id: User whose ledger positions feed the risk context
             
         Returns:
             Tuple of (context_data, context_sources)
@@ -430,13 +446,14 @@ class OpenAIService:
         if intent_type in [IntentType.PORTFOLIO_ANALYSIS, IntentType.GENERAL_QUERY, 
                           IntentType.RISK_ASSESSMENT, IntentType.TAX_ANALYSIS]:
             try:
-                portfolio_context = await self.portfolio_context_provider.get_context(
-                    query=query, 
-                    token_budget=portfolio_budget
-                )
+                with ai_stage("context.portfolio"):
+                    portfolio_context = await self.portfolio_context_provider.get_context(
+                        query=query, 
+                        token_budget=portfolio_budget
+                    )
                 context_data["portfolio"] = portfolio_context
                 context_sources.append("portfolio")
-                logger.debug(f"Added portfolio context for intent {intent_type.name}")
+                logger.debug("Added portfolio context for intent %s", intent_type.name)
             except Exception as e:
                 logger.error(f"Error getting portfolio context: {str(e)}")
                 # Add fallback context if main context retrieval fails
@@ -447,11 +464,27 @@ class OpenAIService:
                     )
                     context_data["portfolio"] = portfolio_context
                     context_sources.append("portfolio_fallback")
-                    logger.debug(f"Added fallback portfolio context for intent {intent_type.name}")
+                    logger.debug("Added fallback portfolio context for intent %s", intent_type.name)
                 except Exception as fallback_err:
                     logger.error(f"Error getting fallback portfolio context: {str(fallback_err)}")
                     context_data["_meta"]["portfolio_error"] = str(e)
         
+        # Get risk metrics (volatility, beta, drawdown, VaR/CVaR) for risk questions
+        if intent_type == IntentType.RISK_ASSESSMENT:
+            try:
+                with ai_stage("context.risk"):
+                    risk_context = await self.risk_context_provider.get_context(
+                        query=query,
+                        token_budget=portfolio_budget,
+                        positions=user_positions(user_id)
+                    )
+                context_data["risk"] = risk_context
+                context_sources.append("risk")
+                logger.debug("Added risk context for intent %s", intent_type.name)
+            except Exception as e:
+                logger.error(f"Error getting risk context: {str(e)}")
+                context_data["_meta"]["risk_error"] = str(e)
+        
         # Get market context if relevant to the intent
         if intent_type in [IntentType.MARKET_PRICE, IntentType.MARKET_ANALYSIS, IntentType.GENERAL_QUERY, 
                           IntentType.TRADE_HISTORY, IntentType.TAX_ANALYSIS]:
@@ -459,14 +492,15 @@ class OpenAIService:
                 # Determine if we should include full market data
                 include_all = intent_type in [IntentType.MARKET_PRICE, IntentType.MARKET_ANALYSIS, IntentType.TRADE_HISTORY]
                 
-                market_context = await self.market_context_provider.get_context(
-                    query=query, 
-                    token_budget=market_budget,
-                    include_all=include_all
-                )
+                with ai_stage("context.market"):
+                    market_context = await self.market_context_provider.get_context(
+                        query=query, 
+                        token_budget=market_budget,
+                        include_all=include_all
+                    )
                 context_data["market"] = market_context
                 context_sources.append("market")
-                logger.debug(f"Added market context for intent {intent_type.name}")
+                logger.debug("Added market context for intent %s", intent_type.name)
             except Exception as e:
                 logger.error(f"Error getting market context: {str(e)}")
                 # Add fallback context if main context retrieval fails
@@ -477,7 +511,7 @@ class OpenAIService:
                     )
                     context_data["market"] = market_context
                     context_sources.append("market_fallback")
-                    logger.debug(f"Added fallback market context for intent {intent_type.name}")
+                    logger.debug("Added fallback market context for intent %s", intent_type.name)
                 except Exception as fallback_err:
                     logger.error(f"Error getting fallback market context: {str(fallback_err)}")
                     context_data["_meta"]["market_error"] = str(e)
@@ -486,14 +520,15 @@ class OpenAIService:
         if intent_type in [IntentType.NEWS_QUERY, IntentType.GENERAL_QUERY, 
                           IntentType.MARKET_PRICE, IntentType.MARKET_ANALYSIS]:
             try:
-                news_context = await self.news_context_provider.get_context(
-                    query=query, 
-                    token_budget=news_budget,
-                    intent_type=intent_type
-                )
+                with ai_stage("context.news"):
+                    news_context = await self.news_context_provider.get_context(
+                        query=query, 
+                        token_budget=news_budget,
+                        intent_type=intent_type
+                    )
                 context_data["news"] = news_context
                 context_sources.append("news")
-                logger.debug(f"Added news context for intent {intent_type.name}")
+                logger.debug("Added news context for intent %s", intent_type.name)
             except Exception as e:
                 logger.error(f"Error getting news context: {str(e)}")
                 # Add fallback context if main context retrieval fails
@@ -504,7 +539,7 @@ class OpenAIService:
                     )
                     context_data["news"] = news_context
                     context_sources.append("news_fallback")
-                    logger.debug(f"Added fallback news context for intent {intent_type.name}")
+                    logger.debug("Added fallback news context for intent %s", intent_type.name)
                 except Exception as fallback_err:
                     logger.error(f"Error getting fallback news context: {str(fallback_err)}")
                     context_data["_meta"]["news_error"] = str(e)
@@ -554,7 +589,7 @@ class OpenAIService:
         # Create an array to hold all the formatted sections
         formatted_sections = []
         
-        logger.debug(f"Formatting context data with keys: {list(context_data.keys())}")
+        logger.debug("Formatting context data with keys: %s", list(context_data.keys()))
         
         # Check for portfolio context
         if "portfolio" in context_data:
@@ -617,7 +652,7 @@ class OpenAIService:
                 portfolio_section += "No portfolio data available or unable to parse portfolio data.\n"
             
             formatted_sections.append(portfolio_section)
-            logger.debug(f"Added portfolio section: {len(portfolio_section)} chars")
+            logger.debug("Added portfolio section: %s chars", len(portfolio_section))
         
         # Check for market context
         if "market" in context_data:
@@ -684,7 +719,7 @@ class OpenAIService:
                 market_section += "No market data available or unable to parse market data.\n"
             
             formatted_sections.append(market_section)
-            logger.debug(f"Added market section: {len(market_section)} chars")
+            logger.debug("Added market section: %s chars", len(market_section))
         
         # Check for news context
         if "news" in context_data:
@@ -754,7 +789,7 @@ class OpenAIService:
                 news_section += f"Note: {news['fallback_message']}\n\n"
             
             formatted_sections.append(news_section)
-            logger.debug(f"Added news section: {len(news_section)} chars")
+            logger.debug("Added news section: %s chars", len(news_section))
         
         # Add metadata section if debug is enabled
         debug_enabled = os.getenv('DEBUG_AI', 'false').lower() == 'true'
@@ -842,6 +877,17 @@ class OpenAIService:
             max_tokens=2000
         )
         
+        # Register risk context provider
+        self.context_registry.register_provider(
+            provider_id="risk",
+            provider_instance=self.risk_context_provider,
+            supports_intents=[
+                IntentType.RISK_ASSESSMENT
+            ],
+            priority=ContextPriority.HIGH,
+            max_tokens=1500
+        )
+        
         # Register news context provider
         self.context_registry.register_provider(
             provider_id="news",
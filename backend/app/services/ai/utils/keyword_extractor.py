@@ -3,8 +3,8 @@ Unified keyword extractor for AI services
 """
 import re
 import logging
+import threading
 from typing import List, Set, Dict, Any, Optional
-import spacy # type: ignore
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -120,8 +120,27 @@ def extract_time_keywords(query: str) -> List[str]:
     
     return time_keywords
 
-# Add spaCy model
-nlp = spacy.load("en_core_web_sm")
+# spaCy and its model take seconds to load, so they are loaded on first use
+# (or by the startup warm-up) instead of on import
+SPACY_MODEL = "en_core_web_sm"
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """
+    The spaCy pipeline, loaded once
+
+    Returns:
+        spaCy Language object
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy # type: ignore
+                _nlp = spacy.load(SPACY_MODEL)
+                logger.info(f"Loaded spaCy model {SPACY_MODEL}")
+    return _nlp
 
 def extract_keywords_from_query(query: str) -> List[str]:
     """
@@ -129,7 +148,7 @@ def extract_keywords_from_query(query: str) -> List[str]:
     """
     try:
         # Process the text with spaCy
-        doc = nlp(query.lower())
+        doc = get_nlp()(query.lower())
         
         # Extract relevant tokens (nouns, proper nouns, and certain verbs)
         keywords = []
@@ -189,7 +208,7 @@ def filter_content_by_keywords(content: Dict[str, Any], keywords: List[str]) ->
         try:
             pattern = r'\b' + re.escape(keyword_lower) + r'\b'
             if re.search(pattern, combined_text):
-                logger.debug(f"Word boundary match found for keyword '{keyword_lower}'")
+                logger.debug("Word boundary match found for keyword '%s'", keyword_lower)
                 return True
         except re.error:
             # Fallback to simple contains for complex patterns
@@ -197,7 +216,7 @@ def filter_content_by_keywords(content: Dict[str, Any], keywords: List[str]) ->
             
         # Check for simple contains as fallback
         if keyword_lower in combined_text:
-            logger.debug(f"Simple contains match found for keyword '{keyword_lower}'")
+            logger.debug("Simple contains match found for keyword '%s'", keyword_lower)
             return True
             
         # For shorter keywords (e.g., BTC), be more strict about matching
@@ -205,7 +224,7 @@ def filter_content_by_keywords(content: Dict[str, Any], keywords: List[str]) ->
             # Only match if it's a standalone token
             for token in combined_text.split():
                 if token == keyword_lower:
-                    logger.debug(f"Exact token match for short keyword '{keyword_lower}'")
+                    logger.debug("Exact token match for short keyword '%s'", keyword_lower)
                     return True
     
     return False 
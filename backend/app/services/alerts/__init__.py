@@ -0,0 +1,8 @@
+"""
+Price and signal alert services
+"""
+from app.services.alerts.engine import AlertEngine
+from app.services.alerts.store import SQLiteAlertStore
+from app.services.alerts.service import AlertService, alert_service
+
+__all__ = ["AlertEngine", "SQLiteAlertStore", "AlertService", "alert_service"]
@@ -0,0 +1,252 @@
+"""
+Alert evaluation engine
+
+Active rules are indexed per (symbol, metric, direction) in NumPy arrays of
+thresholds kept in ascending order:
+
+- "above" rules (PRICE_ABOVE, positive PERCENT_CHANGE, TECHNICAL_SIGNAL)
+  fire when the observed value is >= threshold. The rules that fire are
+  always a prefix of the sorted array.
+- "below" rules (PRICE_BELOW, negative PERCENT_CHANGE) fire when the
+  observed value is <= threshold. The rules that fire are always a suffix.
+
+One binary search per bucket therefore finds every triggered rule in
+O(log n + k), and removing the k triggered one-shot rules is an O(1) slice.
+New rules are buffered and merged into their bucket at the next
+evaluation.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ALERT_TYPES = ("PRICE_ABOVE", "PRICE_BELOW", "PERCENT_CHANGE", "TECHNICAL_SIGNAL")
+
+# Snapshot metric each alert type is evaluated against
+METRIC_PRICE = "price"
+METRIC_CHANGE_24H = "change_24h"
+METRIC_SIGNAL = "signal"
+
+
+def _field(alert: Any, name: str, default: Any = None) -> Any:
+    """Read a field from a dict, AlertEntity or MarketAlert"""
+    if isinstance(alert, Mapping):
+        return alert.get(name, default)
+    return getattr(alert, name, default)
+
+
+def rule_key(alert_type: str, value: float) -> Tuple[str, str]:
+    """
+    Map an alert type and value to the (metric, direction) it is indexed under
+
+    Args:
+        alert_type: One of ALERT_TYPES
+        value: Alert threshold
+
+    Returns:
+        Tuple of metric name and "above"/"below"
+    """
+    if alert_type == "PRICE_ABOVE":
+        return METRIC_PRICE, "above"
+    if alert_type == "PRICE_BELOW":
+        return METRIC_PRICE, "below"
+    if alert_type == "PERCENT_CHANGE":
+        return METRIC_CHANGE_24H, "above" if value >= 0 else "below"
+    if alert_type == "TECHNICAL_SIGNAL":
+        return METRIC_SIGNAL, "above"
+    raise ValueError(f"Unsupported alert type: {alert_type!r}")
+
+
+@dataclass
+class _Bucket:
+    """Sorted thresholds and rule slots for one (symbol, metric, direction)"""
+    thresholds: np.ndarray
+    slots: np.ndarray
+    pending_thresholds: List[float]
+    pending_slots: List[int]
+
+    def merge_pending(self) -> None:
+        """Merge buffered rules into the sorted arrays"""
+        if not self.pending_slots:
+            return
+        thresholds = np.concatenate([self.thresholds, np.asarray(self.pending_thresholds, dtype=np.float64)])
+        slots = np.concatenate([self.slots, np.asarray(self.pending_slots, dtype=np.int64)])
+        order = np.argsort(thresholds, kind="stable")
+        self.thresholds, self.slots = thresholds[order], slots[order]
+        self.pending_thresholds, self.pending_slots = [], []
+
+    def __len__(self) -> int:
+        return len(self.slots) + len(self.pending_slots)
+
+
+class AlertEngine:
+    """Indexes active alert rules and finds crossed thresholds per market update"""
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str, str], _Bucket] = {}
+        # Rule records by slot; a removed or triggered rule leaves None behind
+        self._rules: List[Optional[Dict[str, Any]]] = []
+        self._slot_by_id: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def __contains__(self, alert_id: str) -> bool:
+        return str(alert_id) in self._slot_by_id
+
+    @property
+    def cleared_slots(self) -> int:
+        """Slots of removed or triggered rules that compact() would reclaim"""
+        return len(self._rules) - len(self._slot_by_id)
+
+    def add_rule(self, alert: Any) -> None:
+        """
+        Index an active alert rule
+
+        Args:
+            alert: Dict, AlertEntity or MarketAlert with id, user_id, symbol,
+                alert_type and value. Triggered alerts are ignored.
+        """
+        if _field(alert, "triggered", False):
+            return
+        alert_id = str(_field(alert, "id"))
+        if alert_id in self._slot_by_id:
+            self.remove_rule(alert_id)
+
+        symbol = (_field(alert, "symbol") or "").upper()
+        alert_type = (_field(alert, "alert_type") or "").upper()
+        value = float(_field(alert, "value"))
+        metric, direction = rule_key(alert_type, value)
+
+        slot = len(self._rules)
+        self._rules.append({
+            "id": alert_id,
+            "user_id": _field(alert, "user_id"),
+            "symbol": symbol,
+            "alert_type": alert_type,
+            "value": value,
+            "message": _field(alert, "message"),
+        })
+        self._slot_by_id[alert_id] = slot
+
+        key = (symbol, metric, direction)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(np.empty(0), np.empty(0, dtype=np.int64), [], [])
+        bucket.pending_thresholds.append(value)
+        bucket.pending_slots.append(slot)
+
+    def add_rules(self, alerts: Iterable[Any]) -> int:
+        """Index many rules; returns the number of active rules afterwards"""
+        for alert in alerts:
+            self.add_rule(alert)
+        return len(self)
+
+    def remove_rule(self, alert_id: str) -> bool:
+        """
+        Deactivate a rule
+
+        The slot is cleared immediately and its threshold is skipped (and
+        dropped) the next time its bucket fires.
+
+        Args:
+            alert_id: Alert ID
+
+        Returns:
+            True if the rule was active
+        """
+        slot = self._slot_by_id.pop(str(alert_id), None)
+        if slot is None:
+            return False
+        self._rules[slot] = None
+        return True
+
+    def evaluate(self, observations: Mapping[str, Mapping[str, float]],
+                 now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Find and retire every rule crossed by the observed values
+
+        Args:
+            observations: Metric values keyed by symbol, e.g.
+                {"BTC": {"price": 65000.0, "change_24h": 2.5}}
+            now: Trigger timestamp (default: now)
+
+        Returns:
+            Triggered alerts with the observed value and trigger time
+        """
+        triggered_at = (now or datetime.now()).isoformat()
+        triggers: List[Dict[str, Any]] = []
+
+        for (symbol, metric, direction), bucket in self._buckets.items():
+            observed = observations.get(symbol, {}).get(metric)
+            if observed is None or not np.isfinite(observed):
+                continue
+            bucket.merge_pending()
+            if not len(bucket.slots):
+                continue
+
+            if direction == "above":
+                count = int(np.searchsorted(bucket.thresholds, observed, side="right"))
+                fired = bucket.slots[:count]
+                bucket.thresholds, bucket.slots = bucket.thresholds[count:], bucket.slots[count:]
+            else:
+                start = int(np.searchsorted(bucket.thresholds, observed, side="left"))
+                fired = bucket.slots[start:]
+                bucket.thresholds, bucket.slots = bucket.thresholds[:start], bucket.slots[:start]
+
+            for slot in fired.tolist():
+                rule = self._rules[slot]
+                if rule is None:
+                    continue
+                self._rules[slot] = None
+                del self._slot_by_id[rule["id"]]
+                triggers.append(dict(rule, observed=float(observed), triggered_at=triggered_at,
+                                     message=rule["message"] or _default_message(rule, observed)))
+
+        if triggers:
+            logger.info(f"{len(triggers)} alerts triggered, {len(self)} still active")
+        return triggers
+
+    def compact(self) -> None:
+        """Drop cleared slots and renumber; call occasionally after heavy churn"""
+        active = [rule for rule in self._rules if rule is not None]
+        self._buckets.clear()
+        self._rules = []
+        self._slot_by_id = {}
+        self.add_rules(active)
+
+
+def _default_message(rule: Mapping[str, Any], observed: float) -> str:
+    """Human-readable trigger message"""
+    alert_type = rule["alert_type"]
+    if alert_type == "PRICE_ABOVE":
+        return f"{rule['symbol']} price {observed:,.6g} is above {rule['value']:,.6g}"
+    if alert_type == "PRICE_BELOW":
+        return f"{rule['symbol']} price {observed:,.6g} is below {rule['value']:,.6g}"
+    if alert_type == "PERCENT_CHANGE":
+        return f"{rule['symbol']} moved {observed:+.2f}% in 24h (threshold {rule['value']:+.2f}%)"
+    return f"{rule['symbol']} technical signal {observed:g} reached {rule['value']:g}"
+
+
+def observations_from_snapshot(snapshot, signals: Optional[Mapping[str, float]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Build evaluation inputs from a MarketSnapshot
+
+    Args:
+        snapshot: app.services.portfolio.valuation.MarketSnapshot
+        signals: Optional technical signal strength keyed by symbol
+
+    Returns:
+        Metric values keyed by symbol
+    """
+    observations = {
+        symbol: {METRIC_PRICE: price, METRIC_CHANGE_24H: change}
+        for symbol, price, change in zip(snapshot.symbols, snapshot.prices.tolist(), snapshot.changes["24h"].tolist())
+    }
+    for symbol, strength in (signals or {}).items():
+        observations.setdefault(symbol.upper(), {})[METRIC_SIGNAL] = float(strength)
+    return observations
@@ -0,0 +1,141 @@
+"""
+Alert service
+
+Loads active rules into the AlertEngine once, evaluates them on every market
+data update and records the triggers in a batch.
+
+Only one worker evaluates alerts (the leader in multi-worker mode). Rules
+created or deleted through any worker reach its engine through the store's
+change log, which is replayed before each evaluation.
+"""
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from app.core.settings import DATA_DIR
+from app.services.portfolio.valuation import MarketSnapshot
+from .engine import AlertEngine, observations_from_snapshot, rule_key
+from .store import SQLiteAlertStore
+
+logger = logging.getLogger(__name__)
+
+ALERTS_DB_PATH = os.getenv("ALERTS_DB_PATH", os.path.join(DATA_DIR, "alerts.db"))
+
+# Compact the engine once cleared slots outnumber active rules and this floor
+COMPACT_MIN_CLEARED = 1024
+
+# Evaluated only when signals are passed to evaluate_snapshot, which market
+# updates don't do, so new rules of these types are rejected
+UNSUPPORTED_ALERT_TYPES = ("TECHNICAL_SIGNAL",)
+
+
+class AlertService:
+    """Keeps the alert engine in sync with the alert store"""
+
+    def __init__(self, store: Optional[SQLiteAlertStore] = None):
+        self._store = store
+        self.engine = AlertEngine()
+        self.lock = threading.Lock()
+        self._loaded = False
+        # Last store change reflected in the engine
+        self._change_seq = 0
+        self.trigger_listeners: List[Callable[[List[Dict[str, Any]]], Any]] = []
+
+    @property
+    def store(self) -> SQLiteAlertStore:
+        """Alert store, created on first use"""
+        if self._store is None:
+            self._store = SQLiteAlertStore(ALERTS_DB_PATH)
+        return self._store
+
+    def load(self) -> int:
+        """Index all active rules from the store (idempotent)"""
+        with self.lock:
+            if not self._loaded:
+                # Changes logged from here on are replayed; replaying one already loaded is harmless
+                self._change_seq = self.store.last_change()
+                count = self.engine.add_rules(self.store.iter_active())
+                self._loaded = True
+                logger.info(f"Alert engine loaded {count} active rules")
+            return len(self.engine)
+
+    def create_alert(self, alert: Mapping[str, Any]) -> Dict[str, Any]:
+        """Validate, store and index a new alert rule"""
+        alert_type = (alert.get("alert_type") or "").upper()
+        if alert_type in UNSUPPORTED_ALERT_TYPES:
+            raise ValueError(f"{alert_type} alerts are not supported: market updates carry no technical signals")
+        rule_key(alert_type, float(alert["value"]))
+        self.load()
+        record = self.store.add(alert)
+        with self.lock:
+            self.engine.add_rule(record)
+        return record
+
+    def delete_alert(self, alert_id: str) -> bool:
+        """Remove an alert rule from the store and the engine"""
+        self.load()
+        with self.lock:
+            self.engine.remove_rule(alert_id)
+            self._compact_if_sparse()
+        return self.store.delete(alert_id)
+
+    def evaluate_snapshot(self, snapshot: MarketSnapshot, signals: Optional[Mapping[str, float]] = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate all rules against a market snapshot and record triggers
+
+        Args:
+            snapshot: Current market snapshot
+            signals: Optional technical signal strength keyed by symbol
+
+        Returns:
+            Triggered alerts
+        """
+        self.load()
+        self.apply_changes()
+        with self.lock:
+            triggers = self.engine.evaluate(observations_from_snapshot(snapshot, signals))
+            self._compact_if_sparse()
+        if triggers:
+            self.store.mark_triggered(triggers)
+            for listener in self.trigger_listeners:
+                try:
+                    listener(triggers)
+                except Exception as e:
+                    logger.error(f"Error in alert trigger listener: {str(e)}")
+        return triggers
+
+    def apply_changes(self) -> int:
+        """
+        Replay rule changes logged by any worker since the last replay
+
+        Returns:
+            Number of changes replayed
+        """
+        with self.lock:
+            seq, changes = self.store.changes_since(self._change_seq)
+            for op, alert_id, rule in changes:
+                if op == "delete":
+                    self.engine.remove_rule(alert_id)
+                elif rule is not None and alert_id not in self.engine:
+                    self.engine.add_rule(rule)
+            self._change_seq = seq
+        if changes:
+            self.store.prune_changes(seq)
+        return len(changes)
+
+    def _compact_if_sparse(self) -> None:
+        """Reclaim cleared engine slots after heavy churn (caller holds the lock)"""
+        cleared = self.engine.cleared_slots
+        if cleared > max(COMPACT_MIN_CLEARED, len(self.engine)):
+            self.engine.compact()
+            logger.info(f"Compacted alert engine: dropped {cleared} cleared slots, {len(self.engine)} rules active")
+
+    async def on_market_update(self, market_data: Mapping[str, Any]) -> None:
+        """MarketDataService update listener"""
+        snapshot = MarketSnapshot.from_market_data(market_data)
+        await asyncio.to_thread(self.evaluate_snapshot, snapshot)
+
+
+alert_service = AlertService()
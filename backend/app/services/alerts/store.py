@@ -0,0 +1,182 @@
+"""
+SQLite persistence for alert rules
+
+Uses the AlertEntity layout of the alerts table. Triggers from one market
+update are written in a single transaction with executemany.
+
+Every create and delete is also appended to an alert_changes log in the same
+transaction. Workers share the database file, so the worker that evaluates
+alerts replays the log to pick up rules changed through the other workers.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when loading active rules
+LOAD_BATCH_SIZE = 50_000
+
+
+class SQLiteAlertStore:
+    """Alert rules stored in an SQLite alerts table"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS alerts (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    symbol TEXT,
+                    alert_type TEXT,
+                    value REAL,
+                    triggered BOOLEAN DEFAULT 0,
+                    created_at TIMESTAMP,
+                    triggered_at TIMESTAMP,
+                    message TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_alerts_symbol ON alerts (symbol)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_alerts_user_id ON alerts (user_id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS alert_changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    alert_id TEXT NOT NULL,
+                    op TEXT NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def add(self, alert: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a new alert rule
+
+        Args:
+            alert: Dictionary with user_id, symbol, alert_type, value and optional message
+
+        Returns:
+            The stored rule including its ID
+        """
+        record = {
+            "id": alert.get("id") or str(uuid.uuid4()),
+            "user_id": alert.get("user_id"),
+            "symbol": (alert.get("symbol") or "").upper(),
+            "alert_type": (alert.get("alert_type") or "").upper(),
+            "value": float(alert["value"]),
+            "triggered": False,
+            "created_at": (alert.get("created_at") or datetime.now()),
+            "triggered_at": None,
+            "message": alert.get("message"),
+        }
+        if isinstance(record["created_at"], datetime):
+            record["created_at"] = record["created_at"].isoformat()
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO alerts (id, user_id, symbol, alert_type, value, triggered, created_at, message) "
+                "VALUES (:id, :user_id, :symbol, :alert_type, :value, 0, :created_at, :message)",
+                record
+            )
+            conn.execute("INSERT INTO alert_changes (alert_id, op) VALUES (?, 'add')", (record["id"],))
+        return record
+
+    def iter_active(self) -> Iterator[Dict[str, Any]]:
+        """Stream all untriggered rules in batches"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(
+                "SELECT id, user_id, symbol, alert_type, value, message FROM alerts WHERE triggered = 0"
+            )
+            while True:
+                rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+
+    def list_for_user(self, user_id: str, include_triggered: bool = True) -> List[Dict[str, Any]]:
+        """Get a user's alerts, newest first"""
+        query = "SELECT * FROM alerts WHERE user_id = ?"
+        if not include_triggered:
+            query += " AND triggered = 0"
+        query += " ORDER BY created_at DESC"
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query, (user_id,))]
+
+    def delete(self, alert_id: str) -> bool:
+        """Delete an alert rule"""
+        with self.lock, self._connect() as conn:
+            deleted = conn.execute("DELETE FROM alerts WHERE id = ?", (alert_id,)).rowcount > 0
+            if deleted:
+                conn.execute("INSERT INTO alert_changes (alert_id, op) VALUES (?, 'delete')", (alert_id,))
+            return deleted
+
+    def last_change(self) -> int:
+        """Sequence number of the latest logged change (0 if none)"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM alert_changes").fetchone()[0]
+
+    def changes_since(self, seq: int) -> Tuple[int, List[Tuple[str, str, Optional[Dict[str, Any]]]]]:
+        """
+        Rule changes logged after a sequence number
+
+        Args:
+            seq: Last change already applied
+
+        Returns:
+            Tuple of (latest sequence number, [(op, alert_id, rule)]) where
+            op is "add" or "delete" and rule is the active rule for adds
+            (None if it has since been deleted or triggered)
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT c.seq, c.op, c.alert_id, a.user_id, a.symbol, a.alert_type, a.value, a.message "
+                "FROM alert_changes c LEFT JOIN alerts a ON a.id = c.alert_id AND a.triggered = 0 "
+                "WHERE c.seq > ? ORDER BY c.seq", (seq,)
+            ).fetchall()
+        changes = []
+        for row in rows:
+            rule = None
+            if row["op"] == "add" and row["symbol"] is not None:
+                rule = {"id": row["alert_id"], "user_id": row["user_id"], "symbol": row["symbol"],
+                        "alert_type": row["alert_type"], "value": row["value"], "message": row["message"]}
+            changes.append((row["op"], row["alert_id"], rule))
+        return (rows[-1]["seq"] if rows else seq), changes
+
+    def prune_changes(self, seq: int) -> None:
+        """Drop logged changes up to a sequence number once they were applied"""
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM alert_changes WHERE seq <= ?", (seq,))
+
+    def mark_triggered(self, triggers: List[Mapping[str, Any]]) -> int:
+        """
+        Record triggered alerts in one transaction
+
+        Args:
+            triggers: Triggers returned by AlertEngine.evaluate
+
+        Returns:
+            Number of rows updated
+        """
+        if not triggers:
+            return 0
+        with self.lock, self._connect() as conn:
+            cursor = conn.executemany(
+                "UPDATE alerts SET triggered = 1, triggered_at = ?, message = ? WHERE id = ?",
+                [(trigger["triggered_at"], trigger["message"], trigger["id"]) for trigger in triggers]
+            )
+            updated = cursor.rowcount
+        logger.info(f"Recorded {updated} triggered alerts")
+        return updated
@@ -0,0 +1,127 @@
+# backend/app/services/blockchain/balances.py
+"""
+Batched ETH and ERC20 balance reader
+
+All balances of a refresh are read at one block: one eth_blockNumber call,
+then every eth_getBalance and balanceOf eth_call for all wallets and tokens
+goes out in JSON-RPC batches. Token decimals never change and are fetched
+once; a token whose decimals could not be read is left out of the read and
+tried again next time. Results are cached by block number, so repeated reads within the same
+block (e.g. several API requests during one ~12s slot) cost one
+eth_blockNumber call.
+"""
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.core.metrics import cache_lookup
+from app.services.blockchain.rpc import JsonRpcClient, JsonRpcError
+
+logger = logging.getLogger(__name__)
+
+# Function selectors
+BALANCE_OF_SELECTOR = "0x70a08231"
+DECIMALS_SELECTOR = "0x313ce567"
+
+# Blocks kept in the balance cache
+CACHE_BLOCKS = 4
+
+NATIVE_SYMBOL = "eth"
+NATIVE_DECIMALS = 18
+
+
+def encode_address(address: str) -> str:
+    """ABI-encode an address as a 32-byte word (hex, no prefix)"""
+    return address.lower().replace("0x", "").rjust(64, "0")
+
+
+def decode_uint(value: Optional[str]) -> int:
+    """Decode a hex quantity or 32-byte word ("0x" decodes to 0)"""
+    if not value or value == "0x":
+        return 0
+    return int(value, 16)
+
+
+class BalanceReader:
+    """Reads balances for many wallets and tokens in a few round trips"""
+
+    def __init__(self, rpc: JsonRpcClient):
+        self.rpc = rpc
+        self.decimals: Dict[str, int] = {}
+        # block number -> {(wallet, symbol): balance}
+        self._cache: "OrderedDict[int, Dict[Tuple[str, str], float]]" = OrderedDict()
+
+    async def _load_decimals(self, tokens: Mapping[str, str]) -> None:
+        missing = [symbol for symbol in tokens if symbol not in self.decimals]
+        if not missing:
+            return
+        results = await self.rpc.batch([
+            ("eth_call", [{"to": tokens[symbol], "data": DECIMALS_SELECTOR}, "latest"]) for symbol in missing
+        ])
+        for symbol, result in zip(missing, results):
+            if isinstance(result, JsonRpcError):
+                logger.warning(f"Could not read decimals for {symbol}, skipping it: {result}")
+            else:
+                self.decimals[symbol] = decode_uint(result)
+
+    async def read(self, wallets: Iterable[str], tokens: Mapping[str, str],
+                   block: Optional[int] = None) -> Tuple[int, Dict[str, Dict[str, float]]]:
+        """
+        Read ETH and token balances for every wallet
+
+        Args:
+            wallets: Wallet addresses
+            tokens: Token contract address keyed by symbol
+            block: Block to read at (default: latest)
+
+        Returns:
+            Tuple of (block number, {wallet: {symbol: balance}})
+        """
+        wallets = list(wallets)
+        if block is None:
+            block = decode_uint(await self.rpc.call("eth_blockNumber"))
+        await self._load_decimals(tokens)
+        symbols = [NATIVE_SYMBOL, *(symbol for symbol in tokens if symbol in self.decimals)]
+
+        cached = self._cache.get(block, {})
+        pairs: List[Tuple[str, str]] = [
+            (wallet, symbol) for wallet in wallets for symbol in symbols
+            if (wallet, symbol) not in cached
+        ]
+        cache_lookup("balances", not pairs)
+        if pairs:
+            block_tag = hex(block)
+            calls = [
+                ("eth_getBalance", [wallet, block_tag]) if symbol == NATIVE_SYMBOL else
+                ("eth_call", [{"to": tokens[symbol], "data": BALANCE_OF_SELECTOR + encode_address(wallet)}, block_tag])
+                for wallet, symbol in pairs
+            ]
+            results = await self.rpc.batch(calls)
+            fresh = dict(cached)
+            for (wallet, symbol), result in zip(pairs, results):
+                if isinstance(result, JsonRpcError):
+                    logger.warning(f"Error reading {symbol} balance of {wallet}: {result}")
+                    continue
+                decimals = NATIVE_DECIMALS if symbol == NATIVE_SYMBOL else self.decimals[symbol]
+                fresh[(wallet, symbol)] = decode_uint(result) / 10 ** decimals
+            self._cache[block] = cached = fresh
+            self._cache.move_to_end(block)
+            while len(self._cache) > CACHE_BLOCKS:
+                self._cache.popitem(last=False)
+
+        balances: Dict[str, Dict[str, float]] = {wallet: {} for wallet in wallets}
+        for wallet in wallets:
+            for symbol in symbols:
+                amount = cached.get((wallet, symbol))
+                if amount:
+                    balances[wallet][symbol] = amount
+        return block, balances
+
+    async def read_totals(self, wallets: Iterable[str], tokens: Mapping[str, str]) -> Dict[str, float]:
+        """Balances summed across wallets, keyed by symbol"""
+        _, balances = await self.read(wallets, tokens)
+        totals: Dict[str, float] = {}
+        for wallet_balances in balances.values():
+            for symbol, amount in wallet_balances.items():
+                totals[symbol] = totals.get(symbol, 0.0) + amount
+        return totals
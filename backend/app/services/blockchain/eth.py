@@ -1,12 +1,16 @@
 # backend/app/services/blockchain/eth.py
 import logging
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import asyncio
 from datetime import datetime, timedelta
 import random
 
 from app.config import settings
+from app.services.blockchain.rpc import JsonRpcClient
+from app.services.blockchain.balances import BalanceReader
+from app.services.blockchain.scanner import TransferScanner
+from app.core.settings import DATA_DIR
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,12 @@ class EthereumService:
         # List of tracked wallet addresses
         self.wallet_addresses = self._get_wallet_addresses()
         
+        # Batched JSON-RPC balance reader, if an RPC endpoint is configured
+        self.provider_url = getattr(settings, "ETHEREUM_RPC_URL", None) or os.getenv("ETHEREUM_RPC_URL", "")
+        self.rpc = JsonRpcClient(self.provider_url) if self.provider_url else None
+        self.balance_reader = BalanceReader(self.rpc) if self.rpc else None
+        self._scanner = None
+        
         # Common ERC20 token ABIs for balance checking
         self.erc20_abi = [
             {
@@ -60,7 +70,7 @@ class EthereumService:
     def _get_wallet_addresses(self) -> List[str]:
         """Get tracked wallet addresses from environment or configuration"""
         # In a real app, these would be stored in a database
-        wallet_env = settings.ETH_WALLET_ADDRESSES
+        wallet_env = getattr(settings, "ETH_WALLET_ADDRESSES", None) or os.getenv("ETH_WALLET_ADDRESSES", "")
         if wallet_env:
             return [addr.strip() for addr in wallet_env.split(",")]
         
@@ -73,9 +83,11 @@ class EthereumService:
     async def get_balances(self) -> Dict[str, float]:
         """Get ETH and token balances for all tracked wallets"""
         try:
-            # In a real application, this would query the Ethereum blockchain
-            # For now, return mock data
+            if self.balance_reader is not None:
+                # One batched read across all wallets and tokens at the latest block
+                return await self.balance_reader.read_totals(self.wallet_addresses, self.token_addresses)
             
+            # Without an RPC endpoint, return mock data
             return {
                 "eth": 1.25,
                 "usdt": 500,
@@ -100,6 +112,7 @@ class EthereumService:
             mock_transactions = [
                 {
                     "id": "0x1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef",
+                    "block_number": 19500300,
                     "timestamp": int((datetime.now() - timedelta(days=7)).timestamp() * 1000),
                     "symbol": "ETH",
                     "type": "transfer",
@@ -113,6 +126,7 @@ class EthereumService:
                 },
                 {
                     "id": "0xabcdef1234567890abcdef1234567890abcdef1234567890abcdef1234567890",
+                    "block_number": 19450200,
                     "timestamp": int((datetime.now() - timedelta(days=14)).timestamp() * 1000),
                     "symbol": "USDT",
                     "type": "transfer",
@@ -126,6 +140,7 @@ class EthereumService:
                 },
                 {
                     "id": "0x9876543210abcdef9876543210abcdef9876543210abcdef9876543210abcdef",
+                    "block_number": 19400100,
                     "timestamp": int((datetime.now() - timedelta(days=21)).timestamp() * 1000),
                     "symbol": "LINK",
                     "type": "swap",
@@ -146,11 +161,52 @@ class EthereumService:
             logger.error(f"Error fetching Ethereum transactions: {str(e)}")
             return []
     
+    async def get_transactions_since(self, from_block: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Get wallet transfers mined after a block from the transfer index
+        
+        Only blocks the scanner has covered for every wallet are returned,
+        so the next call resumes exactly where this one stopped.
+        
+        Args:
+            from_block: Last block already synced (-1 for none)
+        
+        Returns:
+            Tuple of (transfers, last block covered)
+        
+        Raises:
+            RuntimeError: If no RPC endpoint is configured
+        """
+        if self.scanner is None:
+            raise RuntimeError("Wallet sync requires ETHEREUM_RPC_URL")
+        
+        await self.scanner.scan()
+        last_block = max(from_block, self.scanner.scanned_block())
+        return self.scanner.transfers_between(from_block, last_block), last_block
+    
+    @property
+    def scanner(self) -> Optional[TransferScanner]:
+        """ERC20 transfer scanner for the tracked wallets, if an RPC endpoint is configured"""
+        if self._scanner is None and self.rpc is not None:
+            self._scanner = TransferScanner(
+                self.rpc,
+                os.getenv("ETH_TRANSFERS_DB_PATH", os.path.join(DATA_DIR, "eth_transfers.db")),
+                self.wallet_addresses,
+                self.token_addresses,
+                start_block=int(os.getenv("ETH_SCAN_START_BLOCK", "0"))
+            )
+        return self._scanner
+    
     async def get_historical_balances(self, days: int = 30) -> List[Dict[str, Any]]:
         """
         Get historical balance snapshots
         Note: This requires a specialized indexer or your own snapshots
         """
+        if self.scanner is not None:
+            # Index new transfers since the last checkpoint, then sum the indexed deltas
+            await self.scanner.scan()
+            return self.scanner.historical_balances(days)
+        
         # For MVP, return mock data
         logger.info(f"Fetching {days} days of historical Ethereum balances")
         
@@ -224,9 +280,11 @@ class EthereumService:
     async def get_token_balances(self, address: str) -> Dict[str, float]:
         """Get token balances for a specific wallet"""
         try:
-            # In a real application, this would query token contracts
-            # For now, return mock data
+            if self.balance_reader is not None:
+                _, balances = await self.balance_reader.read([address], self.token_addresses)
+                return {symbol: amount for symbol, amount in balances[address].items() if symbol in self.token_addresses}
             
+            # Without an RPC endpoint, return mock data
             return {
                 "usdt": 500,
                 "usdc": 200,
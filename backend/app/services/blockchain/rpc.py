@@ -0,0 +1,93 @@
+# backend/app/services/blockchain/rpc.py
+"""
+Minimal async Ethereum JSON-RPC client with request batching
+"""
+import asyncio
+import itertools
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp # type: ignore
+
+from app.core.metrics import upstream_trace_config
+
+logger = logging.getLogger(__name__)
+
+# Calls per JSON-RPC batch request; most providers accept 100-1000
+DEFAULT_BATCH_SIZE = 500
+# Batch requests in flight at once
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class JsonRpcError(Exception):
+    """Error object returned by a JSON-RPC node"""
+
+    def __init__(self, error: Dict[str, Any]):
+        self.code = error.get("code")
+        self.message = error.get("message", "")
+        super().__init__(f"JSON-RPC error {self.code}: {self.message}")
+
+
+class JsonRpcClient:
+    """Sends single and batched JSON-RPC calls to one endpoint"""
+
+    def __init__(self, url: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, timeout: float = 30.0):
+        self.url = url
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._ids = itertools.count(1)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests_sent = 0
+
+    async def _post(self, payload: Any) -> Any:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout, trace_configs=[upstream_trace_config()])
+        async with self.semaphore:
+            self.requests_sent += 1
+            async with self._session.post(self.url, json=payload) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def call(self, method: str, params: Sequence[Any] = ()) -> Any:
+        """
+        Make one JSON-RPC call
+
+        Raises:
+            JsonRpcError: If the node returns an error
+        """
+        reply = await self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)})
+        if reply.get("error"):
+            raise JsonRpcError(reply["error"])
+        return reply.get("result")
+
+    async def batch(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Any]:
+        """
+        Make many calls using as few HTTP requests as possible
+
+        Calls are split into batches of batch_size, sent concurrently.
+
+        Args:
+            calls: (method, params) tuples
+
+        Returns:
+            Results in call order; a failed call's result is a JsonRpcError
+        """
+        requests = [
+            {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+            for method, params in calls
+        ]
+        chunks = [requests[i:i + self.batch_size] for i in range(0, len(requests), self.batch_size)]
+        replies = await asyncio.gather(*(self._post(chunk) for chunk in chunks))
+
+        by_id: Dict[int, Any] = {}
+        for reply in replies:
+            for item in reply if isinstance(reply, list) else [reply]:
+                by_id[item.get("id")] = JsonRpcError(item["error"]) if item.get("error") else item.get("result")
+        return [by_id.get(request["id"], JsonRpcError({"message": "missing response"})) for request in requests]
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,335 @@
+# backend/app/services/blockchain/scanner.py
+"""
+Resumable ERC20 Transfer log scanner
+
+Walks the chain in block ranges with eth_getLogs, filtered to Transfer
+events from or to the tracked wallets. The range adapts to the data: it is
+halved when the node refuses a query for returning too many results and
+doubled while ranges come back sparse.
+
+Events are stored in a compact SQLite table (wallets and tokens are
+interned to integer ids) together with a per-wallet checkpoint, written in
+the same transaction, so an interrupted scan resumes exactly where it
+stopped. Historical balances are cumulative sums of the indexed deltas.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.services.blockchain.balances import DECIMALS_SELECTOR, decode_uint, encode_address
+from app.services.blockchain.rpc import JsonRpcClient, JsonRpcError
+
+logger = logging.getLogger(__name__)
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+DEFAULT_INITIAL_RANGE = 2_000
+DEFAULT_MAX_RANGE = 500_000
+# Grow the range while a query returns fewer logs than this
+SPARSE_LOGS = 200
+# Blocks behind the head that are not scanned yet, to stay clear of reorgs
+DEFAULT_CONFIRMATIONS = 12
+
+# Error fragments providers use when a getLogs query is too large
+_TOO_MANY_RESULTS = ("more than", "too many", "limit exceeded", "response size", "range is too", "too large")
+
+
+def _is_too_many_results(error: JsonRpcError) -> bool:
+    message = (error.message or "").lower()
+    return error.code == -32005 or any(fragment in message for fragment in _TOO_MANY_RESULTS)
+
+
+def _topic_address(topic: str) -> str:
+    return "0x" + topic[-40:].lower()
+
+
+class TransferScanner:
+    """Indexes ERC20 transfers of tracked wallets"""
+
+    def __init__(self, rpc: JsonRpcClient, db_path: str, wallets: Iterable[str],
+                 tokens: Optional[Mapping[str, str]] = None, start_block: int = 0,
+                 initial_range: int = DEFAULT_INITIAL_RANGE, max_range: int = DEFAULT_MAX_RANGE,
+                 confirmations: int = DEFAULT_CONFIRMATIONS):
+        """
+        Args:
+            rpc: JSON-RPC client
+            db_path: SQLite database for events and checkpoints
+            wallets: Wallet addresses to track
+            tokens: Token contract address keyed by symbol (default: any ERC20)
+            start_block: First block to scan for wallets without a checkpoint
+            initial_range: Blocks per query to start with
+            max_range: Largest range a query may grow to
+            confirmations: Blocks behind the head to stop at
+        """
+        self.rpc = rpc
+        self.db_path = db_path
+        self.wallets = [wallet.lower() for wallet in wallets]
+        self.symbols = {address.lower(): symbol for symbol, address in (tokens or {}).items()}
+        self.start_block = start_block
+        self.block_range = initial_range
+        self.max_range = max_range
+        self.confirmations = confirmations
+        self.lock = threading.Lock()
+        self._block_times: Dict[int, int] = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS wallets (
+                    id INTEGER PRIMARY KEY,
+                    address TEXT UNIQUE NOT NULL,
+                    last_block INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS tokens (
+                    id INTEGER PRIMARY KEY,
+                    address TEXT UNIQUE NOT NULL,
+                    symbol TEXT,
+                    decimals INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS transfers (
+                    wallet_id INTEGER NOT NULL,
+                    token_id INTEGER NOT NULL,
+                    block_number INTEGER NOT NULL,
+                    log_index INTEGER NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    delta REAL NOT NULL,
+                    tx_hash TEXT NOT NULL,
+                    PRIMARY KEY (wallet_id, block_number, log_index)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_transfers_timestamp ON transfers (timestamp);
+                CREATE INDEX IF NOT EXISTS ix_transfers_block ON transfers (block_number);
+            """)
+            for wallet in self.wallets:
+                conn.execute("INSERT OR IGNORE INTO wallets (address, last_block) VALUES (?, ?)",
+                             (wallet, start_block - 1))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def checkpoints(self) -> Dict[str, int]:
+        """Last fully scanned block per wallet"""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT address, last_block FROM wallets"))
+
+    async def _get_logs(self, from_block: int, to_block: int, wallets: List[str]) -> List[Dict[str, Any]]:
+        """Transfer logs from or to the wallets in one batched request"""
+        wallet_topics = ["0x" + encode_address(wallet) for wallet in wallets]
+        base = {"fromBlock": hex(from_block), "toBlock": hex(to_block)}
+        if self.symbols:
+            base["address"] = list(self.symbols)
+        sent, received = await self.rpc.batch([
+            ("eth_getLogs", [dict(base, topics=[TRANSFER_TOPIC, wallet_topics])]),
+            ("eth_getLogs", [dict(base, topics=[TRANSFER_TOPIC, None, wallet_topics])]),
+        ])
+        for result in (sent, received):
+            if isinstance(result, JsonRpcError):
+                raise result
+        unique = {(log["transactionHash"], log["logIndex"]): log for log in sent + received}
+        return list(unique.values())
+
+    async def _block_timestamps(self, blocks: Iterable[int]) -> Dict[int, int]:
+        blocks = set(blocks)
+        missing = sorted(block for block in blocks if block not in self._block_times)
+        if missing:
+            results = await self.rpc.batch([("eth_getBlockByNumber", [hex(block), False]) for block in missing])
+            for block, result in zip(missing, results):
+                if isinstance(result, JsonRpcError) or not result:
+                    raise RuntimeError(f"Could not read block {block}: {result}")
+                self._block_times[block] = decode_uint(result["timestamp"])
+        return {block: self._block_times[block] for block in blocks}
+
+    async def _token_ids(self, addresses: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        Token id and decimals per address, reading decimals for new tokens once
+
+        Only decimals actually read are stored. If a token's decimals cannot
+        be read this raises, so the range is not checkpointed and its
+        transfers are stored (with the right scale) by a later scan.
+        """
+        addresses = set(addresses)
+        with self._connect() as conn:
+            known = {
+                address: (token_id, decimals)
+                for token_id, address, decimals in conn.execute("SELECT id, address, decimals FROM tokens")
+                if address in addresses
+            }
+        new = sorted(addresses - set(known))
+        if new:
+            results = await self.rpc.batch([("eth_call", [{"to": address, "data": DECIMALS_SELECTOR}, "latest"])
+                                            for address in new])
+            failed = [address for address, result in zip(new, results) if isinstance(result, JsonRpcError)]
+            with self.lock, self._connect() as conn:
+                for address, result in zip(new, results):
+                    if isinstance(result, JsonRpcError):
+                        continue
+                    conn.execute("INSERT OR IGNORE INTO tokens (address, symbol, decimals) VALUES (?, ?, ?)",
+                                 (address, self.symbols.get(address, address), decode_uint(result)))
+                known.update({
+                    address: (token_id, decimals)
+                    for token_id, address, decimals in conn.execute("SELECT id, address, decimals FROM tokens")
+                    if address in addresses
+                })
+            if failed:
+                raise RuntimeError(f"Could not read decimals for {', '.join(failed)}")
+        return known
+
+    async def _store(self, logs: List[Dict[str, Any]], wallets: List[str], to_block: int) -> int:
+        """Insert the range's events and advance the wallets' checkpoint atomically"""
+        wallet_set = set(wallets)
+        # ERC721 transfers index the token id as a fourth topic
+        logs = [log for log in logs if len(log.get("topics") or []) == 3]
+        times = await self._block_timestamps(decode_uint(log["blockNumber"]) for log in logs)
+        tokens = await self._token_ids(log["address"].lower() for log in logs)
+        rows = []
+        with self.lock, self._connect() as conn:
+            wallet_ids = dict(conn.execute("SELECT address, id FROM wallets"))
+            for log in logs:
+                topics = log["topics"]
+                sender, recipient = _topic_address(topics[1]), _topic_address(topics[2])
+                token_id, decimals = tokens[log["address"].lower()]
+                amount = decode_uint(log.get("data")) / 10 ** decimals
+                block = decode_uint(log["blockNumber"])
+                for wallet in {sender, recipient} & wallet_set:
+                    delta = (amount if recipient == wallet else 0.0) - (amount if sender == wallet else 0.0)
+                    rows.append((wallet_ids[wallet], token_id, block, decode_uint(log["logIndex"]),
+                                 times[block], delta, log["transactionHash"]))
+            conn.executemany("INSERT OR IGNORE INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("UPDATE wallets SET last_block = ? WHERE address = ?",
+                             [(to_block, wallet) for wallet in wallets])
+        return len(rows)
+
+    async def scan(self, to_block: Optional[int] = None) -> int:
+        """
+        Scan from each wallet's checkpoint up to a block
+
+        Args:
+            to_block: Last block to scan (default: head minus confirmations)
+
+        Returns:
+            Number of new transfer rows stored
+        """
+        if to_block is None:
+            to_block = decode_uint(await self.rpc.call("eth_blockNumber")) - self.confirmations
+
+        stored = 0
+        while True:
+            checkpoints = self.checkpoints()
+            pending = {wallet: block for wallet, block in checkpoints.items()
+                       if wallet in self.wallets and block < to_block}
+            if not pending:
+                return stored
+            # Scan the wallets furthest behind together
+            from_block = min(pending.values()) + 1
+            wallets = [wallet for wallet, block in pending.items() if block + 1 == from_block]
+            end = min(from_block + self.block_range - 1, to_block)
+            # Stop before the next group's checkpoint so groups merge once caught up
+            ahead = [block for block in pending.values() if block + 1 > from_block]
+            if ahead:
+                end = min(end, min(ahead))
+
+            try:
+                logs = await self._get_logs(from_block, end, wallets)
+            except JsonRpcError as e:
+                if not _is_too_many_results(e) or end == from_block:
+                    raise
+                self.block_range = max(1, (end - from_block + 1) // 2)
+                logger.debug("Too many logs in %s-%s, shrinking range to %s", from_block, end, self.block_range)
+                continue
+
+            stored += await self._store(logs, wallets, end)
+            if len(logs) < SPARSE_LOGS and end - from_block + 1 >= self.block_range:
+                self.block_range = min(self.max_range, self.block_range * 2)
+
+    def scanned_block(self) -> int:
+        """Last block scanned for every tracked wallet"""
+        checkpoints = self.checkpoints()
+        return min((checkpoints[wallet] for wallet in self.wallets if wallet in checkpoints),
+                   default=self.start_block - 1)
+
+    def transfers_between(self, after_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """
+        Indexed transfers of the tracked wallets in a block range
+
+        Args:
+            after_block: Last block already consumed (exclusive)
+            to_block: Last block to include
+
+        Returns:
+            Transfers in block order as {"id", "block_number", "timestamp"
+            (ms), "symbol", "side" (receive/send), "amount", "wallet",
+            "tx_hash", "source"}, one per wallet side
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT w.address, tk.symbol, t.block_number, t.log_index, t.timestamp, t.delta, t.tx_hash "
+                "FROM transfers t JOIN tokens tk ON tk.id = t.token_id JOIN wallets w ON w.id = t.wallet_id "
+                "WHERE t.block_number > ? AND t.block_number <= ? ORDER BY t.block_number, t.log_index",
+                (after_block, to_block)
+            ).fetchall()
+
+        tracked = set(self.wallets)
+        return [
+            {"id": f"{tx_hash}:{log_index}:{wallet}", "block_number": block, "timestamp": timestamp * 1000,
+             "symbol": symbol.upper(), "side": "receive" if delta > 0 else "send", "amount": abs(delta),
+             "wallet": wallet, "tx_hash": tx_hash, "source": "ethereum"}
+            for wallet, symbol, block, log_index, timestamp, delta, tx_hash in rows
+            if wallet in tracked and delta != 0
+        ]
+
+    def historical_balances(self, days: int = 30, wallet: Optional[str] = None,
+                            end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        End-of-day token balances from cumulative sums of indexed transfers
+
+        Only transfers inside the scanned range are counted.
+
+        Args:
+            days: Number of daily snapshots
+            wallet: Only this wallet (default: all tracked wallets)
+            end: Last day (default: today, UTC)
+
+        Returns:
+            Snapshots, newest first, as {"timestamp", "date", "balances"}
+        """
+        end = end or datetime.now(timezone.utc).date()
+        start = end - timedelta(days=days - 1)
+        start_ts = int(datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp())
+        where, params = "", []
+        if wallet:
+            where, params = " AND w.address = ?", [wallet.lower()]
+
+        with self._connect() as conn:
+            opening = conn.execute(
+                "SELECT tk.symbol, SUM(t.delta) FROM transfers t JOIN tokens tk ON tk.id = t.token_id "
+                "JOIN wallets w ON w.id = t.wallet_id WHERE t.timestamp < ?" + where + " GROUP BY tk.symbol",
+                [start_ts] + params
+            ).fetchall()
+            daily = conn.execute(
+                "SELECT (t.timestamp - ?) / 86400 AS day, tk.symbol, SUM(t.delta) FROM transfers t "
+                "JOIN tokens tk ON tk.id = t.token_id JOIN wallets w ON w.id = t.wallet_id "
+                "WHERE t.timestamp >= ?" + where + " GROUP BY day, tk.symbol ORDER BY day",
+                [start_ts, start_ts] + params
+            ).fetchall()
+
+        balances = {symbol: total for symbol, total in opening}
+        changes: Dict[int, List[Tuple[str, float]]] = {}
+        for day, symbol, total in daily:
+            changes.setdefault(day, []).append((symbol, total))
+
+        snapshots = []
+        for offset in range(days):
+            for symbol, total in changes.get(offset, []):
+                balances[symbol] = balances.get(symbol, 0.0) + total
+            snapshots.append({
+                "timestamp": (start_ts + offset * 86400) * 1000,
+                "date": (start + timedelta(days=offset)).isoformat(),
+                "balances": {symbol: amount for symbol, amount in balances.items() if abs(amount) > 1e-12}
+            })
+        snapshots.reverse()
+        return snapshots
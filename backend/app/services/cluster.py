@@ -0,0 +1,237 @@
+"""
+Multi-worker deployment mode
+
+With DEPLOYMENT_MODE=multi the API runs as several worker processes on one
+host (e.g. gunicorn with uvicorn workers). Without coordination every worker
+would run its own copy of the background refreshers, multiplying upstream
+API calls by the worker count and letting workers serve different data.
+
+Instead, the workers elect a leader through a lock file. Only the leader
+runs the scheduler; after each refresh it publishes the refreshed state on a
+named channel (a SharedSnapshot in SHARED_STATE_DIR). The other workers poll
+the channel versions from shared memory and apply new versions to their
+local services, which in turn notify the usual listeners (stream feeds,
+portfolio updates). Alerts are only evaluated on the leader. If the leader dies the kernel drops its lock and
+the next worker to try takes over the refreshers.
+
+In the default single mode nothing here is active.
+"""
+import asyncio
+import functools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+from app.core.persistence import load_json
+from app.core.settings import DATA_DIR
+from app.core.shared_state import LeaderLock, SharedSnapshot
+
+logger = logging.getLogger(__name__)
+
+DEPLOYMENT_MODE = os.getenv("DEPLOYMENT_MODE", "single").lower()
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", os.path.join(DATA_DIR, "shared"))
+# How often followers check for new versions, in seconds
+POLL_INTERVAL = float(os.getenv("SHARED_STATE_POLL_INTERVAL", "1"))
+# How often followers try to take over the leader lock, in seconds
+ELECTION_INTERVAL = float(os.getenv("LEADER_ELECTION_INTERVAL", "5"))
+
+
+@dataclass
+class Channel:
+    """State published by the leader and applied by the followers"""
+    name: str
+    # Returns the current state on the leader (JSON-compatible)
+    export: Callable[[], Any]
+    # Installs a published state on a follower (sync or async)
+    apply: Callable[[Any], Any]
+
+
+class ClusterCoordinator:
+    """Leader election and state sharing between the workers on a host"""
+
+    def __init__(self, directory: str = SHARED_STATE_DIR, enabled: bool = DEPLOYMENT_MODE == "multi",
+                 poll_interval: float = POLL_INTERVAL, election_interval: float = ELECTION_INTERVAL):
+        self.directory = directory
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self.election_interval = election_interval
+        self.lock = LeaderLock(os.path.join(directory, "leader.lock"))
+        self.channels: Dict[str, Channel] = {}
+        self.applied: Dict[str, int] = {}
+        self._snapshots: Dict[str, SharedSnapshot] = {}
+
+    @property
+    def role(self) -> str:
+        if not self.enabled:
+            return "single"
+        return "leader" if self.lock.is_leader else "follower"
+
+    def register(self, name: str, export: Callable[[], Any], apply: Callable[[Any], Any]) -> None:
+        """
+        Register a channel
+
+        Args:
+            name: Channel name, also the snapshot file name
+            export: Returns the state to publish (called on the leader)
+            apply: Installs a published state (called on followers)
+        """
+        self.channels[name] = Channel(name, export, apply)
+
+    def _snapshot(self, name: str) -> SharedSnapshot:
+        if name not in self._snapshots:
+            self._snapshots[name] = SharedSnapshot(self.directory, name)
+        return self._snapshots[name]
+
+    def publish(self, name: str) -> int:
+        """
+        Publish the current state of a channel
+
+        Returns:
+            The published version
+        """
+        data = self.channels[name].export()
+        version = self._snapshot(name).publish(data)
+        self.applied[name] = version
+        return version
+
+    def publishing(self, name: str, func: Callable) -> Callable:
+        """
+        Wrap a refresh function to publish its channel after each run
+
+        Returns func unchanged in single mode. Publishing errors are logged
+        and never fail the refresh itself.
+
+        Args:
+            name: Channel name
+            func: Sync or async refresh function
+        """
+        if not self.enabled:
+            return func
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def refresh_and_publish(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                try:
+                    await asyncio.to_thread(self.publish, name)
+                except Exception as e:
+                    logger.error(f"Error publishing shared state '{name}': {str(e)}")
+                return result
+        else:
+            @functools.wraps(func)
+            def refresh_and_publish(*args, **kwargs):
+                result = func(*args, **kwargs)
+                try:
+                    self.publish(name)
+                except Exception as e:
+                    logger.error(f"Error publishing shared state '{name}': {str(e)}")
+                return result
+        return refresh_and_publish
+
+    async def sync(self) -> List[str]:
+        """
+        Apply every channel with a newly published version
+
+        Returns:
+            Names of the channels that were applied
+        """
+        applied = []
+        for name, channel in self.channels.items():
+            snapshot = self._snapshot(name)
+            if not snapshot.changed():
+                continue
+            try:
+                version, data = await asyncio.to_thread(snapshot.read)
+                if version == 0:
+                    continue
+                result = channel.apply(data)
+                if asyncio.iscoroutine(result):
+                    await result
+                self.applied[name] = version
+                applied.append(name)
+            except Exception as e:
+                logger.error(f"Error applying shared state '{name}': {str(e)}")
+        return applied
+
+    async def follow(self, on_promoted: Callable[[], Awaitable[None]]) -> None:
+        """
+        Apply the leader's state until this worker becomes the leader
+
+        Args:
+            on_promoted: Coroutine function run once the lock is acquired,
+                e.g. to start the refreshers
+        """
+        next_election = 0.0
+        while True:
+            if time.monotonic() >= next_election:
+                next_election = time.monotonic() + self.election_interval
+                if self.lock.try_acquire():
+                    logger.info(f"Worker {os.getpid()} promoted to leader")
+                    await on_promoted()
+                    return
+            await self.sync()
+            await asyncio.sleep(self.poll_interval)
+
+    def status(self) -> Dict[str, Any]:
+        """Role and channel versions for the readiness probe"""
+        status: Dict[str, Any] = {"mode": "multi" if self.enabled else "single", "role": self.role,
+                                  "pid": os.getpid()}
+        if self.enabled:
+            status["channels"] = {
+                name: {"published": self._snapshot(name).version, "applied": self.applied.get(name, 0)}
+                for name in self.channels
+            }
+        return status
+
+    def close(self) -> None:
+        """Release the leader lock and unmap the channel counters"""
+        self.lock.release()
+        for snapshot in self._snapshots.values():
+            snapshot.close()
+        self._snapshots.clear()
+
+
+def register_default_channels(coordinator: ClusterCoordinator, market_service) -> None:
+    """
+    Share the state of the scheduled refreshers, one channel per task
+
+    Args:
+        coordinator: Coordinator to register the channels with
+        market_service: The market data service
+    """
+    from app.services.market.golden_cross import golden_cross_screener
+    from app.services.news import crypto_news_service, macro_news_service, reddit_service
+    from app.services.news.snapshot import NewsSnapshot, RedditSnapshot
+
+    def news_channel(service):
+        def apply(data):
+            service.snapshot = NewsSnapshot.from_dict(data)
+            service._notify_listeners()
+        return lambda: service.snapshot.to_dict(), apply
+
+    def apply_reddit(data):
+        reddit_service.snapshot = RedditSnapshot.from_dict(data)
+
+    def export_golden_cross():
+        checked_at = golden_cross_screener.checked_at
+        return {"results": golden_cross_screener.results,
+                "checked_at": checked_at.isoformat() if checked_at else None}
+
+    def apply_golden_cross(data):
+        golden_cross_screener.results = data["results"]
+        golden_cross_screener.checked_at = datetime.fromisoformat(data["checked_at"]) if data["checked_at"] else None
+
+    # The leader writes market_data.json on every refresh; followers get the
+    # same update their listeners would have seen on the leader
+    coordinator.register("market_data", lambda: load_json(market_service.market_data_file, {}),
+                         market_service._notify_listeners)
+    coordinator.register("crypto_news", *news_channel(crypto_news_service))
+    coordinator.register("macro_news", *news_channel(macro_news_service))
+    coordinator.register("reddit", lambda: reddit_service.snapshot.to_dict(), apply_reddit)
+    coordinator.register("golden_cross", export_golden_cross, apply_golden_cross)
+
+
+cluster = ClusterCoordinator()
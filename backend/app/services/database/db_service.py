@@ -1,20 +1,144 @@
 import sqlite3
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+import gzip
 import json
 import os
 import shutil
+import tempfile
 import threading
 
+try:
+    import zstandard # type: ignore
+except ImportError:
+    zstandard = None
+
 from app.core.settings import USE_DATABASE
 
 logger = logging.getLogger(__name__)
 
+# Online backup settings
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+BACKUP_EXPORT_BATCH_SIZE = 5000
+BACKUP_COMPRESSIONS = ("gzip", "zstd")
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _timestamp() -> str:
+    """Timestamp in the same format used for last_update columns."""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _check_compression(compression: Optional[str]):
+    """Validate the requested compression method."""
+    if compression is None:
+        return
+    if compression not in BACKUP_COMPRESSIONS:
+        raise ValueError(f"Unsupported compression: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression requires the 'zstandard' package")
+
+
+def _detect_compression(path: str) -> Optional[str]:
+    """Detect the compression of an archive from its magic bytes."""
+    with open(path, "rb") as f:
+        header = f.read(4)
+    if header.startswith(GZIP_MAGIC):
+        return "gzip"
+    if header == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def _log_backup_progress(status: int, remaining: int, total: int):
+    """Progress callback for sqlite3.Connection.backup."""
+    logger.debug("Backup step: %d of %d pages remaining", remaining, total)
+
+
+def _publish_archive(source_path: str, archive_path: str, compression: Optional[str]):
+    """Compress (optionally) and atomically move a finished snapshot into place."""
+    tmp_path = f"{archive_path}.tmp"
+    try:
+        if compression == "gzip":
+            with open(source_path, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        elif compression == "zstd":
+            with open(source_path, "rb") as src, open(tmp_path, "wb") as dst:
+                zstandard.ZstdCompressor().copy_stream(src, dst)
+        else:
+            shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, archive_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextmanager
+def _extracted_archive(archive_path: str) -> Iterator[str]:
+    """Yield a path to a plain SQLite file for a (possibly compressed) archive."""
+    compression = _detect_compression(archive_path)
+    if compression is None:
+        yield archive_path
+        return
+    
+    _check_compression(compression)
+    fd, plain_path = tempfile.mkstemp(suffix=".db")
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            if compression == "gzip":
+                with gzip.open(archive_path, "rb") as src:
+                    shutil.copyfileobj(src, dst)
+            else:
+                with open(archive_path, "rb") as src:
+                    zstandard.ZstdDecompressor().copy_stream(src, dst)
+        yield plain_path
+    finally:
+        os.remove(plain_path)
+
+
+def _integrity_ok(path: str) -> bool:
+    """Run PRAGMA integrity_check against a SQLite file."""
+    try:
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+            return conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    except sqlite3.DatabaseError as e:
+        logger.error(f"Integrity check failed for {path}: {str(e)}")
+        return False
+
+
+def _archive_kind(conn: sqlite3.Connection) -> str:
+    """Return "incremental" for incremental exports and "full" otherwise."""
+    row = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='_snapshot_meta'"
+    ).fetchone()
+    if not row:
+        return "full"
+    return conn.execute("SELECT kind FROM _snapshot_meta LIMIT 1").fetchone()[0]
+
+
+def _tracked_tables(conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+    """Tables that carry a last_update column, with their CREATE statements."""
+    tables = []
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' AND name != '_snapshot_meta'"
+    ).fetchall()
+    for name, create_sql in rows:
+        columns = [col[1] for col in conn.execute(f"PRAGMA table_info({name})").fetchall()]
+        if "last_update" in columns:
+            tables.append((name, create_sql))
+    return tables
+
+
 class DatabaseService:
     def __init__(self):
         self.db_path = "app/data/crypto.db"
-        self.lock = threading.Lock()
+        # Reentrant: methods hold it while get_connection() runs the lazy initialize_db()
+        self.lock = threading.RLock()
         self._initialized = False
         logger.info("DatabaseService instance created (lazy initialization)")
 
@@ -80,6 +204,23 @@ class DatabaseService:
                         )
                     """)
                     
+                    # Golden cross screen results, one row per coin
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS golden_cross_data (
+                            coin_id TEXT PRIMARY KEY,
+                            short_ma REAL,
+                            long_ma REAL,
+                            proximity REAL,
+                            status TEXT,
+                            rank INTEGER,
+                            trend REAL,
+                            days_to_cross REAL,
+                            last_cross_type TEXT,
+                            last_cross_date TEXT,
+                            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    
                     # Create initial loading status record
                     cursor.execute("""
                         INSERT INTO loading_status (
@@ -185,12 +326,27 @@ class DatabaseService:
             logger.error(f"Error cleaning up old data: {str(e)}")
             return {"error": str(e)}
 
-    def archive_database(self, archive_path: str) -> bool:
+    def archive_database(
+        self,
+        archive_path: str,
+        compression: Optional[str] = None,
+        pages_per_step: int = BACKUP_PAGES_PER_STEP,
+        sleep_between_steps: float = BACKUP_STEP_SLEEP,
+        verify: bool = True
+    ) -> bool:
         """
-        Create an archive of the database
+        Create an online snapshot of the database
+        
+        Uses the SQLite backup API to copy the database a few pages at a time,
+        so writers are only blocked for the duration of a single step instead
+        of the whole copy.
         
         Args:
             archive_path: Path where to save the archive
+            compression: Optional compression ("gzip" or "zstd")
+            pages_per_step: Number of pages copied per backup step
+            sleep_between_steps: Seconds to yield to writers between steps
+            verify: Run an integrity check on the snapshot before publishing it
             
         Returns:
             True if successful, False otherwise
@@ -203,23 +359,175 @@ class DatabaseService:
             if not self._initialized:
                 logger.warning("Cannot archive uninitiated database")
                 return False
+            
+            _check_compression(compression)
                 
             # Create archive directory if it doesn't exist
-            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+            os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
             
-            # Create a copy of the database
-            shutil.copy2(self.db_path, archive_path)
+            snapshot_time = _timestamp()
+            snapshot_path = f"{archive_path}.partial"
             
+            try:
+                # Copy the live database page by page
+                with self.get_connection() as source:
+                    self._ensure_snapshot_log(source)
+                    with sqlite3.connect(snapshot_path) as target:
+                        source.backup(
+                            target,
+                            pages=pages_per_step,
+                            progress=_log_backup_progress,
+                            sleep=sleep_between_steps
+                        )
+                    
+                if verify and not _integrity_ok(snapshot_path):
+                    logger.error(f"Snapshot failed integrity check: {snapshot_path}")
+                    return False
+                
+                _publish_archive(snapshot_path, archive_path, compression)
+            finally:
+                if os.path.exists(snapshot_path):
+                    os.remove(snapshot_path)
+            
+            self._record_snapshot(archive_path, "full", snapshot_time)
             logger.info(f"Database archived to {archive_path}")
             return True
         except Exception as e:
             logger.error(f"Error archiving database: {str(e)}")
             return False
 
+    def export_incremental(
+        self,
+        archive_path: str,
+        since: Optional[str] = None,
+        compression: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Export only the rows changed since the last snapshot
+        
+        Every table with a ``last_update`` column is scanned for rows newer
+        than ``since`` and the matching rows are written to a standalone
+        SQLite file with the same table definitions.
+        
+        Args:
+            archive_path: Path where to save the incremental archive
+            since: Timestamp to export changes from (defaults to the last snapshot)
+            compression: Optional compression ("gzip" or "zstd")
+            
+        Returns:
+            Dictionary with the exported row count per table
+        """
+        if not USE_DATABASE:
+            logger.warning("Database operations are disabled (USE_DATABASE=False)")
+            return {"error": "Database operations are disabled"}
+            
+        try:
+            _check_compression(compression)
+            os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+            
+            snapshot_time = _timestamp()
+            export_path = f"{archive_path}.partial"
+            exported = {}
+            
+            try:
+                with self.get_connection() as source:
+                    self._ensure_snapshot_log(source)
+                    if since is None:
+                        since = self._last_snapshot_time(source)
+                    
+                    with sqlite3.connect(export_path) as target:
+                        target.execute("""
+                            CREATE TABLE _snapshot_meta (
+                                kind TEXT,
+                                since TEXT,
+                                created_at TEXT
+                            )
+                        """)
+                        target.execute(
+                            "INSERT INTO _snapshot_meta (kind, since, created_at) VALUES (?, ?, ?)",
+                            ("incremental", since, snapshot_time)
+                        )
+                        
+                        for table_name, create_sql in _tracked_tables(source):
+                            target.execute(create_sql)
+                            
+                            query = f"SELECT * FROM {table_name}"
+                            params: Tuple = ()
+                            if since:
+                                query += " WHERE last_update > ?"
+                                params = (since,)
+                            cursor = source.execute(query, params)
+                            
+                            placeholders = ", ".join("?" for _ in cursor.description)
+                            count = 0
+                            while True:
+                                rows = cursor.fetchmany(BACKUP_EXPORT_BATCH_SIZE)
+                                if not rows:
+                                    break
+                                target.executemany(
+                                    f"INSERT INTO {table_name} VALUES ({placeholders})",
+                                    [tuple(row) for row in rows]
+                                )
+                                count += len(rows)
+                            exported[table_name] = count
+                        
+                        target.commit()
+                
+                _publish_archive(export_path, archive_path, compression)
+            finally:
+                if os.path.exists(export_path):
+                    os.remove(export_path)
+            
+            self._record_snapshot(archive_path, "incremental", snapshot_time)
+            logger.info(f"Incremental export since {since} written to {archive_path}: {exported}")
+            return exported
+        except Exception as e:
+            logger.error(f"Error exporting incremental snapshot: {str(e)}")
+            return {"error": str(e)}
+
+    def verify_archive(self, archive_path: str) -> Dict[str, Any]:
+        """
+        Verify that an archive is readable and passes an integrity check
+        
+        Args:
+            archive_path: Path to the archive file
+            
+        Returns:
+            Dictionary with the verification result and row counts per table
+        """
+        try:
+            if not os.path.exists(archive_path):
+                return {"ok": False, "error": f"Archive file not found: {archive_path}"}
+            
+            with _extracted_archive(archive_path) as plain_path:
+                if not _integrity_ok(plain_path):
+                    return {"ok": False, "error": "Integrity check failed"}
+                
+                with sqlite3.connect(f"file:{plain_path}?mode=ro", uri=True) as conn:
+                    kind = _archive_kind(conn)
+                    tables = {}
+                    for (table_name,) in conn.execute(
+                        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+                    ).fetchall():
+                        tables[table_name] = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+                
+            return {
+                "ok": True,
+                "kind": kind,
+                "compression": _detect_compression(archive_path),
+                "tables": tables
+            }
+        except Exception as e:
+            logger.error(f"Error verifying archive {archive_path}: {str(e)}")
+            return {"ok": False, "error": str(e)}
+
     def restore_from_archive(self, archive_path: str) -> bool:
         """
         Restore database from an archive
         
+        Full snapshots are copied into the live database with the backup API;
+        incremental exports are upserted on top of the current contents.
+        
         Args:
             archive_path: Path to the archive file
             
@@ -232,24 +540,75 @@ class DatabaseService:
                 logger.error(f"Archive file not found: {archive_path}")
                 return False
             
-            # Create backup of current database
-            backup_path = f"{self.db_path}.backup"
-            if os.path.exists(self.db_path):
-                shutil.copy2(self.db_path, backup_path)
-            
-            # Restore from archive
-            shutil.copy2(archive_path, self.db_path)
+            with _extracted_archive(archive_path) as plain_path:
+                if not _integrity_ok(plain_path):
+                    logger.error(f"Archive failed integrity check: {archive_path}")
+                    return False
+                
+                with sqlite3.connect(plain_path) as source:
+                    kind = _archive_kind(source)
+                    
+                    with self.lock:
+                        with self.get_connection() as target:
+                            # Keep a copy of the current database before overwriting it
+                            with sqlite3.connect(f"{self.db_path}.backup") as backup:
+                                target.backup(backup)
+                            
+                            if kind == "incremental":
+                                self._apply_incremental(source, target)
+                            else:
+                                # Copied in a single step so readers never see a mix
+                                # of old and restored pages
+                                source.backup(target)
             
-            logger.info(f"Database restored from {archive_path}")
+            logger.info(f"Database restored from {archive_path} ({kind})")
             return True
         except Exception as e:
             logger.error(f"Error restoring database: {str(e)}")
-            # Restore from backup if available
-            if os.path.exists(backup_path):
-                shutil.copy2(backup_path, self.db_path)
-                logger.info("Restored from backup after failed archive restore")
             return False
 
+    def _apply_incremental(self, source: sqlite3.Connection, target: sqlite3.Connection):
+        """Upsert the rows of an incremental export into the live database."""
+        for table_name, _ in _tracked_tables(source):
+            cursor = source.execute(f"SELECT * FROM {table_name}")
+            placeholders = ", ".join("?" for _ in cursor.description)
+            while True:
+                rows = cursor.fetchmany(BACKUP_EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                target.executemany(
+                    f"INSERT OR REPLACE INTO {table_name} VALUES ({placeholders})",
+                    rows
+                )
+        target.commit()
+
+    def _ensure_snapshot_log(self, conn: sqlite3.Connection):
+        """Create the snapshot bookkeeping table if needed."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshot_log (
+                id INTEGER PRIMARY KEY,
+                archive_path TEXT,
+                kind TEXT,
+                created_at TEXT
+            )
+        """)
+        conn.commit()
+
+    def _last_snapshot_time(self, conn: sqlite3.Connection) -> Optional[str]:
+        """Get the timestamp of the most recent snapshot, if any."""
+        row = conn.execute("SELECT MAX(created_at) FROM snapshot_log").fetchone()
+        return row[0] if row else None
+
+    def _record_snapshot(self, archive_path: str, kind: str, created_at: str):
+        """Record a completed snapshot so the next incremental export starts from it."""
+        with self.get_connection() as conn:
+            self._ensure_snapshot_log(conn)
+            conn.execute(
+                "INSERT INTO snapshot_log (archive_path, kind, created_at) VALUES (?, ?, ?)",
+                (archive_path, kind, created_at)
+            )
+            conn.commit()
+
     def get_database_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the database
@@ -308,10 +667,26 @@ class DatabaseService:
                     params.append(end_date)
                 
                 query += " ORDER BY date ASC"
-                
+
                 cursor.execute(query, params)
                 return [(row[0], row[1]) for row in cursor.fetchall()]
 
+    def get_price_history_since(self, start_date: Optional[str] = None) -> Dict[str, List[Tuple[str, float]]]:
+        """Get historical prices for all coins in one query, grouped by coin."""
+        with self.lock:
+            with self.get_connection() as conn:
+                query = "SELECT coin_id, date, price FROM historical_prices"
+                params = []
+                if start_date:
+                    query += " WHERE date > ?"
+                    params.append(start_date)
+                query += " ORDER BY date ASC"
+
+                history: Dict[str, List[Tuple[str, float]]] = {}
+                for coin_id, date, price in conn.execute(query, params):
+                    history.setdefault(coin_id, []).append((date, price))
+                return history
+
     def save_historical_prices(self, coin_id: str, prices: List[Tuple[str, float]]):
         """Save historical prices for a coin."""
         with self.lock:
@@ -337,6 +712,32 @@ class DatabaseService:
                     logger.error(f"Error saving historical prices for {coin_id}: {str(e)}")
                     raise
 
+    def save_daily_closes(self, day: str, closes: Dict[str, float]):
+        """
+        Save one day's price for many coins
+
+        A later call for the same day replaces the earlier prices, so the
+        last refresh of a day becomes its close. All prices are written in
+        a single transaction.
+
+        Args:
+            day: Date (YYYY-MM-DD)
+            closes: Price keyed by coin ID
+        """
+        current_time = _timestamp()
+        with self.lock:
+            with self.get_connection() as conn:
+                try:
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO historical_prices (coin_id, date, price, last_update)
+                        VALUES (?, ?, ?, ?)
+                    """, [(coin_id, day, price, current_time) for coin_id, price in closes.items()])
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"Error saving daily closes for {day}: {str(e)}")
+                    raise
+
     def get_current_price(self, coin_id: str) -> Optional[float]:
         """
         Get current price for a coin
@@ -537,6 +938,37 @@ class DatabaseService:
         except Exception as e:
             logger.error(f"Error saving golden cross data for {coin_id}: {str(e)}")
 
+    def save_golden_cross_batch(self, rows: List[Dict[str, Any]]):
+        """
+        Replace the stored golden cross results with one screen's rows
+
+        All rows are written in a single transaction.
+        
+        Args:
+            rows: Rows from the golden cross screener
+        """
+        current_time = _timestamp()
+        with self.lock:
+            with self.get_connection() as conn:
+                try:
+                    conn.execute("DELETE FROM golden_cross_data")
+                    conn.executemany("""
+                        INSERT INTO golden_cross_data (
+                            coin_id, short_ma, long_ma, proximity, status, rank, trend,
+                            days_to_cross, last_cross_type, last_cross_date, last_updated
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, [
+                        (row["coin_id"], row["short_ma"], row["long_ma"], row["proximity"], row["status"],
+                         row["rank"], row["trend"], row["days_to_cross"], row["last_cross_type"],
+                         row["last_cross_date"], current_time)
+                        for row in rows
+                    ])
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"Error saving golden cross results: {str(e)}")
+                    raise
+
     def update_loading_status(self, status: str, total_coins: int, processed_coins: int, failed_coins: List[str] = None):
         """Update the loading status."""
         with self.lock:
@@ -33,6 +33,7 @@ class MockDatabaseService:
         self._alerts = {}
         self._crypto_prices = {}
         self._price_history = {}
+        self._golden_cross = []
         self._market_overview = None
         
         # Load sample data
@@ -189,7 +190,7 @@ class MockDatabaseService:
     
     async def get_user_assets(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all assets for a user"""
-        logger.debug(f"Mock: Getting assets for user {user_id}")
+        logger.debug("Mock: Getting assets for user %s", user_id)
         return [asset for asset in self._assets.values() if asset["user_id"] == user_id]
     
     async def get_transactions(self, user_id: str, 
@@ -197,7 +198,7 @@ class MockDatabaseService:
                                limit: int = 50, 
                                offset: int = 0) -> List[Dict[str, Any]]:
         """Get transactions for a user, optionally filtered by symbol"""
-        logger.debug(f"Mock: Getting transactions for user {user_id}, symbol={symbol}")
+        logger.debug("Mock: Getting transactions for user %s, symbol=%s", user_id, symbol)
         
         # Filter transactions
         transactions = [tx for tx in self._transactions.values() if tx["user_id"] == user_id]
@@ -213,7 +214,7 @@ class MockDatabaseService:
     
     async def add_transaction(self, transaction: Dict[str, Any]) -> bool:
         """Add a new transaction and update asset holdings"""
-        logger.debug(f"Mock: Adding transaction for {transaction.get('symbol')}")
+        logger.debug("Mock: Adding transaction for %s", transaction.get('symbol'))
         
         # Generate ID if not provided
         if "id" not in transaction:
@@ -266,7 +267,7 @@ class MockDatabaseService:
     
     async def get_latest_crypto_prices(self, symbols: Optional[List[str]] = None, limit: int = 100) -> List[Dict[str, Any]]:
         """Get latest cryptocurrency prices, optionally filtered by symbols"""
-        logger.debug(f"Mock: Getting latest crypto prices, symbols={symbols}")
+        logger.debug("Mock: Getting latest crypto prices, symbols=%s", symbols)
         
         prices = list(self._crypto_prices.values())
         
@@ -280,6 +281,32 @@ class MockDatabaseService:
         logger.debug("Mock: Getting latest market overview")
         return self._market_overview
     
+    def get_price_history_since(self, start_date: Optional[str] = None) -> Dict[str, List[Tuple[str, float]]]:
+        """Get stored daily prices for all coins, grouped by coin"""
+        logger.debug("Mock: Getting price history since %s", start_date)
+        return {
+            coin_id: [(day, price) for day, price in prices if not start_date or day > start_date]
+            for coin_id, prices in self._price_history.items()
+        }
+    
+    def save_historical_prices(self, coin_id: str, prices: List[Tuple[str, float]]):
+        """Save daily prices for a coin"""
+        logger.debug("Mock: Saving %s historical prices for %s", len(prices), coin_id)
+        merged = dict(self._price_history.get(coin_id, []))
+        merged.update(prices)
+        self._price_history[coin_id] = sorted(merged.items())
+    
+    def save_daily_closes(self, day: str, closes: Dict[str, float]):
+        """Save one day's price for many coins"""
+        logger.debug("Mock: Saving %s closes for %s", len(closes), day)
+        for coin_id, price in closes.items():
+            self.save_historical_prices(coin_id, [(day, price)])
+    
+    def save_golden_cross_batch(self, rows: List[Dict[str, Any]]):
+        """Replace the stored golden cross results"""
+        logger.debug("Mock: Saving %s golden cross results", len(rows))
+        self._golden_cross = list(rows)
+    
     # Other methods can be implemented as needed
     
     # Mock-specific methods
@@ -294,13 +321,14 @@ class MockDatabaseService:
         self._alerts = {}
         self._crypto_prices = {}
         self._price_history = {}
+        self._golden_cross = []
         self._market_overview = None
         
         self._load_sample_data()
     
     def set_mock_data(self, data_type: str, data: Any):
         """Set custom mock data for testing"""
-        logger.debug(f"Setting custom mock data for {data_type}")
+        logger.debug("Setting custom mock data for %s", data_type)
         
         if data_type == "users":
             self._users = data
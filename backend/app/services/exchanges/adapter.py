@@ -0,0 +1,286 @@
+# backend/app/services/exchanges/adapter.py
+"""
+Async exchange adapter on top of ccxt.async_support
+
+Instead of calling fetch_my_trades for every market an exchange lists, the
+adapter only visits markets the account can have traded: markets whose base
+currency has a non-zero balance, and markets with known history (an existing
+cursor). Those markets are fetched concurrently, limited by a semaphore and
+by a token-bucket budget shared by every adapter for the same exchange.
+
+Each market keeps a `since` cursor (timestamp of the newest trade seen, and
+the ids of the trades seen at that timestamp), so later syncs only fetch
+trades from the last one onwards. The adapter keeps its own cursors, but
+callers sharing one adapter (e.g. per-user sync engines) pass their own
+cursor dicts instead.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import ccxt.async_support as ccxt_async
+except ImportError:  # pragma: no cover - optional dependency
+    ccxt_async = None
+
+logger = logging.getLogger(__name__)
+
+# Concurrent requests per adapter
+DEFAULT_MAX_CONCURRENCY = 8
+# Trades requested per fetch_my_trades call
+TRADE_PAGE_SIZE = 500
+# Quote currencies a held base currency is assumed to trade against
+QUOTE_CURRENCIES = ("USDT", "USDC", "USD", "BUSD", "FDUSD", "EUR", "BTC", "ETH", "BNB")
+
+
+class RateBudget:
+    """Token bucket shared by all requests to one exchange"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Requests per second
+            burst: Requests that may be made back to back
+        """
+        self.rate = rate
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        """Wait until `cost` tokens are available and take them"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((cost - self.tokens) / self.rate)
+
+
+_budgets: Dict[str, RateBudget] = {}
+
+
+def get_rate_budget(exchange_id: str, rate: float, burst: int = 1) -> RateBudget:
+    """Get the shared rate budget for an exchange, creating it on first use"""
+    budget = _budgets.get(exchange_id)
+    if budget is None:
+        budget = _budgets[exchange_id] = RateBudget(rate, burst)
+    return budget
+
+
+def create_async_exchange(exchange_id: str, config: Dict[str, Any]):
+    """
+    Create a ccxt.async_support exchange client
+
+    ccxt's own per-instance throttling is disabled; requests are throttled by
+    the shared RateBudget instead.
+
+    Args:
+        exchange_id: ccxt exchange id, e.g. "binance"
+        config: ccxt exchange config (credentials, options)
+
+    Returns:
+        ccxt async exchange instance
+    """
+    if ccxt_async is None:
+        raise RuntimeError("ccxt is not installed")
+    return getattr(ccxt_async, exchange_id)(dict(config, enableRateLimit=False))
+
+
+def normalize_trade(trade: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Convert a ccxt trade to the app's transaction format"""
+    fee = trade.get("fee") or {}
+    return {
+        "id": trade["id"],
+        "timestamp": trade["timestamp"],
+        "symbol": trade["symbol"],
+        "type": "trade",
+        "side": trade["side"],
+        "price": trade["price"],
+        "amount": trade["amount"],
+        "cost": trade["cost"],
+        "fee": fee.get("cost", 0),
+        "fee_currency": fee.get("currency", ""),
+        "source": source
+    }
+
+
+class AsyncExchangeAdapter:
+    """Fetches balances and incremental trade history from one exchange"""
+
+    def __init__(self, exchange, source: str, budget: Optional[RateBudget] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 cursors: Optional[Dict[str, int]] = None,
+                 cursor_ids: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            exchange: ccxt.async_support exchange (or a compatible fake)
+            source: Source name stored on normalized trades
+            budget: Rate budget (default: the shared budget for the exchange's rateLimit)
+            max_concurrency: Concurrent requests
+            cursors: Timestamp (ms) of the newest trade already seen, per market
+            cursor_ids: Ids of the trades seen at each cursor timestamp
+        """
+        self.exchange = exchange
+        self.source = source
+        if budget is None:
+            rate_limit_ms = getattr(exchange, "rateLimit", 50) or 50
+            budget = get_rate_budget(getattr(exchange, "id", source), 1000.0 / rate_limit_ms)
+        self.budget = budget
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.cursors: Dict[str, int] = dict(cursors or {})
+        self.cursor_ids: Dict[str, List[str]] = dict(cursor_ids or {})
+        self._markets: Optional[Dict[str, Any]] = None
+
+    async def _call(self, method: str, *args, **kwargs):
+        async with self.semaphore:
+            await self.budget.acquire()
+            return await getattr(self.exchange, method)(*args, **kwargs)
+
+    async def load_markets(self) -> Dict[str, Any]:
+        """Load the exchange's markets once"""
+        if self._markets is None:
+            self._markets = await self._call("load_markets")
+        return self._markets
+
+    async def fetch_balances(self) -> Dict[str, float]:
+        """
+        Get non-zero balances
+
+        Returns:
+            Total balance keyed by upper-case currency code
+        """
+        balance = await self._call("fetch_balance")
+        totals = balance.get("total") or {
+            currency: data.get("total", 0)
+            for currency, data in balance.items() if isinstance(data, dict) and "total" in data
+        }
+        return {currency.upper(): float(total) for currency, total in totals.items() if total and total > 0}
+
+    async def trade_markets(self, balances: Iterable[str],
+                            cursors: Optional[Dict[str, int]] = None) -> List[str]:
+        """
+        Markets worth fetching trades for
+
+        Args:
+            balances: Currencies with a non-zero balance
+            cursors: Market cursors (default: the adapter's)
+
+        Returns:
+            Markets with a held base currency quoted in a common quote
+            currency, plus every market with a cursor
+        """
+        markets = await self.load_markets()
+        held = {currency.upper() for currency in balances}
+        quotes = held | set(QUOTE_CURRENCIES)
+        selected = {
+            symbol for symbol, market in markets.items()
+            if market.get("base") in held and market.get("quote") in quotes and market.get("spot", True)
+        }
+        cursors = self.cursors if cursors is None else cursors
+        selected.update(symbol for symbol in cursors if symbol in markets)
+        return sorted(selected)
+
+    async def _fetch_market_trades(self, symbol: str, cursors: Dict[str, int],
+                                   cursor_ids: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        """
+        Fetch all trades newer than the market's cursor, page by page
+
+        Pages are requested from the cursor timestamp inclusive, so trades
+        sharing the newest millisecond across a page (or sync) boundary are
+        not skipped; those already seen are recognized by their ids. The
+        cursor is only advanced once every page was fetched.
+        """
+        cursor = cursors.get(symbol)
+        seen = set(cursor_ids.get(symbol, ()))
+        trades: List[Dict[str, Any]] = []
+        since = cursor
+        while True:
+            page = await self._call("fetch_my_trades", symbol, since=since, limit=TRADE_PAGE_SIZE)
+            new = [
+                trade for trade in page
+                if cursor is None or trade["timestamp"] > cursor
+                or (trade["timestamp"] == cursor and str(trade["id"]) not in seen)
+            ]
+            if new:
+                trades.extend(new)
+                newest = max(trade["timestamp"] for trade in new)
+                if newest != cursor:
+                    cursor, seen = newest, set()
+                seen.update(str(trade["id"]) for trade in new if trade["timestamp"] == cursor)
+            if len(page) < TRADE_PAGE_SIZE:
+                break
+            if all(trade["timestamp"] == cursor for trade in page):
+                # A full page within one millisecond cannot be paged by time: step past it
+                since = cursor + 1
+            elif new:
+                since = cursor
+            else:
+                break
+
+        if cursor is not None:
+            cursors[symbol] = cursor
+            cursor_ids[symbol] = sorted(seen)
+        return trades
+
+    async def fetch_new_trades(self, markets: Iterable[str], cursors: Optional[Dict[str, int]] = None,
+                               cursor_ids: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch trades newer than each market's cursor, concurrently
+
+        A failing market is logged and skipped; its cursor is left unchanged
+        so the next sync retries it.
+
+        Args:
+            markets: Market symbols, e.g. from trade_markets()
+            cursors: Market cursors to read and advance (default: the adapter's)
+            cursor_ids: Trade ids seen at each cursor (default: the adapter's)
+
+        Returns:
+            Normalized trades, newest first
+        """
+        if cursors is None:
+            cursors, cursor_ids = self.cursors, self.cursor_ids
+        markets = list(markets)
+        results = await asyncio.gather(*(self._fetch_market_trades(symbol, cursors, cursor_ids) for symbol in markets),
+                                       return_exceptions=True)
+        trades = []
+        for symbol, result in zip(markets, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error fetching {self.source} trades for {symbol}: {str(result)}")
+                continue
+            trades.extend(normalize_trade(trade, self.source) for trade in result)
+        trades.sort(key=lambda trade: trade["timestamp"], reverse=True)
+        return trades
+
+    async def sync_trades(self, balances: Optional[Dict[str, float]] = None,
+                          cursors: Optional[Dict[str, int]] = None,
+                          cursor_ids: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch new trades for every relevant market
+
+        Args:
+            balances: Current balances (fetched if not given)
+            cursors: Market cursors to read and advance in place (default: the adapter's)
+            cursor_ids: Trade ids seen at each cursor, advanced with cursors
+
+        Returns:
+            New normalized trades, newest first
+        """
+        if balances is None:
+            balances = await self.fetch_balances()
+        if cursors is None:
+            cursors, cursor_ids = self.cursors, self.cursor_ids
+        markets = await self.trade_markets(balances, cursors)
+        return await self.fetch_new_trades(markets, cursors, cursor_ids)
+
+    async def close(self) -> None:
+        """Close the exchange's HTTP session"""
+        close = getattr(self.exchange, "close", None)
+        if close is not None:
+            await close()
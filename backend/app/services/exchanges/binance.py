@@ -2,10 +2,10 @@
 import logging
 import os
 from typing import Dict, List, Any, Optional
-import ccxt
 import asyncio
 
 from app.services.exchanges.base import ExchangeService
+from app.services.exchanges.adapter import AsyncExchangeAdapter, create_async_exchange
 
 logger = logging.getLogger(__name__)
 
@@ -16,131 +16,95 @@ class BinanceService(ExchangeService):
         # In a real application, you would get these from a secure source
         api_key = os.getenv("BINANCE_API_KEY", "")
         api_secret = os.getenv("BINANCE_API_SECRET", "")
+        self.has_credentials = bool(api_key and api_secret)
         
-        # Initialize CCXT Binance client
-        self.exchange = ccxt.binance({
-            'apiKey': api_key,
-            'secret': api_secret,
-            'enableRateLimit': True,
-            'options': {
-                'defaultType': 'spot',  # spot, margin, future, delivery
-            }
-        })
+        # Async CCXT Binance client, throttled by the shared Binance rate budget
+        self.adapter = None
+        if self.has_credentials:
+            self.adapter = AsyncExchangeAdapter(create_async_exchange("binance", {
+                'apiKey': api_key,
+                'secret': api_secret,
+                'options': {
+                    'defaultType': 'spot',  # spot, margin, future, delivery
+                }
+            }), source="binance")
+        
+        # Trades synced so far, newest first; each sync only adds new ones
+        self.trades: List[Dict[str, Any]] = []
     
     async def get_balances(self) -> Dict[str, float]:
         """Get all non-zero balances from Binance"""
         try:
-            # In a production app, use ccxt.async_support for async operations
-            # For simplicity in this example, we'll run synchronous code in a thread pool
-            loop = asyncio.get_event_loop()
-            balance_data = await loop.run_in_executor(None, self._fetch_balances)
-            
-            # Process the balance data
-            balances = {}
-            for currency, data in balance_data.items():
-                if data['total'] > 0:
-                    balances[currency.lower()] = data['total']
+            if not self.has_credentials:
+                logger.warning("Binance API keys not set. Using mock data.")
+                return {"btc": 0.1, "eth": 2.5, "usdt": 1000, "bnb": 10}
             
-            return balances
+            balances = await self.adapter.fetch_balances()
+            return {currency.lower(): total for currency, total in balances.items()}
         
         except Exception as e:
             logger.error(f"Error fetching Binance balances: {str(e)}")
             return {}
     
-    def _fetch_balances(self):
-        """Helper method to fetch balances synchronously"""
-        # Check if API keys are set
-        if not self.exchange.apiKey or not self.exchange.secret:
-            logger.warning("Binance API keys not set. Using mock data.")
-            # Return mock data for development
-            return {
-                'BTC': {'free': 0.1, 'used': 0, 'total': 0.1},
-                'ETH': {'free': 2.5, 'used': 0, 'total': 2.5},
-                'USDT': {'free': 1000, 'used': 0, 'total': 1000},
-                'BNB': {'free': 10, 'used': 0, 'total': 10}
-            }
+    async def sync_trades(self) -> List[Dict[str, Any]]:
+        """
+        Fetch trades made since the last sync
+        
+        Only markets for held assets or with earlier trades are queried,
+        concurrently and from each market's last seen trade onwards.
         
-        # Fetch balances from the exchange
-        return self.exchange.fetch_balance()['info']['balances']
+        Returns:
+            New trades, newest first
+        """
+        new_trades = await self.adapter.sync_trades()
+        if new_trades:
+            self.trades = sorted(new_trades + self.trades, key=lambda x: x['timestamp'], reverse=True)
+        return new_trades
     
     async def get_transactions(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get recent transactions from Binance"""
         try:
-            # In a production app, use ccxt.async_support
-            loop = asyncio.get_event_loop()
-            trades = await loop.run_in_executor(
-                None, 
-                lambda: self._fetch_trades(limit, offset)
-            )
-            
-            # Format trades to a standardized format
-            formatted_trades = []
-            for trade in trades:
-                formatted_trades.append({
-                    "id": trade['id'],
-                    "timestamp": trade['timestamp'],
-                    "symbol": trade['symbol'],
-                    "type": "trade",
-                    "side": trade['side'],
-                    "price": trade['price'],
-                    "amount": trade['amount'],
-                    "cost": trade['cost'],
-                    "fee": trade.get('fee', {}).get('cost', 0),
-                    "fee_currency": trade.get('fee', {}).get('currency', ''),
-                    "source": "binance"
-                })
+            if not self.has_credentials:
+                logger.warning("Binance API keys not set. Using mock data.")
+                return self._mock_trades()[offset:offset+limit]
             
-            return formatted_trades
+            await self.sync_trades()
+            return self.trades[offset:offset+limit]
         
         except Exception as e:
             logger.error(f"Error fetching Binance transactions: {str(e)}")
             return []
     
-    def _fetch_trades(self, limit: int, offset: int) -> List[Dict[str, Any]]:
-        """Helper method to fetch trades synchronously"""
-        # Check if API keys are set
-        if not self.exchange.apiKey or not self.exchange.secret:
-            logger.warning("Binance API keys not set. Using mock data.")
-            # Return mock data for development
-            return [
-                {
-                    'id': '123456',
-                    'timestamp': 1646006400000,  # March 1st, 2022
-                    'symbol': 'BTC/USDT',
-                    'side': 'buy',
-                    'price': 40000,
-                    'amount': 0.05,
-                    'cost': 2000,
-                    'fee': {'cost': 2, 'currency': 'USDT'}
-                },
-                {
-                    'id': '123457',
-                    'timestamp': 1646092800000,  # March 2nd, 2022
-                    'symbol': 'ETH/USDT',
-                    'side': 'buy',
-                    'price': 2800,
-                    'amount': 1,
-                    'cost': 2800,
-                    'fee': {'cost': 2.8, 'currency': 'USDT'}
-                }
-            ]
-        
-        # Get all markets
-        markets = self.exchange.load_markets()
-        
-        # Fetch trades for each symbol
-        all_trades = []
-        for symbol in markets:
-            try:
-                trades = self.exchange.fetch_my_trades(symbol, limit=limit)
-                all_trades.extend(trades)
-            except Exception as e:
-                logger.debug(f"Error fetching trades for {symbol}: {str(e)}")
-                continue
-        
-        # Sort by timestamp (newest first) and apply pagination
-        all_trades.sort(key=lambda x: x['timestamp'], reverse=True)
-        return all_trades[offset:offset+limit]
+    def _mock_trades(self) -> List[Dict[str, Any]]:
+        """Mock trades for development without API keys"""
+        return [
+            {
+                "id": '123456',
+                "timestamp": 1646006400000,  # March 1st, 2022
+                "symbol": 'BTC/USDT',
+                "type": "trade",
+                "side": 'buy',
+                "price": 40000,
+                "amount": 0.05,
+                "cost": 2000,
+                "fee": 2,
+                "fee_currency": 'USDT',
+                "source": "binance"
+            },
+            {
+                "id": '123457',
+                "timestamp": 1646092800000,  # March 2nd, 2022
+                "symbol": 'ETH/USDT',
+                "type": "trade",
+                "side": 'buy',
+                "price": 2800,
+                "amount": 1,
+                "cost": 2800,
+                "fee": 2.8,
+                "fee_currency": 'USDT',
+                "source": "binance"
+            }
+        ]
     
     async def get_historical_balances(self, days: int = 30) -> List[Dict[str, Any]]:
         """
@@ -2,10 +2,10 @@
 import logging
 import os
 from typing import Dict, List, Any, Optional
-import ccxt
 import asyncio
 
 from app.services.exchanges.base import ExchangeService
+from app.services.exchanges.adapter import AsyncExchangeAdapter, create_async_exchange
 
 logger = logging.getLogger(__name__)
 
@@ -17,128 +17,90 @@ class CoinbaseService(ExchangeService):
         api_key = os.getenv("COINBASE_API_KEY", "")
         api_secret = os.getenv("COINBASE_API_SECRET", "")
         passphrase = os.getenv("COINBASE_PASSPHRASE", "")
+        self.has_credentials = bool(api_key and api_secret)
         
-        # Initialize CCXT Coinbase client
-        self.exchange = ccxt.coinbasepro({
-            'apiKey': api_key,
-            'secret': api_secret,
-            'password': passphrase,
-            'enableRateLimit': True
-        })
+        # Async CCXT Coinbase Pro client, throttled by the shared Coinbase rate budget
+        self.adapter = None
+        if self.has_credentials:
+            self.adapter = AsyncExchangeAdapter(create_async_exchange("coinbasepro", {
+                'apiKey': api_key,
+                'secret': api_secret,
+                'password': passphrase
+            }), source="coinbase")
+        
+        # Trades synced so far, newest first; each sync only adds new ones
+        self.trades: List[Dict[str, Any]] = []
     
     async def get_balances(self) -> Dict[str, float]:
         """Get all non-zero balances from Coinbase Pro"""
         try:
-            # In a production app, use ccxt.async_support
-            loop = asyncio.get_event_loop()
-            balance_data = await loop.run_in_executor(None, self._fetch_balances)
-            
-            # Process the balance data
-            balances = {}
-            for currency, data in balance_data.items():
-                if data['total'] > 0:
-                    balances[currency.lower()] = data['total']
+            if not self.has_credentials:
+                logger.warning("Coinbase API keys not set. Using mock data.")
+                return {"btc": 0.05, "eth": 1.0, "usdc": 2000, "sol": 20}
             
-            return balances
+            balances = await self.adapter.fetch_balances()
+            return {currency.lower(): total for currency, total in balances.items()}
         
         except Exception as e:
             logger.error(f"Error fetching Coinbase balances: {str(e)}")
             return {}
     
-    def _fetch_balances(self):
-        """Helper method to fetch balances synchronously"""
-        # Check if API keys are set
-        if not self.exchange.apiKey or not self.exchange.secret:
-            logger.warning("Coinbase API keys not set. Using mock data.")
-            # Return mock data for development
-            return {
-                'BTC': {'free': 0.05, 'used': 0, 'total': 0.05},
-                'ETH': {'free': 1.0, 'used': 0, 'total': 1.0},
-                'USDC': {'free': 2000, 'used': 0, 'total': 2000},
-                'SOL': {'free': 20, 'used': 0, 'total': 20}
-            }
+    async def sync_trades(self) -> List[Dict[str, Any]]:
+        """
+        Fetch trades made since the last sync
         
-        # Fetch balances from the exchange
-        return self.exchange.fetch_balance()
+        Returns:
+            New trades, newest first
+        """
+        new_trades = await self.adapter.sync_trades()
+        if new_trades:
+            self.trades = sorted(new_trades + self.trades, key=lambda x: x['timestamp'], reverse=True)
+        return new_trades
     
     async def get_transactions(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """Get recent transactions from Coinbase Pro"""
         try:
-            # Similar implementation to Binance service
-            loop = asyncio.get_event_loop()
-            trades = await loop.run_in_executor(
-                None, 
-                lambda: self._fetch_trades(limit, offset)
-            )
+            if not self.has_credentials:
+                logger.warning("Coinbase API keys not set. Using mock data.")
+                return self._mock_trades()[offset:offset+limit]
             
-            # Format trades to a standardized format
-            formatted_trades = []
-            for trade in trades:
-                formatted_trades.append({
-                    "id": trade['id'],
-                    "timestamp": trade['timestamp'],
-                    "symbol": trade['symbol'],
-                    "type": "trade",
-                    "side": trade['side'],
-                    "price": trade['price'],
-                    "amount": trade['amount'],
-                    "cost": trade['cost'],
-                    "fee": trade.get('fee', {}).get('cost', 0),
-                    "fee_currency": trade.get('fee', {}).get('currency', ''),
-                    "source": "coinbase"
-                })
-            
-            return formatted_trades
+            await self.sync_trades()
+            return self.trades[offset:offset+limit]
         
         except Exception as e:
             logger.error(f"Error fetching Coinbase transactions: {str(e)}")
             return []
     
-    def _fetch_trades(self, limit: int, offset: int) -> List[Dict[str, Any]]:
-        """Helper method to fetch trades synchronously"""
-        # Check if API keys are set
-        if not self.exchange.apiKey or not self.exchange.secret:
-            logger.warning("Coinbase API keys not set. Using mock data.")
-            # Return mock data for development
-            return [
-                {
-                    'id': '789012',
-                    'timestamp': 1645920000000,  # February 27th, 2022
-                    'symbol': 'BTC/USD',
-                    'side': 'buy',
-                    'price': 38000,
-                    'amount': 0.025,
-                    'cost': 950,
-                    'fee': {'cost': 2.5, 'currency': 'USD'}
-                },
-                {
-                    'id': '789013',
-                    'timestamp': 1645833600000,  # February 26th, 2022
-                    'symbol': 'SOL/USD',
-                    'side': 'buy',
-                    'price': 90,
-                    'amount': 10,
-                    'cost': 900,
-                    'fee': {'cost': 2.25, 'currency': 'USD'}
-                }
-            ]
-        
-        # Get all markets
-        markets = self.exchange.load_markets()
-        
-        # Fetch trades for each symbol
-        all_trades = []
-        for symbol in markets:
-            try:
-                trades = self.exchange.fetch_my_trades(symbol, limit=limit)
-                all_trades.extend(trades)
-            except Exception as e:
-                logger.debug(f"Error fetching trades for {symbol}: {str(e)}")
-                continue
-        
-        # Sort by timestamp (newest first) and apply pagination
-        all_trades.sort(key=lambda x: x['timestamp'], reverse=True)
-        return all_trades[offset:offset+limit]
+    def _mock_trades(self) -> List[Dict[str, Any]]:
+        """Mock trades for development without API keys"""
+        return [
+            {
+                "id": '789012',
+                "timestamp": 1645920000000,  # February 27th, 2022
+                "symbol": 'BTC/USD',
+                "type": "trade",
+                "side": 'buy',
+                "price": 38000,
+                "amount": 0.025,
+                "cost": 950,
+                "fee": 2.5,
+                "fee_currency": 'USD',
+                "source": "coinbase"
+            },
+            {
+                "id": '789013',
+                "timestamp": 1645833600000,  # February 26th, 2022
+                "symbol": 'SOL/USD',
+                "type": "trade",
+                "side": 'buy',
+                "price": 90,
+                "amount": 10,
+                "cost": 900,
+                "fee": 2.25,
+                "fee_currency": 'USD',
+                "source": "coinbase"
+            }
+        ]
     
     async def get_historical_balances(self, days: int = 30) -> List[Dict[str, Any]]:
         """Get historical balance snapshots"""
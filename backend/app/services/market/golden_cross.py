@@ -0,0 +1,290 @@
+"""
+Golden-cross screener over the whole coin universe
+
+Instead of analysing one coin at a time, the screener loads the stored daily
+price history of every coin into a (days × coins) matrix and computes both
+moving averages for all coins at once from a cumulative sum along the day
+axis: the average over a window is (csum[t] - csum[t - period]) / period.
+Missing days are counted the same way, so a window with gaps yields NaN
+instead of a biased average.
+
+From the short/long spread (short MA / long MA - 1) it derives, per coin:
+
+- the latest golden (spread turns non-negative) or death (turns negative)
+  cross and its date
+- the spread trend over the last few days and the estimated days to cross
+- a status: recent golden/death cross, approaching (below the long MA by
+  less than APPROACHING_THRESHOLD and closing in), above or below
+
+The universe is the top coins by market cap in the latest market data.
+Results for the universe are persisted in one batched write per check.
+
+The daily history comes from the market data refreshes: each refresh stores
+every coin's price for the day, so the last refresh of a day is its close.
+"""
+import asyncio
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core.settings import DATA_DIR
+from app.services.portfolio.valuation import MarketSnapshot, load_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Days the spread trend is measured over
+TREND_DAYS = 5
+# A cross this many days old or newer is reported as the coin's status
+RECENT_CROSS_DAYS = 7
+# Extra history loaded beyond the long MA period, so recent crosses can be found
+CROSS_LOOKBACK_DAYS = 60
+
+STATUSES = ("golden_cross", "death_cross", "approaching", "above", "below")
+
+
+def moving_average(prices: np.ndarray, period: int) -> np.ndarray:
+    """
+    Trailing simple moving average of every column
+
+    Args:
+        prices: (days × coins) matrix, NaN where a price is missing
+        period: Window length in days
+
+    Returns:
+        Matrix of the same shape; NaN until a full window of prices exists
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    result = np.full(prices.shape, np.nan)
+    if period <= 0 or len(prices) < period:
+        return result
+
+    valid = ~np.isnan(prices)
+    zeros = np.zeros((1, prices.shape[1]))
+    sums = np.concatenate([zeros, np.cumsum(np.where(valid, prices, 0.0), axis=0)])
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+
+    window_sums = sums[period:] - sums[:-period]
+    window_counts = counts[period:] - counts[:-period]
+    result[period - 1:] = np.where(window_counts == period, window_sums / period, np.nan)
+    return result
+
+
+def align_history(history: Mapping[str, Sequence[Tuple[str, float]]],
+                  coin_ids: Optional[Sequence[str]] = None) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    Align per-coin (date, price) series into a matrix
+
+    Args:
+        history: Price series keyed by coin ID, as returned by
+            DatabaseService.get_price_history_since
+        coin_ids: Coins to include, in column order (default: all, sorted)
+
+    Returns:
+        Tuple of (dates, coin IDs, (dates × coins) matrix with NaN gaps)
+    """
+    coin_ids = [coin_id for coin_id in (coin_ids or sorted(history)) if coin_id in history]
+    dates = sorted({day for coin_id in coin_ids for day, _ in history[coin_id]})
+    date_index = {day: i for i, day in enumerate(dates)}
+    matrix = np.full((len(dates), len(coin_ids)), np.nan)
+    for column, coin_id in enumerate(coin_ids):
+        for day, price in history[coin_id]:
+            matrix[date_index[day], column] = price
+    return dates, coin_ids, matrix
+
+
+def screen(dates: Sequence[str], coin_ids: Sequence[str], prices: np.ndarray,
+           short_period: int = settings.SHORT_MA_PERIOD, long_period: int = settings.LONG_MA_PERIOD,
+           threshold: float = settings.APPROACHING_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Golden-cross state of every coin, ranked
+
+    Args:
+        dates: Ascending dates, one per row
+        coin_ids: Coin IDs, one per column
+        prices: (dates × coins) price matrix
+        short_period: Short moving average period
+        long_period: Long moving average period
+        threshold: Maximum distance below the long MA (as a fraction) for
+            a coin to count as approaching a golden cross
+
+    Returns:
+        One row per coin with a full long MA window. Approaching coins come
+        first, then recent crosses, then the rest; within each group coins
+        closer to a cross rank higher.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(dates) < 2 or prices.size == 0:
+        return []
+
+    short_ma = moving_average(prices, short_period)
+    long_ma = moving_average(prices, long_period)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spread = short_ma / long_ma - 1.0
+
+    # Crosses between consecutive days (NaN comparisons are False)
+    previous, current = spread[:-1], spread[1:]
+    golden = (previous < 0) & (current >= 0)
+    death = (previous >= 0) & (current < 0)
+    crossed = golden | death
+    has_cross = crossed.any(axis=0)
+    # Row (in `current`) of the last cross per coin
+    last_cross = len(current) - 1 - np.argmax(crossed[::-1], axis=0)
+    last_is_golden = golden[last_cross, np.arange(len(coin_ids))]
+
+    latest = spread[-1]
+    lag = min(TREND_DAYS, len(spread) - 1)
+    trend = (latest - spread[-1 - lag]) / lag
+    with np.errstate(invalid="ignore", divide="ignore"):
+        days_to_cross = np.where((latest < 0) & (trend > 0), -latest / trend, np.nan)
+
+    days_since_cross = len(current) - 1 - last_cross
+    recent = has_cross & (days_since_cross < RECENT_CROSS_DAYS)
+    approaching = (latest < 0) & (latest > -threshold) & (trend > 0)
+    status = np.where(recent & last_is_golden, "golden_cross",
+             np.where(recent & ~last_is_golden, "death_cross",
+             np.where(approaching, "approaching",
+             np.where(latest >= 0, "above", "below"))))
+
+    # Rank: approaching, recent crosses, the rest; each by distance from a cross
+    group = np.select([status == "approaching", recent], [0, 1], default=2)
+    order = np.lexsort((-latest, np.abs(latest), group))
+
+    results = []
+    for column in order:
+        if np.isnan(latest[column]):
+            continue
+        cross_row = last_cross[column] + 1
+        results.append({
+            "coin_id": coin_ids[column],
+            "rank": len(results) + 1,
+            "status": str(status[column]),
+            "price": float(prices[-1, column]) if not np.isnan(prices[-1, column]) else None,
+            "short_ma": float(short_ma[-1, column]),
+            "long_ma": float(long_ma[-1, column]),
+            "proximity": float(latest[column]),
+            "trend": float(trend[column]) if not np.isnan(trend[column]) else None,
+            "days_to_cross": float(days_to_cross[column]) if not np.isnan(days_to_cross[column]) else None,
+            "last_cross_type": ("golden" if last_is_golden[column] else "death") if has_cross[column] else None,
+            "last_cross_date": dates[cross_row] if has_cross[column] else None,
+            "as_of": dates[-1]
+        })
+    return results
+
+
+def top_coin_ids(snapshot: MarketSnapshot, limit: int) -> List[str]:
+    """
+    Coin IDs ranked by market cap
+
+    Args:
+        snapshot: Market snapshot
+        limit: Maximum number of coins
+
+    Returns:
+        IDs of the largest coins with a known market cap, largest first
+    """
+    order = np.argsort(-snapshot.market_caps, kind="stable")[:limit]
+    return [snapshot.ids[column] for column in order if snapshot.market_caps[column] > 0]
+
+
+class GoldenCrossScreener:
+    """Screens the top coins for golden crosses from stored price history"""
+
+    def __init__(self, db_service=None, short_period: int = settings.SHORT_MA_PERIOD,
+                 long_period: int = settings.LONG_MA_PERIOD, threshold: float = settings.APPROACHING_THRESHOLD,
+                 universe_size: int = settings.TOP_COINS_LIMIT,
+                 market_data_file: str = os.path.join(DATA_DIR, "market_data.json")):
+        self._db_service = db_service
+        self.market_data_file = market_data_file
+        self.short_period = short_period
+        self.long_period = long_period
+        self.threshold = threshold
+        self.universe_size = universe_size
+        self.results: List[Dict[str, Any]] = []
+        self.checked_at: Optional[datetime] = None
+        self.lock = threading.Lock()
+
+    @property
+    def db_service(self):
+        """Database service; defaults to the app-wide instance"""
+        if self._db_service is None:
+            from app.services import db_service
+            self._db_service = db_service
+        return self._db_service
+
+    def run(self, coin_ids: Optional[Sequence[str]] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Screen the universe and persist the results
+
+        Args:
+            coin_ids: Universe (default: the top coins by market cap in
+                market_data_file, or every coin with stored history if there
+                is no market data yet); capped at universe_size
+            end: Last day of history to load from (default: today)
+
+        Returns:
+            Ranked rows from screen()
+        """
+        with self.lock:
+            start = (end or date.today()) - timedelta(days=self.long_period + CROSS_LOOKBACK_DAYS)
+            history = self.db_service.get_price_history_since(start.isoformat())
+            if coin_ids is None:
+                coin_ids = top_coin_ids(load_snapshot(self.market_data_file), self.universe_size)
+            universe = list(coin_ids) if coin_ids else sorted(history)
+            dates, columns, prices = align_history(history, universe[:self.universe_size])
+
+            results = screen(dates, columns, prices, self.short_period, self.long_period, self.threshold)
+            if results:
+                self.db_service.save_golden_cross_batch(results)
+            self.results = results
+            self.checked_at = datetime.now()
+            approaching = sum(1 for row in results if row["status"] == "approaching")
+            logger.info(f"Golden cross screen: {len(results)} coins, {approaching} approaching")
+            return results
+
+    def record_closes(self, snapshot: MarketSnapshot, day: Optional[date] = None) -> int:
+        """
+        Store the snapshot's prices as the day's close of every coin
+
+        Args:
+            snapshot: Market snapshot
+            day: Day the prices belong to (default: today)
+
+        Returns:
+            Number of prices stored
+        """
+        closes = {
+            coin_id: price for coin_id, price in zip(snapshot.ids, snapshot.prices.tolist())
+            if np.isfinite(price) and price > 0
+        }
+        if closes:
+            self.db_service.save_daily_closes((day or date.today()).isoformat(), closes)
+        return len(closes)
+
+    async def on_market_update(self, market_data: Mapping[str, Any]) -> None:
+        """MarketDataService update listener that extends the daily history"""
+        snapshot = MarketSnapshot.from_market_data(market_data)
+        await asyncio.to_thread(self.record_closes, snapshot)
+
+    def ranked(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Latest results, optionally filtered by status
+
+        Args:
+            status: One of STATUSES
+            limit: Maximum rows
+
+        Returns:
+            Ranked rows
+        """
+        results = self.results
+        if status:
+            results = [row for row in results if row["status"] == status]
+        return results[:limit]
+
+
+golden_cross_screener = GoldenCrossScreener()
@@ -1,8 +1,11 @@
 import logging
 import os
 import json
+from app.core.metrics import upstream_trace_config
+from app.core.persistence import load_json, save_json
+from app.services.market.snapshot_file import snapshot_path, write_snapshot
 import ssl
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import aiohttp # type: ignore
 import asyncio
 from datetime import datetime, timedelta
@@ -15,41 +18,31 @@ class MarketDataService:
     def __init__(self):
         self.base_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
         self.market_data_file = os.path.join(self.base_path, 'data', 'market_data.json')
+        # Memory-mappable copy of the coin data for valuation and AI context
+        self.market_snapshot_file = snapshot_path(self.market_data_file)
         self.last_update = None
         self.update_interval = timedelta(minutes=5)
         self.coingecko_api = "https://api.coingecko.com/api/v3"
-        self.update_task = None
-        # Don't start the update loop in the constructor
-        # It will be started when the app starts
+        # Parsed market_data.json and the modification time it was read at
+        self._cached_data: Optional[Tuple[int, Dict[str, Any]]] = None
+        # Callbacks run with the new market data after each successful update
+        self.update_listeners: List[Callable[[Dict[str, Any]], Any]] = []
+        # Updates run as the "market_data" task of the app's scheduler
 
-    def _start_update_loop(self):
-        """Start the background update loop"""
-        # Only start if not already running
-        if self.update_task is None or self.update_task.done():
-            try:
-                # Get the current event loop or create one if needed
-                try:
-                    loop = asyncio.get_event_loop()
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                # Create the task in the current event loop
-                self.update_task = loop.create_task(self._update_loop())
-                logger.info("Market data update loop started")
-            except Exception as e:
-                logger.error(f"Failed to start market data update loop: {str(e)}")
+    def add_update_listener(self, listener: Callable[[Dict[str, Any]], Any]):
+        """Register a callback (sync or async) for market data updates"""
+        if listener not in self.update_listeners:
+            self.update_listeners.append(listener)
 
-    async def _update_loop(self):
-        """Background loop to update market data periodically"""
-        while True:
+    async def _notify_listeners(self, market_data: Dict[str, Any]):
+        """Run update listeners; one failing listener doesn't affect the others"""
+        for listener in self.update_listeners:
             try:
-                await self._update_market_data()
-                logger.info(f"Next market data update in {self.update_interval.total_seconds()} seconds")
-                await asyncio.sleep(self.update_interval.total_seconds())
+                result = listener(market_data)
+                if asyncio.iscoroutine(result):
+                    await result
             except Exception as e:
-                logger.error(f"Error in market data update loop: {str(e)}")
-                await asyncio.sleep(60)  # Wait a minute before retrying
+                logger.error(f"Error in market data update listener: {str(e)}")
 
     async def _update_market_data(self):
         """Update market data from CoinGecko"""
@@ -71,7 +64,8 @@ class MarketDataService:
             ssl_context.check_hostname = False
             ssl_context.verify_mode = ssl.CERT_NONE
             
-            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
+            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context),
+                                             trace_configs=[upstream_trace_config()]) as session:
                 # Fetch up to 5 pages (500 coins)
                 all_coins_data = []
                 pages_to_fetch = 5  # Fetch 5 pages for 500 coins (100 per page)
@@ -179,16 +173,15 @@ class MarketDataService:
                     }
                     
                     # Save to file
-                    try:
-                        # Ensure the directory exists
-                        os.makedirs(os.path.dirname(self.market_data_file), exist_ok=True)
-                        
-                        with open(self.market_data_file, 'w') as f:
-                            json.dump(market_data, f, indent=2)
+                    # Written atomically so concurrent readers never see a partial file
+                    if save_json(self.market_data_file, market_data, indent=2):
                         self.last_update = datetime.now()
                         logger.info(f"Updated market data file with {len(prices)} coins from CoinGecko")
-                    except Exception as e:
-                        logger.error(f"Error saving market data file: {e}")
+                        if not write_snapshot(self.market_snapshot_file, market_data):
+                            logger.error("Error saving market snapshot file")
+                        await self._notify_listeners(market_data)
+                    else:
+                        logger.error("Error saving market data file")
                 else:
                     logger.error("Failed to fetch any market data from CoinGecko API")
                     if os.path.exists(self.market_data_file):
@@ -196,6 +189,32 @@ class MarketDataService:
         except Exception as e:
             logger.error(f"Error updating market data: {str(e)}")
 
+    def _read_market_data(self) -> Optional[Dict[str, Any]]:
+        """
+        Parsed market data file, re-read only when the file changed
+
+        The returned dictionary is shared between callers and must be
+        treated as read-only.
+        """
+        try:
+            mtime = os.stat(self.market_data_file).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._cached_data
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        data = load_json(self.market_data_file)
+        if not isinstance(data, dict):
+            raise ValueError("market data file is not a JSON object")
+        self._cached_data = (mtime, data)
+        return data
+
+    @property
+    def data_version(self) -> Optional[int]:
+        """Modification time (ns) of the market data last returned by get_market_data"""
+        cached = self._cached_data
+        return cached[0] if cached is not None else None
+
     async def get_market_data(self) -> Dict[str, Any]:
         """Get current market data, forcing an update if data is stale"""
         try:
@@ -204,8 +223,7 @@ class MarketDataService:
             
             if os.path.exists(self.market_data_file):
                 try:
-                    with open(self.market_data_file, 'r') as f:
-                        data = json.load(f)
+                    data = self._read_market_data()
                         
                     # Check if data is recent (last 15 minutes)
                     if "overview" in data and "lastUpdated" in data["overview"]:
@@ -230,11 +248,10 @@ class MarketDataService:
                 await self._update_market_data()
                 
                 # Try to read the updated file
-                if os.path.exists(self.market_data_file):
-                    with open(self.market_data_file, 'r') as f:
-                        data = json.load(f)
-                        logger.info(f"Loaded fresh data with {len(data.get('prices', []))} coins")
-                        return data
+                data = self._read_market_data()
+                if data is not None:
+                    logger.info(f"Loaded fresh data with {len(data.get('prices', []))} coins")
+                    return data
                         
             return {"error": "No market data available"}
         except Exception as e:
@@ -0,0 +1,270 @@
+"""
+Binary market snapshot file
+
+market_data.json is pretty-printed and every reader parses all of it. The
+snapshot file holds the same coin data in a layout that can be memory-mapped
+and used in place:
+
+    header    magic, format, row count, sequence number, update time,
+              offsets of the sections below (struct HEADER)
+    strings   UTF-8, NUL-separated: the update time as written to
+              market_data.json, then all symbols, all names, all ids
+    columns   float64 little-endian, one contiguous array per column in
+              COLUMNS order, starting on an 8-byte boundary
+
+A reader maps the file and gets each column as a NumPy view of the mapped
+pages, so loading a snapshot costs one string split instead of a JSON parse,
+and every worker process on the host shares the same physical pages.
+
+MarketDataService writes the file next to market_data.json on every refresh,
+atomically (temp file + rename). A reader that already mapped the previous
+file keeps a valid view of it until it maps the new one.
+
+Like MarketSnapshot, the file holds one row per symbol; when a symbol
+appears more than once the first (highest market cap) entry wins.
+"""
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.core.persistence import save_bytes
+
+MAGIC = b"MKTSNAP\0"
+FORMAT_VERSION = 1
+
+# magic, format, rows, sequence, updated (epoch seconds), strings offset,
+# strings size, columns offset
+HEADER = struct.Struct("<8sIIQdQQQ")
+
+COLUMNS = ("price", "market_cap", "volume_24h", "change_24h", "change_7d", "change_30d", "change_1y", "rank")
+
+# Fields each column is read from, in MarketDataService and raw CoinGecko rows
+_SOURCE_FIELDS = {
+    "price": ("priceUsd", "current_price"),
+    "market_cap": ("marketCap", "market_cap"),
+    "volume_24h": ("volume24h", "total_volume"),
+    "change_24h": ("change24h", "price_change_percentage_24h"),
+    "change_7d": ("change7d", "price_change_percentage_7d", "price_change_percentage_7d_in_currency"),
+    "change_30d": ("change30d", "price_change_percentage_30d", "price_change_percentage_30d_in_currency"),
+    "change_1y": ("price_change_percentage_1y_in_currency", "price_change_percentage_1y"),
+    "rank": ("market_cap_rank",),
+}
+
+
+def snapshot_path(market_data_file: str) -> str:
+    """Path of the snapshot file kept next to a market data JSON file"""
+    return os.path.splitext(market_data_file)[0] + ".snap"
+
+
+def _number(row: Mapping[str, Any], fields: Sequence[str]) -> float:
+    for field in fields:
+        value = row.get(field)
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+def _text(value: Any) -> str:
+    # NUL separates the string table entries
+    return str(value or "").replace("\0", "")
+
+
+def _timestamp(updated: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(updated).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def read_sequence(path: str) -> int:
+    """Sequence number of an existing snapshot file (0 if missing or invalid)"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(HEADER.size)
+    except OSError:
+        return 0
+    if len(raw) < HEADER.size:
+        return 0
+    magic, format_version, _, sequence = HEADER.unpack(raw)[:4]
+    return sequence if magic == MAGIC and format_version == FORMAT_VERSION else 0
+
+
+def encode_snapshot(market_data: Mapping[str, Any], sequence: int = 1) -> bytes:
+    """
+    Encode market data in the snapshot file format
+
+    Args:
+        market_data: Dictionary with a "prices" list and an "updated" time,
+            as written to market_data.json
+        sequence: Sequence number stored in the header
+
+    Returns:
+        File contents
+    """
+    rows = market_data.get("prices", []) if market_data else []
+    updated = market_data.get("updated") if market_data else None
+
+    symbols: List[str] = []
+    names: List[str] = []
+    ids: List[str] = []
+    seen = set()
+    kept = []
+    for row in rows:
+        symbol = _text(row.get("symbol")).upper()
+        if not symbol or symbol in seen:
+            continue
+        seen.add(symbol)
+        symbols.append(symbol)
+        names.append(_text(row.get("name")) or symbol)
+        ids.append(_text(row.get("id")) or symbol.lower())
+        kept.append(row)
+
+    strings = "\0".join([_text(updated)] + symbols + names + ids).encode("utf-8")
+    columns = np.empty((len(COLUMNS), len(kept)), dtype="<f8")
+    for i, column in enumerate(COLUMNS):
+        fields = _SOURCE_FIELDS[column]
+        columns[i] = np.fromiter((_number(row, fields) for row in kept), dtype=np.float64, count=len(kept))
+
+    strings_offset = HEADER.size
+    columns_offset = (strings_offset + len(strings) + 7) & ~7
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(kept), sequence, _timestamp(updated),
+                         strings_offset, len(strings), columns_offset)
+    padding = b"\0" * (columns_offset - strings_offset - len(strings))
+    return header + strings + padding + columns.tobytes()
+
+
+def write_snapshot(path: str, market_data: Mapping[str, Any]) -> bool:
+    """
+    Atomically write market data as a snapshot file
+
+    The sequence number is one more than the file being replaced.
+
+    Args:
+        path: Destination path
+        market_data: Market data as written to market_data.json
+
+    Returns:
+        True if successful, False otherwise
+    """
+    return save_bytes(path, encode_snapshot(market_data, read_sequence(path) + 1))
+
+
+class MarketSnapshotFile:
+    """A memory-mapped snapshot file; columns are read-only NumPy views"""
+
+    def __init__(self, path: str):
+        """
+        Map a snapshot file
+
+        Args:
+            path: Snapshot file path
+
+        Raises:
+            OSError: If the file cannot be opened
+            ValueError: If it is not a snapshot file of this format
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file is closed or replaced
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size:
+            raise ValueError(f"{path} is too short for a market snapshot")
+
+        (magic, format_version, rows, self.sequence, self.updated_at,
+         strings_offset, strings_size, columns_offset) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a market snapshot")
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} has unsupported snapshot format {format_version}")
+        if columns_offset + len(COLUMNS) * rows * 8 > len(self._mmap):
+            raise ValueError(f"{path} is truncated")
+
+        strings = self._mmap[strings_offset:strings_offset + strings_size].decode("utf-8").split("\0")
+        self.rows = rows
+        self.updated = strings[0] or None
+        self.symbols = strings[1:1 + rows]
+        self.names = strings[1 + rows:1 + 2 * rows]
+        self.ids = strings[1 + 2 * rows:1 + 3 * rows]
+
+        data = np.frombuffer(self._mmap, dtype="<f8", count=len(COLUMNS) * rows, offset=columns_offset)
+        self.columns: Dict[str, np.ndarray] = dict(zip(COLUMNS, data.reshape(len(COLUMNS), rows)))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def find(self, keys: Iterable[str]) -> List[int]:
+        """
+        Rows matching any of the keys by symbol, id or name (case-insensitive)
+
+        Args:
+            keys: Symbols, CoinGecko ids or names
+
+        Returns:
+            Row indexes in file (market cap) order
+        """
+        wanted = {key.lower() for key in keys}
+        return [
+            i for i in range(self.rows)
+            if self.symbols[i].lower() in wanted or self.ids[i].lower() in wanted or self.names[i].lower() in wanted
+        ]
+
+    def records(self, indexes: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Rows as dictionaries in the market_data.json "prices" layout
+
+        Args:
+            indexes: Rows to return (default: all)
+
+        Returns:
+            List of coin dictionaries
+        """
+        if indexes is None:
+            indexes = range(self.rows)
+        columns = {name: values.tolist() for name, values in self.columns.items()}
+        return [
+            {
+                "symbol": self.symbols[i],
+                "name": self.names[i],
+                "id": self.ids[i],
+                "priceUsd": columns["price"][i],
+                "change24h": columns["change_24h"][i],
+                "marketCap": columns["market_cap"][i],
+                "volume24h": columns["volume_24h"][i],
+                "change7d": columns["change_7d"][i],
+                "change30d": columns["change_30d"][i],
+                "price_change_percentage_24h_in_currency": columns["change_24h"][i],
+                "price_change_percentage_7d_in_currency": columns["change_7d"][i],
+                "price_change_percentage_30d_in_currency": columns["change_30d"][i],
+                "price_change_percentage_1y_in_currency": columns["change_1y"][i],
+                "market_cap_rank": int(columns["rank"][i]),
+            }
+            for i in indexes
+        ]
+
+    def to_market_snapshot(self):
+        """
+        A MarketSnapshot whose arrays are views of the mapped file
+
+        Returns:
+            MarketSnapshot
+        """
+        from app.services.portfolio.valuation import MarketSnapshot
+
+        return MarketSnapshot(
+            self.symbols,
+            self.columns["price"],
+            {"24h": self.columns["change_24h"], "7d": self.columns["change_7d"], "30d": self.columns["change_30d"]},
+            names=self.names,
+            version=self.updated,
+            ids=self.ids,
+            market_caps=self.columns["market_cap"],
+            volumes=self.columns["volume_24h"]
+        )
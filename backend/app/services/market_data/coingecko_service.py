@@ -7,7 +7,8 @@ import os
 from datetime import datetime, timezone, timedelta
 import logging
 from typing import List, Dict, Optional, Union, Tuple
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.rules import COINGECKO_API, COINGECKO_ENDPOINTS, RATE_LIMIT_RULES
 from app.models.crypto_data import CryptoData, PriceHistory
@@ -207,7 +208,7 @@ class CoinGeckoService:
             logger.error(f"Error fetching historical prices for {coin_id}: {str(e)}")
             return []
 
-    async def process_single_coin(self, db: Session, coin: Dict) -> bool:
+    async def process_single_coin(self, db: AsyncSession, coin: Dict) -> bool:
         """Process a single coin's data"""
         try:
             logger.info(f"Processing coin: {coin['name']} ({coin['symbol']})")
@@ -218,7 +219,7 @@ class CoinGeckoService:
             total_volume = safe_float(coin.get('total_volume'))
             
             # Check if coin exists
-            crypto_data = db.query(CryptoData).filter(CryptoData.coin_id == coin["id"]).first()
+            crypto_data = await db.scalar(select(CryptoData).where(CryptoData.coin_id == coin["id"]))
             
             if not crypto_data:
                 # Create new record
@@ -242,30 +243,27 @@ class CoinGeckoService:
                 crypto_data.last_updated = datetime.now(timezone.utc)
             
             # Commit basic coin data to get the ID
-            db.commit()
+            await db.commit()
+            
+            # Load the timestamps we already have once instead of querying per price point
+            result = await db.execute(
+                select(PriceHistory.timestamp).where(PriceHistory.crypto_id == crypto_data.id)
+            )
+            existing_timestamps = set(result.scalars().all())
             
             # Create price history record for current price
             if current_price is not None:
                 current_time = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
                 
                 # Check if we already have a price for today
-                existing_price = (
-                    db.query(PriceHistory)
-                    .filter(
-                        PriceHistory.crypto_id == crypto_data.id,
-                        PriceHistory.timestamp == current_time
-                    )
-                    .first()
-                )
-                
-                if not existing_price:
-                    price_history = PriceHistory(
-                        crypto=crypto_data,
+                if current_time.replace(tzinfo=None) not in existing_timestamps:
+                    db.add(PriceHistory(
+                        crypto_id=crypto_data.id,
                         price=current_price,
                         timestamp=current_time
-                    )
-                    db.add(price_history)
-                    db.commit()
+                    ))
+                    await db.commit()
+                    existing_timestamps.add(current_time.replace(tzinfo=None))
             
             # Check available days for historical data
             available_days = await self.check_available_days(coin["id"])
@@ -283,27 +281,20 @@ class CoinGeckoService:
                     
                     if historical_prices:
                         logger.info(f"Processing {len(historical_prices)} historical price points for {coin['name']}")
-                        for price_data in historical_prices:
-                            # Check if we already have this price point
-                            existing_price = (
-                                db.query(PriceHistory)
-                                .filter(
-                                    PriceHistory.crypto_id == crypto_data.id,
-                                    PriceHistory.timestamp == price_data["timestamp"]
-                                )
-                                .first()
+                        new_prices = [
+                            PriceHistory(
+                                crypto_id=crypto_data.id,
+                                price=price_data["price"],
+                                timestamp=price_data["timestamp"]
                             )
-                            
-                            if not existing_price:
-                                price_history = PriceHistory(
-                                    crypto=crypto_data,
-                                    price=price_data["price"],
-                                    timestamp=price_data["timestamp"]
-                                )
-                                db.add(price_history)
+                            for price_data in historical_prices
+                            if price_data["timestamp"].replace(tzinfo=None) not in existing_timestamps
+                        ]
+                        db.add_all(new_prices)
                         
                         # Commit all new price history records
-                        db.commit()
+                        await db.commit()
+                        existing_timestamps.update(p.timestamp.replace(tzinfo=None) for p in new_prices)
                         historical_data_success = True
                         logger.info(f"Successfully processed historical data for {coin['name']}")
                     else:
@@ -327,7 +318,7 @@ class CoinGeckoService:
             logger.error(f"Error processing coin {coin.get('name', 'Unknown')}: {str(e)}")
             return False
 
-    async def update_crypto_data(self, db: Session) -> None:
+    async def update_crypto_data(self, db: AsyncSession) -> None:
         """Update cryptocurrency data in the database"""
         try:
             logger.info("Starting crypto data update")
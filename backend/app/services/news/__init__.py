@@ -1,16 +1,21 @@
 """
 News services module initialization
+
+The service singletons load their JSON caches when constructed, so they are
+registered with the service container and built on first use or during
+startup warm-up rather than on import.
 """
+from app.core.container import container
 from app.services.news.crypto_news_service import CryptoNewsService
 from app.services.news.macro_news_service import MacroNewsService
 from app.services.news.reddit_service import RedditService
 from app.services.news.twitter_service import TwitterService
 
-# Initialize service instances
-crypto_news_service = CryptoNewsService()
-macro_news_service = MacroNewsService()
-reddit_service = RedditService()
-twitter_service = TwitterService()
+# Service instances, built lazily
+crypto_news_service = container.register("crypto_news", CryptoNewsService)
+macro_news_service = container.register("macro_news", MacroNewsService)
+reddit_service = container.register("reddit", RedditService)
+twitter_service = container.register("twitter", TwitterService)
 
 __all__ = ["CryptoNewsService", "MacroNewsService", "RedditService", "TwitterService",
            "crypto_news_service", "macro_news_service", "reddit_service", "twitter_service"]
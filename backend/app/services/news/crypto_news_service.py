@@ -1,18 +1,84 @@
-import json
-import time
-import threading
+import asyncio
 import logging
 import os
 from datetime import datetime
-from app.services.news.feed_fetcher import fetch_rss, clean_html, detect_sentiment
+import aiohttp # type: ignore
+from app.core.metrics import upstream_trace_config
+from app.core.persistence import load_json, save_json_later
+from app.services.news.feed_fetcher import fetch_rss_async
+from app.services.news.snapshot import NewsSnapshot
 
 logger = logging.getLogger(__name__)
 
+# Feeds fetched concurrently during a refresh
+FEED_CONCURRENCY = 4
+
+BITCOIN_KEYWORDS = ["bitcoin", "btc", "satoshi", "lightning network", "bitcoin halving"]
+MESSARI_KEYWORDS = ["messari", "research report", "crypto research"]
+
+def _matching(articles, keywords, source_term):
+    return [
+        item for item in articles
+        if any(keyword in item['title'].lower() or
+              keyword in item.get('content', '').lower()
+              for keyword in keywords) or
+        source_term in item['source']
+    ]
+
+def build_news_lists(all_news):
+    """
+    Sort and deduplicate fetched articles and derive the Bitcoin and Messari lists
+
+    Args:
+        all_news: Articles from every feed
+
+    Returns:
+        Tuple of (unique articles, Bitcoin articles, Messari articles)
+    """
+    # Sort by newest first
+    all_news = sorted(all_news, key=lambda x: datetime.strptime(x['timestamp'], '%m/%d/%Y, %I:%M:%S %p'), reverse=True)
+    
+    # Deduplicate based on title similarity
+    unique_news = []
+    seen_titles = set()
+    for item in all_news:
+        title_lower = item['title'].lower()
+        if not any(title_lower in seen_title or seen_title in title_lower for seen_title in seen_titles):
+            seen_titles.add(title_lower)
+            unique_news.append(item)
+    
+    return (unique_news, _matching(unique_news, BITCOIN_KEYWORDS, "BITCOIN"),
+            _matching(unique_news, MESSARI_KEYWORDS, "MESSARI"))
+
+def mentions_asset(item, asset: str) -> bool:
+    """
+    True if an article's title or summary mentions an asset as a word
+
+    Args:
+        item: Article dictionary
+        asset: Symbol or name, e.g. "BTC"
+
+    Returns:
+        Whether the article mentions the asset
+    """
+    term = asset.lower()
+    title = item.get('title', '').lower()
+    summary = item.get('summary', '').lower()
+    return (f" {term} " in f" {title} " or
+            f" {term} " in f" {summary} " or
+            f" {term}." in f" {title}" or
+            f" {term}." in f" {summary}" or
+            f" {term}," in f" {title}" or
+            f" {term}," in f" {summary}" or
+            title.startswith(f"{term} ") or
+            summary.startswith(f"{term} "))
+
 class CryptoNewsService:
     def __init__(self):
-        self.news_database = []
-        self.is_running_flag = False
-        self.update_thread = None
+        # Articles of the last refresh; replaced as a whole, never modified in place
+        self.snapshot = NewsSnapshot()
+        # Callbacks run with the latest articles after each feed update
+        self.update_listeners = []
         self.crypto_feeds = [
             {'url': 'https://cointelegraph.com/rss', 'source': 'COINTELEGRAPH'},
             {'url': 'https://www.coindesk.com/arc/outboundfeeds/rss', 'source': 'COINDESK'},
@@ -28,10 +94,35 @@ class CryptoNewsService:
             {'url': 'https://news.bitcoin.com/feed/', 'source': 'BITCOIN.COM'},
             {'url': 'https://btcmanager.com/feed/', 'source': 'BTC MANAGER'}
         ]
-        self.bitcoin_news = []  # Dedicated storage for Bitcoin-specific news
-        self.messari_news = []  # Dedicated storage for Messari-specific news
         self.load_cached_data()
 
+    @property
+    def news_database(self):
+        """All articles, newest first"""
+        return self.snapshot.articles
+
+    @news_database.setter
+    def news_database(self, articles):
+        self.snapshot = self.snapshot.evolve(articles)
+
+    @property
+    def bitcoin_news(self):
+        """Bitcoin-specific articles"""
+        return self.snapshot.subset("bitcoin")
+
+    @bitcoin_news.setter
+    def bitcoin_news(self, articles):
+        self.snapshot = self.snapshot.evolve(bitcoin=articles)
+
+    @property
+    def messari_news(self):
+        """Messari-specific articles"""
+        return self.snapshot.subset("messari")
+
+    @messari_news.setter
+    def messari_news(self, articles):
+        self.snapshot = self.snapshot.evolve(messari=articles)
+
     def load_cached_data(self):
         """Load cached news data from file"""
         try:
@@ -40,8 +131,7 @@ class CryptoNewsService:
             
             # Load general crypto news
             if os.path.exists(crypto_cache_path):
-                with open(crypto_cache_path, 'r') as f:
-                    self.news_database = json.load(f)
+                self.news_database = load_json(crypto_cache_path, [])
                 logger.info(f"Loaded {len(self.news_database)} crypto news items from cache")
             else:
                 logger.warning(f"Crypto news cache file not found at {crypto_cache_path}")
@@ -50,8 +140,7 @@ class CryptoNewsService:
             # Load Bitcoin-specific news
             bitcoin_cache_path = os.path.join(base_data_dir, 'bitcoin_news.json')
             if os.path.exists(bitcoin_cache_path):
-                with open(bitcoin_cache_path, 'r') as f:
-                    self.bitcoin_news = json.load(f)
+                self.bitcoin_news = load_json(bitcoin_cache_path, [])
                 logger.info(f"Loaded {len(self.bitcoin_news)} Bitcoin-specific news items from cache")
             else:
                 logger.warning(f"Bitcoin news cache file not found at {bitcoin_cache_path}")
@@ -60,8 +149,7 @@ class CryptoNewsService:
             # Load Messari-specific news
             messari_cache_path = os.path.join(base_data_dir, 'messari_news.json')
             if os.path.exists(messari_cache_path):
-                with open(messari_cache_path, 'r') as f:
-                    self.messari_news = json.load(f)
+                self.messari_news = load_json(messari_cache_path, [])
                 logger.info(f"Loaded {len(self.messari_news)} Messari-specific news items from cache")
             else:
                 logger.warning(f"Messari news cache file not found at {messari_cache_path}")
@@ -78,131 +166,94 @@ class CryptoNewsService:
         try:
             cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data')
             os.makedirs(cache_dir, exist_ok=True)
+            snapshot = self.snapshot
             
             # Save general crypto news
             crypto_cache_path = os.path.join(cache_dir, 'crypto_news.json')
-            with open(crypto_cache_path, 'w') as f:
-                json.dump(self.news_database, f)
-            logger.info(f"Saved {len(self.news_database)} crypto news items to cache")
+            save_json_later(crypto_cache_path, list(snapshot.articles))
+            logger.info(f"Saved {len(snapshot.articles)} crypto news items to cache")
             
             # Save Bitcoin-specific news
             bitcoin_cache_path = os.path.join(cache_dir, 'bitcoin_news.json')
-            with open(bitcoin_cache_path, 'w') as f:
-                json.dump(self.bitcoin_news, f)
-            logger.info(f"Saved {len(self.bitcoin_news)} Bitcoin-specific news items to cache")
+            save_json_later(bitcoin_cache_path, list(snapshot.subset("bitcoin")))
+            logger.info(f"Saved {len(snapshot.subset('bitcoin'))} Bitcoin-specific news items to cache")
             
             # Save Messari-specific news
             messari_cache_path = os.path.join(cache_dir, 'messari_news.json')
-            with open(messari_cache_path, 'w') as f:
-                json.dump(self.messari_news, f)
-            logger.info(f"Saved {len(self.messari_news)} Messari-specific news items to cache")
+            save_json_later(messari_cache_path, list(snapshot.subset("messari")))
+            logger.info(f"Saved {len(snapshot.subset('messari'))} Messari-specific news items to cache")
             
         except Exception as e:
             logger.error(f"Error saving news to cache: {e}")
 
-    def update_feeds(self, interval_minutes=10):
-        """Update crypto news feeds"""
-        while self.is_running_flag:
+    def add_update_listener(self, listener):
+        """Register a callback that receives the latest articles after each update"""
+        if listener not in self.update_listeners:
+            self.update_listeners.append(listener)
+
+    def _notify_listeners(self):
+        """Run update listeners; one failing listener doesn't affect the others"""
+        for listener in self.update_listeners:
             try:
-                all_news = []
-                for feed in self.crypto_feeds:
-                    try:
+                listener(list(self.snapshot.articles))
+            except Exception as e:
+                logger.error(f"Error in news update listener: {e}")
+
+    async def refresh(self):
+        """Fetch every crypto news feed once and publish the new articles"""
+        try:
+            semaphore = asyncio.Semaphore(FEED_CONCURRENCY)
+            async with aiohttp.ClientSession(trace_configs=[upstream_trace_config()]) as session:
+                async def fetch(feed):
+                    async with semaphore:
                         logger.info(f"Attempting to fetch RSS feed from {feed['url']}")
-                        feed_news = fetch_rss(feed['url'], feed['source'])
-                        if feed_news:
-                            all_news.extend(feed_news)
-                            logger.info(f"Retrieved {len(feed_news)} articles from {feed['source']}")
-                        else:
-                            logger.warning(f"No articles retrieved from {feed['source']}")
-                    except Exception as e:
-                        logger.error(f"Error fetching from {feed['source']} ({feed['url']}): {e}")
-                    time.sleep(1)  # Short pause between feeds
-                
-                if all_news:
-                    # Sort by newest first
-                    all_news.sort(key=lambda x: datetime.strptime(x['timestamp'], '%m/%d/%Y, %I:%M:%S %p'), reverse=True)
-                    
-                    # Deduplicate based on title similarity
-                    unique_news = []
-                    seen_titles = set()
-                    for item in all_news:
-                        title_lower = item['title'].lower()
-                        if not any(title_lower in seen_title or seen_title in title_lower for seen_title in seen_titles):
-                            seen_titles.add(title_lower)
-                            unique_news.append(item)
-                    
-                    # Update the database
-                    self.news_database = unique_news
-                    
-                    # Update Bitcoin-specific news
-                    bitcoin_keywords = ["bitcoin", "btc", "satoshi", "lightning network", "bitcoin halving"]
-                    self.bitcoin_news = [
-                        item for item in unique_news 
-                        if any(keyword in item['title'].lower() or 
-                              keyword in item.get('content', '').lower() 
-                              for keyword in bitcoin_keywords) or
-                        "BITCOIN" in item['source']
-                    ]
-                    
-                    # Update Messari-specific news
-                    messari_keywords = ["messari", "research report", "crypto research"]
-                    self.messari_news = [
-                        item for item in unique_news 
-                        if any(keyword in item['title'].lower() or 
-                              keyword in item.get('content', '').lower() 
-                              for keyword in messari_keywords) or
-                        "MESSARI" in item['source']
-                    ]
-                    
-                    self.save_to_cache()
-                    
-                    logger.info(f"Updated news database with {len(unique_news)} unique articles")
-                    logger.info(f"Updated Bitcoin news with {len(self.bitcoin_news)} articles")
-                    logger.info(f"Updated Messari news with {len(self.messari_news)} articles")
+                        return await fetch_rss_async(session, feed['url'], feed['source'])
+                results = await asyncio.gather(*(fetch(feed) for feed in self.crypto_feeds))
+            
+            all_news = []
+            for feed, feed_news in zip(self.crypto_feeds, results):
+                if feed_news:
+                    all_news.extend(feed_news)
+                    logger.info(f"Retrieved {len(feed_news)} articles from {feed['source']}")
                 else:
-                    logger.warning("No news articles were retrieved from any feed")
+                    logger.warning(f"No articles retrieved from {feed['source']}")
+            
+            if all_news:
+                unique_news, bitcoin_news, messari_news = await asyncio.to_thread(build_news_lists, all_news)
                 
-            except Exception as e:
-                logger.error(f"Error updating crypto news feeds: {e}")
+                # Publish all three lists at once
+                self.snapshot = self.snapshot.evolve(unique_news, bitcoin=bitcoin_news, messari=messari_news)
+                
+                self.save_to_cache()
+                self._notify_listeners()
+                
+                logger.info(f"Updated news database with {len(unique_news)} unique articles")
+                logger.info(f"Updated Bitcoin news with {len(bitcoin_news)} articles")
+                logger.info(f"Updated Messari news with {len(messari_news)} articles")
+            else:
+                logger.warning("No news articles were retrieved from any feed")
             
-            # Wait before next update
-            time.sleep(interval_minutes * 60)
-
-    def start_update_thread(self):
-        """Start the background thread for updating feeds"""
-        self.is_running_flag = True
-        self.update_thread = threading.Thread(target=self.update_feeds, daemon=True)
-        self.update_thread.start()
-        logger.info("Started crypto news update thread")
-
-    def stop_update_thread(self):
-        """Stop the background thread"""
-        self.is_running_flag = False
-        if self.update_thread:
-            self.update_thread.join()
-        logger.info("Stopped crypto news update thread")
-
-    def is_running(self):
-        """Check if the update thread is running"""
-        return self.is_running_flag and self.update_thread and self.update_thread.is_alive()
+        except Exception as e:
+            logger.error(f"Error updating crypto news feeds: {e}")
 
     def get_news(self, limit: int = 10, filter_term: str = None):
         """Get latest crypto news with optional filtering"""
         try:
-            if not self.news_database:
+            articles = self.snapshot.articles
+            if not articles:
                 logger.warning("No news articles available in database")
                 return []
                 
             if filter_term:
                 filter_term = filter_term.lower()
                 filtered_news = [
-                    news for news in self.news_database 
+                    news for news in articles 
                     if filter_term in news['title'].lower() or 
                        filter_term in news.get('content', '').lower() or
                        filter_term in news.get('summary', '').lower()
                 ]
                 return filtered_news[:limit]
-            return self.news_database[:limit]
+            return list(articles[:limit])
         except Exception as e:
             logger.error(f"Error getting crypto news: {e}")
             return []
@@ -210,30 +261,12 @@ class CryptoNewsService:
     def get_news_by_asset(self, asset: str, limit: int = 10):
         """Get news specific to a particular asset"""
         try:
-            if not self.news_database:
+            articles = self.snapshot.articles
+            if not articles:
                 logger.warning("No news articles available in database")
                 return []
                 
-            asset_terms = [asset.lower(), asset.upper()]
-            filtered_news = []
-            
-            for item in self.news_database:
-                title = item['title'].lower()
-                summary = item.get('summary', '').lower()
-                
-                for term in asset_terms:
-                    if (f" {term} " in f" {title} " or 
-                        f" {term} " in f" {summary} " or
-                        f" {term}." in f" {title}" or
-                        f" {term}." in f" {summary}" or
-                        f" {term}," in f" {title}" or
-                        f" {term}," in f" {summary}" or
-                        title.startswith(f"{term} ") or
-                        summary.startswith(f"{term} ")):
-                        
-                        filtered_news.append(item)
-                        break
-            
+            filtered_news = [item for item in articles if mentions_asset(item, asset)]
             return filtered_news[:limit]
         except Exception as e:
             logger.error(f"Error getting news for asset {asset}: {e}")
@@ -253,26 +286,28 @@ class CryptoNewsService:
         try:
             logger.info(f"Getting cached news, category={category}, limit={limit}")
             
+            snapshot = self.snapshot
+            
             # Return category-specific news if requested
             if category == "bitcoin":
-                if not self.bitcoin_news:
+                if not snapshot.subset("bitcoin"):
                     logger.warning("No Bitcoin news articles available in cache")
                     return []
-                return self.bitcoin_news[:limit]
+                return list(snapshot.subset("bitcoin")[:limit])
             
             elif category == "messari":
-                if not self.messari_news:
+                if not snapshot.subset("messari"):
                     logger.warning("No Messari news articles available in cache")
                     return []
-                return self.messari_news[:limit]
+                return list(snapshot.subset("messari")[:limit])
             
             # Otherwise return general crypto news
-            if not self.news_database:
+            if not snapshot.articles:
                 logger.warning("No news articles available in cache")
                 return []
                 
             # Return the most recent news items
-            return self.news_database[:limit]
+            return list(snapshot.articles[:limit])
             
         except Exception as e:
             logger.error(f"Error getting cached news: {e}")
@@ -1,8 +1,11 @@
 """
 Feed fetcher utilities for news services
 """
+import asyncio
+import os
 import requests
 import feedparser
+import aiohttp # type: ignore
 import time
 import logging
 import re
@@ -12,8 +15,20 @@ from typing import List, Dict, Any, Optional
 from bs4 import BeautifulSoup
 import hashlib
 
+from app.core.metrics import count_upstream_error, track_upstream
+
 logger = logging.getLogger(__name__)
 
+RSS_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Accept': 'application/rss+xml, application/xml, text/xml, */*'
+}
+# Reddit JSON API; overridable for local stub servers
+REDDIT_BASE_URL = os.getenv("REDDIT_BASE_URL", "https://www.reddit.com")
+REDDIT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; CryptoPortfolioTracker/1.0)'
+}
+
 def fetch_rss(url: str, source: str = None) -> List[Dict[str, Any]]:
     """
     Fetch and parse an RSS feed
@@ -28,25 +43,65 @@ def fetch_rss(url: str, source: str = None) -> List[Dict[str, Any]]:
     try:
         logger.info(f"Fetching RSS feed from {url}")
         
-        # Use requests to get the RSS data with a proper user agent
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-            'Accept': 'application/rss+xml, application/xml, text/xml, */*'
-        }
-        
         # Add timeout to prevent hanging on non-responsive feeds
-        response = requests.get(url, headers=headers, timeout=15)
+        with track_upstream(url):
+            response = requests.get(url, headers=RSS_HEADERS, timeout=15)
         
         if response.status_code != 200:
+            count_upstream_error(url)
             logger.error(f"Error fetching RSS feed from {url}: Status code {response.status_code}")
             return []
-            
+        
+        return parse_rss(response.content, url, source)
+    except Exception as e:
+        logger.error(f"Error fetching RSS feed from {url}: {str(e)}")
+        return []
+
+async def fetch_rss_async(session: aiohttp.ClientSession, url: str, source: str = None) -> List[Dict[str, Any]]:
+    """
+    Fetch and parse an RSS feed without blocking the event loop
+    
+    Parsing (feedparser, BeautifulSoup) is CPU-bound and runs in a worker thread.
+    
+    Args:
+        session: HTTP session
+        url: URL of the RSS feed
+        source: Name of the source
+        
+    Returns:
+        List of parsed news items
+    """
+    try:
+        logger.info(f"Fetching RSS feed from {url}")
+        async with session.get(url, headers=RSS_HEADERS, timeout=aiohttp.ClientTimeout(total=15)) as response:
+            if response.status != 200:
+                logger.error(f"Error fetching RSS feed from {url}: Status code {response.status}")
+                return []
+            content = await response.read()
+        return await asyncio.to_thread(parse_rss, content, url, source)
+    except Exception as e:
+        logger.error(f"Error fetching RSS feed from {url}: {str(e)}")
+        return []
+
+def parse_rss(content: bytes, url: str, source: str = None) -> List[Dict[str, Any]]:
+    """
+    Parse RSS feed content into news items
+    
+    Args:
+        content: Raw feed content
+        url: URL the feed was fetched from
+        source: Name of the source
+        
+    Returns:
+        List of parsed news items
+    """
+    try:
         # Log the beginning of the response content to help debug feed issues
-        content_preview = response.content[:500].decode('utf-8', errors='ignore')
-        logger.debug(f"Response from {url} begins with: {content_preview}...")
+        content_preview = content[:500].decode('utf-8', errors='ignore')
+        logger.debug("Response from %s begins with: %s...", url, content_preview)
             
         # Parse the feed using the response content
-        feed = feedparser.parse(response.content)
+        feed = feedparser.parse(content)
         
         if not feed.entries:
             logger.warning(f"No entries found in feed from {url}")
@@ -146,7 +201,7 @@ def fetch_rss(url: str, source: str = None) -> List[Dict[str, Any]]:
         logger.info(f"Fetched {len(items)} items from {url}")
         return items
     except Exception as e:
-        logger.error(f"Error fetching RSS feed from {url}: {str(e)}")
+        logger.error(f"Error parsing RSS feed from {url}: {str(e)}")
         return []
 
 def clean_html(html_text: str) -> str:
@@ -226,58 +281,96 @@ def fetch_reddit_posts(subreddit: str, limit: int = 20, sort: str = 'hot') -> Li
     try:
         logger.info(f"Fetching Reddit posts from r/{subreddit} sorted by {sort}")
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (compatible; CryptoPortfolioTracker/1.0)'
-        }
-        
-        url = f"https://www.reddit.com/r/{subreddit}/{sort}.json?limit={limit}"
-        response = requests.get(url, headers=headers, timeout=10)
+        url = f"{REDDIT_BASE_URL}/r/{subreddit}/{sort}.json?limit={limit}"
+        with track_upstream(url):
+            response = requests.get(url, headers=REDDIT_HEADERS, timeout=10)
         
         if response.status_code != 200:
+            count_upstream_error(url)
             logger.error(f"Error fetching Reddit posts: Status code {response.status_code}")
             return []
         
-        data = response.json()
+        return parse_reddit_posts(response.json(), subreddit)
+    except Exception as e:
+        logger.error(f"Error fetching Reddit posts: {e}")
+        return []
+
+async def fetch_reddit_posts_async(session: aiohttp.ClientSession, subreddit: str, limit: int = 20,
+                                   sort: str = 'hot') -> List[Dict[str, Any]]:
+    """
+    Fetch posts from a Reddit subreddit without blocking the event loop
+    
+    Args:
+        session: HTTP session
+        subreddit: Name of the subreddit
+        limit: Number of posts to fetch
+        sort: Sorting method (hot, new, top)
         
-        if 'data' not in data or 'children' not in data['data']:
-            logger.warning(f"Invalid response format from Reddit API")
-            return []
+    Returns:
+        List of Reddit posts
+    """
+    try:
+        logger.info(f"Fetching Reddit posts from r/{subreddit} sorted by {sort}")
         
-        posts = []
-        for post_data in data['data']['children']:
-            try:
-                post = post_data['data']
-                
-                # Process timestamp
-                created_time = datetime.fromtimestamp(post.get('created_utc', time.time()))
-                timestamp = created_time.strftime('%m/%d/%Y, %I:%M:%S %p')
-                
-                # Detect sentiment
-                sentiment = detect_sentiment(post.get('title', '') + ' ' + post.get('selftext', ''))
-                
-                # Create post object
-                reddit_post = {
-                    'id': post.get('id', f"reddit-{subreddit}-{hash(post.get('title', ''))}"),
-                    'title': post.get('title', 'No Title'),
-                    'author': post.get('author', 'unknown'),
-                    'content': post.get('selftext', ''),
-                    'url': post.get('url', ''),
-                    'permalink': f"https://www.reddit.com{post.get('permalink', '')}",
-                    'score': post.get('score', 0),
-                    'num_comments': post.get('num_comments', 0),
-                    'created_utc': post.get('created_utc', time.time()),
-                    'timestamp': timestamp,
-                    'subreddit': subreddit,
-                    'sentiment': sentiment
-                }
-                
-                posts.append(reddit_post)
-            except Exception as e:
-                logger.error(f"Error processing Reddit post: {e}")
-                continue
+        url = f"{REDDIT_BASE_URL}/r/{subreddit}/{sort}.json?limit={limit}"
+        async with session.get(url, headers=REDDIT_HEADERS, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            if response.status != 200:
+                logger.error(f"Error fetching Reddit posts: Status code {response.status}")
+                return []
+            data = await response.json(content_type=None)
         
-        logger.info(f"Fetched {len(posts)} posts from r/{subreddit}")
-        return posts
+        return parse_reddit_posts(data, subreddit)
     except Exception as e:
         logger.error(f"Error fetching Reddit posts: {e}")
-        return [] 
\ No newline at end of file
+        return []
+
+def parse_reddit_posts(data: Dict[str, Any], subreddit: str) -> List[Dict[str, Any]]:
+    """
+    Convert a Reddit listing response into posts
+    
+    Args:
+        data: Decoded JSON listing
+        subreddit: Name of the subreddit
+        
+    Returns:
+        List of Reddit posts
+    """
+    if 'data' not in data or 'children' not in data['data']:
+        logger.warning(f"Invalid response format from Reddit API")
+        return []
+    
+    posts = []
+    for post_data in data['data']['children']:
+        try:
+            post = post_data['data']
+            
+            # Process timestamp
+            created_time = datetime.fromtimestamp(post.get('created_utc', time.time()))
+            timestamp = created_time.strftime('%m/%d/%Y, %I:%M:%S %p')
+            
+            # Detect sentiment
+            sentiment = detect_sentiment(post.get('title', '') + ' ' + post.get('selftext', ''))
+            
+            # Create post object
+            reddit_post = {
+                'id': post.get('id', f"reddit-{subreddit}-{hash(post.get('title', ''))}"),
+                'title': post.get('title', 'No Title'),
+                'author': post.get('author', 'unknown'),
+                'content': post.get('selftext', ''),
+                'url': post.get('url', ''),
+                'permalink': f"https://www.reddit.com{post.get('permalink', '')}",
+                'score': post.get('score', 0),
+                'num_comments': post.get('num_comments', 0),
+                'created_utc': post.get('created_utc', time.time()),
+                'timestamp': timestamp,
+                'subreddit': subreddit,
+                'sentiment': sentiment
+            }
+            
+            posts.append(reddit_post)
+        except Exception as e:
+            logger.error(f"Error processing Reddit post: {e}")
+            continue
+    
+    logger.info(f"Fetched {len(posts)} posts from r/{subreddit}")
+    return posts
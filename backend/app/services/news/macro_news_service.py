@@ -1,18 +1,26 @@
-import json
-import time
-import threading
+import asyncio
 import logging
 import os
 from datetime import datetime, timedelta
-from app.services.news.feed_fetcher import fetch_rss, clean_html, detect_sentiment
+import aiohttp # type: ignore
+from app.core.metrics import upstream_trace_config
+from app.core.persistence import load_json, save_json_later
+from app.services.news.feed_fetcher import fetch_rss_async
+from app.services.news.snapshot import NewsSnapshot
 
 logger = logging.getLogger(__name__)
 
+# Feeds fetched concurrently during a refresh
+FEED_CONCURRENCY = 4
+# Articles kept in the database
+MAX_ARTICLES = 1000
+
 class MacroNewsService:
     def __init__(self):
-        self.news_database = []
-        self.is_running_flag = False
-        self.update_thread = None
+        # Articles of the last refresh; replaced as a whole, never modified in place
+        self.snapshot = NewsSnapshot()
+        # Callbacks run with the latest articles after each feed update
+        self.update_listeners = []
         self.macro_news_feeds = {
             'business': [
                 {'url': 'https://news.google.com/rss/topics/CAAqJggKIiBDQkFTRWdvSUwyMHZNRGx6TVdZU0FtVnVHZ0pWVXlnQVAB', 'source': 'GOOGLE NEWS BUSINESS'}
@@ -35,13 +43,21 @@ class MacroNewsService:
         }
         self.load_cached_data()
 
+    @property
+    def news_database(self):
+        """All articles, newest first"""
+        return self.snapshot.articles
+
+    @news_database.setter
+    def news_database(self, articles):
+        self.snapshot = self.snapshot.evolve(articles)
+
     def load_cached_data(self):
         """Load cached news data from file"""
         try:
             cache_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data', 'macro_news.json')
             if os.path.exists(cache_path):
-                with open(cache_path, 'r') as f:
-                    self.news_database = json.load(f)
+                self.news_database = load_json(cache_path, [])
                 logger.info(f"Loaded {len(self.news_database)} macro news items from cache")
             else:
                 logger.warning(f"Macro news cache file not found at {cache_path}")
@@ -57,66 +73,67 @@ class MacroNewsService:
             os.makedirs(cache_dir, exist_ok=True)
             
             cache_path = os.path.join(cache_dir, 'macro_news.json')
-            with open(cache_path, 'w') as f:
-                json.dump(self.news_database, f)
-            logger.info(f"Saved {len(self.news_database)} macro news items to cache")
+            articles = self.snapshot.articles
+            save_json_later(cache_path, list(articles))
+            logger.info(f"Saved {len(articles)} macro news items to cache")
         except Exception as e:
             logger.error(f"Error saving macro news to cache: {e}")
 
-    def update_feeds(self, interval_minutes=15):
-        """Update macro news feeds"""
-        while self.is_running_flag:
+    def add_update_listener(self, listener):
+        """Register a callback that receives the latest articles after each update"""
+        if listener not in self.update_listeners:
+            self.update_listeners.append(listener)
+
+    def _notify_listeners(self):
+        """Run update listeners; one failing listener doesn't affect the others"""
+        for listener in self.update_listeners:
             try:
-                # Fetch news from all feeds by category
-                new_items = []
-                for category, feeds in self.macro_news_feeds.items():
-                    for feed in feeds:
-                        feed_news = fetch_rss(feed['url'], feed['source'])
-                        # Add category to each news item
-                        for item in feed_news:
-                            item['category'] = category
-                        new_items.extend(feed_news)
-                        time.sleep(1)  # Short pause between feeds
-                
-                # Add new items to database if they don't exist
-                for item in new_items:
-                    if not any(existing_item.get('id') == item.get('id') for existing_item in self.news_database):
-                        self.news_database.append(item)
-                
-                # Sort by timestamp (newest first)
-                self.news_database.sort(key=lambda x: datetime.strptime(x.get('timestamp', '1/1/2000'), '%m/%d/%Y, %I:%M:%S %p'), reverse=True)
-                
-                # Limit database size
-                self.news_database = self.news_database[:1000]
-                
-                # Save to cache
-                self.save_to_cache()
-                
-                logger.info(f"Updated macro news database with {len(new_items)} new items")
-                
+                listener(list(self.snapshot.articles))
             except Exception as e:
-                logger.error(f"Error updating macro news feeds: {e}")
-            
-            # Wait before next update
-            time.sleep(interval_minutes * 60)
-
-    def start_update_thread(self):
-        """Start the background thread for updating feeds"""
-        self.is_running_flag = True
-        self.update_thread = threading.Thread(target=self.update_feeds, daemon=True)
-        self.update_thread.start()
-        logger.info("Started macro news update thread")
+                logger.error(f"Error in news update listener: {e}")
 
-    def stop_update_thread(self):
-        """Stop the background thread"""
-        self.is_running_flag = False
-        if self.update_thread:
-            self.update_thread.join()
-        logger.info("Stopped macro news update thread")
-
-    def is_running(self):
-        """Check if the update thread is running"""
-        return self.is_running_flag and self.update_thread and self.update_thread.is_alive()
+    async def refresh(self):
+        """Fetch every macro news feed once and publish the merged articles"""
+        try:
+            # Fetch news from all feeds by category
+            feeds = [(category, feed) for category, category_feeds in self.macro_news_feeds.items()
+                     for feed in category_feeds]
+            semaphore = asyncio.Semaphore(FEED_CONCURRENCY)
+            async with aiohttp.ClientSession(trace_configs=[upstream_trace_config()]) as session:
+                async def fetch(feed):
+                    async with semaphore:
+                        return await fetch_rss_async(session, feed['url'], feed['source'])
+                results = await asyncio.gather(*(fetch(feed) for _, feed in feeds))
+            
+            new_items = []
+            for (category, _), feed_news in zip(feeds, results):
+                # Add category to each news item
+                for item in feed_news:
+                    item['category'] = category
+                new_items.extend(feed_news)
+            
+            # Build the new list; the published one is never modified
+            articles = list(self.snapshot.articles)
+            known_ids = {item.get('id') for item in articles}
+            for item in new_items:
+                if item.get('id') not in known_ids:
+                    known_ids.add(item.get('id'))
+                    articles.append(item)
+            
+            # Sort by timestamp (newest first)
+            articles.sort(key=lambda x: datetime.strptime(x.get('timestamp', '1/1/2000'), '%m/%d/%Y, %I:%M:%S %p'), reverse=True)
+            
+            # Limit database size
+            self.snapshot = self.snapshot.evolve(articles[:MAX_ARTICLES])
+            
+            # Save to cache
+            self.save_to_cache()
+            self._notify_listeners()
+            
+            logger.info(f"Updated macro news database with {len(new_items)} new items")
+            
+        except Exception as e:
+            logger.error(f"Error updating macro news feeds: {e}")
 
     def get_news(self, category: str, limit: int = 10, hours: int = 24):
         """Get macro news for a specific category"""
@@ -183,9 +200,11 @@ class MacroNewsService:
         try:
             logger.info(f"Getting cached macro news, category={category}, limit={limit}")
             
+            articles = self.snapshot.articles
+            
             # Return category-specific news if requested
             if category and category in list(self.macro_news_feeds.keys()):
-                filtered_news = [item for item in self.news_database if item.get('category') == category]
+                filtered_news = [item for item in articles if item.get('category') == category]
                 
                 if not filtered_news:
                     logger.warning(f"No macro news articles available for category '{category}'")
@@ -196,13 +215,13 @@ class MacroNewsService:
                 return filtered_news[:limit]
             
             # Otherwise return all macro news
-            if not self.news_database:
+            if not articles:
                 logger.warning("No macro news articles available in cache")
                 return []
                 
             # Sort by timestamp (newest first)
             sorted_news = sorted(
-                self.news_database,
+                articles,
                 key=lambda x: datetime.strptime(x.get('timestamp', '1/1/2000'), '%m/%d/%Y, %I:%M:%S %p'),
                 reverse=True
             )
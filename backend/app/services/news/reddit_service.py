@@ -1,21 +1,25 @@
 """
 Reddit service for fetching and processing Reddit posts
 """
-import json
-import time
-import threading
+import asyncio
 import logging
 import os
 from datetime import datetime
-from app.services.news.feed_fetcher import fetch_reddit_posts, detect_sentiment
+import aiohttp # type: ignore
+from app.core.metrics import upstream_trace_config
+from app.core.persistence import load_json, save_json_later
+from app.services.news.feed_fetcher import fetch_reddit_posts, fetch_reddit_posts_async
+from app.services.news.snapshot import RedditSnapshot
 
 logger = logging.getLogger(__name__)
 
 class RedditService:
+    # Seconds between Reddit requests, to stay under its rate limit
+    request_pause = 2
+
     def __init__(self):
-        self.posts_database = {}
-        self.is_running_flag = False
-        self.update_thread = None
+        # Posts of the last refresh; replaced as a whole, never modified in place
+        self.snapshot = RedditSnapshot()
         self.subreddits = [
             'cryptocurrency',
             'CryptoMarkets',
@@ -26,20 +30,24 @@ class RedditService:
         ]
         self.load_cached_data()
 
+    @property
+    def posts_database(self):
+        """Read-only posts keyed by subreddit, then sort method"""
+        return self.snapshot.posts
+
     def load_cached_data(self):
         """Load cached Reddit data from file"""
         try:
             cache_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data', 'reddit_posts.json')
             if os.path.exists(cache_path):
-                with open(cache_path, 'r') as f:
-                    self.posts_database = json.load(f)
+                self.snapshot = RedditSnapshot().evolve(load_json(cache_path, {}))
                 logger.info(f"Loaded Reddit posts for {len(self.posts_database)} subreddits from cache")
             else:
                 logger.warning(f"Reddit cache file not found at {cache_path}")
-                self.posts_database = {}
+                self.snapshot = RedditSnapshot()
         except Exception as e:
             logger.error(f"Error loading Reddit posts cache: {e}")
-            self.posts_database = {}
+            self.snapshot = RedditSnapshot()
 
     def save_to_cache(self):
         """Save Reddit data to cache file"""
@@ -48,76 +56,46 @@ class RedditService:
             os.makedirs(cache_dir, exist_ok=True)
             
             cache_path = os.path.join(cache_dir, 'reddit_posts.json')
-            with open(cache_path, 'w') as f:
-                json.dump(self.posts_database, f)
-            logger.info(f"Saved Reddit posts for {len(self.posts_database)} subreddits to cache")
+            snapshot = self.snapshot
+            save_json_later(cache_path, snapshot.to_dict())
+            logger.info(f"Saved Reddit posts for {len(snapshot.posts)} subreddits to cache")
         except Exception as e:
             logger.error(f"Error saving Reddit posts to cache: {e}")
 
-    def update_feeds(self, interval_minutes=30):
-        """Update Reddit feeds for all configured subreddits"""
-        while self.is_running_flag:
-            try:
+    async def refresh(self):
+        """Fetch posts for all configured subreddits once and publish them"""
+        try:
+            fetched = {}
+            async with aiohttp.ClientSession(trace_configs=[upstream_trace_config()]) as session:
                 for subreddit in self.subreddits:
-                    try:
-                        # Fetch posts for each sort method
-                        for sort in ['hot', 'new', 'top']:
-                            try:
-                                posts = fetch_reddit_posts(subreddit=subreddit, limit=25, sort=sort)
-                                if posts:
-                                    if subreddit not in self.posts_database:
-                                        self.posts_database[subreddit] = {}
-                                    
-                                    self.posts_database[subreddit][sort] = posts
-                                    logger.info(f"Updated {len(posts)} {sort} posts for r/{subreddit}")
-                                else:
-                                    logger.warning(f"No {sort} posts retrieved from r/{subreddit}")
-                                
-                                # Short pause between requests to avoid rate limiting
-                                time.sleep(2)
-                            except Exception as e:
-                                logger.error(f"Error fetching {sort} posts from r/{subreddit}: {e}")
-                    except Exception as e:
-                        logger.error(f"Error updating subreddit r/{subreddit}: {e}")
-                
-                # Save to cache after updating all subreddits
+                    # Fetch posts for each sort method
+                    for sort in ['hot', 'new', 'top']:
+                        posts = await fetch_reddit_posts_async(session, subreddit=subreddit, limit=25, sort=sort)
+                        if posts:
+                            fetched.setdefault(subreddit, {})[sort] = posts
+                            logger.info(f"Updated {len(posts)} {sort} posts for r/{subreddit}")
+                        else:
+                            logger.warning(f"No {sort} posts retrieved from r/{subreddit}")
+                        
+                        # Short pause between requests to avoid rate limiting
+                        await asyncio.sleep(self.request_pause)
+            
+            # Publish every subreddit at once and save to cache
+            if fetched:
+                self.snapshot = self.snapshot.evolve(fetched)
                 self.save_to_cache()
-                logger.info(f"Completed Reddit update cycle for {len(self.subreddits)} subreddits")
-                
-            except Exception as e:
-                logger.error(f"Error in Reddit update cycle: {e}")
+            logger.info(f"Completed Reddit update cycle for {len(self.subreddits)} subreddits")
             
-            # Wait before next update
-            time.sleep(interval_minutes * 60)
-
-    def start_update_thread(self):
-        """Start the background thread for updating feeds"""
-        self.is_running_flag = True
-        self.update_thread = threading.Thread(target=self.update_feeds, daemon=True)
-        self.update_thread.start()
-        logger.info("Started Reddit update thread")
-
-    def stop_update_thread(self):
-        """Stop the background thread"""
-        self.is_running_flag = False
-        if self.update_thread:
-            self.update_thread.join()
-        logger.info("Stopped Reddit update thread")
-
-    def is_running(self):
-        """Check if the update thread is running"""
-        return self.is_running_flag and self.update_thread and self.update_thread.is_alive()
+        except Exception as e:
+            logger.error(f"Error in Reddit update cycle: {e}")
 
     def get_posts(self, subreddit: str, sort: str = 'hot', limit: int = 25):
         """Get posts from a specific subreddit with a particular sort method"""
         try:
             # Check if we have cached data for this subreddit and sort method
-            if (subreddit in self.posts_database and 
-                sort in self.posts_database[subreddit] and 
-                self.posts_database[subreddit][sort]):
-                
-                posts = self.posts_database[subreddit][sort]
-                return posts[:limit]
+            posts = self.snapshot.posts.get(subreddit, {}).get(sort)
+            if posts:
+                return list(posts[:limit])
             
             # If not in cache, fetch them directly
             logger.info(f"No cached posts for r/{subreddit} ({sort}), fetching directly")
@@ -125,10 +103,7 @@ class RedditService:
             
             # Update the cache
             if posts:
-                if subreddit not in self.posts_database:
-                    self.posts_database[subreddit] = {}
-                
-                self.posts_database[subreddit][sort] = posts
+                self.snapshot = self.snapshot.evolve({subreddit: {sort: posts}})
                 self.save_to_cache()
             
             return posts[:limit]
@@ -148,7 +123,7 @@ class RedditService:
             # Search through all cached posts
             matching_posts = []
             
-            for subreddit, sorts in self.posts_database.items():
+            for subreddit, sorts in self.snapshot.posts.items():
                 for sort_method, posts in sorts.items():
                     for post in posts:
                         # Search in title and content
@@ -179,11 +154,12 @@ class RedditService:
             logger.info(f"Getting cached Reddit posts, subreddit={subreddit}, limit={limit}")
             
             all_posts = []
+            posts_database = self.snapshot.posts
             
             # If a specific subreddit is requested
-            if subreddit and subreddit in self.posts_database:
+            if subreddit and subreddit in posts_database:
                 # Combine posts from different sort methods (hot, new, top)
-                for sort_method, posts in self.posts_database[subreddit].items():
+                for sort_method, posts in posts_database[subreddit].items():
                     for post in posts:
                         # Format the post as a news item
                         news_item = {
@@ -202,7 +178,7 @@ class RedditService:
                     return []
             else:
                 # Get posts from all subreddits
-                for subreddit_name, sorts in self.posts_database.items():
+                for subreddit_name, sorts in posts_database.items():
                     for sort_method, posts in sorts.items():
                         # Only use 'hot' posts when getting from all subreddits to avoid duplicates
                         if sort_method == 'hot':
@@ -0,0 +1,162 @@
+"""
+Copy-on-write snapshots of news service data
+
+A refresh builds complete new article lists and publishes them by swapping a
+single reference to a new snapshot. Request handlers read the current
+snapshot without taking a lock; a snapshot is never modified after it is
+published, so a reader always sees one consistent refresh.
+
+Articles inside a snapshot are plain dicts (they are serialized as-is) and
+must be treated as read-only: refreshes create new dicts instead of editing
+published ones.
+
+Each snapshot also carries time-ordered indexes of its articles and subsets,
+built on first use, that keyset-paginated listings page through.
+"""
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from app.core.pagination import Key, KeysetIndex
+
+Articles = Tuple[Dict[str, Any], ...]
+
+# Format of the "timestamp" field the feed parsers write
+ARTICLE_TIME_FORMAT = "%m/%d/%Y, %I:%M:%S %p"
+
+
+def article_key(article: Mapping[str, Any]) -> Key:
+    """
+    Pagination key of an article: (ISO publication time, id)
+
+    Articles without a parseable timestamp sort as the oldest.
+    """
+    try:
+        published = datetime.strptime(article.get("timestamp", ""), ARTICLE_TIME_FORMAT).isoformat()
+    except (TypeError, ValueError):
+        published = ""
+    return published, str(article.get("id") or article.get("url") or article.get("title", ""))
+
+
+def _empty_mapping() -> Mapping[str, Any]:
+    return MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class NewsSnapshot:
+    """Articles from one refresh, newest first"""
+    articles: Articles = ()
+    # Named subsets of the articles, e.g. "bitcoin"
+    subsets: Mapping[str, Articles] = field(default_factory=_empty_mapping)
+    version: int = 0
+    updated_at: Optional[datetime] = None
+
+    def subset(self, name: str) -> Articles:
+        return self.subsets.get(name, ())
+
+    def evolve(self, articles: Optional[Iterable[Dict[str, Any]]] = None,
+               **subsets: Iterable[Dict[str, Any]]) -> "NewsSnapshot":
+        """
+        A new snapshot with some lists replaced and the version bumped
+
+        Args:
+            articles: New article list (default: keep the current one)
+            **subsets: New subset lists by name
+
+        Returns:
+            New snapshot
+        """
+        merged = dict(self.subsets)
+        merged.update({name: tuple(items) for name, items in subsets.items()})
+        return replace(
+            self,
+            articles=self.articles if articles is None else tuple(articles),
+            subsets=MappingProxyType(merged),
+            version=self.version + 1,
+            updated_at=datetime.now()
+        )
+
+    @property
+    def stamp(self) -> str:
+        """Identifies this snapshot's content, e.g. for response caching"""
+        updated_at = self.updated_at.timestamp() if self.updated_at else 0
+        return f"{self.version}-{updated_at:.6f}"
+
+    @cached_property
+    def index(self) -> KeysetIndex:
+        """The articles ordered newest first by article_key"""
+        return KeysetIndex((article_key(article), article) for article in self.articles)
+
+    @cached_property
+    def _subset_indexes(self) -> Dict[str, KeysetIndex]:
+        return {}
+
+    def subset_index(self, name: str) -> KeysetIndex:
+        """A named subset ordered newest first by article_key, built on first use"""
+        index = self._subset_indexes.get(name)
+        if index is None:
+            index = KeysetIndex((article_key(article), article) for article in self.subset(name))
+            self._subset_indexes[name] = index
+        return index
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dicts and lists, for sharing with other worker processes"""
+        return {
+            "articles": list(self.articles),
+            "subsets": {name: list(items) for name, items in self.subsets.items()},
+            "version": self.version,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "NewsSnapshot":
+        """A snapshot built from to_dict() output, keeping its version"""
+        snapshot = cls().evolve(data.get("articles", ()), **data.get("subsets", {}))
+        if data.get("version") is None:
+            return snapshot
+        updated_at = data.get("updated_at")
+        return replace(snapshot, version=data["version"],
+                       updated_at=datetime.fromisoformat(updated_at) if updated_at else None)
+
+
+@dataclass(frozen=True)
+class RedditSnapshot:
+    """Reddit posts by subreddit and sort method"""
+    posts: Mapping[str, Mapping[str, Articles]] = field(default_factory=_empty_mapping)
+    version: int = 0
+    updated_at: Optional[datetime] = None
+
+    def evolve(self, posts: Mapping[str, Mapping[str, Iterable[Dict[str, Any]]]]) -> "RedditSnapshot":
+        """
+        A new snapshot with the given subreddit/sort lists replaced
+
+        Args:
+            posts: New post lists keyed by subreddit, then sort method
+
+        Returns:
+            New snapshot
+        """
+        merged = {subreddit: dict(sorts) for subreddit, sorts in self.posts.items()}
+        for subreddit, sorts in posts.items():
+            merged.setdefault(subreddit, {}).update({sort: tuple(items) for sort, items in sorts.items()})
+        return RedditSnapshot(
+            posts=MappingProxyType({
+                subreddit: MappingProxyType(sorts) for subreddit, sorts in merged.items()
+            }),
+            version=self.version + 1,
+            updated_at=datetime.now()
+        )
+
+    def to_dict(self) -> Dict[str, Dict[str, list]]:
+        """Plain nested dicts and lists, for the JSON cache"""
+        return {
+            subreddit: {sort: list(items) for sort, items in sorts.items()}
+            for subreddit, sorts in self.posts.items()
+        }
+
+    @classmethod
+    def from_dict(cls, posts: Mapping[str, Mapping[str, Iterable[Dict[str, Any]]]]) -> "RedditSnapshot":
+        """A snapshot built from to_dict() output"""
+        return cls().evolve(posts)
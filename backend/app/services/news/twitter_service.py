@@ -2,7 +2,6 @@
 Twitter/X service for fetching and processing tweets
 """
 import os
-import json
 import time
 import threading
 import logging
@@ -13,6 +12,7 @@ from functools import lru_cache
 import asyncio
 
 from app.core.logging import get_logger
+from app.core.persistence import load_json, save_json_later
 from app.models.news import TwitterPost
 
 logger = get_logger(__name__)
@@ -31,8 +31,7 @@ class TwitterService:
         """Load cached Twitter data from file"""
         try:
             if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    self.tweets_cache = json.load(f)
+                self.tweets_cache = load_json(self.cache_file, {})
                 logger.info(f"Loaded Twitter posts for {len(self.tweets_cache)} users from cache")
             else:
                 logger.warning(f"Twitter cache file not found at {self.cache_file}")
@@ -46,8 +45,12 @@ class TwitterService:
         try:
             os.makedirs(self.cache_dir, exist_ok=True)
             
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.tweets_cache, f)
+            # Copy nested maps so later updates don't race the flush
+            snapshot = {
+                key: dict(value) if isinstance(value, dict) else value
+                for key, value in self.tweets_cache.items()
+            }
+            save_json_later(self.cache_file, snapshot)
             logger.info(f"Saved Twitter posts for {len(self.tweets_cache)} users to cache")
         except Exception as e:
             logger.error(f"Error saving Twitter posts to cache: {e}")
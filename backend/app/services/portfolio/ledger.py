@@ -0,0 +1,484 @@
+"""
+Append-only portfolio ledger with an incrementally maintained position table
+
+Transactions are appended to a JSON Lines file and applied to the in-memory
+position table as they arrive, so adding a transaction costs the same no
+matter how long the history is. A snapshot of the position table (plus the
+ledger offset it covers) is written every few hundred transactions, which
+bounds the replay needed on startup to the entries after the snapshot.
+
+Transaction listings page through an index of (timestamp, id) keys and
+entry byte offsets, built by one scan of the ledger on first use and kept
+up to date by append(), so a page reads only its own entries.
+
+Several processes (the workers in multi-worker mode) may open the same
+ledger. Appends hold an flock on the ledger directory's lock file, and
+every instance applies entries other processes appended (the file tail
+past its offset) before appending or reading, so positions, offsets and
+the index stay in step with the file.
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.pagination import Key, KeysetIndex
+
+try:
+    import fcntl # type: ignore
+except ImportError: # pragma: no cover - Windows: single process only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Write a position snapshot after this many new ledger entries
+SNAPSHOT_INTERVAL = 500
+
+# Quantities below this are treated as a closed position
+QUANTITY_EPSILON = 1e-12
+
+# Ledger entry types; deposits and withdrawals move funds in and out of the
+# portfolio (e.g. wallet transfers, exchange fees) without realizing P&L
+TRANSACTION_TYPES = ("buy", "sell", "deposit", "withdrawal")
+
+
+def normalize_transaction(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize the transaction shapes used across the app into one ledger entry
+
+    Both the API schema (symbol/transaction_type/quantity/price_usd) and the
+    service schema (asset_id/type/amount/price) are accepted.
+
+    Args:
+        transaction: Transaction dictionary
+
+    Returns:
+        Normalized ledger entry
+    """
+    symbol = transaction.get("symbol") or transaction.get("asset_id") or ""
+    side = (transaction.get("transaction_type") or transaction.get("type") or "").lower()
+    quantity = transaction.get("quantity", transaction.get("amount", 0.0))
+    price = transaction.get("price_usd", transaction.get("price", 0.0))
+
+    if side not in TRANSACTION_TYPES:
+        raise ValueError(f"Unsupported transaction type: {side!r}")
+    if not symbol:
+        raise ValueError("Transaction is missing a symbol")
+
+    timestamp = transaction.get("timestamp") or datetime.now().isoformat()
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+
+    entry = dict(transaction)
+    entry.update({
+        "id": transaction.get("id") or str(uuid.uuid4()),
+        "symbol": symbol.upper(),
+        "transaction_type": side,
+        "quantity": float(quantity or 0.0),
+        "price_usd": float(price or 0.0),
+        "timestamp": timestamp
+    })
+    return entry
+
+
+def apply_transaction(positions: Dict[str, Dict[str, Any]], entry: Dict[str, Any]) -> None:
+    """
+    Apply one normalized ledger entry to a position table in place
+
+    Cost basis uses the average cost method: buys add their cost, sells
+    remove the average cost of the units sold and realize the difference.
+    Deposits and withdrawals adjust quantity and cost basis the same way
+    but never realize P&L.
+
+    Args:
+        positions: Position table keyed by symbol
+        entry: Normalized ledger entry
+    """
+    symbol = entry["symbol"]
+    quantity = entry["quantity"]
+    price = entry["price_usd"]
+
+    position = positions.get(symbol)
+    if position is None:
+        position = {
+            "symbol": symbol,
+            "name": entry.get("name") or symbol,
+            "quantity": 0.0,
+            "cost_basis": 0.0,
+            "realized_pnl": 0.0,
+            "last_price": price,
+            "last_updated": entry["timestamp"]
+        }
+        positions[symbol] = position
+
+    if entry["transaction_type"] in ("buy", "deposit"):
+        position["quantity"] += quantity
+        position["cost_basis"] += quantity * price
+    else:
+        held = position["quantity"]
+        sold = min(quantity, held)
+        if held > 0:
+            average_cost = position["cost_basis"] / held
+            position["cost_basis"] -= average_cost * sold
+            if entry["transaction_type"] == "sell":
+                position["realized_pnl"] += (price - average_cost) * sold
+        position["quantity"] = held - sold
+        if position["quantity"] <= QUANTITY_EPSILON:
+            position["quantity"] = 0.0
+            position["cost_basis"] = 0.0
+
+    if entry.get("name"):
+        position["name"] = entry["name"]
+    if price:
+        position["last_price"] = price
+    position["last_updated"] = entry["timestamp"]
+
+
+def entry_key(entry: Dict[str, Any]) -> Key:
+    """Pagination key of a ledger entry: (timestamp, id)"""
+    return str(entry.get("timestamp", "")), str(entry.get("id", ""))
+
+
+class PortfolioLedger:
+    """Append-only transaction ledger with O(1) position updates"""
+
+    def __init__(self, ledger_dir: str, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        self.ledger_dir = ledger_dir
+        self.ledger_file = os.path.join(ledger_dir, "ledger.jsonl")
+        self.snapshot_file = os.path.join(ledger_dir, "positions_snapshot.json")
+        self.lock_file = os.path.join(ledger_dir, "ledger.lock")
+        self.snapshot_interval = snapshot_interval
+        self.lock = threading.Lock()
+
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.sequence = 0
+        self._offset = 0
+        self._snapshot_sequence = 0
+        self._torn_tail = False
+        # Entry locations (offset, length) by symbol; None holds all entries
+        self._index: Optional[Dict[Optional[str], KeysetIndex]] = None
+
+        os.makedirs(ledger_dir, exist_ok=True)
+        self._load()
+
+    @property
+    def version(self) -> int:
+        """Monotonic ledger version (number of applied entries)"""
+        self.refresh()
+        return self.sequence
+
+    @property
+    def offset(self) -> int:
+        """Byte offset just past the last applied entry"""
+        return self._offset
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold the cross-process append lock"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _catch_up(self) -> int:
+        """
+        Apply complete entries appended past our offset by other processes;
+        call with the lock held
+
+        Returns:
+            Number of entries applied
+        """
+        applied = 0
+        try:
+            if os.path.getsize(self.ledger_file) <= self._offset:
+                return 0
+        except OSError:
+            return 0
+        with open(self.ledger_file, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Still being written, or torn
+                    break
+                entry = json.loads(line)
+                apply_transaction(self.positions, entry)
+                if self._index is not None:
+                    self._add_to_index(entry, self._offset, len(line))
+                self.sequence += 1
+                self._offset += len(line)
+                applied += 1
+        return applied
+
+    def refresh(self) -> int:
+        """
+        Pick up entries appended by other processes
+
+        Returns:
+            Number of new entries applied
+        """
+        with self.lock:
+            return self._catch_up()
+
+    def _load(self) -> None:
+        """Restore the position table from the latest snapshot plus the ledger tail"""
+        if os.path.exists(self.snapshot_file):
+            try:
+                with open(self.snapshot_file, "r") as f:
+                    snapshot = json.load(f)
+                self.positions = snapshot["positions"]
+                self.sequence = snapshot["sequence"]
+                self._offset = snapshot["offset"]
+                self._snapshot_sequence = self.sequence
+            except Exception as e:
+                logger.error(f"Error loading ledger snapshot, replaying full ledger: {str(e)}")
+                self.positions, self.sequence, self._offset = {}, 0, 0
+
+        replayed = 0
+        if os.path.exists(self.ledger_file):
+            with open(self.ledger_file, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn final write; it is truncated by the next append
+                        self._torn_tail = True
+                        break
+                    apply_transaction(self.positions, json.loads(line))
+                    self.sequence += 1
+                    self._offset += len(line)
+                    replayed += 1
+
+        logger.info(f"Ledger loaded from {self.ledger_dir}: {self.sequence} entries, {replayed} replayed after snapshot")
+
+    def append(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Append a transaction and update its position
+
+        Args:
+            transaction: Transaction dictionary (API or service schema)
+
+        Returns:
+            The normalized ledger entry
+        """
+        entry = normalize_transaction(transaction)
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+
+        with self.lock, self._file_lock():
+            self._catch_up()
+            with open(self.ledger_file, "ab") as f:
+                # Anything past the caught-up offset is a torn write: no
+                # other writer can be mid-append while we hold the lock
+                if self._torn_tail or f.tell() > self._offset:
+                    f.truncate(self._offset)
+                    self._torn_tail = False
+                f.write(line)
+            apply_transaction(self.positions, entry)
+            if self._index is not None:
+                self._add_to_index(entry, self._offset, len(line))
+            self.sequence += 1
+            self._offset += len(line)
+
+            if self.sequence - self._snapshot_sequence >= self.snapshot_interval:
+                self._write_snapshot()
+
+        return entry
+
+    def _write_snapshot(self) -> None:
+        """Persist the position table and the ledger offset it covers"""
+        snapshot = {
+            "sequence": self.sequence,
+            "offset": self._offset,
+            "created_at": datetime.now().isoformat(),
+            "positions": self.positions
+        }
+        tmp_path = f"{self.snapshot_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.snapshot_file)
+        self._snapshot_sequence = self.sequence
+        logger.debug("Ledger snapshot written at sequence %s", self.sequence)
+
+    def snapshot(self) -> None:
+        """Force a position snapshot"""
+        with self.lock, self._file_lock():
+            self._catch_up()
+            self._write_snapshot()
+
+    def get_positions(self, include_closed: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get a copy of the current positions
+
+        Args:
+            include_closed: Include positions with zero quantity
+
+        Returns:
+            List of position dictionaries
+        """
+        with self.lock:
+            self._catch_up()
+            return [
+                dict(position) for position in self.positions.values()
+                if include_closed or position["quantity"] > 0
+            ]
+
+    def get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a single position"""
+        with self.lock:
+            self._catch_up()
+            position = self.positions.get(symbol.upper())
+            return dict(position) if position else None
+
+    def read_from(self, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Iterate over ledger entries starting at a byte offset
+
+        Consumers that process the ledger incrementally keep the returned
+        offset and resume from it, so they only ever read new entries.
+
+        Args:
+            offset: Byte offset returned by a previous call (0 for the start)
+
+        Yields:
+            Tuples of (offset after the entry, entry)
+        """
+        if not os.path.exists(self.ledger_file):
+            return
+        with self.lock:
+            self._catch_up()
+            end = self._offset
+        with open(self.ledger_file, "rb") as f:
+            f.seek(offset)
+            position = offset
+            for line in f:
+                position += len(line)
+                if position > end:
+                    break
+                yield position, json.loads(line)
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all ledger entries in append order"""
+        if not os.path.exists(self.ledger_file):
+            return
+        with self.lock:
+            self._catch_up()
+            end = self._offset
+        with open(self.ledger_file, "rb") as f:
+            position = 0
+            for line in f:
+                position += len(line)
+                if position > end:
+                    break
+                yield json.loads(line)
+
+    def _add_to_index(self, entry: Dict[str, Any], offset: int, length: int) -> None:
+        key = entry_key(entry)
+        location = (offset, length)
+        self._index[None].add(key, location)
+        symbol = entry.get("symbol", "").upper()
+        self._index.setdefault(symbol, KeysetIndex()).add(key, location)
+
+    def _build_index(self) -> None:
+        """Scan the ledger once and index every entry; call with the lock held"""
+        self._index = {None: KeysetIndex()}
+        if not os.path.exists(self.ledger_file):
+            return
+        with open(self.ledger_file, "rb") as f:
+            offset = 0
+            for line in f:
+                if offset + len(line) > self._offset:
+                    break
+                self._add_to_index(json.loads(line), offset, len(line))
+                offset += len(line)
+        logger.debug("Ledger index built for %s: %s entries", self.ledger_dir, len(self._index[None]))
+
+    def page(self, limit: int, after: Optional[Key] = None, symbol: Optional[str] = None,
+             skip: int = 0) -> Tuple[List[Dict[str, Any]], Optional[Key]]:
+        """
+        One page of entries, newest first by (timestamp, id)
+
+        Args:
+            limit: Page size
+            after: Key of the last entry of the previous page
+            symbol: Only entries for this symbol
+            skip: Number of entries to skip first (offset pagination)
+
+        Returns:
+            Tuple of (entries, key of the last entry if more pages follow, else None)
+        """
+        with self.lock:
+            self._catch_up()
+            if self._index is None:
+                self._build_index()
+            index = self._index.get(symbol.upper() if symbol else None)
+            if index is None:
+                return [], None
+            locations, next_key = index.page(limit, after=after, skip=skip)
+        if not locations:
+            return [], next_key
+
+        entries = []
+        with open(self.ledger_file, "rb") as f:
+            for offset, length in locations:
+                f.seek(offset)
+                entries.append(json.loads(f.read(length)))
+        return entries, next_key
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        """Rebuild the position table from the full ledger"""
+        positions: Dict[str, Dict[str, Any]] = {}
+        for entry in self.iter_entries():
+            apply_transaction(positions, entry)
+        return positions
+
+    def check_consistency(self, tolerance: float = 1e-6) -> Dict[str, Any]:
+        """
+        Verify the incrementally maintained positions against a full replay
+
+        Args:
+            tolerance: Relative tolerance for floating point comparisons
+
+        Returns:
+            Dictionary with a consistent flag and any mismatching symbols
+        """
+        with self.lock:
+            self._catch_up()
+            end = self._offset
+            current = {symbol: dict(position) for symbol, position in self.positions.items()}
+        replayed: Dict[str, Dict[str, Any]] = {}
+        for position, entry in self.read_from(0):
+            if position > end:
+                break
+            apply_transaction(replayed, entry)
+
+        mismatches = []
+        for symbol in set(replayed) | set(current):
+            expected = replayed.get(symbol)
+            actual = current.get(symbol)
+            if expected is None or actual is None:
+                mismatches.append({"symbol": symbol, "expected": expected, "actual": actual})
+                continue
+            for field in ("quantity", "cost_basis", "realized_pnl"):
+                scale = max(abs(expected[field]), abs(actual[field]), 1.0)
+                if abs(expected[field] - actual[field]) > tolerance * scale:
+                    mismatches.append({
+                        "symbol": symbol,
+                        "field": field,
+                        "expected": expected[field],
+                        "actual": actual[field]
+                    })
+
+        if mismatches:
+            logger.warning(f"Ledger consistency check found {len(mismatches)} mismatches")
+        return {
+            "consistent": not mismatches,
+            "sequence": self.sequence,
+            "mismatches": mismatches
+        }
@@ -0,0 +1,125 @@
+"""
+Per-user ledger registry
+
+Each user's transactions live in their own PortfolioLedger under LEDGER_DIR.
+The registry keeps each opened ledger for the life of the process. Ledgers
+are only created by writes; reads of a user without one see no positions.
+The legacy holdings file belongs to the default user, whose ledger is
+seeded from it once.
+
+User IDs come from requests and name the ledger directories, so only IDs
+matching USER_ID_PATTERN are accepted.
+"""
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from app.core.persistence import load_json
+from app.core.settings import DATA_DIR
+from .ledger import PortfolioLedger
+
+logger = logging.getLogger(__name__)
+
+HOLDINGS_FILE = os.path.join(DATA_DIR, "portfolio", "user_portfolio_holdings.json")
+LEDGER_DIR = os.path.join(DATA_DIR, "portfolio", "ledgers")
+
+# Owner of the legacy single-user holdings file
+DEFAULT_USER_ID = "user123"
+
+# User IDs are also directory names: no separators, dots or empty IDs
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Ledgers opened in this process, by user ID
+_ledgers: Dict[str, PortfolioLedger] = {}
+
+
+def is_valid_user_id(user_id: Any) -> bool:
+    """Whether a user ID is safe to use as a ledger directory name"""
+    return isinstance(user_id, str) and USER_ID_PATTERN.match(user_id) is not None
+
+
+def _ledger_dir(user_id: str) -> str:
+    if not is_valid_user_id(user_id):
+        raise ValueError(f"Invalid user ID: {user_id!r}")
+    return os.path.join(LEDGER_DIR, user_id)
+
+
+def get_ledger(user_id: str) -> PortfolioLedger:
+    """
+    Get or create the transaction ledger for a user (for writes)
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        The user's ledger
+
+    Raises:
+        ValueError: If the user ID is invalid
+    """
+    ledger = _ledgers.get(user_id)
+    if ledger is None:
+        ledger_dir = _ledger_dir(user_id)
+        is_new = not os.path.exists(os.path.join(ledger_dir, "ledger.jsonl"))
+        ledger = PortfolioLedger(ledger_dir)
+        if is_new and user_id == DEFAULT_USER_ID:
+            _seed_ledger(ledger, user_id)
+        _ledgers[user_id] = ledger
+    return ledger
+
+
+def find_ledger(user_id: str) -> Optional[PortfolioLedger]:
+    """
+    Get a user's existing ledger without creating one (for reads)
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        The user's ledger, or None if they have none
+
+    Raises:
+        ValueError: If the user ID is invalid
+    """
+    ledger = _ledgers.get(user_id)
+    if ledger is None and os.path.exists(os.path.join(_ledger_dir(user_id), "ledger.jsonl")):
+        ledger = get_ledger(user_id)
+    return ledger
+
+
+def user_positions(user_id: str) -> List[Dict[str, Any]]:
+    """Open positions of a user ([] if they have no ledger)"""
+    ledger = find_ledger(user_id)
+    return ledger.get_positions() if ledger is not None else []
+
+
+def migrate_legacy_holdings() -> None:
+    """Seed the default user's ledger from the legacy holdings file if it has none yet"""
+    if os.path.exists(HOLDINGS_FILE):
+        get_ledger(DEFAULT_USER_ID)
+
+
+def loaded_ledgers() -> Dict[str, PortfolioLedger]:
+    """Ledgers opened so far in this process, keyed by user ID"""
+    return dict(_ledgers)
+
+
+def _seed_ledger(ledger: PortfolioLedger, user_id: str):
+    """Seed a new ledger with opening balances from the legacy holdings file"""
+    for holding in load_json(HOLDINGS_FILE, []):
+        quantity = holding.get("quantity", 0.0)
+        if not holding.get("symbol") or quantity <= 0:
+            continue
+        ledger.append({
+            "user_id": user_id,
+            "symbol": holding["symbol"],
+            "name": holding.get("name"),
+            "transaction_type": "buy",
+            "quantity": quantity,
+            "price_usd": holding.get("purchase_price_avg", holding.get("price_usd", 0.0)),
+            "timestamp": holding.get("last_updated"),
+            "notes": "Opening balance"
+        })
+    ledger.snapshot()
+    logger.info(f"Seeded ledger for {user_id} with {ledger.version} opening balances")
@@ -1,16 +1,19 @@
 import logging
 import os
-import json
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from ..market.market_data_service import MarketDataService
+from .ledger import PortfolioLedger
+from .ledgers import get_ledger, user_positions
+from .valuation import MarketSnapshot, value_positions
 
 logger = logging.getLogger(__name__)
 
 class PortfolioService:
     """Service for managing portfolio data and operations"""
     
-    def __init__(self):
+    def __init__(self, user_id: str = "user123"):
+        self.user_id = user_id
         self.base_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
         self.data_path = os.path.join(self.base_path, 'app', 'data')
         # Update file paths to point to our data directory
@@ -24,23 +27,37 @@ class PortfolioService:
         logger.info(f"Portfolio file: {self.portfolio_file}")
         logger.info(f"Transactions file: {self.transactions_file}")
 
+    @property
+    def ledger(self) -> PortfolioLedger:
+        """The user's ledger, shared with the portfolio API (created on first use)"""
+        return get_ledger(self.user_id)
+
+    def get_positions(self) -> List[Dict[str, Any]]:
+        """The user's open positions, without creating a ledger"""
+        return user_positions(self.user_id)
+
     async def get_portfolio(self) -> Dict[str, Any]:
         """Get current portfolio data with market prices"""
         try:
-            portfolio_data = self._load_portfolio()
-            if not portfolio_data or "holdings" not in portfolio_data:
-                return {"holdings": [], "total_value": 0}
+            positions = self.get_positions()
+            portfolio_data = self._portfolio_from_ledger(positions)
+
+            # Value all holdings in one vectorized pass against a single market snapshot
+            market_data = await self.market_data_service.get_market_data()
+            snapshot = MarketSnapshot.from_market_data(market_data)
+            valuation = value_positions(positions, snapshot)
+            rows = {row["symbol"]: row for row in valuation["positions"]}
 
-            # Update market prices
-            total_value = 0
             for holding in portfolio_data["holdings"]:
-                current_price = await self.market_data_service.get_coin_price(holding["asset_id"])
-                if current_price:
-                    holding["current_price"] = current_price
-                    holding["current_value"] = current_price * holding["amount"]
-                    total_value += holding["current_value"]
+                row = rows.get(holding["asset_id"].upper())
+                if row:
+                    holding["current_price"] = row["price_usd"]
+                    holding["current_value"] = row["value_usd"]
+                    holding["unrealized_pnl"] = row["unrealized_pnl_usd"]
+                    holding["allocation_percentage"] = row["allocation_percentage"]
 
-            portfolio_data["total_value"] = total_value
+            portfolio_data["total_value"] = valuation["total_value_usd"]
+            portfolio_data["valuation"] = valuation
             portfolio_data["last_update"] = datetime.now().isoformat()
 
             return portfolio_data
@@ -48,117 +65,43 @@ class PortfolioService:
             logger.error(f"Error getting portfolio: {str(e)}")
             return {"error": str(e)}
 
-    def _load_portfolio(self) -> Dict[str, Any]:
-        """Load portfolio data from file"""
-        try:
-            if os.path.exists(self.portfolio_file):
-                with open(self.portfolio_file, 'r') as f:
-                    return json.load(f)
-            return {"holdings": []}
-        except Exception as e:
-            logger.error(f"Error loading portfolio: {str(e)}")
-            return {"holdings": []}
-
-    def _save_portfolio(self, portfolio_data: Dict[str, Any]) -> bool:
-        """Save portfolio data to file"""
-        try:
-            with open(self.portfolio_file, 'w') as f:
-                json.dump(portfolio_data, f, indent=2)
-            return True
-        except Exception as e:
-            logger.error(f"Error saving portfolio: {str(e)}")
-            return False
-
     async def add_transaction(self, transaction: Dict[str, Any]) -> bool:
         """Add a new transaction and update portfolio"""
         try:
             # Validate transaction data
-            required_fields = ["asset_id", "type", "amount", "price", "timestamp"]
+            required_fields = ["asset_id", "type", "amount", "price"]
             if not all(field in transaction for field in required_fields):
                 logger.error("Missing required transaction fields")
                 return False
 
-            # Load existing transactions
-            transactions = self._load_transactions()
-            
-            # Add new transaction
-            transaction["id"] = str(len(transactions) + 1)
-            transaction["timestamp"] = datetime.now().isoformat()
-            transactions.append(transaction)
-            
-            # Save transactions
-            self._save_transactions(transactions)
-            
-            # Update portfolio
-            await self._update_portfolio_from_transactions()
+            # Append to the ledger, which updates the position incrementally
+            transaction.setdefault("timestamp", datetime.now().isoformat())
+            transaction.setdefault("user_id", self.user_id)
+            entry = self.ledger.append(transaction)
+            transaction["id"] = entry["id"]
             
             return True
         except Exception as e:
             logger.error(f"Error adding transaction: {str(e)}")
             return False
 
-    def _load_transactions(self) -> List[Dict[str, Any]]:
-        """Load transaction history from file"""
-        try:
-            if os.path.exists(self.transactions_file):
-                with open(self.transactions_file, 'r') as f:
-                    return json.load(f)
-            return []
-        except Exception as e:
-            logger.error(f"Error loading transactions: {str(e)}")
-            return []
-
-    def _save_transactions(self, transactions: List[Dict[str, Any]]) -> bool:
-        """Save transactions to file"""
-        try:
-            with open(self.transactions_file, 'w') as f:
-                json.dump(transactions, f, indent=2)
-            return True
-        except Exception as e:
-            logger.error(f"Error saving transactions: {str(e)}")
-            return False
-
-    async def _update_portfolio_from_transactions(self) -> bool:
-        """Update portfolio holdings based on transaction history"""
-        try:
-            transactions = self._load_transactions()
-            holdings = {}
-            
-            # Calculate holdings from transactions
-            for tx in transactions:
-                asset_id = tx["asset_id"]
-                if asset_id not in holdings:
-                    holdings[asset_id] = {
-                        "asset_id": asset_id,
-                        "amount": 0,
-                        "total_cost": 0
-                    }
-                
-                if tx["type"] == "buy":
-                    holdings[asset_id]["amount"] += tx["amount"]
-                    holdings[asset_id]["total_cost"] += tx["amount"] * tx["price"]
-                elif tx["type"] == "sell":
-                    holdings[asset_id]["amount"] -= tx["amount"]
-                    holdings[asset_id]["total_cost"] -= tx["amount"] * tx["price"]
-            
-            # Remove zero balance holdings
-            holdings = {k: v for k, v in holdings.items() if v["amount"] > 0}
-            
-            # Calculate average cost
-            for holding in holdings.values():
-                if holding["amount"] > 0:
-                    holding["average_cost"] = holding["total_cost"] / holding["amount"]
-            
-            # Save updated portfolio
-            portfolio_data = {
-                "holdings": list(holdings.values()),
-                "last_update": datetime.now().isoformat()
-            }
-            return self._save_portfolio(portfolio_data)
-            
-        except Exception as e:
-            logger.error(f"Error updating portfolio from transactions: {str(e)}")
-            return False
+    def _portfolio_from_ledger(self, positions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Build portfolio data from the ledger's position table (or the given positions)"""
+        if positions is None:
+            positions = self.get_positions()
+        holdings = []
+        for position in positions:
+            holdings.append({
+                "asset_id": position["symbol"].lower(),
+                "amount": position["quantity"],
+                "total_cost": position["cost_basis"],
+                "average_cost": position["cost_basis"] / position["quantity"],
+                "realized_pnl": position["realized_pnl"]
+            })
+        return {
+            "holdings": holdings,
+            "last_update": datetime.now().isoformat()
+        }
 
     async def get_portfolio_performance(self) -> Dict[str, Any]:
         """Get portfolio performance metrics"""
@@ -167,21 +110,28 @@ class PortfolioService:
             if "error" in portfolio:
                 return portfolio
 
-            total_cost = sum(h["total_cost"] for h in portfolio["holdings"])
-            total_value = portfolio["total_value"]
+            # Totals come straight from the vectorized valuation
+            valuation = portfolio["valuation"]
+            total_cost = valuation["total_cost_usd"]
+            total_value = valuation["total_value_usd"]
             
             return {
                 "total_cost": total_cost,
                 "total_value": total_value,
-                "total_profit_loss": total_value - total_cost,
-                "profit_loss_percentage": ((total_value - total_cost) / total_cost * 100) if total_cost > 0 else 0,
+                "total_profit_loss": valuation["unrealized_pnl_usd"],
+                "realized_profit_loss": valuation["realized_pnl_usd"],
+                "profit_loss_percentage": (valuation["unrealized_pnl_usd"] / total_cost * 100) if total_cost > 0 else 0,
+                "change_24h_percentage": valuation["change_24h_pct"],
+                "change_7d_percentage": valuation["change_7d_pct"],
+                "change_30d_percentage": valuation["change_30d_pct"],
                 "holdings_performance": [
                     {
-                        "asset_id": h["asset_id"],
-                        "profit_loss": (h["current_value"] - h["total_cost"]) if "current_value" in h else 0,
-                        "profit_loss_percentage": ((h["current_value"] - h["total_cost"]) / h["total_cost"] * 100) if h["total_cost"] > 0 else 0
+                        "asset_id": row["symbol"].lower(),
+                        "profit_loss": row["unrealized_pnl_usd"],
+                        "profit_loss_percentage": (row["unrealized_pnl_usd"] / row["cost_basis_usd"] * 100) if row["cost_basis_usd"] > 0 else 0,
+                        "contribution_24h_percentage": row["contribution_24h_pct"]
                     }
-                    for h in portfolio["holdings"]
+                    for row in valuation["positions"]
                 ],
                 "last_update": datetime.now().isoformat()
             }
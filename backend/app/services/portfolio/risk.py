@@ -0,0 +1,386 @@
+"""
+Risk analytics over stored daily price history
+
+RiskEngine keeps a (days × coins) price matrix and the daily returns for a
+rolling window. From those it computes:
+
+- rolling 7d/30d/90d returns
+- annualized volatility
+- the covariance and correlation matrix
+- each coin's beta to a benchmark (BTC) and to the total market
+- max and current drawdown
+
+The total market is a weighted average of the returns on each day.
+
+Pairwise-complete statistics are kept as running sums (Σxy, Σx, Σx², n for
+each pair) that get a rank-1 update per day. Adding a day therefore costs
+O(coins²), however long the window is. Drift from the floating point updates
+is cleared by a full recompute once per window; that recompute is a few
+matrix products.
+"""
+import logging
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Daily data, crypto trades every day
+ANNUALIZATION_DAYS = 365
+
+# Rolling window for volatility, covariance and beta
+DEFAULT_WINDOW = 90
+
+# Trailing return horizons in days
+ROLLING_PERIODS = {"7d": 7, "30d": 30, "90d": 90}
+
+# Pairs with fewer overlapping observations report NaN
+MIN_OBSERVATIONS = 10
+
+# Holdings pairs above this correlation are flagged in portfolio reports
+HIGH_CORRELATION = 0.8
+
+
+def _outer_update(x: np.ndarray, m: np.ndarray, sign: float, sums: Tuple[np.ndarray, ...]) -> None:
+    """Add (sign=1) or remove (sign=-1) one return row from the pairwise sums"""
+    s_xy, s_xm, s_x2m, count = sums
+    s_xy += sign * np.outer(x, x)
+    s_xm += sign * np.outer(x, m)
+    s_x2m += sign * np.outer(x * x, m)
+    count += sign * np.outer(m, m)
+
+
+class RiskEngine:
+    """Rolling risk statistics for a fixed universe of coins"""
+
+    def __init__(self, labels: Sequence[str], window: int = DEFAULT_WINDOW, benchmark: str = "bitcoin",
+                 market_weights: Optional[Mapping[str, float]] = None):
+        self.labels = list(labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.window = window
+        self.benchmark = benchmark
+        self.dates: List[str] = []
+
+        n = len(self.labels)
+        weights = np.ones(n)
+        if market_weights:
+            weights = np.array([float(market_weights.get(label, 0.0)) for label in self.labels])
+        self.market_weights = weights
+
+        # Retained price rows: enough for the longest trailing return
+        self._history_rows = max(window, max(ROLLING_PERIODS.values())) + 1
+        self._prices = np.empty((0, n))
+        # Return window; the last column is the market return
+        self._returns = np.empty((0, n + 1))
+        self._sums = tuple(np.zeros((n + 1, n + 1)) for _ in range(4))
+        self._updates_since_rebuild = 0
+
+        # Drawdown state over the full history
+        self._peak = np.full(n, np.nan)
+        self._max_drawdown = np.zeros(n)
+        self._last_price = np.full(n, np.nan)
+
+    @classmethod
+    def from_price_history(cls, history: Mapping[str, Sequence[Tuple[str, float]]], **kwargs) -> "RiskEngine":
+        """
+        Build an engine from per-coin (date, price) series
+
+        Args:
+            history: Price series keyed by coin ID, as returned by
+                DatabaseService.get_price_history_since
+            **kwargs: Passed to the constructor
+
+        Returns:
+            RiskEngine loaded with the full history
+        """
+        engine = cls(sorted(history), **kwargs)
+        dates, matrix = engine._align(history)
+        engine.load(dates, matrix)
+        return engine
+
+    def _align(self, history: Mapping[str, Sequence[Tuple[str, float]]]) -> Tuple[List[str], np.ndarray]:
+        """Align per-coin series into a (dates × coins) matrix with NaN gaps"""
+        dates = sorted({date for label in history if label in self.index for date, _ in history[label]})
+        date_index = {date: i for i, date in enumerate(dates)}
+        matrix = np.full((len(dates), len(self.labels)), np.nan)
+        for label, series in history.items():
+            column = self.index.get(label)
+            if column is None:
+                continue
+            for date, price in series:
+                matrix[date_index[date], column] = price
+        return dates, matrix
+
+    def _row_returns(self, previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+        """Daily simple returns for each coin plus the weighted market return"""
+        valid = (previous > 0) & (current > 0)
+        returns = np.full(len(self.labels) + 1, np.nan)
+        returns[:-1] = np.divide(current, previous, out=np.full_like(current, np.nan), where=valid) - 1.0
+        weights = self.market_weights * valid
+        if weights.sum() > 0:
+            returns[-1] = np.dot(np.nan_to_num(returns[:-1]), weights) / weights.sum()
+        return returns
+
+    def load(self, dates: Sequence[str], prices: np.ndarray) -> None:
+        """
+        Replace all state with a full price history
+
+        Args:
+            dates: Ascending date strings, one per row
+            prices: (dates × coins) price matrix, NaN where missing
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        self.dates = list(dates)[-self._history_rows:]
+        self._prices = prices[-self._history_rows:]
+
+        returns = [self._row_returns(prices[i - 1], prices[i]) for i in range(max(1, len(prices) - self.window), len(prices))]
+        self._returns = np.array(returns) if returns else np.empty((0, len(self.labels) + 1))
+        self._rebuild_sums()
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            peaks = np.fmax.accumulate(prices, axis=0) if len(prices) else np.empty((0, len(self.labels)))
+            drawdowns = prices / peaks - 1.0
+        self._max_drawdown = np.nan_to_num(np.fmin.reduce(drawdowns, axis=0, initial=0.0)) if len(prices) else np.zeros(len(self.labels))
+        self._peak = peaks[-1] if len(prices) else np.full(len(self.labels), np.nan)
+
+        # Last valid price per coin (forward fill)
+        valid = ~np.isnan(prices)
+        last_row = np.maximum.accumulate(np.where(valid, np.arange(len(prices))[:, None], 0), axis=0)
+        self._last_price = prices[last_row[-1], np.arange(len(self.labels))] if len(prices) else np.full(len(self.labels), np.nan)
+
+        logger.info(f"Risk engine loaded {len(prices)} days for {len(self.labels)} coins")
+
+    def _rebuild_sums(self) -> None:
+        """Recompute the pairwise running sums from the return window"""
+        mask = (~np.isnan(self._returns)).astype(np.float64)
+        x = np.nan_to_num(self._returns)
+        self._sums = (x.T @ x, x.T @ mask, (x * x).T @ mask, mask.T @ mask)
+        self._updates_since_rebuild = 0
+
+    def append_day(self, date: str, prices: Any) -> None:
+        """
+        Add one day of prices and update all statistics incrementally
+
+        A date equal to the latest one replaces that day's prices.
+
+        Args:
+            date: Date string, not earlier than the latest loaded date
+            prices: Price array aligned to labels, or a mapping of label to price
+        """
+        if isinstance(prices, Mapping):
+            row = np.full(len(self.labels), np.nan)
+            for label, price in prices.items():
+                column = self.index.get(label)
+                if column is not None:
+                    row[column] = price
+        else:
+            row = np.asarray(prices, dtype=np.float64)
+
+        if self.dates and date < self.dates[-1]:
+            logger.warning(f"Ignoring out-of-order risk data for {date}")
+            return
+
+        if self.dates and date == self.dates[-1]:
+            # Revision of the latest day: swap its row and return, then recompute the window sums
+            self._prices[-1] = row
+            if len(self._prices) > 1 and len(self._returns):
+                self._returns[-1] = self._row_returns(self._prices[-2], row)
+            self._rebuild_sums()
+        else:
+            if len(self._prices):
+                returns = self._row_returns(self._prices[-1], row)
+                mask = (~np.isnan(returns)).astype(np.float64)
+                _outer_update(np.nan_to_num(returns), mask, 1.0, self._sums)
+                self._returns = np.vstack([self._returns, returns])
+                if len(self._returns) > self.window:
+                    oldest = self._returns[0]
+                    _outer_update(np.nan_to_num(oldest), (~np.isnan(oldest)).astype(np.float64), -1.0, self._sums)
+                    self._returns = self._returns[1:]
+                self._updates_since_rebuild += 1
+                if self._updates_since_rebuild >= self.window:
+                    self._rebuild_sums()
+            self.dates.append(date)
+            self._prices = np.vstack([self._prices, row])[-self._history_rows:]
+            self.dates = self.dates[-self._history_rows:]
+
+        valid = ~np.isnan(row)
+        self._last_price = np.where(valid, row, self._last_price)
+        self._peak = np.fmax(self._peak, row)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            current = row / self._peak - 1.0
+        self._max_drawdown = np.fmin(self._max_drawdown, np.where(valid, current, 0.0))
+
+    def update_from_history(self, history: Mapping[str, Sequence[Tuple[str, float]]]) -> int:
+        """
+        Append every day in history that is newer than the latest loaded date
+
+        Args:
+            history: Price series keyed by coin ID
+
+        Returns:
+            Number of days appended
+        """
+        latest = self.dates[-1] if self.dates else ""
+        dates, matrix = self._align(history)
+        appended = 0
+        for date, row in zip(dates, matrix):
+            if date > latest:
+                self.append_day(date, row)
+                appended += 1
+        return appended
+
+    # Statistics
+
+    def _pairwise(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Pairwise-complete covariance and the matching per-pair variances"""
+        s_xy, s_xm, s_x2m, count = self._sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            n = np.where(count >= MIN_OBSERVATIONS, count, np.nan)
+            covariance = (s_xy - s_xm * s_xm.T / n) / (n - 1)
+            # var_i over the rows where both i and j are present
+            variance = (s_x2m - s_xm * s_xm / n) / (n - 1)
+        return covariance, variance, n
+
+    def covariance(self, annualized: bool = True) -> np.ndarray:
+        """Covariance matrix of daily returns (coins × coins)"""
+        covariance = self._pairwise()[0][:-1, :-1]
+        return covariance * ANNUALIZATION_DAYS if annualized else covariance
+
+    def correlation(self) -> np.ndarray:
+        """Pairwise-complete correlation matrix (coins × coins)"""
+        covariance, variance, _ = self._pairwise()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = covariance / np.sqrt(variance * variance.T)
+        return np.clip(correlation[:-1, :-1], -1.0, 1.0)
+
+    def volatility(self) -> np.ndarray:
+        """Annualized volatility per coin"""
+        covariance = self._pairwise()[0]
+        with np.errstate(invalid="ignore"):
+            return np.sqrt(np.diag(covariance)[:-1] * ANNUALIZATION_DAYS)
+
+    def betas(self) -> Dict[str, np.ndarray]:
+        """Beta of each coin to the benchmark and to the total market"""
+        covariance, variance, _ = self._pairwise()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            market = covariance[:-1, -1] / variance[-1, :-1]
+            column = self.index.get(self.benchmark)
+            if column is None:
+                benchmark = np.full(len(self.labels), np.nan)
+            else:
+                benchmark = covariance[:-1, column] / variance[column, :-1]
+        return {"benchmark": benchmark, "market": market}
+
+    def drawdowns(self) -> Dict[str, np.ndarray]:
+        """Max drawdown over the full history and the current drawdown from peak"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            current = np.nan_to_num(self._last_price / self._peak - 1.0)
+        return {"max": self._max_drawdown.copy(), "current": current}
+
+    def rolling_returns(self) -> Dict[str, np.ndarray]:
+        """Trailing returns per coin for each rolling period"""
+        result = {}
+        for period, days in ROLLING_PERIODS.items():
+            if len(self._prices) <= days:
+                result[period] = np.full(len(self.labels), np.nan)
+                continue
+            start, end = self._prices[-1 - days], self._prices[-1]
+            valid = (start > 0) & (end > 0)
+            result[period] = np.divide(end, start, out=np.full_like(end, np.nan), where=valid) - 1.0
+        return result
+
+    def return_window(self, labels: Sequence[str]) -> np.ndarray:
+        """
+        Daily returns in the rolling window for the given coins
+
+        Args:
+            labels: Coin IDs (must be indexed)
+
+        Returns:
+            (days × coins) array, NaN where a price was missing
+        """
+        return self._returns[:, [self.index[label] for label in labels]]
+
+    # Reports
+
+    def asset_metrics(self, labels: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Per-coin risk metrics
+
+        Args:
+            labels: Coins to include (default: all)
+
+        Returns:
+            List of metric dictionaries; NaN values are reported as None
+        """
+        volatility = self.volatility()
+        betas = self.betas()
+        drawdowns = self.drawdowns()
+        returns = self.rolling_returns()
+
+        def clean(value: float) -> Optional[float]:
+            return None if np.isnan(value) else round(float(value), 6)
+
+        metrics = []
+        for label in labels if labels is not None else self.labels:
+            i = self.index.get(label)
+            if i is None:
+                continue
+            row = {
+                "id": label,
+                "volatility": clean(volatility[i]),
+                "beta_btc": clean(betas["benchmark"][i]),
+                "beta_market": clean(betas["market"][i]),
+                "max_drawdown": clean(drawdowns["max"][i]),
+                "current_drawdown": clean(drawdowns["current"][i]),
+            }
+            for period in ROLLING_PERIODS:
+                row[f"return_{period}"] = clean(returns[period][i])
+            metrics.append(row)
+        return metrics
+
+    def portfolio_risk(self, weights: Mapping[str, float]) -> Dict[str, Any]:
+        """
+        Risk report for a weighted portfolio
+
+        Args:
+            weights: Portfolio weight (or value) keyed by coin ID; normalized internally
+
+        Returns:
+            Dictionary with portfolio volatility, betas, concentration,
+            highly correlated holding pairs and per-asset metrics
+        """
+        covered = [label for label in weights if label in self.index and weights[label] > 0]
+        uncovered = [label for label in weights if label not in self.index]
+        if not covered:
+            return {"available": False, "uncovered": uncovered}
+
+        columns = np.array([self.index[label] for label in covered])
+        w = np.array([float(weights[label]) for label in covered])
+        w = w / w.sum()
+
+        covariance = np.nan_to_num(self.covariance()[np.ix_(columns, columns)])
+        correlation = self.correlation()[np.ix_(columns, columns)]
+        betas = self.betas()
+
+        pairs = []
+        for a in range(len(covered)):
+            for b in range(a + 1, len(covered)):
+                if correlation[a, b] >= HIGH_CORRELATION:
+                    pairs.append({"pair": [covered[a], covered[b]], "correlation": round(float(correlation[a, b]), 4)})
+        pairs.sort(key=lambda pair: pair["correlation"], reverse=True)
+
+        return {
+            "available": True,
+            "as_of": self.dates[-1] if self.dates else None,
+            "window_days": self.window,
+            "volatility": float(np.sqrt(max(w @ covariance @ w, 0.0))),
+            "beta_btc": float(np.nansum(w * betas["benchmark"][columns])),
+            "beta_market": float(np.nansum(w * betas["market"][columns])),
+            "max_weight": float(w.max()),
+            "concentration_hhi": float((w * w).sum()),
+            "weights": {label: float(weight) for label, weight in zip(covered, w)},
+            "correlated_pairs": pairs,
+            "assets": self.asset_metrics(covered),
+            "uncovered": uncovered,
+        }
@@ -0,0 +1,166 @@
+"""
+Portfolio risk service
+
+Loads the risk engine from the historical price table once and then appends
+only the days stored since the last refresh. Risk reports map portfolio
+symbols to coin IDs through the market snapshot.
+"""
+import logging
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .risk import RiskEngine
+from .valuation import MarketSnapshot, value_positions
+from .var import DEFAULT_CONFIDENCES, DEFAULT_HORIZONS, DEFAULT_PATHS, historical_var, monte_carlo_var
+
+logger = logging.getLogger(__name__)
+
+
+class RiskService:
+    """Keeps a RiskEngine in sync with stored price history"""
+
+    def __init__(self, db_service=None):
+        self._db_service = db_service
+        self.engine: Optional[RiskEngine] = None
+        self._refreshed_on: Optional[date] = None
+        self.lock = threading.Lock()
+
+    @property
+    def db_service(self):
+        """Database service; defaults to the app-wide instance"""
+        if self._db_service is None:
+            from app.services import db_service
+            self._db_service = db_service
+        return self._db_service
+
+    def get_engine(self, market_weights: Optional[Mapping[str, float]] = None) -> Optional[RiskEngine]:
+        """
+        Get the risk engine, loading or refreshing it at most once per day
+
+        Args:
+            market_weights: Market cap weights by coin ID for the market return,
+                used when the engine is first built
+
+        Returns:
+            RiskEngine, or None if no price history is available
+        """
+        with self.lock:
+            today = date.today()
+            if self.engine is not None and self._refreshed_on == today:
+                return self.engine
+
+            try:
+                if self.engine is None:
+                    history = self.db_service.get_price_history_since()
+                    if not history:
+                        logger.warning("No price history available for risk analytics")
+                        return None
+                    self.engine = RiskEngine.from_price_history(history, market_weights=market_weights)
+                else:
+                    latest = self.engine.dates[-1] if self.engine.dates else None
+                    appended = self.engine.update_from_history(self.db_service.get_price_history_since(latest))
+                    logger.info(f"Risk engine refreshed with {appended} new days")
+                self._refreshed_on = today
+            except Exception as e:
+                logger.error(f"Error loading price history for risk analytics: {str(e)}")
+            return self.engine
+
+    def assess_positions(self, positions: Iterable[Mapping[str, Any]], snapshot: MarketSnapshot) -> Dict[str, Any]:
+        """
+        Build a risk report for ledger positions
+
+        Args:
+            positions: Ledger positions
+            snapshot: Current market snapshot
+
+        Returns:
+            Risk report from RiskEngine.portfolio_risk, with symbols attached
+        """
+        valuation = value_positions(positions, snapshot)
+        total_caps = snapshot.market_caps.sum()
+        market_weights = None
+        if total_caps > 0:
+            market_weights = dict(zip(snapshot.ids, (snapshot.market_caps / total_caps).tolist()))
+
+        engine = self.get_engine(market_weights)
+        if engine is None:
+            return {"available": False, "reason": "No price history available"}
+
+        weights: Dict[str, float] = {}
+        symbols: Dict[str, str] = {}
+        for row in valuation["positions"]:
+            column = snapshot.index.get(row["symbol"])
+            coin_id = snapshot.ids[column] if column is not None else row["symbol"].lower()
+            weights[coin_id] = weights.get(coin_id, 0.0) + row["value_usd"]
+            symbols[coin_id] = row["symbol"]
+
+        report = engine.portfolio_risk(weights)
+        for asset in report.get("assets", []):
+            asset["symbol"] = symbols.get(asset["id"])
+        report["total_value_usd"] = valuation["total_value_usd"]
+        return report
+
+    def value_at_risk(self, positions: Iterable[Mapping[str, Any]], snapshot: MarketSnapshot,
+                      paths: int = DEFAULT_PATHS, horizons: Sequence[int] = DEFAULT_HORIZONS,
+                      confidences: Sequence[float] = DEFAULT_CONFIDENCES,
+                      seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Historical and Monte Carlo VaR/CVaR for ledger positions
+
+        Holdings without price history are left out of the simulation and
+        listed under "uncovered".
+
+        Args:
+            positions: Ledger positions
+            snapshot: Current market snapshot
+            paths: Monte Carlo paths per horizon
+            horizons: Horizons in days
+            confidences: Confidence levels
+            seed: Seed for reproducible Monte Carlo results
+
+        Returns:
+            Dictionary with "historical" and "monte_carlo" results
+        """
+        valuation = value_positions(positions, snapshot)
+        engine = self.get_engine()
+        if engine is None:
+            return {"available": False, "reason": "No price history available"}
+
+        values: Dict[str, float] = {}
+        uncovered = []
+        for row in valuation["positions"]:
+            column = snapshot.index.get(row["symbol"])
+            coin_id = snapshot.ids[column] if column is not None else row["symbol"].lower()
+            if coin_id in engine.index:
+                values[coin_id] = values.get(coin_id, 0.0) + row["value_usd"]
+            elif row["value_usd"] > 0:
+                uncovered.append(row["symbol"])
+
+        covered_value = sum(values.values())
+        if covered_value <= 0:
+            return {"available": False, "reason": "No holdings with price history", "uncovered": uncovered}
+
+        labels = list(values)
+        weights = np.array([values[label] for label in labels]) / covered_value
+        returns = engine.return_window(labels)
+        columns = [engine.index[label] for label in labels]
+        covariance = engine.covariance(annualized=False)[np.ix_(columns, columns)]
+
+        return {
+            "available": True,
+            "as_of": engine.dates[-1] if engine.dates else None,
+            "covered_value_usd": covered_value,
+            "total_value_usd": valuation["total_value_usd"],
+            "uncovered": uncovered,
+            "historical": historical_var(returns, weights, covered_value, horizons, confidences),
+            "monte_carlo": monte_carlo_var(
+                np.nanmean(returns, axis=0) if len(returns) else np.zeros(len(labels)),
+                covariance, weights, covered_value, horizons, confidences, paths=paths, seed=seed
+            )
+        }
+
+
+risk_service = RiskService()
@@ -0,0 +1,309 @@
+"""
+Incremental exchange and wallet sync into the portfolio ledger
+
+Each source keeps a persisted cursor (per-market trade timestamps for
+exchanges, the last scanned block for wallets), so a sync only fetches and
+appends events newer than the previous one. Synced events are normalized
+into ledger entries tagged with their source and a sync_id.
+
+Daily balances are derived from the ledger incrementally: BalanceHistory
+remembers the ledger offset it has processed and accumulates per-day
+quantity deltas, so a balance history for any window is a running sum over
+days rather than a replay of every transaction.
+"""
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.persistence import load_json, save_json
+from app.services.portfolio.ledger import PortfolioLedger
+
+logger = logging.getLogger(__name__)
+
+# Quote currencies valued at 1 USD
+USD_QUOTES = ("USD", "USDT", "USDC", "BUSD", "FDUSD", "TUSD", "DAI")
+
+# Signed effect of each ledger entry type on the held quantity
+_QUANTITY_SIGN = {"buy": 1.0, "deposit": 1.0, "sell": -1.0, "withdrawal": -1.0}
+
+PriceLookup = Callable[[str], float]
+
+
+def _no_price(symbol: str) -> float:
+    return 0.0
+
+
+def _usd_price(symbol: str, price_lookup: PriceLookup) -> float:
+    return 1.0 if symbol.upper() in USD_QUOTES else price_lookup(symbol.upper())
+
+
+def _iso_timestamp(timestamp_ms: float) -> str:
+    # Local time, like the datetime.now() default of manual ledger entries
+    return datetime.fromtimestamp(timestamp_ms / 1000).isoformat()
+
+
+def trade_entries(trade: Dict[str, Any], price_lookup: PriceLookup = _no_price) -> List[Dict[str, Any]]:
+    """
+    Ledger entries for a normalized exchange trade
+
+    A trade moves both sides of its market: buying BTC/USDT adds BTC and
+    spends USDT. Fees are recorded as a withdrawal of the fee currency.
+
+    Args:
+        trade: Trade from AsyncExchangeAdapter (normalize_trade format)
+        price_lookup: USD price for non-USD quote and fee currencies
+
+    Returns:
+        Ledger transactions
+    """
+    base, quote = trade["symbol"].split("/")[:2]
+    quote = quote.split(":")[0]
+    quote_usd = _usd_price(quote, price_lookup)
+    timestamp = _iso_timestamp(trade["timestamp"])
+    buying = trade["side"] == "buy"
+    cost = trade.get("cost") or trade["price"] * trade["amount"]
+
+    entries = [
+        {"symbol": base, "transaction_type": "buy" if buying else "sell", "quantity": trade["amount"],
+         "price_usd": trade["price"] * quote_usd, "timestamp": timestamp},
+        {"symbol": quote, "transaction_type": "sell" if buying else "buy", "quantity": cost,
+         "price_usd": quote_usd, "timestamp": timestamp},
+    ]
+    if trade.get("fee") and trade.get("fee_currency"):
+        entries.append({"symbol": trade["fee_currency"], "transaction_type": "withdrawal", "quantity": trade["fee"],
+                        "price_usd": _usd_price(trade["fee_currency"], price_lookup), "timestamp": timestamp,
+                        "notes": "Trading fee"})
+    return entries
+
+
+def transfer_entries(transfer: Dict[str, Any], price_lookup: PriceLookup = _no_price) -> List[Dict[str, Any]]:
+    """
+    Ledger entries for a wallet transaction
+
+    Args:
+        transfer: Transaction from EthereumService (side receive/send/buy/sell)
+        price_lookup: USD price lookup
+
+    Returns:
+        Ledger transactions
+    """
+    symbol = transfer["symbol"]
+    timestamp = _iso_timestamp(transfer["timestamp"])
+    transaction_type = {"receive": "deposit", "send": "withdrawal"}.get(transfer["side"], transfer["side"])
+    entries = [{"symbol": symbol, "transaction_type": transaction_type, "quantity": transfer["amount"],
+                "price_usd": _usd_price(symbol, price_lookup), "timestamp": timestamp}]
+    if transfer.get("fee") and transfer["side"] != "receive":
+        fee_currency = transfer.get("fee_currency") or "ETH"
+        entries.append({"symbol": fee_currency, "transaction_type": "withdrawal", "quantity": transfer["fee"],
+                        "price_usd": _usd_price(fee_currency, price_lookup), "timestamp": timestamp,
+                        "notes": "Network fee"})
+    return entries
+
+
+class ExchangeSyncSource:
+    """Trades from an exchange service with an AsyncExchangeAdapter"""
+
+    def __init__(self, service, price_lookup: PriceLookup = _no_price):
+        self.service = service
+        self.price_lookup = price_lookup
+
+    async def fetch(self, cursor: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        # The adapter is shared by every user's engine: advance copies of this engine's cursors
+        markets = dict(cursor.get("markets", {}))
+        market_ids = dict(cursor.get("market_ids", {}))
+        trades = await self.service.adapter.sync_trades(cursors=markets, cursor_ids=market_ids)
+        return trades, {"markets": markets, "market_ids": market_ids}
+
+    def to_entries(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return trade_entries(event, self.price_lookup)
+
+
+class WalletSyncSource:
+    """Transactions of the wallets tracked by EthereumService"""
+
+    def __init__(self, service, price_lookup: PriceLookup = _no_price):
+        self.service = service
+        self.price_lookup = price_lookup
+
+    async def fetch(self, cursor: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        transactions, last_block = await self.service.get_transactions_since(cursor.get("last_block", -1))
+        return transactions, {"last_block": last_block}
+
+    def to_entries(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return transfer_entries(event, self.price_lookup)
+
+
+class BalanceHistory:
+    """Daily balances per source, maintained incrementally from a ledger"""
+
+    def __init__(self, path: str):
+        self.path = path
+        state = load_json(path, None) or {}
+        self.offset: int = state.get("offset", 0)
+        # source -> day (YYYY-MM-DD) -> symbol -> net quantity change
+        self.deltas: Dict[str, Dict[str, Dict[str, float]]] = state.get("deltas", {})
+
+    def update(self, ledger: PortfolioLedger) -> int:
+        """
+        Fold ledger entries appended since the last update into the deltas
+
+        Args:
+            ledger: Portfolio ledger
+
+        Returns:
+            Number of entries processed
+        """
+        processed = 0
+        for offset, entry in ledger.read_from(self.offset):
+            sign = _QUANTITY_SIGN.get(entry.get("transaction_type"), 0.0)
+            day = str(entry.get("timestamp", ""))[:10]
+            days = self.deltas.setdefault(entry.get("source") or "manual", {})
+            symbols = days.setdefault(day, {})
+            symbols[entry["symbol"]] = symbols.get(entry["symbol"], 0.0) + sign * entry.get("quantity", 0.0)
+            self.offset = offset
+            processed += 1
+        if processed:
+            save_json(self.path, {"offset": self.offset, "deltas": self.deltas})
+        return processed
+
+    def daily_balances(self, days: int = 30, source: Optional[str] = None,
+                       end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        End-of-day balances for the last `days` days
+
+        Args:
+            days: Number of daily snapshots
+            source: Only count entries from this source (default: all)
+            end: Last day (default: today)
+
+        Returns:
+            Snapshots, newest first, as {"timestamp", "date", "balances"}
+            with lower-case symbols
+        """
+        end = end or date.today()
+        start = end - timedelta(days=days - 1)
+        merged: Dict[str, Dict[str, float]] = {}
+        for name, per_day in self.deltas.items():
+            if source is not None and name != source:
+                continue
+            for day, symbols in per_day.items():
+                target = merged.setdefault(day, {})
+                for symbol, quantity in symbols.items():
+                    target[symbol] = target.get(symbol, 0.0) + quantity
+
+        balances: Dict[str, float] = {}
+        changes = sorted(merged.items())
+        index = 0
+        # Opening balances: everything before the window
+        while index < len(changes) and changes[index][0] < start.isoformat():
+            for symbol, quantity in changes[index][1].items():
+                balances[symbol] = balances.get(symbol, 0.0) + quantity
+            index += 1
+
+        snapshots = []
+        for offset in range(days):
+            day = (start + timedelta(days=offset)).isoformat()
+            while index < len(changes) and changes[index][0] <= day:
+                for symbol, quantity in changes[index][1].items():
+                    balances[symbol] = balances.get(symbol, 0.0) + quantity
+                index += 1
+            snapshots.append({
+                "timestamp": int(datetime.fromisoformat(day).timestamp() * 1000),
+                "date": day,
+                "balances": {symbol.lower(): quantity for symbol, quantity in balances.items() if abs(quantity) > 1e-12}
+            })
+        snapshots.reverse()
+        return snapshots
+
+
+class SyncEngine:
+    """Syncs exchange and wallet sources into one user's ledger"""
+
+    def __init__(self, ledger: PortfolioLedger, sources: Dict[str, Any], user_id: Optional[str] = None):
+        """
+        Args:
+            ledger: The user's portfolio ledger
+            sources: Sync sources keyed by source name (e.g. "binance")
+            user_id: User ID stored on appended entries
+        """
+        self.ledger = ledger
+        self.sources = sources
+        self.user_id = user_id
+        self.state_file = os.path.join(ledger.ledger_dir, "sync_state.json")
+        self.state = load_json(self.state_file, None) or {"ledger_offset": 0, "sources": {}}
+        self.history = BalanceHistory(os.path.join(ledger.ledger_dir, "balance_history.json"))
+        self._recent_ids: Optional[set] = None
+        # Serializes syncs of this ledger: fetch, append and state save run as one step
+        self.lock = asyncio.Lock()
+
+    def _synced_ids(self) -> set:
+        """
+        sync_ids appended after the last saved state
+
+        Only these can be fetched again (if the process stopped between
+        appending and saving the cursor), so only the ledger tail is read.
+        """
+        if self._recent_ids is None:
+            self._recent_ids = {
+                entry["sync_id"] for _, entry in self.ledger.read_from(self.state.get("ledger_offset", 0))
+                if entry.get("sync_id")
+            }
+        return self._recent_ids
+
+    async def sync_source(self, name: str) -> int:
+        """
+        Fetch and append new events from one source
+
+        Args:
+            name: Source name
+
+        Returns:
+            Number of new events appended
+        """
+        source = self.sources[name]
+        async with self.lock:
+            events, cursor = await source.fetch(self.state["sources"].get(name, {}))
+
+            synced_ids = self._synced_ids()
+            appended = 0
+            for event in sorted(events, key=lambda event: event["timestamp"]):
+                sync_id = f"{name}:{event['id']}"
+                if sync_id in synced_ids:
+                    continue
+                for leg, transaction in enumerate(source.to_entries(event)):
+                    transaction.update({"id": f"{sync_id}:{leg}", "user_id": self.user_id,
+                                        "source": name, "sync_id": sync_id})
+                    self.ledger.append(transaction)
+                synced_ids.add(sync_id)
+                appended += 1
+
+            self.state["sources"][name] = cursor
+            self.state["ledger_offset"] = self.ledger.offset
+            save_json(self.state_file, self.state)
+            # Everything appended so far is now behind the saved cursor
+            self._recent_ids = set()
+
+            self.history.update(self.ledger)
+        if appended:
+            logger.info(f"Synced {appended} new events from {name}")
+        return appended
+
+    async def sync_all(self) -> Dict[str, int]:
+        """
+        Sync every source; a failing source is logged and skipped
+
+        Returns:
+            New events appended per source (-1 for failed sources)
+        """
+        names = list(self.sources)
+        results = await asyncio.gather(*(self.sync_source(name) for name in names), return_exceptions=True)
+        counts = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error syncing {name}: {str(result)}")
+                counts[name] = -1
+            else:
+                counts[name] = result
+        return counts
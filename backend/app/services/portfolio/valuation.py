@@ -0,0 +1,361 @@
+"""
+Vectorized portfolio valuation
+
+Market data is held as a MarketSnapshot: one NumPy column per field, aligned
+to a symbol index. Positions are mapped onto that index once, after which
+value, allocation, unrealized/realized P&L and 24h/7d/30d contribution are
+computed for a whole portfolio in one pass.
+
+Many portfolios can be revalued together with value_batch. Positions from
+all users are stored as flat arrays (user row, coin column, quantity, cost
+basis), and per-user totals are reduced with np.bincount. The work is
+proportional to the number of positions, not users × coins.
+"""
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.metrics import cache_lookup
+from app.core.persistence import load_json
+from app.services.market.snapshot_file import MarketSnapshotFile, snapshot_path
+
+logger = logging.getLogger(__name__)
+
+# Change windows reported by the engine, keyed by output suffix
+CHANGE_PERIODS = ("24h", "7d", "30d")
+
+# Field names for price and percentage changes in the two market data layouts
+# (MarketDataService output and raw CoinGecko /coins/markets rows)
+_PRICE_FIELDS = ("priceUsd", "current_price")
+_CHANGE_FIELDS = {
+    "24h": ("change24h", "price_change_percentage_24h"),
+    "7d": ("change7d", "price_change_percentage_7d", "price_change_percentage_7d_in_currency"),
+    "30d": ("change30d", "price_change_percentage_30d", "price_change_percentage_30d_in_currency"),
+}
+
+
+def _first_number(row: Mapping[str, Any], fields: Sequence[str]) -> float:
+    """Get the first numeric value present among the given fields"""
+    for field in fields:
+        value = row.get(field)
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+class MarketSnapshot:
+    """Column-oriented market prices aligned to a symbol index"""
+
+    def __init__(self, symbols: Sequence[str], prices: np.ndarray, changes: Dict[str, np.ndarray],
+                 names: Optional[Sequence[str]] = None, version: Optional[str] = None,
+                 ids: Optional[Sequence[str]] = None, market_caps: Optional[np.ndarray] = None,
+                 volumes: Optional[np.ndarray] = None):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.names = list(names) if names is not None else list(self.symbols)
+        self.ids = list(ids) if ids is not None else [symbol.lower() for symbol in self.symbols]
+        self.market_caps = market_caps if market_caps is not None else np.zeros(len(self.symbols))
+        self.volumes = volumes if volumes is not None else np.zeros(len(self.symbols))
+        self.prices = prices
+        self.changes = changes
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def from_market_data(cls, market_data: Mapping[str, Any]) -> "MarketSnapshot":
+        """
+        Build a snapshot from market data as stored in market_data.json
+
+        When a symbol appears more than once, the first (highest market cap)
+        entry wins.
+
+        Args:
+            market_data: Dictionary with a "prices" list
+
+        Returns:
+            MarketSnapshot
+        """
+        rows = market_data.get("prices", []) if market_data else []
+        symbols: List[str] = []
+        names: List[str] = []
+        ids: List[str] = []
+        seen = set()
+        kept = []
+        for row in rows:
+            symbol = (row.get("symbol") or "").upper()
+            if not symbol or symbol in seen:
+                continue
+            seen.add(symbol)
+            symbols.append(symbol)
+            names.append(row.get("name") or symbol)
+            ids.append(row.get("id") or symbol.lower())
+            kept.append(row)
+
+        prices = np.fromiter((_first_number(row, _PRICE_FIELDS) for row in kept), dtype=np.float64, count=len(kept))
+        changes = {
+            period: np.fromiter((_first_number(row, fields) for row in kept), dtype=np.float64, count=len(kept))
+            for period, fields in _CHANGE_FIELDS.items()
+        }
+        market_caps = np.fromiter((_first_number(row, ("marketCap", "market_cap")) for row in kept), dtype=np.float64, count=len(kept))
+        volumes = np.fromiter((_first_number(row, ("volume24h", "total_volume")) for row in kept), dtype=np.float64, count=len(kept))
+        version = market_data.get("updated") if market_data else None
+        return cls(symbols, prices, changes, names=names, version=version, ids=ids, market_caps=market_caps,
+                   volumes=volumes)
+
+    def extended(self, symbols: Sequence[str], prices: Sequence[float]) -> "MarketSnapshot":
+        """
+        Get a snapshot with extra symbols appended
+
+        Used for holdings the market data doesn't cover, priced at their last
+        known price with no change.
+
+        Args:
+            symbols: Symbols to append (must not already be indexed)
+            prices: Fallback prices for those symbols
+
+        Returns:
+            New MarketSnapshot sharing nothing mutable with this one
+        """
+        extra = len(symbols)
+        return MarketSnapshot(
+            self.symbols + list(symbols),
+            np.concatenate([self.prices, np.asarray(prices, dtype=np.float64)]),
+            {period: np.concatenate([change, np.zeros(extra)]) for period, change in self.changes.items()},
+            names=self.names + list(symbols),
+            version=self.version,
+            ids=self.ids + [symbol.lower() for symbol in symbols],
+            market_caps=np.concatenate([self.market_caps, np.zeros(extra)]),
+            volumes=np.concatenate([self.volumes, np.zeros(extra)])
+        )
+
+
+class PositionBatch:
+    """Positions of many portfolios as flat arrays aligned to a snapshot"""
+
+    def __init__(self, owners: Sequence[str], rows: np.ndarray, columns: np.ndarray,
+                 quantity: np.ndarray, cost_basis: np.ndarray, realized_pnl: np.ndarray,
+                 snapshot: MarketSnapshot):
+        self.owners = list(owners)
+        self.rows = rows
+        self.columns = columns
+        self.quantity = quantity
+        self.cost_basis = cost_basis
+        self.realized_pnl = realized_pnl
+        self.snapshot = snapshot
+
+    @classmethod
+    def build(cls, portfolios: Mapping[str, Iterable[Mapping[str, Any]]], snapshot: MarketSnapshot) -> "PositionBatch":
+        """
+        Map ledger positions onto a snapshot's coin index
+
+        Symbols missing from the snapshot are appended to it, priced at the
+        position's last_price.
+
+        Args:
+            portfolios: Ledger positions keyed by owner (user ID)
+            snapshot: Current market snapshot
+
+        Returns:
+            PositionBatch
+        """
+        owners = list(portfolios)
+        rows: List[int] = []
+        symbols: List[str] = []
+        quantity: List[float] = []
+        cost_basis: List[float] = []
+        realized: List[float] = []
+        fallback: Dict[str, float] = {}
+
+        for row, owner in enumerate(owners):
+            for position in portfolios[owner]:
+                symbol = position["symbol"].upper()
+                if symbol not in snapshot.index and symbol not in fallback:
+                    fallback[symbol] = float(position.get("last_price") or 0.0)
+                rows.append(row)
+                symbols.append(symbol)
+                quantity.append(position.get("quantity", 0.0))
+                cost_basis.append(position.get("cost_basis", 0.0))
+                realized.append(position.get("realized_pnl", 0.0))
+
+        if fallback:
+            snapshot = snapshot.extended(list(fallback), list(fallback.values()))
+        columns = np.fromiter((snapshot.index[symbol] for symbol in symbols), dtype=np.intp, count=len(symbols))
+
+        return cls(
+            owners,
+            np.asarray(rows, dtype=np.intp),
+            columns,
+            np.asarray(quantity, dtype=np.float64),
+            np.asarray(cost_basis, dtype=np.float64),
+            np.asarray(realized, dtype=np.float64),
+            snapshot
+        )
+
+
+def _contribution(values: np.ndarray, change_pct: np.ndarray) -> np.ndarray:
+    """USD change over a period implied by the current value and percent change"""
+    ratio = 1.0 + change_pct / 100.0
+    previous = np.divide(values, ratio, out=values.copy(), where=ratio > 0)
+    return values - previous
+
+
+def value_batch(batch: PositionBatch) -> Dict[str, Any]:
+    """
+    Revalue every portfolio in a batch
+
+    Args:
+        batch: Positions aligned to a market snapshot
+
+    Returns:
+        Dictionary of per-position arrays ("value", "unrealized_pnl",
+        "allocation", "change_<period>") and per-owner arrays
+        ("total_value", "total_cost", "unrealized_pnl", "realized_pnl",
+        "change_<period>", "change_<period>_pct"), plus "owners"
+    """
+    snapshot = batch.snapshot
+    owners = len(batch.owners)
+    prices = snapshot.prices[batch.columns]
+    values = batch.quantity * prices
+    unrealized = values - batch.cost_basis
+
+    def per_owner(weights: np.ndarray) -> np.ndarray:
+        return np.bincount(batch.rows, weights=weights, minlength=owners)
+
+    total_value = per_owner(values)
+    totals_at_position = total_value[batch.rows]
+    allocation = np.divide(values * 100.0, totals_at_position, out=np.zeros_like(values), where=totals_at_position > 0)
+
+    result: Dict[str, Any] = {
+        "owners": batch.owners,
+        "price": prices,
+        "value": values,
+        "unrealized_pnl": unrealized,
+        "allocation": allocation,
+        "total_value": total_value,
+        "total_cost": per_owner(batch.cost_basis),
+        "total_unrealized_pnl": per_owner(unrealized),
+        "total_realized_pnl": per_owner(batch.realized_pnl),
+    }
+
+    for period in CHANGE_PERIODS:
+        change = _contribution(values, snapshot.changes[period][batch.columns])
+        total_change = per_owner(change)
+        previous_total = total_value - total_change
+        result[f"change_{period}"] = change
+        result[f"total_change_{period}"] = total_change
+        result[f"total_change_{period}_pct"] = np.divide(
+            total_change * 100.0, previous_total, out=np.zeros(owners), where=previous_total > 0
+        )
+        # Each position's contribution to the portfolio's percent change
+        previous_at_position = previous_total[batch.rows]
+        result[f"contribution_{period}_pct"] = np.divide(
+            change * 100.0, previous_at_position, out=np.zeros_like(change), where=previous_at_position > 0
+        )
+
+    return result
+
+
+def value_positions(positions: Iterable[Mapping[str, Any]], snapshot: MarketSnapshot) -> Dict[str, Any]:
+    """
+    Value a single portfolio
+
+    Args:
+        positions: Ledger positions
+        snapshot: Current market snapshot
+
+    Returns:
+        Dictionary with portfolio totals and a "positions" list, largest first
+    """
+    positions = list(positions)
+    batch = PositionBatch.build({"portfolio": positions}, snapshot)
+    result = value_batch(batch)
+
+    rows = []
+    for i, position in enumerate(positions):
+        row = {
+            "symbol": position["symbol"].upper(),
+            "name": position.get("name") or position["symbol"].upper(),
+            "quantity": float(batch.quantity[i]),
+            "price_usd": float(result["price"][i]),
+            "value_usd": float(result["value"][i]),
+            "cost_basis_usd": float(batch.cost_basis[i]),
+            "unrealized_pnl_usd": float(result["unrealized_pnl"][i]),
+            "realized_pnl_usd": float(batch.realized_pnl[i]),
+            "allocation_percentage": float(result["allocation"][i]),
+        }
+        for period in CHANGE_PERIODS:
+            row[f"change_{period}_usd"] = float(result[f"change_{period}"][i])
+            row[f"contribution_{period}_pct"] = float(result[f"contribution_{period}_pct"][i])
+        rows.append(row)
+    rows.sort(key=lambda row: row["value_usd"], reverse=True)
+
+    summary = {
+        "positions": rows,
+        "total_value_usd": float(result["total_value"][0]),
+        "total_cost_usd": float(result["total_cost"][0]),
+        "unrealized_pnl_usd": float(result["total_unrealized_pnl"][0]),
+        "realized_pnl_usd": float(result["total_realized_pnl"][0]),
+        "market_version": snapshot.version,
+    }
+    for period in CHANGE_PERIODS:
+        summary[f"change_{period}_usd"] = float(result[f"total_change_{period}"][0])
+        summary[f"change_{period}_pct"] = float(result[f"total_change_{period}_pct"][0])
+    return summary
+
+
+_snapshot_cache: Dict[str, Tuple[str, float, MarketSnapshot]] = {}
+
+
+def load_snapshot(market_data_file: str) -> MarketSnapshot:
+    """
+    Load a market snapshot from a market data file
+
+    The binary snapshot file written next to the JSON file is memory-mapped
+    when it is at least as new, so the arrays are views of the file instead
+    of a parsed copy; otherwise the JSON file is parsed. The snapshot is
+    cached until the source file's modification time changes, so every
+    request during a market tick shares one set of arrays.
+
+    Args:
+        market_data_file: Path to market_data.json
+
+    Returns:
+        MarketSnapshot (empty if neither file exists)
+    """
+    sources = []
+    for path in (snapshot_path(market_data_file), market_data_file):
+        try:
+            sources.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    if not sources:
+        return MarketSnapshot.from_market_data({})
+    # Newest first; on a tie the snapshot file wins (it is written second)
+    mtime, source = max(sources, key=lambda item: item[0])
+
+    cached = _snapshot_cache.get(market_data_file)
+    if cached and cached[:2] == (source, mtime):
+        cache_lookup("market_snapshot", True)
+        return cached[2]
+    cache_lookup("market_snapshot", False)
+
+    snapshot = None
+    if source != market_data_file:
+        try:
+            snapshot = MarketSnapshotFile(source).to_market_snapshot()
+        except (OSError, ValueError) as e:
+            logger.error(f"Error mapping market snapshot {source}: {str(e)}")
+            source = market_data_file
+            mtime = os.path.getmtime(market_data_file) if os.path.exists(market_data_file) else mtime
+    if snapshot is None:
+        snapshot = MarketSnapshot.from_market_data(load_json(market_data_file, {}))
+    _snapshot_cache[market_data_file] = (source, mtime, snapshot)
+    logger.info(f"Loaded market snapshot with {len(snapshot)} coins from {source}")
+    return snapshot
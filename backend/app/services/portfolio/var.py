@@ -0,0 +1,154 @@
+"""
+Value-at-Risk and Expected Shortfall (CVaR)
+
+Two methods are provided:
+
+- Historical simulation replays the stored daily return window against the
+  current weights. Multi-day horizons use overlapping compounded windows.
+- Monte Carlo draws correlated normal returns through the Cholesky factor of
+  the covariance matrix. Paths are simulated in fixed-size chunks so memory
+  stays bounded, and chunks can be spread over a process pool.
+
+Losses are reported as positive USD amounts and as a fraction of portfolio
+value.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIDENCES = (0.95, 0.99)
+DEFAULT_HORIZONS = (1, 7)
+DEFAULT_PATHS = 100_000
+
+# Paths simulated per chunk; bounds the (chunk × assets) draw matrix
+SIMULATION_CHUNK_SIZE = 25_000
+
+# Worker processes for Monte Carlo chunks (0 = simulate in-process)
+VAR_PROCESSES = int(os.getenv("VAR_PROCESSES", "0"))
+
+
+def _tail_metrics(pnl: np.ndarray, total_value: float, confidences: Sequence[float]) -> Dict[str, Dict[str, float]]:
+    """VaR and CVaR for each confidence level from simulated portfolio returns"""
+    losses = -pnl
+    result = {}
+    for confidence in confidences:
+        var = float(np.quantile(losses, confidence))
+        tail = losses[losses >= var]
+        cvar = float(tail.mean()) if len(tail) else var
+        result[f"{int(round(confidence * 100))}"] = {
+            "var": var * total_value,
+            "cvar": cvar * total_value,
+            "var_pct": var,
+            "cvar_pct": cvar,
+        }
+    return result
+
+
+def historical_var(returns: np.ndarray, weights: np.ndarray, total_value: float,
+                   horizons: Sequence[int] = DEFAULT_HORIZONS,
+                   confidences: Sequence[float] = DEFAULT_CONFIDENCES) -> Dict[str, Any]:
+    """
+    Historical-simulation VaR/CVaR
+
+    Args:
+        returns: (days × assets) daily simple returns; NaN is treated as 0
+        weights: Portfolio weights per asset (sum to 1)
+        total_value: Portfolio value in USD
+        horizons: Horizons in days
+        confidences: Confidence levels
+
+    Returns:
+        Dictionary keyed by horizon ("1d", "7d", ...) then confidence ("95", "99")
+    """
+    daily = np.nan_to_num(returns) @ weights
+    growth = np.log1p(daily)
+    cumulative = np.concatenate([[0.0], np.cumsum(growth)])
+
+    result: Dict[str, Any] = {"method": "historical", "observations": int(len(daily))}
+    for horizon in horizons:
+        if len(daily) < horizon:
+            continue
+        # Overlapping compounded horizon returns
+        horizon_returns = np.expm1(cumulative[horizon:] - cumulative[:-horizon])
+        result[f"{horizon}d"] = _tail_metrics(horizon_returns, total_value, confidences)
+    return result
+
+
+def _cholesky(covariance: np.ndarray) -> np.ndarray:
+    """Cholesky factor, repairing matrices that are not positive definite"""
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        # Clip negative eigenvalues from pairwise-estimated or singular matrices
+        values, vectors = np.linalg.eigh((covariance + covariance.T) / 2)
+        repaired = (vectors * np.clip(values, 1e-12, None)) @ vectors.T
+        return np.linalg.cholesky(repaired)
+
+
+def _simulate_chunk(args) -> np.ndarray:
+    """Simulate one chunk of portfolio returns (module level so it can be pickled)"""
+    seed, paths, mean, factor, weights = args
+    rng = np.random.default_rng(seed)
+    draws = rng.standard_normal((paths, len(mean)), dtype=np.float64)
+    # Correlated per-asset log returns, compounded per asset before weighting
+    asset_returns = np.expm1(mean + draws @ factor.T)
+    return asset_returns @ weights
+
+
+def monte_carlo_var(mean: np.ndarray, covariance: np.ndarray, weights: np.ndarray, total_value: float,
+                    horizons: Sequence[int] = DEFAULT_HORIZONS,
+                    confidences: Sequence[float] = DEFAULT_CONFIDENCES,
+                    paths: int = DEFAULT_PATHS, chunk_size: int = SIMULATION_CHUNK_SIZE,
+                    processes: Optional[int] = None, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Monte Carlo VaR/CVaR with correlated normal returns
+
+    Per-asset log returns over each horizon are drawn with mean and
+    covariance scaled by the horizon length.
+
+    Args:
+        mean: Mean daily return per asset
+        covariance: Daily covariance matrix
+        weights: Portfolio weights per asset (sum to 1)
+        total_value: Portfolio value in USD
+        horizons: Horizons in days
+        confidences: Confidence levels
+        paths: Number of simulated paths per horizon
+        chunk_size: Paths simulated per chunk
+        processes: Worker processes (default VAR_PROCESSES; 0 or 1 runs in-process)
+        seed: Seed for reproducible results
+
+    Returns:
+        Dictionary keyed by horizon ("1d", "7d", ...) then confidence ("95", "99")
+    """
+    mean = np.nan_to_num(np.asarray(mean, dtype=np.float64))
+    covariance = np.nan_to_num(np.asarray(covariance, dtype=np.float64))
+    weights = np.asarray(weights, dtype=np.float64)
+    factor = _cholesky(covariance)
+    processes = VAR_PROCESSES if processes is None else processes
+
+    chunks = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks) * len(horizons))
+
+    tasks = []
+    for h, horizon in enumerate(horizons):
+        scale = np.sqrt(horizon)
+        for c, size in enumerate(chunks):
+            tasks.append((seeds[h * len(chunks) + c], size, mean * horizon, factor * scale, weights))
+
+    if processes and processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            simulated = list(pool.map(_simulate_chunk, tasks))
+    else:
+        simulated = [_simulate_chunk(task) for task in tasks]
+
+    result: Dict[str, Any] = {"method": "monte_carlo", "paths": paths}
+    for h, horizon in enumerate(horizons):
+        pnl = np.concatenate(simulated[h * len(chunks):(h + 1) * len(chunks)])
+        result[f"{horizon}d"] = _tail_metrics(pnl, total_value, confidences)
+    return result
@@ -0,0 +1,11 @@
+"""
+Push updates to WebSocket and SSE clients
+"""
+from app.services.realtime.hub import PushHub, Subscriber, frame, push_hub
+from app.services.realtime.feeds import (
+    MarketFeed, NewsFeed, market_feed, crypto_news_feed, macro_news_feed, market_topic, portfolio_topic
+)
+
+__all__ = ["PushHub", "Subscriber", "frame", "push_hub", "MarketFeed", "NewsFeed",
+           "market_feed", "crypto_news_feed",
+           "macro_news_feed", "market_topic", "portfolio_topic"]
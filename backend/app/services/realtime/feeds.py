@@ -0,0 +1,129 @@
+"""
+Producers that turn service updates into push hub topics
+
+- "market": all coin rows; deltas contain only the rows that changed
+- "market:<SYMBOL>": one coin's row, published only when it changes
+- "news:crypto", "news:macro": the latest articles; deltas contain only new
+  articles
+"""
+import logging
+from typing import Any, Dict, List, Mapping, Optional
+
+from app.services.portfolio.valuation import MarketSnapshot
+from .hub import PushHub, push_hub
+
+logger = logging.getLogger(__name__)
+
+MARKET_TOPIC = "market"
+CRYPTO_NEWS_TOPIC = "news:crypto"
+MACRO_NEWS_TOPIC = "news:macro"
+
+# Articles kept as a news topic's state
+NEWS_STATE_SIZE = 50
+
+
+def market_topic(symbol: str) -> str:
+    return f"{MARKET_TOPIC}:{symbol.upper()}"
+
+
+def portfolio_topic(user_id: str) -> str:
+    return f"portfolio:{user_id}"
+
+
+def market_rows(snapshot: MarketSnapshot) -> Dict[str, Dict[str, Any]]:
+    """Per-symbol rows pushed to clients"""
+    prices = snapshot.prices.tolist()
+    changes = {period: values.tolist() for period, values in snapshot.changes.items()}
+    market_caps = snapshot.market_caps.tolist()
+    return {
+        symbol: {
+            "symbol": symbol,
+            "name": snapshot.names[i],
+            "price_usd": prices[i],
+            "change_24h": changes["24h"][i],
+            "change_7d": changes["7d"][i],
+            "change_30d": changes["30d"][i],
+            "market_cap": market_caps[i]
+        }
+        for i, symbol in enumerate(snapshot.symbols)
+    }
+
+
+class MarketFeed:
+    """Publishes market data updates as per-symbol deltas"""
+
+    def __init__(self, hub: PushHub = push_hub):
+        self.hub = hub
+        self.hub.retain(MARKET_TOPIC)
+        self.rows: Dict[str, Dict[str, Any]] = {}
+
+    def publish(self, snapshot: MarketSnapshot) -> List[Dict[str, Any]]:
+        """
+        Diff a snapshot against the previous one and publish the changes
+
+        Args:
+            snapshot: New market snapshot
+
+        Returns:
+            Rows that changed
+        """
+        rows = market_rows(snapshot)
+        changed = [row for symbol, row in rows.items() if self.rows.get(symbol) != row]
+        self.rows = rows
+        if not changed:
+            return changed
+
+        state = list(rows.values())
+        self.hub.publish(MARKET_TOPIC, state, delta=changed)
+        for row in changed:
+            self.hub.publish(market_topic(row["symbol"]), row)
+        return changed
+
+    async def on_market_update(self, market_data: Mapping[str, Any]) -> None:
+        """MarketDataService update listener"""
+        self.publish(MarketSnapshot.from_market_data(market_data))
+
+
+def _article_key(article: Mapping[str, Any]) -> Optional[str]:
+    return article.get("id") or article.get("link") or article.get("url") or article.get("title")
+
+
+class NewsFeed:
+    """Publishes newly seen articles of one news store"""
+
+    def __init__(self, topic: str, hub: PushHub = push_hub):
+        self.topic = topic
+        self.hub = hub
+        self.hub.retain(topic)
+        self.seen = set()
+
+    def publish(self, articles: List[Mapping[str, Any]], threadsafe: bool = False) -> List[Mapping[str, Any]]:
+        """
+        Publish articles not seen before
+
+        Args:
+            articles: Latest articles, newest first
+            threadsafe: Publish via the hub's event loop (for news threads)
+
+        Returns:
+            New articles
+        """
+        new = [article for article in articles if _article_key(article) not in self.seen]
+        # Remember only the current snapshot's keys, so the set stays as small as the store
+        self.seen = {_article_key(article) for article in articles}
+        if new:
+            publish = self.hub.publish_threadsafe if threadsafe else self.hub.publish
+            publish(self.topic, list(articles[:NEWS_STATE_SIZE]), new)
+        return new
+
+    def on_news_update(self, articles: List[Mapping[str, Any]]) -> None:
+        """News service update listener (called on the event loop after each refresh)"""
+        try:
+            self.publish(articles)
+        except Exception as e:
+            logger.error(f"Error publishing news update: {str(e)}")
+
+
+market_feed = MarketFeed()
+crypto_news_feed = NewsFeed(CRYPTO_NEWS_TOPIC)
+macro_news_feed = NewsFeed(MACRO_NEWS_TOPIC)
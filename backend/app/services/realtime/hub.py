@@ -0,0 +1,229 @@
+"""
+Topic-based push hub for WebSocket and SSE clients
+
+Producers publish to a topic ("market", "market:BTC", "portfolio:user123",
+"news"). Each message is serialized once per topic and the same bytes are
+handed to every subscriber.
+
+Subscribers hold at most one undelivered message per topic. If a second
+message arrives for a topic before the first was sent, the two are
+coalesced: the subscriber receives the topic's current full state instead
+of two deltas. A slow consumer therefore costs bounded memory and always
+catches up with a single, correct message per topic.
+
+A topic is dropped with its state when its last subscriber leaves, unless
+it is retained (the fixed topics whose producers only publish changes).
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.core.persistence import dumps
+
+logger = logging.getLogger(__name__)
+
+# Topics a single connection may subscribe to
+MAX_TOPICS_PER_SUBSCRIBER = 512
+
+
+class Topic:
+    """Latest state of a topic and its serialized payloads"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.version = 0
+        self.state: Any = None
+        self._state_payload: Optional[bytes] = None
+        self.subscribers: Set["Subscriber"] = set()
+
+    def update(self, state: Any) -> None:
+        """Replace the topic state; its payload is serialized on first use"""
+        self.version += 1
+        self.state = state
+        self._state_payload = None
+
+    def state_payload(self) -> Optional[bytes]:
+        """Full-state message, serialized once per version"""
+        if self.state is None:
+            return None
+        if self._state_payload is None:
+            self._state_payload = dumps({
+                "topic": self.name, "type": "snapshot", "version": self.version, "data": self.state
+            })
+        return self._state_payload
+
+
+class Subscriber:
+    """One connected client's mailbox"""
+
+    def __init__(self, hub: "PushHub"):
+        self.hub = hub
+        self.topics: Set[str] = set()
+        # topic -> payload to send, or None to send the topic's current state
+        self._pending: Dict[str, Optional[bytes]] = {}
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.coalesced = 0
+
+    def offer(self, topic: Topic, payload: Optional[bytes]) -> None:
+        """Queue a message, coalescing with any undelivered one for the topic"""
+        if topic.name in self._pending:
+            self.coalesced += 1
+            payload = None
+        self._pending[topic.name] = payload
+        self._ready.set()
+
+    async def next_batch(self) -> List[bytes]:
+        """
+        Wait for and take every pending message
+
+        Returns:
+            Serialized messages, at most one per topic (empty once closed)
+        """
+        while not self._pending and not self.closed:
+            self._ready.clear()
+            await self._ready.wait()
+        pending, self._pending = self._pending, {}
+        batch = []
+        for name, payload in pending.items():
+            if payload is None:
+                topic = self.hub.topics.get(name)
+                payload = topic.state_payload() if topic else None
+            if payload is not None:
+                batch.append(payload)
+        return batch
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+
+def frame(batch: List[bytes]) -> bytes:
+    """Join serialized messages into one JSON array without re-serializing"""
+    return b"[" + b",".join(batch) + b"]"
+
+
+class PushHub:
+    """Fans out topic updates to subscribers"""
+
+    def __init__(self):
+        self.topics: Dict[str, Topic] = {}
+        self.subscribers: Set[Subscriber] = set()
+        self.retained: Set[str] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.lock = threading.Lock()
+        self.messages_published = 0
+
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Remember the event loop that thread-side producers publish into"""
+        self.loop = loop or asyncio.get_running_loop()
+
+    def retain(self, name: str) -> None:
+        """Keep a topic and its state while it has no subscribers"""
+        self.retained.add(name)
+
+    def _topic(self, name: str) -> Topic:
+        topic = self.topics.get(name)
+        if topic is None:
+            topic = self.topics[name] = Topic(name)
+        return topic
+
+    def connect(self) -> Subscriber:
+        """Register a new subscriber"""
+        subscriber = Subscriber(self)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def disconnect(self, subscriber: Subscriber) -> None:
+        """Remove a subscriber from all its topics"""
+        subscriber.close()
+        self.unsubscribe(subscriber, list(subscriber.topics))
+        self.subscribers.discard(subscriber)
+
+    def subscribe(self, subscriber: Subscriber, names: Iterable[str]) -> List[str]:
+        """
+        Subscribe to topics and queue each topic's current state
+
+        Args:
+            subscriber: Subscriber from connect()
+            names: Topic names
+
+        Returns:
+            Topics actually subscribed (limited to MAX_TOPICS_PER_SUBSCRIBER)
+        """
+        added = []
+        for name in names:
+            if name in subscriber.topics:
+                continue
+            if len(subscriber.topics) >= MAX_TOPICS_PER_SUBSCRIBER:
+                logger.warning(f"Subscriber topic limit reached, ignoring {name}")
+                break
+            topic = self._topic(name)
+            topic.subscribers.add(subscriber)
+            subscriber.topics.add(name)
+            added.append(name)
+            if topic.state is not None:
+                subscriber.offer(topic, topic.state_payload())
+        return added
+
+    def unsubscribe(self, subscriber: Subscriber, names: Iterable[str]) -> None:
+        """Unsubscribe from topics, dropping topics left without subscribers"""
+        for name in names:
+            subscriber.topics.discard(name)
+            topic = self.topics.get(name)
+            if topic is not None:
+                topic.subscribers.discard(subscriber)
+                if not topic.subscribers and name not in self.retained:
+                    del self.topics[name]
+
+    def has_subscribers(self, name: str) -> bool:
+        topic = self.topics.get(name)
+        return bool(topic and topic.subscribers)
+
+    def subscribed_topics(self, prefix: str) -> List[str]:
+        """Names of topics with the given prefix that have subscribers"""
+        return [name for name, topic in self.topics.items() if name.startswith(prefix) and topic.subscribers]
+
+    def publish(self, name: str, state: Any, delta: Any = None) -> None:
+        """
+        Update a topic and push the change to its subscribers
+
+        Must be called on the hub's event loop; use publish_threadsafe from
+        other threads.
+
+        Args:
+            name: Topic name
+            state: New full state of the topic
+            delta: Change since the previous state (default: the full state)
+        """
+        topic = self._topic(name)
+        topic.update(state)
+        if not topic.subscribers:
+            return
+        if delta is None:
+            payload = topic.state_payload()
+        else:
+            payload = dumps({"topic": name, "type": "delta", "version": topic.version, "data": delta})
+        for subscriber in topic.subscribers:
+            subscriber.offer(topic, payload)
+        self.messages_published += 1
+
+    def publish_threadsafe(self, name: str, state: Any, delta: Any = None) -> None:
+        """Publish from a worker thread (e.g. the news update threads)"""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.publish, name, state, delta)
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection and fan-out counters"""
+        return {
+            "subscribers": len(self.subscribers),
+            "topics": sum(1 for topic in self.topics.values() if topic.subscribers),
+            "messages_published": self.messages_published,
+            "coalesced": sum(subscriber.coalesced for subscriber in self.subscribers)
+        }
+
+
+push_hub = PushHub()
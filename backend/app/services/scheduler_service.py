@@ -1,218 +1,422 @@
 # backend/app/services/scheduler_service.py
+"""
+Periodic task scheduler
+
+Tasks are kept in a heap ordered by their next run time and the scheduler
+loop sleeps exactly until the earliest one is due, or until a task is added
+or removed, instead of polling. Each task runs on one of three executors:
+
+- "loop": a coroutine function awaited on the event loop
+- "thread": a blocking function run in the scheduler's thread pool
+- "process": a CPU-bound, picklable function run in a process pool
+
+`jitter_seconds` delays each run by a random amount so tasks with equal
+intervals don't all fire at once, and `max_instances` limits overlapping
+runs of the same task. A run that is due more than `misfire_grace_seconds`
+late (e.g. after the event loop was blocked) follows the task's misfire
+policy: "coalesce" runs once and continues the schedule from now, "skip"
+drops the late run and waits for the next slot.
+"""
 import logging
 import asyncio
-import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Callable, Awaitable
+import heapq
+import itertools
+import random
 import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Dict, List, Any, Optional, Callable, Set, Tuple
+
+from app.core.metrics import JOB_SECONDS
 
 logger = logging.getLogger(__name__)
 
+EXECUTORS = ("loop", "thread", "process")
+MISFIRE_POLICIES = ("coalesce", "skip")
+
+# Worker pool sizes
+DEFAULT_THREAD_WORKERS = 8
+DEFAULT_PROCESS_WORKERS = 2
+
+
+@dataclass(eq=False)
+class ScheduledTask:
+    """A registered task and its run statistics"""
+    name: str
+    func: Callable[..., Any]
+    interval: float
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    executor: str = "loop"
+    jitter: float = 0.0
+    max_instances: int = 1
+    misfire_policy: str = "coalesce"
+    misfire_grace: float = 60.0
+    # Monotonic time of the next slot, and of the next run (slot + jitter)
+    due: float = 0.0
+    next_run: float = 0.0
+    last_run: Optional[datetime] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    run_count: int = 0
+    error_count: int = 0
+    missed_count: int = 0
+    instances: int = 0
+
+
 class TaskScheduler:
     """Service for scheduling and running periodic tasks"""
-    
-    def __init__(self):
-        self.tasks = {}
-        self.running_tasks = {}
-        self.stop_event = asyncio.Event()
+
+    def __init__(self, thread_workers: int = DEFAULT_THREAD_WORKERS,
+                 process_workers: int = DEFAULT_PROCESS_WORKERS):
+        self.tasks: Dict[str, ScheduledTask] = {}
+        # Task name -> asyncio tasks of its in-flight runs
+        self.running_tasks: Dict[str, Set[asyncio.Task]] = {}
         self.lock = threading.Lock()
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._heap: List[Tuple[float, int, ScheduledTask]] = []
+        self._sequence = itertools.count()
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._scheduler_task: Optional[asyncio.Task] = None
         self._is_running = False
-    
+
     def add_task(
         self,
         name: str,
-        func: Callable[..., Awaitable[Any]],
-        interval_seconds: int,
+        func: Callable[..., Any],
+        interval_seconds: float,
         args: tuple = (),
-        kwargs: Dict[str, Any] = {},
-        start_immediately: bool = False
+        kwargs: Optional[Dict[str, Any]] = None,
+        start_immediately: bool = False,
+        executor: str = "loop",
+        jitter_seconds: float = 0.0,
+        max_instances: int = 1,
+        misfire_policy: str = "coalesce",
+        misfire_grace_seconds: float = 60.0
     ) -> None:
         """
-        Add a task to the scheduler
-        
+        Add a task to the scheduler, replacing any task with the same name
+
         Args:
             name: Task name (must be unique)
-            func: Async function to call
+            func: Coroutine function for the "loop" executor, plain function otherwise
             interval_seconds: Interval between task runs in seconds
             args: Positional arguments to pass to the function
             kwargs: Keyword arguments to pass to the function
             start_immediately: Whether to run the task immediately on start
+            executor: "loop", "thread" or "process"
+            jitter_seconds: Maximum random delay added to each run
+            max_instances: Maximum concurrent runs of the task
+            misfire_policy: "coalesce" or "skip" for runs later than the grace time
+            misfire_grace_seconds: How late a run may start before it counts as misfired
+
+        Raises:
+            ValueError: If an option is invalid
         """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy '{misfire_policy}', expected one of {MISFIRE_POLICIES}")
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        if executor == "loop" and not asyncio.iscoroutinefunction(func):
+            raise ValueError(f"Task '{name}' uses the loop executor but is not a coroutine function")
+
+        task = ScheduledTask(
+            name=name, func=func, interval=interval_seconds, args=args, kwargs=kwargs or {},
+            executor=executor, jitter=max(jitter_seconds, 0.0), max_instances=max(max_instances, 1),
+            misfire_policy=misfire_policy, misfire_grace=misfire_grace_seconds
+        )
+        task.due = time.monotonic() + (0 if start_immediately else interval_seconds)
         with self.lock:
-            self.tasks[name] = {
-                "func": func,
-                "interval": interval_seconds,
-                "args": args,
-                "kwargs": kwargs,
-                "last_run": None if start_immediately else datetime.now(),
-                "next_run": datetime.now() if start_immediately else datetime.now() + timedelta(seconds=interval_seconds)
-            }
-            
-            logger.info(f"Added task '{name}' with interval {interval_seconds} seconds")
-    
+            self.tasks[name] = task
+            self._schedule(task)
+        self._wake()
+
+        logger.info(f"Added task '{name}' with interval {interval_seconds} seconds ({executor} executor)")
+
     def remove_task(self, name: str) -> bool:
         """
         Remove a task from the scheduler
-        
+
+        Runs in progress are not interrupted.
+
         Args:
             name: Task name
-            
+
         Returns:
             True if the task was removed, False if it wasn't found
         """
         with self.lock:
-            if name in self.tasks:
-                del self.tasks[name]
-                logger.info(f"Removed task '{name}'")
-                return True
-            
-            return False
-    
+            if name not in self.tasks:
+                return False
+            # The task's heap entry goes stale and is dropped when popped
+            del self.tasks[name]
+        self._wake()
+        logger.info(f"Removed task '{name}'")
+        return True
+
+    def _schedule(self, task: ScheduledTask) -> None:
+        """Push the task's next run onto the heap (call with the lock held)"""
+        task.next_run = task.due + (random.uniform(0, task.jitter) if task.jitter else 0.0)
+        heapq.heappush(self._heap, (task.next_run, next(self._sequence), task))
+
+    def _wake(self) -> None:
+        """Wake the scheduler loop so it recomputes its sleep"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if current is loop:
+            wakeup.set()
+        else:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    def _status(self, task: ScheduledTask) -> Dict[str, Any]:
+        wall_offset = time.time() - time.monotonic()
+        return {
+            "func": getattr(task.func, "__name__", repr(task.func)),
+            "interval": task.interval,
+            "args": task.args,
+            "kwargs": task.kwargs,
+            "executor": task.executor,
+            "jitter": task.jitter,
+            "max_instances": task.max_instances,
+            "misfire_policy": task.misfire_policy,
+            "last_run": task.last_run,
+            "next_run": datetime.fromtimestamp(task.next_run + wall_offset),
+            "last_duration": task.last_duration,
+            "last_error": task.last_error,
+            "run_count": task.run_count,
+            "error_count": task.error_count,
+            "missed_count": task.missed_count,
+            "running_instances": task.instances,
+            "is_running": task.instances > 0
+        }
+
     def get_task_status(self, name: str) -> Optional[Dict[str, Any]]:
         """
         Get the status of a task
-        
+
         Args:
             name: Task name
-            
+
         Returns:
             Task status dictionary or None if the task wasn't found
         """
         with self.lock:
-            if name in self.tasks:
-                task = self.tasks[name].copy()
-                # Convert function to string for display
-                task["func"] = task["func"].__name__
-                
-                # Add running status
-                task["is_running"] = name in self.running_tasks
-                
-                return task
-            
-            return None
-    
+            task = self.tasks.get(name)
+            return self._status(task) if task is not None else None
+
     def get_all_task_statuses(self) -> Dict[str, Dict[str, Any]]:
         """
         Get the status of all tasks
-        
+
         Returns:
             Dictionary mapping task names to task status dictionaries
         """
         with self.lock:
-            result = {}
-            for name, task in self.tasks.items():
-                task_copy = task.copy()
-                # Convert function to string for display
-                task_copy["func"] = task_copy["func"].__name__
-                
-                # Add running status
-                task_copy["is_running"] = name in self.running_tasks
-                
-                result[name] = task_copy
-            
+            return {name: self._status(task) for name, task in self.tasks.items()}
+
+    def _executor_pool(self, kind: str) -> Executor:
+        if kind == "thread":
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.thread_workers,
+                                                       thread_name_prefix="scheduler")
+            return self._thread_pool
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        return self._process_pool
+
+    async def _call(self, task: ScheduledTask) -> Any:
+        if task.executor == "loop":
+            return await task.func(*task.args, **task.kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor_pool(task.executor),
+                                          partial(task.func, *task.args, **task.kwargs))
+
+    async def _execute(self, task: ScheduledTask, raise_errors: bool = False) -> Any:
+        """Run the task once and record the outcome"""
+        task.instances += 1
+        task.last_run = datetime.now()
+        started = time.monotonic()
+        outcome = "ok"
+        try:
+            result = await self._call(task)
+            task.last_error = None
+            logger.debug("Task '%s' executed successfully", task.name)
             return result
-    
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "error"
+            task.error_count += 1
+            task.last_error = str(e)
+            logger.error(f"Error executing task '{task.name}': {str(e)}")
+            if raise_errors:
+                raise
+        finally:
+            task.instances -= 1
+            task.run_count += 1
+            task.last_duration = time.monotonic() - started
+            JOB_SECONDS.labels(task.name, outcome).observe(task.last_duration)
+
+    def _track(self, name: str, run: asyncio.Task) -> None:
+        runs = self.running_tasks.setdefault(name, set())
+        runs.add(run)
+
+        def done(_):
+            runs.discard(run)
+            if not runs and self.running_tasks.get(name) is runs:
+                del self.running_tasks[name]
+        run.add_done_callback(done)
+
     async def run_task(self, name: str) -> Any:
         """
         Run a task immediately
-        
+
+        The task's schedule restarts from now.
+
         Args:
             name: Task name
-            
+
         Returns:
             Task result
-        
+
         Raises:
             KeyError: If the task wasn't found
         """
-        task = None
         with self.lock:
             if name not in self.tasks:
                 raise KeyError(f"Task '{name}' not found")
-            
             task = self.tasks[name]
-            self.running_tasks[name] = True
-        
-        try:
-            result = await task["func"](*task["args"], **task["kwargs"])
-            
-            with self.lock:
-                now = datetime.now()
-                self.tasks[name]["last_run"] = now
-                self.tasks[name]["next_run"] = now + timedelta(seconds=task["interval"])
-                
-            logger.info(f"Task '{name}' executed successfully")
-            return result
-        
-        except Exception as e:
-            logger.error(f"Error executing task '{name}': {str(e)}")
-            raise
-        
-        finally:
-            with self.lock:
-                if name in self.running_tasks:
-                    del self.running_tasks[name]
-    
+            task.due = time.monotonic() + task.interval
+            self._schedule(task)
+        self._wake()
+
+        run = asyncio.ensure_future(self._execute(task, raise_errors=True))
+        self._track(name, run)
+        return await run
+
+    def _dispatch(self, task: ScheduledTask, now: float) -> None:
+        """Start a due task (unless it misfired or is at its instance limit) and schedule its next run"""
+        late = now - task.due
+        if late > task.misfire_grace:
+            missed = int(late // task.interval)
+            if task.misfire_policy == "skip":
+                task.missed_count += missed + 1
+                task.due += (missed + 1) * task.interval
+                with self.lock:
+                    self._schedule(task)
+                logger.warning(f"Task '{task.name}' misfired by {late:.1f}s, skipping to the next run")
+                return
+            # Coalesce: one run stands in for every missed one
+            task.missed_count += missed
+            task.due = now
+
+        task.due += task.interval
+        with self.lock:
+            self._schedule(task)
+
+        if task.instances >= task.max_instances:
+            task.missed_count += 1
+            logger.warning(f"Skipping run of task '{task.name}': {task.instances} run(s) still in progress")
+            return
+        self._track(task.name, asyncio.ensure_future(self._execute(task)))
+
     async def _run_scheduler(self) -> None:
         """Run the scheduler loop"""
         self._is_running = True
         logger.info("Scheduler started")
-        
-        while not self.stop_event.is_set():
-            try:
-                now = datetime.now()
-                
-                # Find tasks that need to be run
-                tasks_to_run = []
-                with self.lock:
-                    for name, task in self.tasks.items():
-                        if name not in self.running_tasks and task["next_run"] <= now:
-                            tasks_to_run.append(name)
-                
-                # Run tasks
-                for name in tasks_to_run:
+
+        try:
+            while True:
+                try:
+                    now = time.monotonic()
+                    due: List[ScheduledTask] = []
+                    with self.lock:
+                        while self._heap and self._heap[0][0] <= now:
+                            run_at, _, task = heapq.heappop(self._heap)
+                            # Skip entries of removed, replaced or rescheduled tasks
+                            if self.tasks.get(task.name) is task and task.next_run == run_at:
+                                due.append(task)
+                        delay = self._heap[0][0] - now if self._heap else None
+
+                    if due:
+                        for task in due:
+                            self._dispatch(task, now)
+                        continue
+
+                    # Sleep until the next task is due or the task set changes
+                    self._wakeup.clear()
                     try:
-                        # Run in background
-                        asyncio.create_task(self.run_task(name))
-                    except Exception as e:
-                        logger.error(f"Error starting task '{name}': {str(e)}")
-                
-                # Sleep for a short time
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Error in scheduler loop: {str(e)}")
-                await asyncio.sleep(5)  # Sleep longer after an error
-        
-        self._is_running = False
-        logger.info("Scheduler stopped")
-    
+                        await asyncio.wait_for(self._wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error in scheduler loop: {str(e)}")
+                    await asyncio.sleep(5)  # Sleep longer after an error
+        finally:
+            self._is_running = False
+            logger.info("Scheduler stopped")
+
     async def start(self) -> None:
         """Start the scheduler"""
         if self._is_running:
             logger.warning("Scheduler is already running")
             return
-        
-        self.stop_event.clear()
-        asyncio.create_task(self._run_scheduler())
-    
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._is_running = True
+        self._scheduler_task = asyncio.create_task(self._run_scheduler())
+
     async def stop(self) -> None:
-        """Stop the scheduler"""
+        """
+        Stop the scheduler
+
+        Runs on the event loop are cancelled. Thread and process runs can't
+        be interrupted; their pools are shut down without waiting for them.
+        """
         if not self._is_running:
             logger.warning("Scheduler is not running")
             return
-        
-        self.stop_event.set()
-        
-        # Wait for the scheduler to stop
-        while self._is_running:
-            await asyncio.sleep(0.1)
-    
+
+        self._scheduler_task.cancel()
+        runs = [run for runs in self.running_tasks.values() for run in runs]
+        for run in runs:
+            run.cancel()
+        await asyncio.gather(self._scheduler_task, *runs, return_exceptions=True)
+        self._scheduler_task = None
+
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = self._process_pool = None
+
     def is_running(self) -> bool:
         """
         Check if the scheduler is running
-        
+
         Returns:
             True if the scheduler is running, False otherwise
         """
-        return self._is_running 
\ No newline at end of file
+        return self._is_running
+
+
+# Shared scheduler for the application's background refreshers
+task_scheduler = TaskScheduler()
@@ -86,10 +86,10 @@ async def cleanup_database(days: int = 365):
         return {"status": "error", "message": str(e)}
 
 @app.post("/database/archive")
-async def archive_database(archive_path: str = "archives/crypto_data_backup.db"):
-    """Create an archive of the database"""
+async def archive_database(archive_path: str = "archives/crypto_data_backup.db", compression: Optional[str] = None):
+    """Create an online snapshot of the database"""
     try:
-        success = db_service.archive_database(archive_path)
+        success = await asyncio.to_thread(db_service.archive_database, archive_path, compression)
         if success:
             return {"status": "success", "message": f"Database archived to {archive_path}"}
         return {"status": "error", "message": "Failed to archive database"}
@@ -97,11 +97,33 @@ async def archive_database(archive_path: str = "archives/crypto_data_backup.db")
         logger.error(f"Error archiving database: {str(e)}")
         return {"status": "error", "message": str(e)}
 
+@app.post("/database/archive/incremental")
+async def export_incremental(archive_path: str = "archives/crypto_data_incremental.db", compression: Optional[str] = None):
+    """Export the rows changed since the last snapshot"""
+    try:
+        exported = await asyncio.to_thread(db_service.export_incremental, archive_path, None, compression)
+        if "error" in exported:
+            return {"status": "error", "message": exported["error"]}
+        return {"status": "success", "exported": exported}
+    except Exception as e:
+        logger.error(f"Error exporting incremental snapshot: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+@app.get("/database/archive/verify")
+async def verify_archive(archive_path: str = "archives/crypto_data_backup.db"):
+    """Verify the integrity of an archive"""
+    try:
+        result = await asyncio.to_thread(db_service.verify_archive, archive_path)
+        return {"status": "success" if result.get("ok") else "error", "data": result}
+    except Exception as e:
+        logger.error(f"Error verifying archive: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
 @app.post("/database/restore")
 async def restore_database(archive_path: str = "archives/crypto_data_backup.db"):
     """Restore database from an archive"""
     try:
-        success = db_service.restore_from_archive(archive_path)
+        success = await asyncio.to_thread(db_service.restore_from_archive, archive_path)
         if success:
             return {"status": "success", "message": f"Database restored from {archive_path}"}
         return {"status": "error", "message": "Failed to restore database"}
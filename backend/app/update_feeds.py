@@ -1,6 +1,7 @@
 """
 Script to force update all RSS feeds
 """
+import asyncio
 import logging
 import os
 import sys
@@ -12,7 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.services.news.crypto_news_service import CryptoNewsService
 from app.services.news.macro_news_service import MacroNewsService
 from app.services.news.reddit_service import RedditService
-from app.services.news.feed_fetcher import fetch_rss, clean_html, detect_sentiment
+from app.services.news.feed_fetcher import fetch_rss
 
 # Configure logging
 logging.basicConfig(
@@ -93,18 +94,9 @@ def update_reddit_posts(reddit_service=None):
     try:
         # Update Reddit posts
         logger.info("Updating Reddit posts...")
-        try:
-            # First try with the single_run parameter
-            success = reddit_service.update_feeds(single_run=True)
-        except TypeError:
-            # If that fails, call the method without parameters
-            success = reddit_service.update_feeds()
-            
-        if success:
-            logger.info("Reddit posts updated successfully")
-        else:
-            logger.warning("Reddit posts update failed")
-        return success
+        asyncio.run(reddit_service.refresh())
+        logger.info("Reddit posts updated successfully")
+        return True
     except Exception as e:
         logger.error(f"Error updating Reddit posts: {e}")
         return False
@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the API and the ingestion paths
+
+stubs: local CoinGecko, RSS, Reddit and OpenAI servers with synthetic data
+harness: load scenarios, ingest benchmarks and the baseline regression check
+
+Run the whole suite with scripts/benchmark_api.py.
+"""
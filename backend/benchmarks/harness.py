@@ -0,0 +1,362 @@
+"""
+Load scenarios, ingest benchmarks and the baseline regression check
+
+BenchmarkEnvironment starts the upstream stubs and runs the real FastAPI
+app in a subprocess (benchmarks/server.py) against them and a temporary
+data directory. The subprocess ingests market data, news and Reddit posts
+the way the scheduled refreshes do, reports the ingest timings, and serves
+the app with uvicorn. Keeping the app out of the load generator's
+interpreter keeps the two from competing for the GIL.
+
+run_load drives one endpoint with a fixed number of concurrent httpx
+clients and reports throughput and latency percentiles. compare checks a
+run against the stored baseline (benchmarks/baseline.json).
+"""
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import httpx
+
+from benchmarks.server import READY_PREFIX
+from benchmarks.stubs import MAJOR_COINS, SUBREDDITS, UpstreamStubs
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+
+# Metrics compared against the baseline, and whether higher is better
+METRICS = {
+    "rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "items_per_second": True,
+}
+
+# Relative change tolerated before a metric counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+# Latency changes below this are scheduling noise, whatever the ratio
+LATENCY_SLACK_MS = 1.0
+
+BENCHMARK_USER = "benchmark"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One endpoint request, repeated by the load generator"""
+    name: str
+    method: str
+    path: str
+    params: Mapping[str, Any] = field(default_factory=dict)
+    body: Optional[Mapping[str, Any]] = None
+
+
+SCENARIOS = [
+    Scenario("market_prices", "GET", "/api/v1/market/prices", {"limit": 100}),
+    Scenario("portfolio_holdings", "GET", "/api/v1/portfolio/holdings", {"user_id": BENCHMARK_USER}),
+    Scenario("news_crypto", "GET", "/api/v1/news/crypto", {"limit": 20}),
+    Scenario("news_portfolio", "GET", "/api/v1/news/portfolio", {"user_id": BENCHMARK_USER}),
+    Scenario("ai_query", "POST", "/api/v1/ai/query", body={
+        "query": "What is the latest news about Bitcoin?", "user_id": BENCHMARK_USER
+    }),
+]
+
+
+@dataclass
+class LoadResult:
+    """Throughput and latency of one scenario"""
+    name: str
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: round(value, 3) if isinstance(value, float) else value for key, value in asdict(self).items()}
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile
+
+    Args:
+        samples: Values sorted in ascending order
+        q: Percentile between 0 and 100
+
+    Returns:
+        The percentile value (0.0 for no samples)
+    """
+    if not samples:
+        return 0.0
+    rank = max(int(-(-q * len(samples) // 100)), 1)
+    return samples[min(rank, len(samples)) - 1]
+
+
+async def run_load(client: httpx.AsyncClient, scenario: Scenario, requests: int = 500,
+                   concurrency: int = 20) -> LoadResult:
+    """
+    Send a scenario's request a number of times from concurrent clients
+
+    Args:
+        client: HTTP client with the app's base URL
+        scenario: Request to send
+        requests: Total number of requests
+        concurrency: Requests in flight at once
+
+    Returns:
+        LoadResult
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, scenario.path,
+                                                params=dict(scenario.params), json=scenario.body)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return LoadResult(
+        name=scenario.name,
+        requests=requests,
+        errors=errors,
+        seconds=seconds,
+        rps=requests / seconds if seconds else 0.0,
+        p50_ms=percentile(latencies, 50) * 1000,
+        p95_ms=percentile(latencies, 95) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+    )
+
+
+class BenchmarkEnvironment:
+    """The app in a subprocess, its upstream stubs and temporary data, for one benchmark run"""
+
+    def __init__(self, stubs: Optional[UpstreamStubs] = None, ingest_rounds: int = 3,
+                 startup_timeout: float = 120.0):
+        """
+        Args:
+            stubs: Upstream stubs (default: UpstreamStubs())
+            ingest_rounds: Rounds of each ingest benchmark; the fastest counts
+            startup_timeout: Seconds to wait for the app to ingest and start serving
+        """
+        self.stubs = stubs or UpstreamStubs()
+        self.ingest_rounds = ingest_rounds
+        self.startup_timeout = startup_timeout
+        self.ingest: Dict[str, Dict[str, Any]] = {}
+        self.client: Optional[httpx.AsyncClient] = None
+        self._data_dir: Optional[str] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._drain: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "BenchmarkEnvironment":
+        try:
+            await self._start()
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _server_config(self) -> Dict[str, Any]:
+        return {
+            "data_dir": self._data_dir,
+            "coingecko_api": self.stubs.coingecko_api,
+            "feeds": self.stubs.feeds,
+            "articles_per_feed": self.stubs.articles_per_feed,
+            "subreddits": SUBREDDITS,
+            "ingest_rounds": self.ingest_rounds,
+            "holdings": [
+                {"symbol": symbol, "name": name, "quantity": 10.0 / (rank + 1), "purchase_price_avg": 100.0,
+                 "last_updated": datetime.now().isoformat()}
+                for rank, (_, symbol, name) in enumerate(MAJOR_COINS)
+            ],
+        }
+
+    async def _start(self) -> None:
+        self._data_dir = tempfile.mkdtemp(prefix="benchmark-")
+        await self.stubs.start()
+
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", ""),
+            "OPENAI_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": self.stubs.openai_base_url,
+            "REDDIT_BASE_URL": self.stubs.reddit_base_url,
+        })
+        stderr_path = os.path.join(self._data_dir, "server.err")
+        with open(stderr_path, "wb") as stderr:
+            self._process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "benchmarks.server", "--config", json.dumps(self._server_config()),
+                cwd=BACKEND_DIR, env=env, stdout=asyncio.subprocess.PIPE, stderr=stderr
+            )
+
+        try:
+            ready = await asyncio.wait_for(self._wait_ready(), self.startup_timeout)
+        except (asyncio.TimeoutError, EOFError):
+            with open(stderr_path, "r", errors="replace") as f:
+                error = f.read()[-2000:]
+            raise RuntimeError(f"Benchmark server failed to start:\n{error}")
+
+        self.ingest = ready["ingest"]
+        # Keep reading so the server never blocks on a full stdout pipe
+        self._drain = asyncio.create_task(self._process.stdout.read())
+        self.client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{ready['port']}", timeout=60.0,
+                                        limits=httpx.Limits(max_connections=None, max_keepalive_connections=None))
+
+    async def _wait_ready(self) -> Dict[str, Any]:
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                raise EOFError("Benchmark server exited")
+            text = line.decode("utf-8", errors="replace")
+            if text.startswith(READY_PREFIX):
+                return json.loads(text[len(READY_PREFIX):])
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self._process is not None:
+            if self._process.returncode is None:
+                self._process.terminate()
+                try:
+                    await asyncio.wait_for(self._process.wait(), 10)
+                except asyncio.TimeoutError:
+                    self._process.kill()
+                    await self._process.wait()
+            self._process = None
+        if self._drain is not None:
+            await self._drain
+            self._drain = None
+        await self.stubs.close()
+        if self._data_dir is not None:
+            shutil.rmtree(self._data_dir, ignore_errors=True)
+            self._data_dir = None
+
+
+async def run_suite(requests: int = 500, concurrency: int = 20, scenarios: Optional[Sequence[str]] = None,
+                    latency: float = 0.0, ingest_rounds: int = 3, warmup: int = 20,
+                    rounds: int = 3) -> Dict[str, Any]:
+    """
+    Run the ingest benchmarks and the load scenarios
+
+    Args:
+        requests: Requests per scenario
+        concurrency: Concurrent clients per scenario
+        scenarios: Scenario names to run (default: all)
+        latency: Simulated upstream latency in seconds
+        ingest_rounds: Rounds of each ingest benchmark
+        warmup: Unmeasured requests sent per scenario first
+        rounds: Load rounds per scenario; the one with the highest throughput counts
+
+    Returns:
+        Dictionary with "meta", "ingest" and "load" results
+    """
+    selected = [scenario for scenario in SCENARIOS if not scenarios or scenario.name in scenarios]
+    stubs = UpstreamStubs(latency=latency)
+    async with BenchmarkEnvironment(stubs, ingest_rounds=ingest_rounds) as environment:
+        load = {}
+        for scenario in selected:
+            if warmup:
+                await run_load(environment.client, scenario, warmup, min(concurrency, warmup))
+            results = [await run_load(environment.client, scenario, requests, concurrency) for _ in range(rounds)]
+            load[scenario.name] = max(results, key=lambda result: result.rps).to_dict()
+        upstream_requests = dict(stubs.requests)
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "rounds": rounds,
+            "upstream_latency_s": latency,
+            "upstream_requests": upstream_requests,
+        },
+        "ingest": environment.ingest,
+        "load": load,
+    }
+
+
+def compare(results: Mapping[str, Any], baseline: Mapping[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Find metrics that regressed against a baseline
+
+    Throughput may not drop, and latency may not rise, by more than the
+    threshold. Only benchmarks and metrics present in both are compared;
+    any failed request is a regression.
+
+    Args:
+        results: Output of run_suite
+        baseline: Stored run_suite output
+        threshold: Tolerated relative change, e.g. 0.25 for 25%
+
+    Returns:
+        Descriptions of the regressions (empty if none)
+    """
+    regressions = []
+    for group in ("ingest", "load"):
+        for name, current in results.get(group, {}).items():
+            if current.get("errors"):
+                regressions.append(f"{group}.{name}: {current['errors']} failed requests")
+            expected = baseline.get(group, {}).get(name)
+            if not expected:
+                continue
+            for metric, higher_is_better in METRICS.items():
+                if metric not in current or not expected.get(metric):
+                    continue
+                value, reference = current[metric], expected[metric]
+                if higher_is_better:
+                    regressed = value < reference * (1 - threshold)
+                else:
+                    regressed = value > reference * (1 + threshold) and value - reference > LATENCY_SLACK_MS
+                if regressed:
+                    change = (value - reference) / reference * 100
+                    regressions.append(f"{group}.{name}.{metric}: {value:.2f} vs baseline {reference:.2f} ({change:+.0f}%)")
+    return regressions
+
+
+def load_baseline(path: str = BASELINE_FILE) -> Dict[str, Any]:
+    """The stored baseline, or an empty one"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: Mapping[str, Any], path: str = BASELINE_FILE) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
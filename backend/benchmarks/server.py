@@ -0,0 +1,121 @@
+"""
+The app, served against the upstream stubs for a benchmark run
+
+Run as a subprocess by BenchmarkEnvironment, so the app and the load
+generator do not share an interpreter:
+
+    python -m benchmarks.server --config '{"data_dir": ..., "coingecko_api": ..., "feeds": [...]}'
+
+Upstream URLs that the services read from the environment
+(OPENAI_BASE_URL, REDDIT_BASE_URL) are set by the parent. This process
+points everything else the benchmarked endpoints read or write (market
+data files, ledgers, news caches, CoinGecko and the RSS feeds) at the
+data directory and the stubs, times the scheduled refreshes, then starts
+uvicorn on an ephemeral port and prints one line:
+
+    BENCHMARK_READY {"port": ..., "ingest": {...}}
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Mapping
+
+READY_PREFIX = "BENCHMARK_READY "
+
+
+def _best(name: str, items: int, timings: List[float]) -> Dict[str, Any]:
+    # The fastest round is the least disturbed by the rest of the machine
+    seconds = min(timings)
+    return {"name": name, "items": items, "seconds": round(seconds, 6),
+            "items_per_second": round(items / seconds if seconds else 0.0, 3)}
+
+
+async def _timed(refresh, rounds: int) -> List[float]:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        await refresh()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def serve(config: Mapping[str, Any]) -> None:
+    """
+    Configure the app for the stubs, run the ingest benchmarks and serve
+
+    Args:
+        config: data_dir, coingecko_api, feeds (CryptoNewsService.crypto_feeds
+            format), articles_per_feed, subreddits, holdings and ingest_rounds
+    """
+    import uvicorn # type: ignore
+
+    from app.main import app
+    from app.api.v1 import ai, market, portfolio
+    from app.core.logging import setup_logging
+    from app.services.market.market_data_service import MarketDataService
+    from app.services.news import crypto_news_service, reddit_service
+
+    data_dir = config["data_dir"]
+    # Log to files as in production, but not into backend/logs
+    setup_logging(log_to_console=False, logs_dir=os.path.join(data_dir, "logs"))
+
+    # Market data: CoinGecko stub into a temporary market_data.json/.snap
+    market_data_file = os.path.join(data_dir, "market_data.json")
+    market_service = MarketDataService()
+    market_service.market_data_file = market_data_file
+    market_service.market_snapshot_file = os.path.join(data_dir, "market_data.snap")
+    market_service.coingecko_api = config["coingecko_api"]
+    market._market_service = market_service
+    portfolio.MARKET_DATA_FILE = market_data_file
+    ai.MARKET_DATA_FILE = market_data_file
+
+    # Ledgers are seeded from a holdings file
+    holdings_file = os.path.join(data_dir, "holdings.json")
+    with open(holdings_file, "w") as f:
+        json.dump(config["holdings"], f)
+    portfolio.HOLDINGS_FILE = holdings_file
+    portfolio.LEDGER_DIR = os.path.join(data_dir, "ledgers")
+
+    # News and Reddit from the stubs; their caches in backend/data are not written
+    crypto_news_service.crypto_feeds = config["feeds"]
+    crypto_news_service.save_to_cache = lambda: None
+    reddit_service.subreddits = config["subreddits"]
+    reddit_service.request_pause = 0
+    reddit_service.save_to_cache = lambda: None
+
+    rounds = config.get("ingest_rounds", 3)
+    ingest = {}
+    timings = await _timed(market_service._update_market_data, rounds)
+    market_data = market_service._read_market_data() or {}
+    ingest["prices"] = _best("prices", len(market_data.get("prices", [])), timings)
+    timings = await _timed(crypto_news_service.refresh, rounds)
+    # Articles parsed per refresh, before deduplication
+    ingest["news"] = _best("news", len(config["feeds"]) * config["articles_per_feed"], timings)
+    await reddit_service.refresh()
+
+    # No lifespan: the startup refreshers would fetch from the real upstreams
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off",
+                                           log_level="warning", access_log=False))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+            raise RuntimeError("Benchmark server stopped during startup")
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    print(READY_PREFIX + json.dumps({"port": port, "ingest": ingest}), flush=True)
+    await task
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the app against benchmark upstream stubs")
+    parser.add_argument("--config", required=True, help="JSON configuration (see serve)")
+    args = parser.parse_args()
+    asyncio.run(serve(json.loads(args.config)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Local stand-ins for the upstream APIs the backend ingests from
+
+One aiohttp application serves all of them under separate prefixes:
+
+    /coingecko/api/v3/coins/markets     CoinGecko markets, 100 coins per page
+    /rss/{feed}.xml                     RSS 2.0 feeds
+    /reddit/r/{subreddit}/{sort}.json   Reddit listings
+    /openai/v1/chat/completions         OpenAI chat completions
+
+Responses are generated once from a fixed seed, so every run ingests the
+same data. An optional per-request latency simulates upstream round trips.
+"""
+import asyncio
+import random
+import socket
+import time
+from collections import Counter
+from email.utils import formatdate
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from aiohttp import web # type: ignore
+
+# Coins that headlines and holdings refer to; also the first market cap ranks
+MAJOR_COINS = [
+    ("bitcoin", "BTC", "Bitcoin"), ("ethereum", "ETH", "Ethereum"), ("tether", "USDT", "Tether"),
+    ("solana", "SOL", "Solana"), ("ripple", "XRP", "XRP"), ("cardano", "ADA", "Cardano"),
+    ("dogecoin", "DOGE", "Dogecoin"), ("chainlink", "LINK", "Chainlink"), ("avalanche-2", "AVAX", "Avalanche"),
+    ("polkadot", "DOT", "Polkadot"),
+]
+
+HEADLINES = [
+    "{name} price climbs as ETF inflows hit a record",
+    "Analysts say {symbol} could retest its all-time high",
+    "{name} developers ship a major network upgrade",
+    "Whales move $200M of {symbol} to exchanges",
+    "Regulators weigh new rules that could affect {name}",
+    "{symbol} funding rates turn negative after sharp drop",
+]
+
+SUBREDDITS = ["cryptocurrency", "CryptoMarkets", "Bitcoin", "ethereum", "defi", "altcoin"]
+
+
+def coins(count: int = 500, seed: int = 1) -> List[Dict[str, Any]]:
+    """
+    Synthetic CoinGecko /coins/markets rows in market cap order
+
+    Args:
+        count: Number of coins
+        seed: Random seed
+
+    Returns:
+        List of coin dictionaries
+    """
+    rng = random.Random(seed)
+    rows = []
+    market_cap = 1.2e12
+    for rank in range(1, count + 1):
+        if rank <= len(MAJOR_COINS):
+            coin_id, symbol, name = MAJOR_COINS[rank - 1]
+        else:
+            coin_id, symbol, name = f"coin-{rank}", f"C{rank}", f"Coin {rank}"
+        price = round(rng.uniform(0.01, 70000.0) if rank > 1 else 60000.0, 6)
+        rows.append({
+            "id": coin_id,
+            "symbol": symbol.lower(),
+            "name": name,
+            "image": f"https://example.com/{coin_id}.png",
+            "current_price": price,
+            "market_cap": market_cap,
+            "market_cap_rank": rank,
+            "total_volume": market_cap * rng.uniform(0.01, 0.2),
+            "price_change_percentage_24h": rng.uniform(-10, 10),
+            "price_change_percentage_7d_in_currency": rng.uniform(-20, 20),
+            "price_change_percentage_30d_in_currency": rng.uniform(-40, 40),
+            "price_change_percentage_1y_in_currency": rng.uniform(-80, 300),
+        })
+        market_cap *= 0.93
+    return rows
+
+
+def rss_feed(source: str, count: int = 50, seed: int = 1, now: Optional[float] = None) -> bytes:
+    """
+    A synthetic RSS 2.0 feed, newest item first
+
+    Args:
+        source: Feed name, used in titles and links
+        count: Number of items
+        seed: Random seed
+        now: Publication time of the newest item (default: current time)
+
+    Returns:
+        Feed XML
+    """
+    rng = random.Random(f"{source}-{seed}")
+    now = time.time() if now is None else now
+    items = []
+    for i in range(count):
+        _, symbol, name = rng.choice(MAJOR_COINS)
+        title = rng.choice(HEADLINES).format(name=name, symbol=symbol) + f" ({source} #{i})"
+        summary = (f"<p>{name} ({symbol}) traders reacted to the news. "
+                   f"Market participants expect volatility to stay elevated.</p>")
+        items.append(
+            "<item>"
+            f"<title>{escape(title)}</title>"
+            f"<link>https://example.com/{source}/{i}</link>"
+            f"<guid>https://example.com/{source}/{i}</guid>"
+            f"<description>{escape(summary)}</description>"
+            f"<pubDate>{formatdate(now - i * 300)}</pubDate>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(source)}</title><link>https://example.com/{source}</link>"
+        f"<description>Stub feed</description>{''.join(items)}</channel></rss>"
+    ).encode("utf-8")
+
+
+def reddit_listing(subreddit: str, sort: str, count: int = 25, now: Optional[float] = None) -> Dict[str, Any]:
+    """A synthetic Reddit listing response"""
+    now = time.time() if now is None else now
+    children = []
+    for i in range(count):
+        _, symbol, name = MAJOR_COINS[i % len(MAJOR_COINS)]
+        children.append({"data": {
+            "id": f"{subreddit}-{sort}-{i}",
+            "title": f"Daily {name} ({symbol}) discussion #{i}",
+            "author": f"user{i}",
+            "selftext": f"What is everyone's outlook on {symbol} this week?",
+            "url": f"https://example.com/r/{subreddit}/{i}",
+            "permalink": f"/r/{subreddit}/comments/{i}",
+            "score": 1000 - i,
+            "num_comments": 100 + i,
+            "created_utc": now - i * 600,
+        }})
+    return {"kind": "Listing", "data": {"children": children}}
+
+
+def chat_completion(model: str, content: str) -> Dict[str, Any]:
+    """An OpenAI chat completion response"""
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+class UpstreamStubs:
+    """Local CoinGecko, RSS, Reddit and OpenAI servers"""
+
+    def __init__(self, coin_count: int = 500, feed_count: int = 8, articles_per_feed: int = 50,
+                 latency: float = 0.0):
+        """
+        Args:
+            coin_count: Coins CoinGecko serves across all pages
+            feed_count: Number of RSS feeds
+            articles_per_feed: Items per RSS feed
+            latency: Seconds each response is delayed
+        """
+        self.latency = latency
+        self.articles_per_feed = articles_per_feed
+        self.requests: Counter = Counter()
+        self.base_url: Optional[str] = None
+
+        now = time.time()
+        self._coins = coins(coin_count)
+        self.feed_names = [f"FEED{i}" for i in range(feed_count)]
+        self._feeds = {name: rss_feed(name, articles_per_feed, now=now) for name in self.feed_names}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def coingecko_api(self) -> str:
+        return f"{self.base_url}/coingecko/api/v3"
+
+    @property
+    def reddit_base_url(self) -> str:
+        return f"{self.base_url}/reddit"
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.base_url}/openai/v1"
+
+    @property
+    def feeds(self) -> List[Dict[str, str]]:
+        """Feed list in the format of CryptoNewsService.crypto_feeds"""
+        return [{"url": f"{self.base_url}/rss/{name}.xml", "source": name} for name in self.feed_names]
+
+    async def _delay(self, route: str) -> None:
+        self.requests[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def _coins_markets(self, request: web.Request) -> web.Response:
+        await self._delay("coingecko")
+        per_page = int(request.query.get("per_page", 100))
+        page = int(request.query.get("page", 1))
+        return web.json_response(self._coins[(page - 1) * per_page:page * per_page])
+
+    async def _rss(self, request: web.Request) -> web.Response:
+        await self._delay("rss")
+        feed = self._feeds.get(request.match_info["feed"])
+        if feed is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=feed, content_type="application/rss+xml")
+
+    async def _reddit(self, request: web.Request) -> web.Response:
+        await self._delay("reddit")
+        count = int(request.query.get("limit", 25))
+        return web.json_response(reddit_listing(request.match_info["subreddit"], request.match_info["sort"], count))
+
+    async def _chat_completions(self, request: web.Request) -> web.Response:
+        await self._delay("openai")
+        body = await request.json()
+        question = body["messages"][-1]["content"] if body.get("messages") else ""
+        return web.json_response(chat_completion(body.get("model", "stub"), f"Stub answer to: {question}"))
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start serving
+
+        Returns:
+            Base URL of the server
+        """
+        app = web.Application()
+        app.router.add_get("/coingecko/api/v3/coins/markets", self._coins_markets)
+        app.router.add_get("/rss/{feed}.xml", self._rss)
+        app.router.add_get("/reddit/r/{subreddit}/{sort}.json", self._reddit)
+        app.router.add_post("/openai/v1/chat/completions", self._chat_completions)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        # Bind first so port 0 picks a free port we can read back
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind((host, port))
+        await web.SockSite(self._runner, sock).start()
+        self.base_url = f"http://{host}:{sock.getsockname()[1]}"
+        return self.base_url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the API endpoints and ingestion paths against local upstream stubs
+
+Starts stub CoinGecko, RSS, Reddit and OpenAI servers, times the market,
+news and Reddit refreshes against them, then serves the app with uvicorn
+and measures throughput and p50/p95/p99 latency of:
+
+    /market/prices, /portfolio/holdings, /news/crypto, /news/portfolio, /ai/query
+
+Results are compared with benchmarks/baseline.json; --check exits with
+status 1 if any metric regressed by more than the threshold. Baselines are
+machine-specific: regenerate them with --update-baseline on the machine
+that runs the check.
+
+Usage:
+    python3 scripts/benchmark_api.py [--requests 500] [--concurrency 20] [--rounds 3] [--scenario NAME ...]
+                                     [--latency 0.0] [--check] [--threshold 0.25]
+                                     [--update-baseline] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add the parent directory to sys.path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from benchmarks.harness import (BASELINE_FILE, DEFAULT_THRESHOLD, SCENARIOS, compare, load_baseline,
+                                run_suite, save_baseline)
+
+
+def print_results(results, baseline):
+    """Print a table of the results next to the baseline values"""
+    def reference(group, name, metric):
+        value = baseline.get(group, {}).get(name, {}).get(metric)
+        return f"({value:.1f})" if value else ""
+
+    print(f"{'ingest':<20} {'items':>7} {'items/s':>10} {'(baseline)':>12}")
+    for name, result in results["ingest"].items():
+        print(f"{name:<20} {result['items']:>7} {result['items_per_second']:>10.1f} "
+              f"{reference('ingest', name, 'items_per_second'):>12}")
+    print()
+    print(f"{'endpoint':<20} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}  baseline rps/p95")
+    for name, result in results["load"].items():
+        print(f"{name:<20} {result['rps']:>8.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f} {result['errors']:>7}  "
+              f"{reference('load', name, 'rps')} {reference('load', name, 'p95_ms')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="Load rounds per endpoint; the fastest counts")
+    parser.add_argument("--scenario", action="append", choices=[scenario.name for scenario in SCENARIOS],
+                        help="Endpoint scenario to run (repeatable; default: all)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated upstream latency in seconds")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Tolerated relative change before a metric counts as regressed")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args.requests, args.concurrency, args.scenario, args.latency,
+                                    rounds=args.rounds))
+
+    baseline = load_baseline(args.baseline)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regressions (threshold {args.threshold:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        if args.check:
+            sys.exit(1)
+    elif baseline:
+        print(f"\nNo regressions (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
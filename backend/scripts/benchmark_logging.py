@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request logging overhead, before and after the async log sink
+
+Simulates concurrent requests on one event loop. Each request logs what a
+request to the AI news context does: the request start/end lines from the
+HTTP middleware and one line per news match.
+
+- before: the previous setup (api.log and error.log RotatingFileHandlers
+  written on the logging thread) with eager f-strings at INFO
+- after: setup_logging (QueueHandler/QueueListener, JSON files, sampled
+  DEBUG) with lazy %-style calls
+
+Usage:
+    python3 scripts/benchmark_logging.py [--requests 5000] [--concurrency 50] [--matches 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+
+# Add the parent directory to sys.path
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from app.core.logging import setup_logging, shutdown_logging
+
+logger = logging.getLogger("benchmark.request")
+
+TITLES = [f"Bitcoin ETF inflows hit record on day {i}" for i in range(100)]
+
+
+def setup_before(logs_dir: str) -> None:
+    """The synchronous handler setup that setup_logging replaced"""
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(logging.INFO)
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                                  datefmt="%Y-%m-%d %H:%M:%S")
+    for name, level in (("api.log", logging.NOTSET), ("error.log", logging.ERROR)):
+        handler = RotatingFileHandler(os.path.join(logs_dir, name), maxBytes=10*1024*1024, backupCount=5)
+        handler.setLevel(level)
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+
+
+METHOD, URL, CLIENT, TERMS = "GET", "/api/v1/ai/query", "127.0.0.1", ["bitcoin", "etf"]
+
+
+async def request_before(matches: int) -> None:
+    logger.info(f"Request started: {METHOD} {URL} from {CLIENT}")
+    for title in TITLES[:matches]:
+        logger.info(f"News match found for terms [{', '.join(TERMS)}]: {title}")
+    await asyncio.sleep(0)
+    logger.info(f"Request completed: {METHOD} {URL} - Status: {200} - Time: {0.0123:.4f}s")
+
+
+async def request_after(matches: int) -> None:
+    logger.debug("Request started: %s %s from %s", METHOD, URL, CLIENT)
+    for title in TITLES[:matches]:
+        logger.debug("News match found for terms %s: %s", TERMS, title)
+    await asyncio.sleep(0)
+    logger.info("Request completed: %s %s - Status: %s - Time: %.4fs", METHOD, URL, 200, 0.0123)
+
+
+async def run(request, total: int, concurrency: int, matches: int) -> float:
+    """Seconds per request, measured on the event loop"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await request(matches)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return (time.perf_counter() - started) / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--matches", type=int, default=20, help="News matches logged per request")
+    parser.add_argument("--debug", action="store_true", help="Run 'after' with DEBUG enabled (sampled)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as logs_dir:
+        setup_before(logs_dir)
+        before = asyncio.run(run(request_before, args.requests, args.concurrency, args.matches))
+        for handler in logging.getLogger().handlers:
+            handler.close()
+        logging.getLogger().handlers.clear()
+
+        setup_logging(log_to_console=False, log_level=logging.DEBUG if args.debug else logging.INFO,
+                      logs_dir=logs_dir)
+        after = asyncio.run(run(request_after, args.requests, args.concurrency, args.matches))
+        shutdown_logging()
+
+    print(f"requests={args.requests} concurrency={args.concurrency} matches/request={args.matches}")
+    print(f"before: {before * 1e6:8.1f} us/request")
+    print(f"after:  {after * 1e6:8.1f} us/request ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Shared test fixtures.
+"""
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+class JsonRpcStub:
+    """Local JSON-RPC server; register handlers per method in `methods`"""
+
+    def __init__(self):
+        self.methods = {}
+        self.http_requests = 0
+        self.calls = []
+        self.max_batch = None
+
+    async def handle(self, request):
+        self.http_requests += 1
+        payload = await request.json()
+        if isinstance(payload, list):
+            if self.max_batch is not None and len(payload) > self.max_batch:
+                return web.json_response({"jsonrpc": "2.0", "id": None,
+                                          "error": {"code": -32600, "message": "batch too large"}})
+            return web.json_response([self._dispatch(item) for item in payload])
+        return web.json_response(self._dispatch(payload))
+
+    def _dispatch(self, item):
+        self.calls.append(item["method"])
+        handler = self.methods.get(item["method"])
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": item["id"], "error": {"code": -32601, "message": "method not found"}}
+        try:
+            return {"jsonrpc": "2.0", "id": item["id"], "result": handler(*item.get("params", []))}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": item["id"], "error": {"code": -32000, "message": str(e)}}
+
+
+@pytest_asyncio.fixture
+async def rpc_stub():
+    """A running JsonRpcStub; its URL is in `stub.url`"""
+    stub = JsonRpcStub()
+    app = web.Application()
+    app.router.add_post("/", stub.handle)
+    server = TestServer(app)
+    await server.start_server()
+    stub.url = str(server.make_url("/"))
+    yield stub
+    await server.close()
@@ -0,0 +1,152 @@
+"""
+Tests for the alert evaluation engine, store and service.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from app.services.alerts import AlertEngine, AlertService, SQLiteAlertStore
+from app.services.portfolio.valuation import MarketSnapshot
+
+
+def _rule(alert_id, symbol, alert_type, value, **extra):
+    return dict(id=alert_id, user_id="u1", symbol=symbol, alert_type=alert_type, value=value, **extra)
+
+
+def test_price_above_and_below_fire_once():
+    engine = AlertEngine()
+    engine.add_rules([
+        _rule("a1", "BTC", "PRICE_ABOVE", 60_000),
+        _rule("a2", "BTC", "PRICE_ABOVE", 70_000),
+        _rule("b1", "BTC", "PRICE_BELOW", 50_000),
+        _rule("b2", "BTC", "PRICE_BELOW", 40_000),
+    ])
+
+    triggers = engine.evaluate({"BTC": {"price": 65_000.0}})
+    assert [t["id"] for t in triggers] == ["a1"]
+    assert triggers[0]["observed"] == 65_000.0
+    assert "above" in triggers[0]["message"]
+
+    assert engine.evaluate({"BTC": {"price": 65_000.0}}) == []
+
+    triggers = engine.evaluate({"BTC": {"price": 45_000.0}})
+    assert [t["id"] for t in triggers] == ["b1"]
+    assert len(engine) == 2
+
+
+def test_percent_change_direction_follows_sign():
+    engine = AlertEngine()
+    engine.add_rules([
+        _rule("up", "ETH", "PERCENT_CHANGE", 5.0),
+        _rule("down", "ETH", "PERCENT_CHANGE", -5.0, message="ETH dump"),
+    ])
+
+    assert engine.evaluate({"ETH": {"change_24h": 3.0}}) == []
+    triggers = engine.evaluate({"ETH": {"change_24h": -7.5}})
+    assert [(t["id"], t["message"]) for t in triggers] == [("down", "ETH dump")]
+    assert [t["id"] for t in engine.evaluate({"ETH": {"change_24h": 5.0}})] == ["up"]
+
+
+def test_removed_and_triggered_rules_are_skipped():
+    engine = AlertEngine()
+    engine.add_rule(_rule("x", "SOL", "PRICE_ABOVE", 100))
+    engine.add_rule(_rule("done", "SOL", "PRICE_ABOVE", 90, triggered=True))
+    assert engine.remove_rule("x")
+    assert not engine.remove_rule("x")
+
+    assert engine.evaluate({"SOL": {"price": 150.0}}) == []
+    assert len(engine) == 0
+
+
+def test_unknown_alert_type_is_rejected():
+    with pytest.raises(ValueError):
+        AlertEngine().add_rule(_rule("bad", "BTC", "VOLUME_SPIKE", 1))
+
+
+def test_service_rejects_signal_alerts_it_cannot_evaluate(tmp_path):
+    service = AlertService(SQLiteAlertStore(str(tmp_path / "alerts.db")))
+    with pytest.raises(ValueError):
+        service.create_alert({"user_id": "u1", "symbol": "BTC", "alert_type": "technical_signal", "value": 1})
+    assert service.store.list_for_user("u1") == []
+
+
+def test_service_records_triggers_in_store(tmp_path):
+    store = SQLiteAlertStore(str(tmp_path / "alerts.db"))
+    service = AlertService(store)
+    created = service.create_alert({"user_id": "u1", "symbol": "btc", "alert_type": "PRICE_ABOVE", "value": 60_000})
+    service.create_alert({"user_id": "u1", "symbol": "ETH", "alert_type": "PRICE_BELOW", "value": 1_000})
+
+    fired = []
+    service.trigger_listeners.append(fired.extend)
+    snapshot = MarketSnapshot.from_market_data({"prices": [
+        {"symbol": "BTC", "priceUsd": 65_000.0, "change24h": 1.0},
+        {"symbol": "ETH", "priceUsd": 3_000.0, "change24h": 1.0},
+    ]})
+    triggers = service.evaluate_snapshot(snapshot)
+
+    assert [t["id"] for t in triggers] == [created["id"]]
+    assert fired == triggers
+    stored = {row["id"]: row for row in store.list_for_user("u1")}
+    assert stored[created["id"]]["triggered"] == 1
+    assert stored[created["id"]]["triggered_at"] is not None
+    assert len(store.list_for_user("u1", include_triggered=False)) == 1
+
+    # A fresh service only loads the untriggered rule
+    assert AlertService(store).load() == 1
+
+
+def test_service_compacts_after_heavy_churn(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.alerts.service.COMPACT_MIN_CLEARED", 4)
+    service = AlertService(SQLiteAlertStore(str(tmp_path / "alerts.db")))
+    created = [service.create_alert({"user_id": "u1", "symbol": "BTC", "alert_type": "PRICE_ABOVE", "value": 50_000 + i})
+               for i in range(10)]
+
+    for record in created[:5]:
+        service.delete_alert(record["id"])
+    assert service.engine.cleared_slots == 5
+
+    # The sixth delete leaves more cleared slots than active rules
+    service.delete_alert(created[5]["id"])
+    assert service.engine.cleared_slots == 0 and len(service.engine) == 4
+    snapshot = MarketSnapshot.from_market_data({"prices": [{"symbol": "BTC", "priceUsd": 60_000.0, "change24h": 1.0}]})
+    assert sorted(t["id"] for t in service.evaluate_snapshot(snapshot)) == sorted(r["id"] for r in created[6:])
+
+
+def test_rule_changes_from_other_workers_reach_the_evaluator(tmp_path):
+    db_path = str(tmp_path / "alerts.db")
+    leader = AlertService(SQLiteAlertStore(db_path))
+    follower = AlertService(SQLiteAlertStore(db_path))
+    stale = leader.create_alert({"user_id": "u1", "symbol": "BTC", "alert_type": "PRICE_ABOVE", "value": 50_000})
+    leader.load()
+
+    created = follower.create_alert({"user_id": "u1", "symbol": "BTC", "alert_type": "PRICE_ABOVE", "value": 55_000})
+    assert follower.delete_alert(stale["id"])
+
+    snapshot = MarketSnapshot.from_market_data({"prices": [{"symbol": "BTC", "priceUsd": 60_000.0, "change24h": 1.0}]})
+    assert [t["id"] for t in leader.evaluate_snapshot(snapshot)] == [created["id"]]
+    # Applied changes are pruned from the log
+    assert leader.store.changes_since(0)[1] == []
+    assert leader.evaluate_snapshot(snapshot) == []
+
+
+def test_million_rules_evaluate_quickly():
+    rng = np.random.default_rng(0)
+    symbols = [f"C{i}" for i in range(1_000)]
+    prices = rng.uniform(10, 1_000, size=1_000_000)
+    engine = AlertEngine()
+    engine.add_rules(
+        _rule(str(i), symbols[i % 1_000], "PRICE_ABOVE" if i % 2 else "PRICE_BELOW", prices[i])
+        for i in range(1_000_000)
+    )
+    # First evaluation merges the buffered rules
+    engine.evaluate({})
+    engine.evaluate({symbol: {"price": 505.0} for symbol in symbols})
+
+    observations = {symbol: {"price": 506.0} for symbol in symbols}
+    started = time.perf_counter()
+    triggers = engine.evaluate(observations)
+    elapsed = time.perf_counter() - started
+
+    assert all(t["alert_type"] == "PRICE_ABOVE" and 505.0 < t["value"] <= 506.0 for t in triggers)
+    assert elapsed < 0.5
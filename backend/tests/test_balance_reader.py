@@ -0,0 +1,122 @@
+"""
+Tests for the batched ETH/ERC20 balance reader against a local JSON-RPC stub.
+"""
+import pytest
+
+from app.services.blockchain.balances import BALANCE_OF_SELECTOR, DECIMALS_SELECTOR, BalanceReader
+from app.services.blockchain.rpc import JsonRpcClient
+
+
+def _serve_chain(stub, wallets, tokens, block=1_000):
+    """Every wallet holds (i + 1) ETH and (i + 1) * (j + 1) units of token j"""
+    state = {"block": block}
+    addresses = {address.lower(): j for j, address in enumerate(tokens.values())}
+    index = {wallet.lower(): i for i, wallet in enumerate(wallets)}
+
+    def eth_call(call, block_tag):
+        j = addresses[call["to"].lower()]
+        if call["data"] == DECIMALS_SELECTOR:
+            return hex(6 if j == 0 else 18)
+        assert call["data"].startswith(BALANCE_OF_SELECTOR)
+        i = index["0x" + call["data"][-40:]]
+        decimals = 6 if j == 0 else 18
+        return "0x" + format((i + 1) * (j + 1) * 10 ** decimals, "064x")
+
+    stub.methods.update({
+        "eth_blockNumber": lambda: hex(state["block"]),
+        "eth_getBalance": lambda wallet, block_tag: hex((index[wallet.lower()] + 1) * 10 ** 18),
+        "eth_call": eth_call,
+    })
+    return state
+
+
+@pytest.mark.asyncio
+async def test_reads_all_balances_in_batches(rpc_stub):
+    wallets = [f"0x{i:040x}" for i in range(1, 101)]
+    tokens = {f"tok{j}": f"0x{0xdead0000 + j:040x}" for j in range(50)}
+    _serve_chain(rpc_stub, wallets, tokens)
+    rpc = JsonRpcClient(rpc_stub.url, batch_size=1000)
+    reader = BalanceReader(rpc)
+
+    block, balances = await reader.read(wallets, tokens)
+    await rpc.close()
+
+    assert block == 1_000
+    assert balances[wallets[0]]["eth"] == 1.0
+    assert balances[wallets[99]]["tok0"] == pytest.approx(100.0)
+    assert balances[wallets[9]]["tok49"] == pytest.approx(500.0)
+    # blockNumber + decimals + ceil(5100 / 1000) balance batches
+    assert rpc_stub.http_requests == 1 + 1 + 6
+    assert rpc_stub.calls.count("eth_call") == 50 + 5000
+
+
+@pytest.mark.asyncio
+async def test_cache_is_keyed_by_block(rpc_stub):
+    wallets = ["0x" + "1" * 40, "0x" + "2" * 40]
+    tokens = {"usdc": "0x" + "a" * 40}
+    state = _serve_chain(rpc_stub, wallets, tokens)
+    rpc = JsonRpcClient(rpc_stub.url)
+    reader = BalanceReader(rpc)
+
+    assert await reader.read_totals(wallets, tokens) == {"eth": 3.0, "usdc": 3.0}
+    requests = rpc_stub.http_requests
+
+    # Same block: only eth_blockNumber goes out
+    await reader.read(wallets, tokens)
+    assert rpc_stub.http_requests == requests + 1
+
+    # New block: balances are read again, decimals are not
+    state["block"] += 1
+    rpc_stub.calls.clear()
+    await reader.read(wallets, tokens)
+    assert rpc_stub.calls.count("eth_call") == 2
+    await rpc.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_calls_are_skipped(rpc_stub):
+    wallets = ["0x" + "1" * 40]
+    tokens = {"usdc": "0x" + "a" * 40, "bad": "0x" + "b" * 40}
+    _serve_chain(rpc_stub, wallets, {"usdc": tokens["usdc"]})
+    good_call = rpc_stub.methods["eth_call"]
+
+    def eth_call(call, block_tag):
+        if call["to"] == tokens["bad"]:
+            raise ValueError("execution reverted")
+        return good_call(call, block_tag)
+
+    rpc_stub.methods["eth_call"] = eth_call
+    rpc = JsonRpcClient(rpc_stub.url)
+    _, balances = await BalanceReader(rpc).read(wallets, tokens)
+    await rpc.close()
+
+    assert balances[wallets[0]] == {"eth": 1.0, "usdc": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_unreadable_decimals_are_retried(rpc_stub):
+    wallets = ["0x" + "1" * 40]
+    tokens = {"usdc": "0x" + "a" * 40}
+    _serve_chain(rpc_stub, wallets, tokens)
+    good_call = rpc_stub.methods["eth_call"]
+    state = {"fail": True}
+
+    def eth_call(call, block_tag):
+        if call["data"] == DECIMALS_SELECTOR and state["fail"]:
+            raise ValueError("upstream unavailable")
+        return good_call(call, block_tag)
+
+    rpc_stub.methods["eth_call"] = eth_call
+    rpc = JsonRpcClient(rpc_stub.url)
+    reader = BalanceReader(rpc)
+
+    # The token is left out rather than scaled by a guessed 18 decimals
+    _, balances = await reader.read(wallets, tokens)
+    assert balances[wallets[0]] == {"eth": 1.0}
+    assert "usdc" not in reader.decimals
+
+    state["fail"] = False
+    _, balances = await reader.read(wallets, tokens)
+    await rpc.close()
+
+    assert balances[wallets[0]] == {"eth": 1.0, "usdc": 1.0}
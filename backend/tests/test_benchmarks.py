@@ -0,0 +1,51 @@
+"""
+Tests for the benchmark harness and its regression check.
+"""
+import pytest
+
+from benchmarks.harness import SCENARIOS, compare, percentile, run_suite
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {
+        "ingest": {"news": {"items_per_second": 1000.0}},
+        "load": {"market_prices": {"rps": 200.0, "p50_ms": 10.0, "p95_ms": 2.0, "p99_ms": 40.0, "errors": 0}},
+    }
+    results = {
+        "ingest": {"news": {"items_per_second": 700.0}},
+        "load": {
+            "market_prices": {"rps": 180.0, "p50_ms": 14.0, "p95_ms": 2.9, "p99_ms": 41.0, "errors": 0},
+            "ai_query": {"rps": 1.0, "p50_ms": 1.0, "errors": 2},
+        },
+    }
+    regressions = compare(results, baseline, threshold=0.25)
+    assert len(regressions) == 3
+    assert regressions[0].startswith("ingest.news.items_per_second: 700.00 vs baseline 1000.00 (-30%)")
+    assert regressions[1].startswith("load.market_prices.p50_ms")
+    # Sub-millisecond changes are noise; scenarios missing from the baseline only fail on errors
+    assert regressions[2] == "load.ai_query: 2 failed requests"
+    assert compare({"load": {"market_prices": results["load"]["market_prices"]}}, baseline, threshold=0.5) == []
+
+
+@pytest.mark.asyncio
+async def test_suite_runs_every_scenario_against_the_stubs():
+    results = await run_suite(requests=4, concurrency=2, ingest_rounds=1, warmup=0, rounds=1)
+
+    assert set(results["load"]) == {scenario.name for scenario in SCENARIOS}
+    for name, result in results["load"].items():
+        assert result["errors"] == 0, name
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+    assert results["ingest"]["prices"]["items"] == 500
+    assert results["ingest"]["news"]["items"] == 400
+    upstream = results["meta"]["upstream_requests"]
+    assert upstream["coingecko"] == 5 and upstream["reddit"] > 0
+    assert upstream["openai"] >= 4
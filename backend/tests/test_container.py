@@ -0,0 +1,89 @@
+import os
+import re
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from app.core.container import ServiceContainer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budget for `import app.main`, in seconds (about 1s on a laptop)
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "2.5"))
+
+# Modules that must only be imported when first used
+LAZY_MODULES = ("spacy", "openai", "sqlalchemy")
+
+
+class Service:
+    instances = 0
+
+    def __init__(self):
+        Service.instances += 1
+        self.value = 1
+
+
+def test_service_is_built_once_on_first_use():
+    Service.instances = 0
+    container = ServiceContainer()
+    proxy = container.register("service", Service)
+    assert Service.instances == 0
+    assert not container.is_built("service")
+
+    threads = [threading.Thread(target=lambda: proxy.value) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Service.instances == 1
+    proxy.value = 5
+    assert container.get("service").value == 5
+    with pytest.raises(KeyError):
+        container.get("unknown")
+
+
+@pytest.mark.asyncio
+async def test_warm_up_reports_progress_and_failures():
+    container = ServiceContainer()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("cache unreadable")
+        return Service()
+
+    container.register("service", Service)
+    container.register("flaky", flaky)
+    container.register("on_demand", Service, warm_up=False)
+    assert container.status()["warm_up"] == {"started": False, "finished": False, "completed": 0, "total": 2}
+    assert not container.is_ready()
+
+    await container.warm_up()
+
+    status = container.status()
+    assert status["ready"]
+    assert status["warm_up"]["completed"] == 2
+    assert status["failed"] == ["flaky"]
+    assert status["services"]["flaky"]["error"] == "cache unreadable"
+    assert status["services"]["on_demand"]["state"] == "pending"
+    # A failed service is built again on its next use
+    assert isinstance(container.get("flaky"), Service)
+    assert container.status()["failed"] == []
+
+
+def test_import_time_budget():
+    code = "import sys, app.main; print('eager:' + ','.join(m for m in %r if m in sys.modules))" % (LAZY_MODULES,)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    eager = [name for name in re.search(r"^eager:(.*)$", result.stdout, re.M).group(1).split(",") if name]
+    assert eager == [], f"imported at startup: {eager}"
+    cumulative = re.search(r"import time:\s+\d+ \|\s+(\d+) \| app\.main$", result.stderr, re.M)
+    assert cumulative, "no import time reported for app.main"
+    seconds = int(cumulative.group(1)) / 1e6
+    assert seconds < IMPORT_TIME_BUDGET, f"import app.main took {seconds:.2f}s"
@@ -0,0 +1,107 @@
+"""
+Tests for the async crypto data routes.
+"""
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import aiosqlite
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from app.db import session as db_session
+from app.models.crypto_data import CryptoData, PriceHistory
+from app.routes.crypto_data import router
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path, monkeypatch):
+    """HTTP client for an app backed by a temporary SQLite database"""
+    monkeypatch.setattr(db_session, "ASYNC_DB_URL", f"sqlite+aiosqlite:///{tmp_path / 'crypto.db'}")
+    await db_session.dispose_async_engine()
+    await db_session.init_async_db()
+
+    async with db_session.get_session_factory()() as session:
+        coin = CryptoData(coin_id="bitcoin", symbol="BTC", name="Bitcoin", current_price=60000.0)
+        session.add(coin)
+        await session.flush()
+        start = datetime(2024, 1, 1)
+        session.add_all([
+            PriceHistory(crypto_id=coin.id, price=50000.0 + i, timestamp=start + timedelta(days=i))
+            for i in range(500)
+        ])
+        await session.commit()
+
+    app = FastAPI()
+    app.include_router(router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http_client:
+        yield http_client
+
+    await db_session.dispose_async_engine()
+
+
+class TestCryptoDataRoutes:
+    @pytest.mark.asyncio
+    async def test_price_history_is_newest_first(self, client):
+        response = await client.get("/crypto/coins/bitcoin/history", params={"limit": 3})
+        assert response.status_code == 200
+        prices = [record["price"] for record in response.json()]
+        assert prices == [50499.0, 50498.0, 50497.0]
+
+    @pytest.mark.asyncio
+    async def test_unknown_coin_returns_404(self, client):
+        response = await client.get("/crypto/coins/unknown/history")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_initialization_status(self, client):
+        response = await client.get("/crypto/initialization-status")
+        assert response.json()["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_history_requests_run_queries_off_the_loop(self, client, monkeypatch):
+        """SQL runs on the driver's threads and concurrent requests interleave on the loop"""
+        statement_threads = set()
+
+        class TracingCursor(sqlite3.Cursor):
+            def execute(self, *args):
+                statement_threads.add(threading.get_ident())
+                return super().execute(*args)
+
+        class TracingConnection(sqlite3.Connection):
+            def cursor(self, factory=TracingCursor):
+                return super().cursor(factory)
+
+        connect = aiosqlite.connect
+        monkeypatch.setattr(aiosqlite, "connect",
+                            lambda *args, **kwargs: connect(*args, factory=TracingConnection, **kwargs))
+        # Reconnect through the tracing factory
+        await db_session.dispose_async_engine()
+
+        in_flight, max_in_flight = 0, 0
+
+        async def traced(scope, receive, send):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            try:
+                await app(scope, receive, send)
+            finally:
+                in_flight -= 1
+
+        app = FastAPI()
+        app.include_router(router)
+        transport = httpx.ASGITransport(app=traced)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as traced_client:
+            responses = await asyncio.gather(*[
+                traced_client.get("/crypto/coins/bitcoin/history", params={"limit": 500})
+                for _ in range(50)
+            ])
+
+        assert all(response.status_code == 200 for response in responses)
+        assert statement_threads and threading.get_ident() not in statement_threads
+        # A request that blocked the loop on its queries would finish before the next one started
+        assert max_in_flight > 1
@@ -0,0 +1,96 @@
+"""
+Tests for online database snapshots, incremental exports and restores.
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.database import db_service as db_module
+from app.services.database.db_service import DatabaseService
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Database service backed by a temporary SQLite file"""
+    monkeypatch.setattr(db_module, "USE_DATABASE", True)
+    service = DatabaseService()
+    service.db_path = str(tmp_path / "crypto.db")
+    service.initialize_db()
+    service.save_historical_prices("bitcoin", [("2024-01-01", 42000.0), ("2024-01-02", 43000.0)])
+    return service
+
+
+def _price_count(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM historical_prices").fetchone()[0]
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_archive_and_verify(db, tmp_path, compression):
+    """Snapshots are readable and pass verification"""
+    archive_path = str(tmp_path / "archives" / "backup.db")
+    assert db.archive_database(archive_path, compression=compression)
+
+    result = db.verify_archive(archive_path)
+    assert result["ok"]
+    assert result["kind"] == "full"
+    assert result["compression"] == compression
+    assert result["tables"]["historical_prices"] == 2
+
+
+def test_verify_rejects_corrupt_archive(db, tmp_path):
+    """Verification fails for files that are not valid databases"""
+    archive_path = tmp_path / "broken.db"
+    archive_path.write_bytes(b"not a database" * 100)
+    assert not db.verify_archive(str(archive_path))["ok"]
+
+
+def test_incremental_export_only_contains_new_rows(db, tmp_path):
+    """Incremental exports start from the previous snapshot"""
+    assert db.archive_database(str(tmp_path / "full.db"))
+    db.save_historical_prices("ethereum", [("2024-01-02", 2300.0)])
+
+    exported = db.export_incremental(str(tmp_path / "incr.db.gz"), compression="gzip")
+    assert exported["historical_prices"] == 1
+
+    result = db.verify_archive(str(tmp_path / "incr.db.gz"))
+    assert result["kind"] == "incremental"
+
+
+def test_restore_full_and_incremental(db, tmp_path):
+    """A full restore followed by an incremental one rebuilds the latest state"""
+    full_path = str(tmp_path / "full.db.gz")
+    incremental_path = str(tmp_path / "incr.db")
+    assert db.archive_database(full_path, compression="gzip")
+    db.save_historical_prices("ethereum", [("2024-01-02", 2300.0)])
+    db.export_incremental(incremental_path)
+
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM historical_prices")
+        conn.commit()
+
+    assert db.restore_from_archive(full_path)
+    assert _price_count(db.db_path) == 2
+    assert db.restore_from_archive(incremental_path)
+    assert _price_count(db.db_path) == 3
+
+
+def _finishes(call, timeout=10.0):
+    """Run call in a thread; False if it is still running after the timeout"""
+    result = []
+    worker = threading.Thread(target=lambda: result.append(call()), daemon=True)
+    worker.start()
+    worker.join(timeout)
+    return not worker.is_alive() and result
+
+
+def test_restore_on_uninitialized_service(db, tmp_path):
+    """The first call on a fresh service initializes it instead of deadlocking"""
+    full_path = str(tmp_path / "full.db")
+    assert db.archive_database(full_path)
+
+    fresh = DatabaseService()
+    fresh.db_path = str(tmp_path / "fresh" / "crypto.db")
+    assert _finishes(lambda: fresh.restore_from_archive(full_path)) == [True]
+    assert _price_count(fresh.db_path) == 2
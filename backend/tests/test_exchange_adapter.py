@@ -0,0 +1,165 @@
+"""
+Tests for the async exchange adapter using a fake ccxt exchange.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.exchanges import adapter as adapter_module
+from app.services.exchanges.adapter import AsyncExchangeAdapter, RateBudget
+
+
+class FakeExchange:
+    """In-memory stand-in for a ccxt.async_support exchange"""
+
+    id = "fake"
+    rateLimit = 1
+
+    def __init__(self, markets, balances, trades, delay=0.0):
+        self.markets = {symbol: {"symbol": symbol, "base": symbol.split("/")[0], "quote": symbol.split("/")[1]}
+                        for symbol in markets}
+        self.balances = balances
+        self.trades = trades
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def _request(self, name, *args):
+        self.calls.append((name,) + args)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+
+    async def load_markets(self):
+        await self._request("load_markets")
+        return self.markets
+
+    async def fetch_balance(self):
+        await self._request("fetch_balance")
+        return {"total": dict(self.balances)}
+
+    async def fetch_my_trades(self, symbol, since=None, limit=None):
+        await self._request("fetch_my_trades", symbol, since)
+        trades = sorted((t for t in self.trades.get(symbol, []) if since is None or t["timestamp"] >= since),
+                        key=lambda t: t["timestamp"])
+        return trades[:limit]
+
+
+def _trade(trade_id, symbol, timestamp):
+    return {"id": trade_id, "symbol": symbol, "timestamp": timestamp, "side": "buy",
+            "price": 1.0, "amount": 1.0, "cost": 1.0, "fee": {"cost": 0.1, "currency": "USDT"}}
+
+
+@pytest.mark.asyncio
+async def test_only_held_or_known_markets_are_fetched():
+    exchange = FakeExchange(
+        markets=["BTC/USDT", "ETH/USDT", "DOGE/USDT", "BTC/EUR", "ETH/BTC", "XRP/TRY"],
+        balances={"BTC": 0.5, "USDT": 100.0, "XRP": 0.0},
+        trades={"BTC/USDT": [_trade("1", "BTC/USDT", 1_000)], "ETH/BTC": [_trade("2", "ETH/BTC", 2_000)]}
+    )
+    adapter = AsyncExchangeAdapter(exchange, "fake", budget=RateBudget(10_000, 100), cursors={"ETH/BTC": 0})
+
+    trades = await adapter.sync_trades()
+
+    fetched = sorted(call[1] for call in exchange.calls if call[0] == "fetch_my_trades")
+    assert fetched == ["BTC/EUR", "BTC/USDT", "ETH/BTC"]
+    assert [t["id"] for t in trades] == ["2", "1"]
+    assert trades[0]["fee"] == 0.1 and trades[0]["source"] == "fake"
+
+
+@pytest.mark.asyncio
+async def test_cursors_fetch_only_new_trades(monkeypatch):
+    monkeypatch.setattr(adapter_module, "TRADE_PAGE_SIZE", 2)
+    exchange = FakeExchange(
+        markets=["BTC/USDT"], balances={"BTC": 1.0},
+        trades={"BTC/USDT": [_trade(str(i), "BTC/USDT", i * 1_000) for i in range(1, 6)]}
+    )
+    adapter = AsyncExchangeAdapter(exchange, "fake", budget=RateBudget(10_000, 100))
+
+    assert len(await adapter.sync_trades()) == 5
+    assert adapter.cursors == {"BTC/USDT": 5_000}
+
+    exchange.trades["BTC/USDT"].append(_trade("6", "BTC/USDT", 6_000))
+    exchange.calls.clear()
+    new = await adapter.sync_trades({"BTC": 1.0})
+    assert [t["id"] for t in new] == ["6"]
+    # Pages start at the cursor inclusive; the seen trade there is skipped
+    assert exchange.calls == [("fetch_my_trades", "BTC/USDT", 5_000), ("fetch_my_trades", "BTC/USDT", 6_000)]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_and_failures_are_isolated():
+    markets = [f"C{i}/USDT" for i in range(20)]
+    exchange = FakeExchange(markets=markets, balances={f"C{i}": 1.0 for i in range(20)},
+                            trades={symbol: [_trade(symbol, symbol, 1)] for symbol in markets}, delay=0.01)
+    original = exchange.fetch_my_trades
+
+    async def flaky(symbol, since=None, limit=None):
+        if symbol == "C3/USDT":
+            raise RuntimeError("boom")
+        return await original(symbol, since, limit)
+
+    exchange.fetch_my_trades = flaky
+    adapter = AsyncExchangeAdapter(exchange, "fake", budget=RateBudget(10_000, 100), max_concurrency=4)
+
+    trades = await adapter.fetch_new_trades(markets)
+
+    assert len(trades) == 19
+    assert "C3/USDT" not in adapter.cursors
+
+
+@pytest.mark.asyncio
+async def test_failed_page_leaves_cursor_and_same_millisecond_trades(monkeypatch):
+    monkeypatch.setattr(adapter_module, "TRADE_PAGE_SIZE", 2)
+    # Trades 2 and 3 share a millisecond across the first page boundary
+    trades = [_trade("1", "BTC/USDT", 1_000), _trade("2", "BTC/USDT", 2_000), _trade("3", "BTC/USDT", 2_000),
+              _trade("4", "BTC/USDT", 3_000)]
+    exchange = FakeExchange(markets=["BTC/USDT"], balances={"BTC": 1.0}, trades={"BTC/USDT": trades})
+    original = exchange.fetch_my_trades
+    failing = {"after": 1}
+
+    async def rate_limited(symbol, since=None, limit=None):
+        if failing["after"] is not None:
+            if failing["after"] == 0:
+                raise RuntimeError("429 Too Many Requests")
+            failing["after"] -= 1
+        return await original(symbol, since, limit)
+
+    exchange.fetch_my_trades = rate_limited
+    adapter = AsyncExchangeAdapter(exchange, "fake", budget=RateBudget(10_000, 100))
+
+    # Page 1 succeeds, page 2 is rate limited: nothing is consumed
+    assert await adapter.fetch_new_trades(["BTC/USDT"]) == []
+    assert adapter.cursors == {}
+
+    failing["after"] = None
+    assert sorted(t["id"] for t in await adapter.fetch_new_trades(["BTC/USDT"])) == ["1", "2", "3", "4"]
+    assert adapter.cursors == {"BTC/USDT": 3_000} and adapter.cursor_ids == {"BTC/USDT": ["4"]}
+
+    # A resumed sync steps past a full page of already seen trades
+    resumed = AsyncExchangeAdapter(exchange, "fake", budget=RateBudget(10_000, 100),
+                                   cursors={"BTC/USDT": 2_000}, cursor_ids={"BTC/USDT": ["2", "3"]})
+    assert [t["id"] for t in await resumed.fetch_new_trades(["BTC/USDT"])] == ["4"]
+
+    # A trade in the cursor's millisecond that arrives later is still picked up, once
+    exchange.trades["BTC/USDT"].append(_trade("5", "BTC/USDT", 3_000))
+    assert [t["id"] for t in await adapter.fetch_new_trades(["BTC/USDT"])] == ["5"]
+    assert await adapter.fetch_new_trades(["BTC/USDT"]) == []
+    assert exchange.max_active <= 4
+
+
+@pytest.mark.asyncio
+async def test_rate_budget_is_shared():
+    budget = RateBudget(rate=100, burst=1)
+    exchanges = [FakeExchange(["BTC/USDT"], {"BTC": 1.0}, {}) for _ in range(2)]
+    adapters = [AsyncExchangeAdapter(exchange, "fake", budget=budget) for exchange in exchanges]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(adapter.fetch_balances() for adapter in adapters for _ in range(5)))
+    elapsed = time.perf_counter() - started
+
+    # 10 requests at 100/s with a burst of 1 take at least ~90ms
+    assert elapsed >= 0.08
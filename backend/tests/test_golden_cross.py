@@ -0,0 +1,168 @@
+"""
+Tests for the golden-cross universe screener.
+"""
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.core.persistence import save_json
+from app.services.database import db_service as db_module
+from app.services.database.db_service import DatabaseService
+from app.services.database.mock_database import MockDatabaseService
+from app.services.market.golden_cross import GoldenCrossScreener, align_history, moving_average, screen
+from app.services.portfolio.valuation import MarketSnapshot
+
+
+def _dates(n, start=date(2024, 1, 1)):
+    return [(start + timedelta(days=i)).isoformat() for i in range(n)]
+
+
+def _series():
+    """Three coins over 120 days: a fresh golden cross, one approaching, one falling"""
+    days = np.arange(120, dtype=float)
+    crossing = np.where(days < 112, 100 - 0.5 * days, 44 + 3.0 * (days - 112))
+    # Below its long MA, but closing in
+    approaching = np.where(days < 114, 100 - 0.4 * days, 54.4 + 0.4 * (days - 114))
+    falling = 200 - days
+    return np.column_stack([crossing, approaching, falling])
+
+
+def test_moving_average_matches_naive_windows_and_skips_gaps():
+    rng = np.random.default_rng(1)
+    prices = rng.uniform(1, 100, size=(40, 3))
+    prices[10, 1] = np.nan
+
+    result = moving_average(prices, 5)
+
+    for t in range(4, 40):
+        for column in range(3):
+            window = prices[t - 4:t + 1, column]
+            expected = np.nan if np.isnan(window).any() else window.mean()
+            np.testing.assert_allclose(result[t, column], expected, equal_nan=True)
+    assert np.isnan(result[:4]).all()
+
+
+def test_screen_classifies_and_ranks_coins():
+    prices = _series()
+    results = screen(_dates(len(prices)), ["crossing", "approaching", "falling"], prices,
+                     short_period=5, long_period=20, threshold=0.2)
+    by_coin = {row["coin_id"]: row for row in results}
+
+    assert [row["coin_id"] for row in results][0] == "approaching"
+    assert by_coin["approaching"]["status"] == "approaching"
+    assert by_coin["approaching"]["days_to_cross"] > 0
+    assert by_coin["crossing"]["status"] == "golden_cross"
+    assert by_coin["crossing"]["last_cross_type"] == "golden"
+    assert by_coin["falling"]["status"] == "below"
+    assert by_coin["falling"]["last_cross_date"] is None
+    assert [row["rank"] for row in results] == [1, 2, 3]
+
+
+def test_align_history_fills_gaps():
+    history = {"b": [("2024-01-01", 1.0), ("2024-01-03", 3.0)], "a": [("2024-01-02", 2.0)]}
+    dates, coin_ids, matrix = align_history(history)
+
+    assert dates == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert coin_ids == ["a", "b"]
+    assert np.isnan(matrix[0, 0]) and matrix[2, 1] == 3.0
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_module, "USE_DATABASE", True)
+    service = DatabaseService()
+    service.db_path = str(tmp_path / "crypto.db")
+    service.initialize_db()
+    return service
+
+
+def test_first_screen_on_a_fresh_database_service(tmp_path, monkeypatch):
+    # The first read and write initialize the database lazily under the service lock
+    monkeypatch.setattr(db_module, "USE_DATABASE", True)
+    service = DatabaseService()
+    service.db_path = str(tmp_path / "crypto.db")
+    row = {"coin_id": "a", "short_ma": 1, "long_ma": 1, "proximity": 0, "status": "above", "rank": 1,
+           "trend": None, "days_to_cross": None, "last_cross_type": None, "last_cross_date": None}
+    results = []
+
+    def first_calls():
+        results.append(service.get_price_history_since("2024-01-01"))
+        service.save_golden_cross_batch([row])
+        results.append(service.get_golden_cross_data("a")["short_ma"])
+
+    worker = threading.Thread(target=first_calls, daemon=True)
+    worker.start()
+    worker.join(10)
+    assert not worker.is_alive()
+    assert results == [{}, 1]
+
+
+def test_screener_persists_results_in_one_batch(db):
+    prices = _series()
+    dates = _dates(len(prices))
+    for column, coin_id in enumerate(["crossing", "approaching", "falling"]):
+        db.save_historical_prices(coin_id, list(zip(dates, prices[:, column].tolist())))
+    # Results from an earlier check are replaced
+    db.save_golden_cross_batch([{"coin_id": "delisted", "short_ma": 1, "long_ma": 1, "proximity": 0,
+                                 "status": "above", "rank": 1, "trend": None, "days_to_cross": None,
+                                 "last_cross_type": None, "last_cross_date": None}])
+
+    screener = GoldenCrossScreener(db_service=db, short_period=5, long_period=20, threshold=0.2, universe_size=2)
+    results = screener.run(["approaching", "crossing", "falling"], end=date.fromisoformat(dates[-1]))
+
+    assert {row["coin_id"] for row in results} == {"approaching", "crossing"}
+    assert screener.ranked("approaching")[0]["coin_id"] == "approaching"
+    with sqlite3.connect(db.db_path) as conn:
+        rows = conn.execute("SELECT coin_id, status, rank FROM golden_cross_data ORDER BY rank").fetchall()
+    assert rows == [("approaching", "approaching", 1), ("crossing", "golden_cross", 2)]
+    assert db.get_golden_cross_data("crossing")["short_ma"] == pytest.approx(results[1]["short_ma"])
+
+
+def test_default_universe_is_top_coins_by_market_cap(tmp_path):
+    db = MockDatabaseService()
+    prices = _series()
+    dates = _dates(len(prices))
+    for column, coin_id in enumerate(["crossing", "approaching", "falling"]):
+        db.save_historical_prices(coin_id, list(zip(dates, prices[:, column].tolist())))
+    market_data_file = str(tmp_path / "market_data.json")
+    save_json(market_data_file, {"updated": "2024-04-29T00:00:00", "prices": [
+        {"id": "approaching", "symbol": "APR", "marketCap": 10.0},
+        {"id": "falling", "symbol": "FAL", "marketCap": 300.0},
+        {"id": "crossing", "symbol": "CRS", "marketCap": 20.0},
+    ]})
+
+    screener = GoldenCrossScreener(db_service=db, short_period=5, long_period=20, threshold=0.2,
+                                   universe_size=2, market_data_file=market_data_file)
+    results = screener.run(end=date.fromisoformat(dates[-1]))
+
+    assert {row["coin_id"] for row in results} == {"falling", "crossing"}
+    assert db._golden_cross == results
+
+
+def test_screen_without_stored_history_is_empty(tmp_path):
+    # The mock database (USE_DATABASE off) has no price history
+    screener = GoldenCrossScreener(db_service=MockDatabaseService(),
+                                   market_data_file=str(tmp_path / "missing.json"))
+    assert screener.run() == []
+    assert screener.checked_at is not None
+
+
+def test_market_refreshes_build_the_daily_history(db):
+    screener = GoldenCrossScreener(db_service=db, short_period=2, long_period=3, threshold=0.2)
+    snapshot = MarketSnapshot.from_market_data({"prices": [
+        {"id": "bitcoin", "symbol": "BTC", "priceUsd": 100.0, "marketCap": 2.0},
+        {"id": "ghost", "symbol": "GHO", "priceUsd": 0.0, "marketCap": 1.0},
+    ]})
+    for offset in range(3):
+        screener.record_closes(snapshot, day=date(2024, 1, 1) + timedelta(days=offset))
+    # A later refresh of the same day replaces that day's price
+    snapshot.prices[0] = 130.0
+    screener.record_closes(snapshot, day=date(2024, 1, 3))
+
+    assert db.get_price_history_since("2023-12-31") == {
+        "bitcoin": [("2024-01-01", 100.0), ("2024-01-02", 100.0), ("2024-01-03", 130.0)]}
+    (row,) = screener.run(["bitcoin"], end=date(2024, 1, 3))
+    assert row["short_ma"] == pytest.approx(115.0)
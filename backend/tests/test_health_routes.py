@@ -0,0 +1,43 @@
+"""
+Tests for the operational endpoints router.
+"""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.v1.health import router
+
+
+def _client(app=None):
+    if app is None:
+        app = FastAPI()
+        app.include_router(router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_task_status():
+    async with _client() as client:
+        response = await client.get("/health/tasks")
+    assert response.status_code == 200
+    assert set(response.json()) == {"scheduler_running", "tasks"}
+
+
+@pytest.mark.asyncio
+async def test_metrics_are_served_as_prometheus_text():
+    async with _client() as client:
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+@pytest.mark.asyncio
+async def test_readiness_waits_for_background_tasks():
+    app = FastAPI()
+    app.include_router(router)
+    app.state.background_started = False
+    async with _client(app) as client:
+        response = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+    assert response.json()["cluster"]["mode"] in ("single", "multi")
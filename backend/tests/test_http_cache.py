@@ -0,0 +1,126 @@
+"""
+Tests for HTTP validators, Cache-Control and response compression.
+"""
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.http_cache import CompressionMiddleware, cache_control, cache_control_header
+
+
+def _app(state):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/items")
+    @cache_control(lambda params: state["version"], max_age=30, stale_while_revalidate=300)
+    async def items(limit: int = Query(10)):
+        state["calls"] += 1
+        return [{"id": i, "name": f"item {i}"} for i in range(limit)]
+
+    @app.get("/holdings")
+    @cache_control(lambda params: state["version"] if params["user_id"] == "alice" else None, private=True)
+    async def holdings(request: Request, user_id: str = Query(...)):
+        state["calls"] += 1
+        return {"user_id": user_id, "path": request.url.path}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b'{"a": ' + b" " * 200
+            yield b"1}"
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    return app
+
+
+@pytest.fixture
+def state():
+    return {"version": 1, "calls": 0}
+
+
+@pytest_asyncio.fixture
+async def client(state):
+    transport = httpx.ASGITransport(app=_app(state))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield http_client
+
+
+def test_cache_control_header():
+    assert cache_control_header(30, 300) == "public, max-age=30, stale-while-revalidate=300"
+    assert cache_control_header(private=True) == "private, no-cache"
+
+
+@pytest.mark.asyncio
+async def test_conditional_request_skips_the_handler(client, state):
+    first = await client.get("/items", params={"limit": 3}, headers={"Accept-Encoding": "identity"})
+    assert first.headers["cache-control"] == "public, max-age=30, stale-while-revalidate=300"
+    etag = first.headers["etag"]
+
+    cached = await client.get("/items", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert state["calls"] == 1
+
+    # Different query parameters and new data versions get new tags
+    other = await client.get("/items", params={"limit": 4}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    state["version"] = 2
+    changed = await client.get("/items", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert state["calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_routes_keep_their_own_request_and_can_opt_out(client, state):
+    alice = await client.get("/holdings", params={"user_id": "alice"})
+    assert alice.json() == {"user_id": "alice", "path": "/holdings"}
+    assert alice.headers["cache-control"] == "private, no-cache"
+    assert (await client.get("/holdings", params={"user_id": "alice"},
+                             headers={"If-None-Match": alice.headers["etag"]})).status_code == 304
+
+    bob = await client.get("/holdings", params={"user_id": "bob"})
+    assert bob.status_code == 200
+    assert "etag" not in bob.headers
+
+
+@pytest.mark.asyncio
+async def test_large_json_is_compressed_with_its_own_tag(client, state):
+    response = await client.get("/items", params={"limit": 50}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert len(response.json()) == 50
+
+    raw = await client.get("/items", params={"limit": 50}, headers={"Accept-Encoding": "identity"})
+    assert int(response.headers["content-length"]) < len(raw.content)
+    assert response.headers["etag"] != raw.headers["etag"]
+
+    # The compressed representation's tag validates too
+    cached = await client.get("/items", params={"limit": 50},
+                              headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+    small = await client.get("/items", params={"limit": 1}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+@pytest.mark.asyncio
+async def test_streamed_responses_are_left_alone(client):
+    response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_direct_calls_bypass_validation(state):
+    @cache_control(lambda params: state["version"], private=True)
+    async def holdings(user_id: str = Query("alice")):
+        return {"user_id": user_id}
+
+    # Route handlers called from other handlers get no request injected
+    assert await holdings("bob") == {"user_id": "bob"}
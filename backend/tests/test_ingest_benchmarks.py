@@ -0,0 +1,52 @@
+"""
+Micro-benchmarks of the ingestion and listing hot paths (pytest-benchmark).
+
+Run with `pytest tests/test_ingest_benchmarks.py --benchmark-only`; compare
+runs with --benchmark-autosave and --benchmark-compare.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.services.market.snapshot_file import encode_snapshot
+from app.services.news.crypto_news_service import build_news_lists
+from app.services.news.feed_fetcher import parse_rss
+from app.services.news.snapshot import NewsSnapshot
+from benchmarks.stubs import coins, rss_feed
+
+FEED = rss_feed("BENCH", count=50, now=1743519600.0)
+
+
+@pytest.fixture(scope="module")
+def articles():
+    parsed = []
+    for i in range(8):
+        parsed.extend(parse_rss(rss_feed(f"FEED{i}", count=50, now=1743519600.0), "stub", f"FEED{i}"))
+    return parsed
+
+
+def test_parse_rss_feed(benchmark):
+    items = benchmark(parse_rss, FEED, "stub", "BENCH")
+    assert len(items) == 50
+
+
+def test_build_news_lists(benchmark, articles):
+    unique, bitcoin, messari = benchmark(build_news_lists, articles)
+    assert unique and len(unique) <= len(articles)
+
+
+def test_encode_market_snapshot(benchmark):
+    prices = [
+        {"symbol": row["symbol"].upper(), "name": row["name"], "id": row["id"], "priceUsd": row["current_price"],
+         "marketCap": row["market_cap"], "volume24h": row["total_volume"]}
+        for row in coins(500)
+    ]
+    encoded = benchmark(encode_snapshot, {"updated": "2025-04-01T15:00:00", "prices": prices})
+    assert len(encoded) > 500 * 8
+
+
+def test_news_index_deep_page(benchmark, articles):
+    index = NewsSnapshot().evolve(articles).index
+    _, cursor = index.page(len(articles) - 20)
+    page, _ = benchmark(index.page, 20, cursor)
+    assert len(page) == 20
@@ -0,0 +1,77 @@
+import json
+import logging
+import sys
+
+import pytest
+
+from app.core.logging import JsonFormatter, SamplingFilter, setup_logging, shutdown_logging
+
+
+def _record(msg, *args, level=logging.DEBUG):
+    return logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+
+
+def test_json_formatter_includes_extra_fields_and_exceptions():
+    formatter = JsonFormatter()
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("app.test", logging.ERROR, __file__, 1, "Failed %s", ("refresh",), sys.exc_info())
+    record.feed = "coindesk"
+
+    entry = json.loads(formatter.format(record))
+
+    assert entry["message"] == "Failed refresh"
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "app.test"
+    assert entry["feed"] == "coindesk"
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_sampling_filter_keeps_one_in_n_per_call_site():
+    sampler = SamplingFilter(rate=5)
+
+    kept = [sampler.filter(_record("Matched %s", i)) for i in range(20)]
+    other = [sampler.filter(_record("Skipped %s", i)) for i in range(5)]
+    info = [sampler.filter(_record("Request done", level=logging.INFO)) for _ in range(5)]
+
+    assert sum(kept) == 4 and kept[0]
+    assert sum(other) == 1
+    assert all(info)
+
+
+def test_sampling_filter_counters_are_bounded():
+    sampler = SamplingFilter(rate=5, max_call_sites=100)
+    # Pre-formatted messages are a new template each time
+    for i in range(1_000):
+        sampler.filter(_record(f"Task {i} executed"))
+    assert len(sampler._counters) <= 100
+
+
+@pytest.fixture
+def queued_logging(tmp_path):
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    setup_logging(log_to_console=False, log_level=logging.INFO, logs_dir=str(tmp_path))
+    yield tmp_path
+    shutdown_logging()
+    root.handlers[:] = saved_handlers
+    root.setLevel(saved_level)
+
+
+def test_records_reach_files_through_the_listener(queued_logging):
+    logs_dir = queued_logging
+    arguments = {"symbol": "BTC"}
+    logging.getLogger("app.api").info("Valued %s", arguments)
+    # Arguments are rendered when logging, not when the listener writes
+    arguments["symbol"] = "ETH"
+    logging.getLogger("background.refresh").error("Feed failed", extra={"feed": "reuters"})
+    shutdown_logging()
+
+    api = [json.loads(line) for line in (logs_dir / "api.log").read_text().splitlines()]
+    errors = [json.loads(line) for line in (logs_dir / "error.log").read_text().splitlines()]
+    background = [json.loads(line) for line in (logs_dir / "background.log").read_text().splitlines()]
+
+    assert [entry["message"] for entry in api] == ["Valued {'symbol': 'BTC'}", "Feed failed"]
+    assert [entry["feed"] for entry in errors] == ["reuters"]
+    assert [entry["logger"] for entry in background] == ["background.refresh"]
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.core import metrics
+from app.core.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    child = latency.labels("/a")
+    for value in (0.05, 0.1, 0.5, 5.0):
+        child.observe(value)
+    registry.counter("hits_total", "Hits", ("cache", "result")).labels("market", "hit").inc(3)
+
+    text = registry.render()
+
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+    assert 'latency_seconds_sum{route="/a"} 5.65' in text
+    assert 'hits_total{cache="market",result="hit"} 3' in text
+    assert text.endswith("\n")
+
+
+def test_label_values_are_normalized_and_checked():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("status",))
+    requests.labels(200).inc()
+    requests.labels("200").inc()
+
+    assert 'requests_total{status="200"} 2' in registry.render()
+    with pytest.raises(ValueError):
+        requests.labels("200", "GET")
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Duplicate")
+
+
+def test_observations_from_many_threads_are_all_counted():
+    registry = MetricsRegistry()
+    counter = registry.counter("events_total", "Events").labels()
+    histogram = registry.histogram("work_seconds", "Work").labels()
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+            histogram.observe(0.002)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value == 80000
+    _, count, total = histogram.snapshot()
+    assert count == 80000
+    assert total == pytest.approx(160)
+
+
+def test_observation_overhead_is_small():
+    child = MetricsRegistry().histogram("fast_seconds", "Fast").labels()
+    child.observe(0.01)
+    runs = 100000
+    started = time.perf_counter()
+    for _ in range(runs):
+        child.observe(0.01)
+    per_call = (time.perf_counter() - started) / runs
+
+    # Well under a microsecond on a typical machine; loose bound for slow CI
+    assert per_call < 5e-6
+
+
+@pytest.mark.asyncio
+async def test_trace_config_records_upstream_latency_and_errors():
+    import aiohttp
+
+    async def ok(request):
+        return web.Response(text="ok")
+
+    async def broken(request):
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_get("/ok", ok)
+    app.router.add_get("/broken", broken)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        host = server.make_url("/").host
+        latency = metrics.UPSTREAM_REQUEST_SECONDS.labels(host)
+        errors = metrics.UPSTREAM_ERRORS.labels(host)
+        count_before, errors_before = latency.snapshot()[1], errors.value
+
+        async with aiohttp.ClientSession(trace_configs=[metrics.upstream_trace_config()]) as session:
+            for path in ("/ok", "/broken"):
+                async with session.get(server.make_url(path)) as response:
+                    await response.read()
+
+        assert latency.snapshot()[1] == count_before + 2
+        assert errors.value == errors_before + 1
+    finally:
+        await server.close()
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services.news.crypto_news_service import CryptoNewsService
+from app.services.news.snapshot import NewsSnapshot, RedditSnapshot
+
+RSS = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><title>Bitcoin breaks out</title><link>https://example.com/1</link><guid>1</guid>
+<pubDate>Mon, 01 Jan 2024 12:00:00 GMT</pubDate><description>BTC rally</description></item>
+<item><title>Ethereum upgrade ships</title><link>https://example.com/2</link><guid>2</guid>
+<pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate><description>ETH news</description></item>
+</channel></rss>"""
+
+
+@pytest_asyncio.fixture
+async def feed_server():
+    """Serves RSS at /rss and never answers /slow"""
+    async def rss(request):
+        return web.Response(body=RSS.encode(), content_type="application/rss+xml")
+
+    async def slow(request):
+        await asyncio.sleep(60)
+        return web.Response(text="")
+
+    app = web.Application()
+    app.router.add_get("/rss", rss)
+    app.router.add_get("/slow", slow)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+def service():
+    service = CryptoNewsService()
+    service.save_to_cache = lambda: None
+    service.snapshot = NewsSnapshot()
+    return service
+
+
+def test_snapshot_evolve_leaves_published_snapshot_untouched():
+    first = NewsSnapshot().evolve([{"id": "a"}], bitcoin=[{"id": "a"}])
+    second = first.evolve([{"id": "b"}])
+
+    assert [item["id"] for item in first.articles] == ["a"]
+    assert [item["id"] for item in second.articles] == ["b"]
+    assert second.subset("bitcoin") == first.subset("bitcoin")
+    assert second.version == first.version + 1
+    with pytest.raises(TypeError):
+        second.subsets["bitcoin"] = ()
+
+    reddit = RedditSnapshot().evolve({"Bitcoin": {"hot": [{"id": 1}]}})
+    updated = reddit.evolve({"Bitcoin": {"new": [{"id": 2}]}})
+    assert set(updated.posts["Bitcoin"]) == {"hot", "new"}
+    assert set(reddit.posts["Bitcoin"]) == {"hot"}
+    assert updated.to_dict() == {"Bitcoin": {"hot": [{"id": 1}], "new": [{"id": 2}]}}
+
+
+@pytest.mark.asyncio
+async def test_refresh_publishes_one_consistent_snapshot(service, feed_server):
+    service.crypto_feeds = [{"url": str(feed_server.make_url("/rss")), "source": "TEST"}]
+    received = []
+    service.add_update_listener(received.append)
+    before = service.snapshot
+
+    await service.refresh()
+
+    snapshot = service.snapshot
+    assert [item["title"] for item in snapshot.articles] == ["Bitcoin breaks out", "Ethereum upgrade ships"]
+    assert [item["title"] for item in snapshot.subset("bitcoin")] == ["Bitcoin breaks out"]
+    assert service.bitcoin_news is snapshot.subset("bitcoin")
+    assert before.articles == ()
+    assert len(received) == 1 and len(received[0]) == 2
+    assert service.get_news(limit=1)[0]["title"] == "Bitcoin breaks out"
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_cancelled_immediately(service, feed_server):
+    service.crypto_feeds = [{"url": str(feed_server.make_url("/slow")), "source": "SLOW"}]
+    refresh = asyncio.create_task(service.refresh())
+    await asyncio.sleep(0.05)
+
+    refresh.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(refresh, 1)
+    assert service.snapshot.articles == ()
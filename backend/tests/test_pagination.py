@@ -0,0 +1,198 @@
+"""
+Tests for keyset pagination of news and transaction listings.
+"""
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from app.api.v1 import news, portfolio
+from app.core.pagination import KeysetIndex, decode_cursor, encode_cursor
+from app.core.responses import payload_cache
+from app.services.news.crypto_news_service import CryptoNewsService
+from app.services.news.snapshot import NewsSnapshot
+from app.services.portfolio import ledgers
+from app.services.portfolio.ledger import PortfolioLedger
+
+
+def _article(i, minute):
+    return {"id": f"news-{i}", "title": f"Headline {i}" + (" about SOL" if i % 3 == 0 else ""),
+            "summary": "", "source": "CoinDesk", "url": f"https://example.com/{i}",
+            "timestamp": f"04/01/2025, 02:{minute:02d}:00 PM"}
+
+
+# news-0 is the newest; news-10 and news-11 share a publication time
+ARTICLES = [_article(i, 59 - min(i, 10)) for i in range(25)]
+
+
+def test_cursor_round_trip_and_validation():
+    key = ("2025-04-01T14:59:00", "id with spaces/ü")
+    cursor = encode_cursor(key)
+    assert "=" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == key
+    for invalid in ("not a cursor!", encode_cursor(("a", "b"))[:-3], "WzEsMl0"):
+        with pytest.raises(ValueError):
+            decode_cursor(invalid)
+
+
+def test_keyset_index_pages():
+    index = KeysetIndex(((f"t{i:02d}", str(i)), i) for i in range(10))
+    first, key = index.page(4)
+    assert first == [9, 8, 7, 6]
+    second, key = index.page(4, after=key)
+    assert second == [5, 4, 3, 2]
+    assert index.page(4, after=key) == ([1, 0], None)
+
+    # Items added after a cursor was issued do not shift later pages
+    index.add(("t99", "new"), 99)
+    assert index.page(4, after=("t06", "6"))[0] == [5, 4, 3, 2]
+    assert index.page(3, skip=1)[0] == [9, 8, 7]
+
+    even, key = index.page(2, predicate=lambda value: value % 2 == 0)
+    assert even == [8, 6]
+    assert index.page(2, after=key, predicate=lambda value: value % 2 == 0) == ([4, 2], ("t02", "2"))
+    assert index.count(lambda value: value % 2 == 0) == 5
+
+
+def test_ledger_pages_by_timestamp_and_symbol(tmp_path):
+    ledger = PortfolioLedger(str(tmp_path))
+    for i in range(12):
+        ledger.append({"id": f"tx-{i:02d}", "symbol": "ETH" if i % 2 else "BTC", "transaction_type": "buy",
+                       "quantity": 1.0, "price_usd": 100.0, "timestamp": f"2025-04-{i + 1:02d}T12:00:00"})
+
+    entries, key = ledger.page(5)
+    assert [entry["id"] for entry in entries] == ["tx-11", "tx-10", "tx-09", "tx-08", "tx-07"]
+    # Appends after the index was built are indexed too, even out of order
+    ledger.append({"id": "tx-late", "symbol": "BTC", "transaction_type": "buy", "quantity": 1.0,
+                   "price_usd": 100.0, "timestamp": "2025-04-07T18:00:00"})
+    entries, key = ledger.page(5, after=key)
+    assert [entry["id"] for entry in entries] == ["tx-late", "tx-06", "tx-05", "tx-04", "tx-03"]
+    entries, key = ledger.page(5, after=key)
+    assert [entry["id"] for entry in entries] == ["tx-02", "tx-01", "tx-00"]
+    assert key is None
+
+    btc, _ = ledger.page(3, symbol="btc", skip=1)
+    assert [entry["id"] for entry in btc] == ["tx-08", "tx-late", "tx-06"]
+    assert ledger.page(3, symbol="DOGE") == ([], None)
+
+    # A restarted ledger rebuilds the same index from the file
+    reloaded = PortfolioLedger(str(tmp_path))
+    assert reloaded.page(13)[0] == ledger.page(13)[0]
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path, monkeypatch):
+    """HTTP client for the news and portfolio routers backed by temporary data"""
+    payload_cache.clear()
+
+    news_service = CryptoNewsService()
+    news_service.snapshot = NewsSnapshot().evolve(ARTICLES)
+    monkeypatch.setattr(news, "crypto_news_service", news_service)
+
+    ledger = PortfolioLedger(str(tmp_path / "ledger"))
+    for i in range(7):
+        ledger.append({"id": f"tx-{i}", "user_id": "alice", "symbol": "BTC", "transaction_type": "buy", "quantity": 1.0,
+                       "price_usd": 100.0, "timestamp": f"2025-04-0{i + 1}T12:00:00"})
+    monkeypatch.setitem(ledgers._ledgers, "alice", ledger)
+
+    app = FastAPI()
+    app.include_router(news.router)
+    app.include_router(portfolio.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http_client:
+        http_client.news_service = news_service
+        yield http_client
+
+
+@pytest.mark.asyncio
+async def test_news_cursor_walks_every_article_once(client):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        body = (await client.get("/news/crypto", params=params)).json()
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+        if len(seen) == 7:
+            # New articles arriving between pages do not shift the cursor
+            client.news_service.snapshot = client.news_service.snapshot.evolve(
+                [_article(99, 59)] + ARTICLES)
+    # The article added above the cursor is not mixed into later pages
+    assert sorted(seen) == sorted(item["id"] for item in ARTICLES)
+    assert seen[:3] == ["news-0", "news-1", "news-2"]
+    assert seen.index("news-11") < seen.index("news-10")
+
+
+@pytest.mark.asyncio
+async def test_news_page_numbers_and_filters(client):
+    second = (await client.get("/news/crypto", params={"limit": 5, "page": 2})).json()
+    assert [item["id"] for item in second["items"]] == [f"news-{i}" for i in range(5, 10)]
+
+    filtered = (await client.get("/news/crypto", params={"limit": 3, "symbol": "SOL"})).json()
+    assert [item["id"] for item in filtered["items"]] == ["news-0", "news-3", "news-6"]
+    assert filtered["total_count"] == 9
+    rest = (await client.get("/news/crypto", params={"limit": 10, "symbol": "SOL",
+                                                     "cursor": filtered["next_cursor"]})).json()
+    assert len(rest["items"]) == 6 and rest["next_cursor"] is None
+
+    assert (await client.get("/news/crypto", params={"cursor": "garbage!"})).status_code == 400
+    assert (await client.get("/news/crypto", params={"limit": 1000})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_transactions_follow_next_cursor_header(client):
+    response = await client.get("/portfolio/transactions", params={"user_id": "alice", "limit": 3})
+    assert [item["id"] for item in response.json()] == ["tx-6", "tx-5", "tx-4"]
+    cursor = response.headers["x-next-cursor"]
+
+    response = await client.get("/portfolio/transactions", params={"user_id": "alice", "limit": 3, "cursor": cursor})
+    assert [item["id"] for item in response.json()] == ["tx-3", "tx-2", "tx-1"]
+    response = await client.get("/portfolio/transactions",
+                                params={"user_id": "alice", "limit": 3, "cursor": response.headers["x-next-cursor"]})
+    assert [item["id"] for item in response.json()] == ["tx-0"]
+    assert "x-next-cursor" not in response.headers
+
+    offset = await client.get("/portfolio/transactions", params={"user_id": "alice", "limit": 2, "offset": 5})
+    assert [item["id"] for item in offset.json()] == ["tx-1", "tx-0"]
+    bad = await client.get("/portfolio/transactions", params={"user_id": "alice", "cursor": "e30"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bitcoin_and_messari_pages(client):
+    # Without dedicated collections both fall back to filtering the crypto index
+    fallback = (await client.get("/news/bitcoin", params={"limit": 4})).json()
+    assert fallback["items"] == [] and fallback["next_cursor"] is None
+    assert (await client.get("/news/messari", params={"limit": 4})).json()["total_count"] == 0
+
+    bitcoin = [dict(article, source="") for article in ARTICLES[:10]]
+    client.news_service.snapshot = client.news_service.snapshot.evolve(bitcoin=bitcoin)
+    first = (await client.get("/news/bitcoin", params={"limit": 4})).json()
+    rest = (await client.get("/news/bitcoin", params={"limit": 10, "cursor": first["next_cursor"]})).json()
+    assert [item["id"] for item in first["items"] + rest["items"]] == [f"news-{i}" for i in range(10)]
+    assert rest["next_cursor"] is None and rest["items"][0]["related_coins"] == ["BTC"]
+
+    assert (await client.get("/news/bitcoin", params={"limit": 1000})).status_code == 422
+    assert (await client.get("/news/messari", params={"cursor": "garbage!"})).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_macro_news_cursor(client, monkeypatch):
+    now = datetime.now()
+    articles = [{"id": f"macro-{i}", "title": f"Rates {i}", "category": "business" if i % 2 else "technology",
+                 "timestamp": (now - timedelta(minutes=i)).strftime("%m/%d/%Y, %I:%M:%S %p")}
+                for i in range(12)]
+    articles.append({"id": "stale", "title": "Old", "category": "business",
+                     "timestamp": (now - timedelta(days=3)).strftime("%m/%d/%Y, %I:%M:%S %p")})
+    monkeypatch.setattr(news.macro_news_service, "snapshot", NewsSnapshot().evolve(articles))
+
+    first = (await client.get("/news/macro", params={"limit": 4})).json()
+    rest = (await client.get("/news/macro", params={"limit": 4, "cursor": first["next_cursor"]})).json()
+    assert [item["id"] for item in first["items"] + rest["items"]] == [f"macro-{i}" for i in range(1, 12, 2)]
+    assert first["total_count"] == 6 and rest["next_cursor"] is None
+    assert (await client.get("/news/macro", params={"limit": 0})).status_code == 422
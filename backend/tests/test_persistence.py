@@ -0,0 +1,78 @@
+"""
+Tests for atomic JSON persistence and coalesced background writes.
+"""
+import json
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from app.core import persistence
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """Saved data reads back unchanged and is plain JSON"""
+    path = str(tmp_path / "nested" / "data.json")
+    data = {"holdings": [{"symbol": "BTC", "quantity": 1.5}]}
+
+    assert persistence.save_json(path, data, indent=2)
+    assert persistence.load_json(path) == data
+    with open(path) as f:
+        assert json.load(f) == data
+
+
+def test_load_missing_or_corrupt_returns_default(tmp_path):
+    """Unreadable files fall back to the default"""
+    assert persistence.load_json(str(tmp_path / "missing.json"), []) == []
+    corrupt = tmp_path / "corrupt.json"
+    corrupt.write_text('{"truncated": ')
+    assert persistence.load_json(str(corrupt), {}) == {}
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    """A write that fails midway leaves the old file and no temp files"""
+    path = str(tmp_path / "data.json")
+    persistence.save_json(path, {"version": 1})
+
+    with mock.patch.object(persistence.os, "replace", side_effect=OSError("disk full")):
+        assert not persistence.save_json(path, {"version": 2})
+
+    assert persistence.load_json(path) == {"version": 1}
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_concurrent_writers_never_corrupt_file(tmp_path):
+    """Parallel writers to one path always leave a complete document"""
+    path = str(tmp_path / "data.json")
+    payloads = [{"writer": i, "items": list(range(2000))} for i in range(8)]
+
+    threads = [threading.Thread(target=persistence.save_json, args=(path, payload)) for payload in payloads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert persistence.load_json(path) in payloads
+
+
+def test_save_later_coalesces_writes(tmp_path):
+    """Only the latest pending data for a path is written"""
+    path = str(tmp_path / "news.json")
+    with mock.patch.object(persistence, "save_json", wraps=persistence.save_json) as save:
+        for i in range(20):
+            persistence.save_json_later(path, [i], delay=60)
+        persistence.flush_pending()
+
+    assert save.call_count == 1
+    assert persistence.load_json(path) == [19]
+
+
+def test_load_detects_msgpack(tmp_path):
+    """Files written as msgpack read back transparently"""
+    msgpack = pytest.importorskip("msgpack")
+    path = str(tmp_path / "cache.json")
+    assert persistence.save_json(path, {"a": [1, 2]}, binary=True)
+    with open(path, "rb") as f:
+        assert msgpack.unpackb(f.read()) == {"a": [1, 2]}
+    assert persistence.load_json(path) == {"a": [1, 2]}
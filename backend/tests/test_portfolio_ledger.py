@@ -0,0 +1,83 @@
+"""
+Tests for the append-only portfolio ledger.
+"""
+import pytest
+
+from app.services.portfolio.ledger import PortfolioLedger, apply_transaction, normalize_transaction
+
+
+def _tx(side, quantity, price, symbol="BTC"):
+    return {"symbol": symbol, "transaction_type": side, "quantity": quantity, "price_usd": price}
+
+
+class TestPortfolioLedger:
+    def test_average_cost_basis_and_realized_pnl(self, tmp_path):
+        ledger = PortfolioLedger(str(tmp_path))
+        ledger.append(_tx("buy", 1.0, 100.0))
+        ledger.append(_tx("buy", 1.0, 200.0))
+        ledger.append(_tx("sell", 1.0, 300.0))
+
+        position = ledger.get_position("btc")
+        assert position["quantity"] == pytest.approx(1.0)
+        assert position["cost_basis"] == pytest.approx(150.0)
+        assert position["realized_pnl"] == pytest.approx(150.0)
+
+    def test_closed_positions_are_hidden(self, tmp_path):
+        ledger = PortfolioLedger(str(tmp_path))
+        ledger.append(_tx("buy", 2.0, 10.0, symbol="ETH"))
+        ledger.append(_tx("sell", 2.0, 12.0, symbol="ETH"))
+        assert ledger.get_positions() == []
+        assert len(ledger.get_positions(include_closed=True)) == 1
+
+    def test_service_schema_is_accepted(self):
+        entry = normalize_transaction({"asset_id": "sol", "type": "buy", "amount": 3, "price": 20})
+        assert entry["symbol"] == "SOL"
+        assert entry["quantity"] == 3.0
+        assert entry["price_usd"] == 20.0
+
+    def test_restart_replays_only_after_snapshot(self, tmp_path):
+        ledger = PortfolioLedger(str(tmp_path), snapshot_interval=10)
+        for i in range(25):
+            ledger.append(_tx("buy", 1.0, 100.0 + i))
+
+        reloaded = PortfolioLedger(str(tmp_path), snapshot_interval=10)
+        assert reloaded.version == 25
+        assert reloaded.get_position("BTC") == ledger.get_position("BTC")
+        assert reloaded.check_consistency()["consistent"]
+
+    def test_torn_tail_is_discarded(self, tmp_path):
+        ledger = PortfolioLedger(str(tmp_path))
+        ledger.append(_tx("buy", 1.0, 100.0))
+        with open(ledger.ledger_file, "ab") as f:
+            f.write(b'{"symbol": "BTC", "transac')
+
+        reloaded = PortfolioLedger(str(tmp_path))
+        reloaded.append(_tx("buy", 1.0, 100.0))
+        assert reloaded.version == 2
+        assert len(list(reloaded.iter_entries())) == 2
+
+    def test_consistency_checker_detects_drift(self, tmp_path):
+        ledger = PortfolioLedger(str(tmp_path))
+        ledger.append(_tx("buy", 1.0, 100.0))
+        apply_transaction(ledger.positions, normalize_transaction(_tx("buy", 1.0, 100.0)))
+
+        result = ledger.check_consistency()
+        assert not result["consistent"]
+        assert result["mismatches"][0]["symbol"] == "BTC"
+
+    def test_instances_sharing_a_directory_stay_in_step(self, tmp_path):
+        # Two workers with the same ledger open
+        first = PortfolioLedger(str(tmp_path))
+        second = PortfolioLedger(str(tmp_path))
+        first.append(_tx("buy", 1.0, 100.0))
+        # Reads pick up the other instance's appends (and build the index)
+        assert [entry["quantity"] for entry in second.page(10)[0]] == [1.0]
+
+        second.append(_tx("buy", 2.0, 130.0))
+        first.append(_tx("sell", 0.5, 150.0))
+
+        for ledger in (first, second):
+            assert ledger.version == 3
+            assert ledger.get_position("BTC")["quantity"] == 2.5
+            assert ledger.check_consistency()["consistent"]
+            assert [entry["quantity"] for entry in ledger.page(10)[0]] == [0.5, 2.0, 1.0]
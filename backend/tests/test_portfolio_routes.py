@@ -0,0 +1,124 @@
+"""
+Tests for the portfolio routes built on the ledger.
+"""
+import os
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from app.api.v1 import portfolio
+from app.core.persistence import save_json
+from app.services.ai.context_providers.risk import RiskContextProvider
+from app.services.portfolio import ledgers
+from app.services.portfolio.portfolio_service import PortfolioService
+
+MARKET_DATA = {
+    "updated": "2025-04-01T15:00:00",
+    "prices": [
+        {"symbol": "BTC", "name": "Bitcoin", "priceUsd": 60000.0},
+        {"symbol": "ETH", "name": "Ethereum", "priceUsd": 2000.0},
+    ]
+}
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path, monkeypatch):
+    """HTTP client for the portfolio router backed by temporary data"""
+    market_data_file = str(tmp_path / "market_data.json")
+    save_json(market_data_file, MARKET_DATA)
+    monkeypatch.setattr(portfolio, "MARKET_DATA_FILE", market_data_file)
+    monkeypatch.setattr(ledgers, "HOLDINGS_FILE", str(tmp_path / "holdings.json"))
+    monkeypatch.setattr(ledgers, "LEDGER_DIR", str(tmp_path / "ledgers"))
+    monkeypatch.setattr(ledgers, "_ledgers", {})
+
+    app = FastAPI()
+    app.include_router(portfolio.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http_client:
+        yield http_client
+
+
+@pytest.mark.asyncio
+async def test_complete_portfolio_and_holdings_update(client):
+    response = await client.post("/portfolio/holdings/update", json={
+        "user_id": "alice", "assets": [{"symbol": "btc", "name": "Bitcoin", "quantity": 0.5}]
+    })
+    assert response.status_code == 200
+    assert [(asset["symbol"], asset["value_usd"]) for asset in response.json()["assets"]] == [("BTC", 30000.0)]
+
+    response = await client.get("/portfolio", params={"user_id": "alice"})
+    assert response.status_code == 200
+    assert response.json()["totalValue"] == 30000.0
+
+    # Quantity edits are deposits/withdrawals at the market price, not trades
+    response = await client.post("/portfolio/holdings/update", json={
+        "user_id": "alice", "assets": [{"symbol": "BTC", "quantity": 0.2}]
+    })
+    position = ledgers.get_ledger("alice").get_position("BTC")
+    assert [entry["transaction_type"] for entry in ledgers.get_ledger("alice").iter_entries()] == ["deposit", "withdrawal"]
+    assert position["cost_basis"] == pytest.approx(12000.0) and position["realized_pnl"] == 0.0
+
+    # The cached holdings route still answers with validators
+    holdings = await client.get("/portfolio/holdings", params={"user_id": "alice"})
+    assert holdings.status_code == 200 and "etag" in holdings.headers
+
+
+@pytest.mark.asyncio
+async def test_portfolio_service_reads_the_seeded_user_ledger(client):
+    save_json(ledgers.HOLDINGS_FILE, [{"symbol": "ETH", "name": "Ethereum", "quantity": 2.0,
+                                       "purchase_price_avg": 1500.0, "last_updated": "2025-01-01T00:00:00"}])
+    ledgers.migrate_legacy_holdings()
+    service = PortfolioService()
+
+    # Opening balances from the legacy holdings file, as the API sees them
+    assert service._portfolio_from_ledger()["holdings"][0]["asset_id"] == "eth"
+    assert await service.add_transaction({"asset_id": "ETH", "type": "buy", "amount": 1.0, "price": 1800.0,
+                                          "timestamp": "2025-02-01T00:00:00"})
+    assert list(service.ledger.iter_entries())[-1]["timestamp"].startswith("2025-02-01")
+    response = await client.get("/portfolio/holdings", params={"user_id": ledgers.DEFAULT_USER_ID})
+    assert response.json()["assets"][0]["quantity"] == 3.0
+
+
+@pytest.mark.asyncio
+async def test_reads_never_create_ledgers(client):
+    for path in ("/portfolio/holdings", "/portfolio/transactions", "/portfolio/risk", "/portfolio/ledger/check"):
+        assert (await client.get(path, params={"user_id": "../../escape"})).status_code == 400
+    response = await client.post("/portfolio/holdings/update", json={
+        "user_id": "a/b", "assets": [{"symbol": "BTC", "quantity": 1.0}]
+    })
+    assert response.status_code == 400
+
+    # Unknown users read as empty portfolios
+    assert (await client.get("/portfolio/holdings", params={"user_id": "ghost"})).json()["assets"] == []
+    assert (await client.get("/portfolio/transactions", params={"user_id": "ghost"})).json() == []
+    assert (await client.get("/portfolio/balances/history", params={"user_id": "ghost"})).json() == []
+    assert (await client.get("/portfolio/ledger/check", params={"user_id": "ghost"})).status_code == 404
+    assert ledgers.loaded_ledgers() == {}
+    assert not os.path.exists(ledgers.LEDGER_DIR)
+
+
+class _RecordingRiskService:
+    """Risk service stub that records the positions it is asked about"""
+
+    def __init__(self):
+        self.positions = []
+
+    def assess_positions(self, positions, snapshot):
+        self.positions.append([position["symbol"] for position in positions])
+        return {"available": False}
+
+
+@pytest.mark.asyncio
+async def test_risk_context_uses_the_user_ledger(client):
+    save_json(ledgers.HOLDINGS_FILE, [{"symbol": "ETH", "name": "Ethereum", "quantity": 2.0,
+                                       "purchase_price_avg": 1500.0, "last_updated": "2025-01-01T00:00:00"}])
+    ledgers.migrate_legacy_holdings()
+    ledgers.get_ledger("carol").append({"asset_id": "BTC", "type": "buy", "amount": 1.0, "price": 50000.0,
+                                          "timestamp": "2025-02-01T00:00:00"})
+    risk = _RecordingRiskService()
+    provider = RiskContextProvider(PortfolioService(), risk_service=risk)
+
+    await provider.get_fallback_context("how risky?")
+    await provider.get_fallback_context("how risky?", positions=ledgers.get_ledger("carol").get_positions())
+    assert risk.positions == [["ETH"], ["BTC"]]
@@ -0,0 +1,164 @@
+"""
+Tests for the push hub, market/news feeds and the stream endpoints.
+"""
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.persistence import save_json
+from app.services.portfolio import ledgers
+from app.services.portfolio.valuation import MarketSnapshot
+from app.services.realtime import MarketFeed, NewsFeed, PushHub, frame
+
+MARKET_DATA = {"prices": [
+    {"symbol": "BTC", "name": "Bitcoin", "priceUsd": 60000.0, "change24h": 1.0},
+    {"symbol": "ETH", "name": "Ethereum", "priceUsd": 2000.0, "change24h": 2.0},
+]}
+
+
+def _with_prices(**prices):
+    rows = [dict(row, priceUsd=prices.get(row["symbol"], row["priceUsd"])) for row in MARKET_DATA["prices"]]
+    return MarketSnapshot.from_market_data({"prices": rows})
+
+
+def _messages(batch):
+    return json.loads(frame(batch))
+
+
+@pytest.mark.asyncio
+async def test_fan_out_shares_one_payload():
+    hub = PushHub()
+    first, second = hub.connect(), hub.connect()
+    hub.subscribe(first, ["market:BTC"])
+    hub.subscribe(second, ["market:BTC"])
+
+    hub.publish("market:BTC", {"price_usd": 1.0})
+
+    (payload_a,), (payload_b,) = await first.next_batch(), await second.next_batch()
+    assert payload_a is payload_b
+    assert _messages([payload_a])[0]["data"] == {"price_usd": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_gets_coalesced_state():
+    hub = PushHub()
+    feed = MarketFeed(hub)
+    feed.publish(MarketSnapshot.from_market_data(MARKET_DATA))
+    subscriber = hub.connect()
+    hub.subscribe(subscriber, ["market"])
+
+    # Initial state, then two deltas the client hasn't read yet
+    feed.publish(_with_prices(BTC=61000.0))
+    feed.publish(_with_prices(BTC=61000.0, ETH=2100.0))
+
+    (message,) = _messages(await subscriber.next_batch())
+    assert message["type"] == "snapshot"
+    assert message["version"] == 3
+    assert {row["symbol"]: row["price_usd"] for row in message["data"]} == {"BTC": 61000.0, "ETH": 2100.0}
+    assert subscriber.coalesced == 2
+
+    feed.publish(_with_prices(BTC=61000.0, ETH=2200.0))
+    (message,) = _messages(await subscriber.next_batch())
+    assert message["type"] == "delta"
+    assert [row["symbol"] for row in message["data"]] == ["ETH"]
+
+
+@pytest.mark.asyncio
+async def test_market_feed_only_publishes_changed_symbols():
+    hub = PushHub()
+    feed = MarketFeed(hub)
+    feed.publish(MarketSnapshot.from_market_data(MARKET_DATA))
+    subscriber = hub.connect()
+    hub.subscribe(subscriber, ["market:ETH"])
+    await subscriber.next_batch()
+
+    assert feed.publish(MarketSnapshot.from_market_data(MARKET_DATA)) == []
+    changed = feed.publish(_with_prices(BTC=1.0))
+    assert [row["symbol"] for row in changed] == ["BTC"]
+    assert not subscriber._pending
+
+
+@pytest.mark.asyncio
+async def test_news_feed_publishes_new_articles():
+    hub = PushHub()
+    feed = NewsFeed("news:crypto", hub)
+    feed.publish([{"id": "a", "title": "A"}])
+    subscriber = hub.connect()
+    hub.subscribe(subscriber, ["news:crypto"])
+    await subscriber.next_batch()
+
+    assert feed.publish([{"id": "a", "title": "A"}]) == []
+    feed.publish([{"id": "b", "title": "B"}, {"id": "a", "title": "A"}])
+    (message,) = _messages(await subscriber.next_batch())
+    assert message["type"] == "delta"
+    assert message["data"] == [{"id": "b", "title": "B"}]
+
+    # Keys of articles that dropped out of the store are forgotten
+    feed.publish([{"id": f"c{i}", "title": "C"} for i in range(3)])
+    assert feed.seen == {"c0", "c1", "c2"}
+
+
+@pytest.mark.asyncio
+async def test_topics_are_dropped_with_their_last_subscriber():
+    hub = PushHub()
+    feed = MarketFeed(hub)
+    feed.publish(MarketSnapshot.from_market_data(MARKET_DATA))
+    first, second = hub.connect(), hub.connect()
+    hub.subscribe(first, ["market", "portfolio:u1"])
+    hub.subscribe(second, ["portfolio:u1"])
+
+    hub.disconnect(first)
+    assert "portfolio:u1" in hub.topics
+    hub.unsubscribe(second, ["portfolio:u1"])
+    assert "portfolio:u1" not in hub.topics
+    # Fixed topics keep their state for the next subscriber
+    assert hub.topics["market"].state is not None
+
+
+def test_parse_topics_rejects_invalid_user_ids():
+    from app.api.v1.stream import parse_topics
+
+    assert parse_topics("market, market:btc,portfolio:user-1,portfolio:../x,portfolio:,market:,bogus") == [
+        "market", "market:BTC", "portfolio:user-1"]
+
+
+def test_websocket_subscriptions(tmp_path, monkeypatch):
+    from app.api.v1 import portfolio, stream
+    from app.services.realtime import feeds, push_hub
+
+    market_file = tmp_path / "market_data.json"
+    save_json(str(market_file), MARKET_DATA)
+    monkeypatch.setattr(stream, "MARKET_DATA_FILE", str(market_file))
+    monkeypatch.setattr(portfolio, "MARKET_DATA_FILE", str(market_file))
+    monkeypatch.setattr(ledgers, "LEDGER_DIR", str(tmp_path / "ledgers"))
+    monkeypatch.setattr(ledgers, "HOLDINGS_FILE", str(tmp_path / "holdings.json"))
+    monkeypatch.setattr(ledgers, "_ledgers", {})
+    monkeypatch.setattr(feeds.market_feed, "rows", {})
+    ledgers.get_ledger("ws-user").append({
+        "user_id": "ws-user", "symbol": "BTC", "transaction_type": "buy", "quantity": 2.0, "price_usd": 50000.0
+    })
+
+    app = FastAPI()
+    app.include_router(stream.router)
+    client = TestClient(app)
+    with client.websocket_connect("/stream/ws?topics=market:btc,market:nope,bogus") as websocket:
+        (message,) = websocket.receive_json()
+        assert message["topic"] == "market:BTC"
+        assert message["data"]["price_usd"] == 60000.0
+        # Symbols outside the market snapshot get no topic
+        assert "market:NOPE" not in push_hub.topics
+
+        websocket.send_json({"action": "subscribe", "topics": ["portfolio:ws-user"]})
+        (message,) = websocket.receive_json()
+        assert message["topic"] == "portfolio:ws-user"
+        assert message["data"]["total_value_usd"] == pytest.approx(120000.0)
+        assert message["data"]["unrealized_pnl_usd"] == pytest.approx(20000.0)
+
+        # A dropped per-symbol topic is restored from the feed on the next subscribe
+        websocket.send_json({"action": "unsubscribe", "topics": ["market:BTC"]})
+        websocket.send_json({"action": "subscribe", "topics": ["market:BTC"]})
+        (message,) = websocket.receive_json()
+        assert message["topic"] == "market:BTC"
+        assert message["data"]["price_usd"] == 60000.0
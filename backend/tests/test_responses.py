@@ -0,0 +1,111 @@
+"""
+Tests for pre-serialized payloads and conditional responses.
+"""
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from app.api.v1 import market, news
+from app.core.persistence import save_json
+from app.core.responses import PayloadCache, payload_cache
+from app.services.market.market_data_service import MarketDataService
+from app.services.news.crypto_news_service import CryptoNewsService
+from app.services.news.snapshot import NewsSnapshot
+
+ARTICLES = [
+    {"id": f"news-{i}", "title": f"Headline {i}", "summary": "", "source": "CoinDesk",
+     "url": f"https://example.com/{i}", "timestamp": f"04/01/2025, 03:{59 - i:02d}:00 PM"}
+    for i in range(30)
+]
+
+
+def test_payload_is_built_once_per_version():
+    cache = PayloadCache(max_entries=2)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"value": len(builds)}
+
+    first = cache.get("prices", 1, build)
+    assert cache.get("prices", 1, build) is first
+    assert json.loads(first.body) == {"value": 1}
+    second = cache.get("prices", 2, build)
+    assert second.etag != first.etag
+    assert len(builds) == 2
+
+    # The oldest key is dropped once the cache is full
+    cache.get("news", 1, build)
+    cache.get("overview", 1, build)
+    cache.get("prices", 2, build)
+    assert len(builds) == 5
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path, monkeypatch):
+    """HTTP client for the market and news routers backed by temporary data"""
+    payload_cache.clear()
+
+    market_service = MarketDataService()
+    market_service.market_data_file = str(tmp_path / "market_data.json")
+    now = datetime.now().isoformat()
+    save_json(market_service.market_data_file, {
+        "updated": now,
+        "overview": {"lastUpdated": now},
+        "prices": [{"symbol": "ETH", "marketCap": 2.0}, {"symbol": "BTC", "marketCap": 10.0}]
+    })
+    monkeypatch.setattr(market, "_market_service", market_service)
+
+    news_service = CryptoNewsService()
+    news_service.save_to_cache = lambda: None
+    news_service.snapshot = NewsSnapshot().evolve(ARTICLES)
+    monkeypatch.setattr(news, "crypto_news_service", news_service)
+
+    app = FastAPI()
+    app.include_router(market.router)
+    app.include_router(news.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http_client:
+        http_client.market_service = market_service
+        http_client.news_service = news_service
+        yield http_client
+
+
+@pytest.mark.asyncio
+async def test_prices_are_served_with_etag_and_304(client):
+    response = await client.get("/market/prices", params={"limit": 1})
+    assert response.status_code == 200
+    assert response.json() == [{"symbol": "BTC", "marketCap": 10.0}]
+    etag = response.headers["etag"]
+
+    not_modified = await client.get("/market/prices", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    other_page = await client.get("/market/prices", params={"limit": 1, "offset": 1})
+    assert other_page.json() == [{"symbol": "ETH", "marketCap": 2.0}]
+
+
+@pytest.mark.asyncio
+async def test_first_news_page_follows_the_snapshot_version(client):
+    response = await client.get("/news/crypto", params={"limit": 5})
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == [f"news-{i}" for i in range(5)]
+    assert body["total_count"] == 30
+    etag = response.headers["etag"]
+
+    cached = await client.get("/news/crypto", params={"limit": 5}, headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert cached.status_code == 304
+
+    client.news_service.snapshot = client.news_service.snapshot.evolve(ARTICLES[1:])
+    refreshed = await client.get("/news/crypto", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["items"][0]["id"] == "news-1"
+
+    # Filtered requests are built per request and validated per query
+    filtered = await client.get("/news/crypto", params={"limit": 5, "query": "Headline 1"})
+    assert filtered.status_code == 200
+    assert filtered.headers["etag"] not in (etag, refreshed.headers["etag"])
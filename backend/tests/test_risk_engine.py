@@ -0,0 +1,135 @@
+"""
+Tests for the rolling risk analytics engine.
+"""
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.portfolio.risk import RiskEngine
+
+
+def _dates(count):
+    start = date(2024, 1, 1)
+    return [(start + timedelta(days=i)).isoformat() for i in range(count)]
+
+
+def _random_prices(days, coins, seed=0):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.03, size=(days, 1))
+    returns = market * rng.uniform(0.5, 1.5, size=(1, coins)) + rng.normal(0, 0.02, size=(days, coins))
+    return 100.0 * np.cumprod(1.0 + returns, axis=0)
+
+
+def test_correlation_matches_numpy():
+    prices = _random_prices(61, 4)
+    engine = RiskEngine([f"c{i}" for i in range(4)], window=60)
+    engine.load(_dates(61), prices)
+
+    returns = prices[1:] / prices[:-1] - 1.0
+    np.testing.assert_allclose(engine.correlation(), np.corrcoef(returns.T), atol=1e-9)
+    np.testing.assert_allclose(engine.volatility(), returns.std(axis=0, ddof=1) * np.sqrt(365), rtol=1e-9)
+
+
+def test_incremental_updates_match_full_load():
+    prices = _random_prices(150, 5, seed=1)
+    prices[40:60, 2] = np.nan
+    labels = ["bitcoin", "b", "c", "d", "e"]
+    dates = _dates(150)
+
+    incremental = RiskEngine(labels, window=30)
+    incremental.load(dates[:100], prices[:100])
+    for day, row in zip(dates[100:], prices[100:]):
+        incremental.append_day(day, row)
+
+    full = RiskEngine(labels, window=30)
+    full.load(dates, prices)
+
+    np.testing.assert_allclose(incremental.covariance(), full.covariance(), rtol=1e-7, atol=1e-12)
+    np.testing.assert_allclose(incremental.betas()["benchmark"], full.betas()["benchmark"], rtol=1e-7)
+    np.testing.assert_allclose(incremental.betas()["market"], full.betas()["market"], rtol=1e-7)
+    np.testing.assert_allclose(incremental.drawdowns()["max"], full.drawdowns()["max"])
+    np.testing.assert_allclose(incremental.rolling_returns()["30d"], full.rolling_returns()["30d"])
+
+
+def test_beta_and_drawdown():
+    btc = np.array([100.0, 110.0, 99.0, 108.9, 87.12, 95.832] * 3)
+    levered = btc.copy()
+    levered[1:] = 50.0 * np.cumprod(1.0 + 2.0 * (btc[1:] / btc[:-1] - 1.0))
+    levered[0] = 50.0
+    engine = RiskEngine.from_price_history({
+        "bitcoin": list(zip(_dates(len(btc)), btc)),
+        "levered": list(zip(_dates(len(btc)), levered)),
+    })
+
+    betas = engine.betas()["benchmark"]
+    assert betas[engine.index["levered"]] == pytest.approx(2.0)
+    assert betas[engine.index["bitcoin"]] == pytest.approx(1.0)
+    drawdowns = engine.drawdowns()
+    assert drawdowns["max"][engine.index["bitcoin"]] == pytest.approx(87.12 / 110.0 - 1.0)
+    assert drawdowns["current"][engine.index["bitcoin"]] == pytest.approx(95.832 / 110.0 - 1.0)
+
+
+def test_portfolio_risk_report():
+    prices = _random_prices(91, 3, seed=2)
+    prices[:, 1] = prices[:, 0] * 2
+    engine = RiskEngine(["bitcoin", "wrapped", "other"])
+    engine.load(_dates(91), prices)
+
+    report = engine.portfolio_risk({"bitcoin": 600.0, "wrapped": 400.0, "unknown": 5.0})
+    assert report["available"]
+    assert report["beta_btc"] == pytest.approx(1.0)
+    assert report["max_weight"] == pytest.approx(0.6)
+    assert report["correlated_pairs"][0]["pair"] == ["bitcoin", "wrapped"]
+    assert report["uncovered"] == ["unknown"]
+
+
+def test_full_universe_correlation_is_fast():
+    engine = RiskEngine([f"c{i}" for i in range(500)])
+    engine.load(_dates(366), _random_prices(366, 500, seed=3))
+
+    started = time.perf_counter()
+    engine.append_day("2025-01-01", _random_prices(1, 500, seed=4)[0])
+    correlation = engine.correlation()
+    elapsed = time.perf_counter() - started
+
+    assert correlation.shape == (500, 500)
+    assert elapsed < 0.5
+
+
+def test_risk_service_refreshes_from_database(tmp_path, monkeypatch):
+    from app.services.database import db_service as db_module
+    from app.services.portfolio import risk_service as risk_module
+    from app.services.portfolio.valuation import MarketSnapshot
+
+    monkeypatch.setattr(db_module, "USE_DATABASE", True)
+    db = db_module.DatabaseService()
+    db.db_path = str(tmp_path / "crypto.db")
+    db.initialize_db()
+    prices = _random_prices(40, 2, seed=5)
+    dates = _dates(40)
+    db.save_historical_prices("bitcoin", list(zip(dates[:30], prices[:30, 0])))
+    db.save_historical_prices("ethereum", list(zip(dates[:30], prices[:30, 1])))
+
+    service = risk_module.RiskService(db_service=db)
+    snapshot = MarketSnapshot.from_market_data({"prices": [
+        {"id": "bitcoin", "symbol": "BTC", "priceUsd": 100.0, "marketCap": 2.0},
+        {"id": "ethereum", "symbol": "ETH", "priceUsd": 10.0, "marketCap": 1.0},
+    ]})
+    positions = [{"symbol": "BTC", "quantity": 1.0, "cost_basis": 50.0},
+                 {"symbol": "ETH", "quantity": 5.0, "cost_basis": 40.0}]
+
+    report = service.assess_positions(positions, snapshot)
+    assert report["available"]
+    assert report["as_of"] == dates[29]
+    assert {asset["symbol"] for asset in report["assets"]} == {"BTC", "ETH"}
+
+    db.save_historical_prices("bitcoin", list(zip(dates[30:], prices[30:, 0])))
+    service._refreshed_on = None
+    assert service.get_engine().dates[-1] == dates[-1]
+
+    var = service.value_at_risk(positions, snapshot, paths=5_000, seed=0)
+    assert var["available"]
+    assert var["historical"]["1d"]["95"]["var"] > 0
+    assert var["monte_carlo"]["7d"]["99"]["cvar"] >= var["monte_carlo"]["7d"]["99"]["var"]
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.services.scheduler_service import TaskScheduler
+
+
+@pytest_asyncio.fixture
+async def scheduler():
+    scheduler = TaskScheduler(thread_workers=2)
+    yield scheduler
+    if scheduler.is_running():
+        await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_tasks_run_in_due_order(scheduler):
+    order = []
+
+    async def record(name):
+        order.append(name)
+
+    scheduler.add_task("slow", record, 0.08, args=("slow",))
+    scheduler.add_task("fast", record, 0.03, args=("fast",))
+    await scheduler.start()
+    await asyncio.sleep(0.1)
+
+    assert order[:3] == ["fast", "fast", "slow"]
+    status = scheduler.get_all_task_statuses()
+    assert status["fast"]["run_count"] >= 3
+    assert status["slow"]["func"] == "record"
+
+
+@pytest.mark.asyncio
+async def test_added_task_wakes_sleeping_scheduler(scheduler):
+    ran = asyncio.Event()
+
+    async def idle():
+        pass
+
+    async def quick():
+        ran.set()
+
+    scheduler.add_task("idle", idle, 3600)
+    await scheduler.start()
+    await asyncio.sleep(0.01)
+    scheduler.add_task("quick", quick, 3600, start_immediately=True)
+    await asyncio.wait_for(ran.wait(), 0.5)
+
+
+def test_jitter_stays_within_bounds():
+    scheduler = TaskScheduler()
+
+    def noop():
+        pass
+
+    scheduler.add_task("jittered", noop, 60, executor="thread", jitter_seconds=5)
+    task = scheduler.tasks["jittered"]
+    for _ in range(200):
+        scheduler._schedule(task)
+        assert task.due <= task.next_run <= task.due + 5
+
+
+@pytest.mark.asyncio
+async def test_max_instances_limits_overlapping_runs(scheduler):
+    active = 0
+    peak = 0
+
+    async def slow():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.1)
+        active -= 1
+
+    scheduler.add_task("slow", slow, 0.02, start_immediately=True, max_instances=1)
+    await scheduler.start()
+    await asyncio.sleep(0.15)
+
+    assert peak == 1
+    assert scheduler.get_task_status("slow")["missed_count"] > 0
+
+
+@pytest.mark.asyncio
+async def test_misfire_policies(scheduler):
+    runs = []
+
+    async def record(name):
+        runs.append(name)
+
+    scheduler.add_task("skip", record, 1, args=("skip",), misfire_policy="skip", misfire_grace_seconds=0.5)
+    scheduler.add_task("coalesce", record, 1, args=("coalesce",), misfire_grace_seconds=0.5)
+    now = time.monotonic()
+    for task in scheduler.tasks.values():
+        task.due = now - 3.5
+        scheduler._dispatch(task, now)
+    await asyncio.sleep(0)
+
+    skipped, coalesced = scheduler.tasks["skip"], scheduler.tasks["coalesce"]
+    assert runs == ["coalesce"]
+    assert skipped.missed_count == 4 and skipped.due == pytest.approx(now + 0.5)
+    assert coalesced.missed_count == 3 and coalesced.due == pytest.approx(now + 1)
+
+
+@pytest.mark.asyncio
+async def test_thread_executor_and_errors(scheduler):
+    def blocking():
+        return threading.current_thread().name
+
+    def failing():
+        raise RuntimeError("feed down")
+
+    scheduler.add_task("blocking", blocking, 60, executor="thread")
+    scheduler.add_task("failing", failing, 60, executor="thread")
+
+    assert (await scheduler.run_task("blocking")).startswith("scheduler")
+    with pytest.raises(RuntimeError):
+        await scheduler.run_task("failing")
+    status = scheduler.get_task_status("failing")
+    assert status["error_count"] == 1 and status["last_error"] == "feed down"
+
+    with pytest.raises(ValueError):
+        scheduler.add_task("sync_on_loop", blocking, 60)
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_running_tasks(scheduler):
+    async def forever():
+        await asyncio.sleep(3600)
+
+    scheduler.add_task("forever", forever, 60, start_immediately=True)
+    await scheduler.start()
+    await asyncio.sleep(0.01)
+    assert scheduler.get_task_status("forever")["is_running"]
+
+    await asyncio.wait_for(scheduler.stop(), 1)
+    assert not scheduler.is_running()
+    assert not scheduler.get_task_status("forever")["is_running"]
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core.shared_state import LeaderLock, SharedSnapshot
+from app.services.cluster import ClusterCoordinator
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_one_leader_per_lock_file(tmp_path):
+    path = str(tmp_path / "leader.lock")
+    first, second = LeaderLock(path), LeaderLock(path)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+
+    # Another process cannot take the lock either
+    code = f"from app.core.shared_state import LeaderLock; print(LeaderLock({path!r}).try_acquire())"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60)
+    assert result.stdout.strip() == "False", result.stderr[-2000:]
+
+    first.release()
+    assert second.try_acquire()
+    second.release()
+
+
+def test_snapshot_versions_are_seen_by_other_instances(tmp_path):
+    writer, reader = SharedSnapshot(str(tmp_path), "prices"), SharedSnapshot(str(tmp_path), "prices")
+    assert reader.read() == (0, None)
+    assert not reader.changed()
+
+    assert writer.publish({"bitcoin": 1}) == 1
+    assert reader.changed()
+    assert reader.read() == (1, {"bitcoin": 1})
+    assert not reader.changed()
+
+    writer.publish({"bitcoin": 2})
+    assert reader.version == 2
+    assert reader.read() == (2, {"bitcoin": 2})
+    assert reader.published_at is not None
+    writer.close()
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_follower_applies_published_channels(tmp_path):
+    state = {"leader": [], "follower": []}
+
+    leader = ClusterCoordinator(str(tmp_path), enabled=True)
+    follower = ClusterCoordinator(str(tmp_path), enabled=True)
+    assert leader.lock.try_acquire()
+    assert not follower.lock.try_acquire()
+    for coordinator, role in ((leader, "leader"), (follower, "follower")):
+        coordinator.register("news", lambda role=role: state[role], lambda data, role=role: state.__setitem__(role, data))
+
+    async def refresh():
+        state["leader"] = state["leader"] + ["ETF approved"]
+
+    await leader.publishing("news", refresh)()
+    assert await follower.sync() == ["news"]
+    assert state["follower"] == ["ETF approved"]
+    assert await follower.sync() == []
+    assert follower.status()["channels"]["news"] == {"published": 1, "applied": 1}
+    assert (leader.role, follower.role) == ("leader", "follower")
+
+    # The follower takes over once the leader is gone
+    promoted = []
+
+    async def on_promoted():
+        promoted.append(True)
+
+    leader.close()
+    await follower.follow(on_promoted)
+    assert promoted and follower.role == "leader"
+    follower.close()
+
+
+def test_publishing_is_a_no_op_in_single_mode(tmp_path):
+    def refresh():
+        return "done"
+
+    coordinator = ClusterCoordinator(str(tmp_path), enabled=False)
+    assert coordinator.publishing("news", refresh) is refresh
+    assert coordinator.role == "single"
@@ -0,0 +1,107 @@
+"""
+Tests for the memory-mapped market snapshot file.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from app.core.persistence import save_json
+from app.services.market.snapshot_file import MarketSnapshotFile, snapshot_path, write_snapshot
+from app.services.portfolio.valuation import MarketSnapshot, load_snapshot, value_positions
+
+MARKET_DATA = {
+    "updated": "2025-04-01T15:00:00",
+    "prices": [
+        {"symbol": "BTC", "name": "Bitcoin", "id": "bitcoin", "priceUsd": 60000.0, "change24h": 2.0,
+         "change7d": 5.0, "change30d": -10.0, "marketCap": 1.2e12, "volume24h": 3e10,
+         "price_change_percentage_1y_in_currency": 80.0, "market_cap_rank": 1},
+        {"symbol": "eth", "name": "Ethereum", "id": "ethereum", "priceUsd": 2000.0, "change24h": None,
+         "marketCap": 2.4e11, "market_cap_rank": 2},
+        {"symbol": "BTC", "name": "Duplicate", "priceUsd": 1.0},
+        {"symbol": "XMR", "name": "Mon\0ero", "priceUsd": "not a number"},
+    ]
+}
+
+
+def test_round_trip_matches_json_snapshot(tmp_path):
+    path = str(tmp_path / "market_data.snap")
+    assert write_snapshot(path, MARKET_DATA)
+
+    mapped = MarketSnapshotFile(path)
+    assert mapped.sequence == 1
+    assert mapped.updated == "2025-04-01T15:00:00"
+    assert mapped.symbols == ["BTC", "ETH", "XMR"]
+    assert mapped.names == ["Bitcoin", "Ethereum", "Monero"]
+    assert mapped.ids == ["bitcoin", "ethereum", "xmr"]
+    assert mapped.columns["change_1y"].tolist() == [80.0, 0.0, 0.0]
+
+    from_file = mapped.to_market_snapshot()
+    from_json = MarketSnapshot.from_market_data(MARKET_DATA)
+    assert from_file.symbols == from_json.symbols
+    assert from_file.version == from_json.version
+    np.testing.assert_array_equal(from_file.prices, from_json.prices)
+    np.testing.assert_array_equal(from_file.volumes, from_json.volumes)
+    for period in from_json.changes:
+        np.testing.assert_array_equal(from_file.changes[period], from_json.changes[period])
+
+    # Columns are read-only views of the mapping, not copies
+    assert not from_file.prices.flags.writeable
+    assert not from_file.prices.flags.owndata
+
+    positions = [{"symbol": "BTC", "name": "Bitcoin", "quantity": 0.5, "cost_basis": 20000.0}]
+    assert value_positions(positions, from_file) == value_positions(positions, from_json)
+
+
+def test_records_and_find(tmp_path):
+    path = str(tmp_path / "market_data.snap")
+    write_snapshot(path, MARKET_DATA)
+    mapped = MarketSnapshotFile(path)
+
+    rows = mapped.find(["btc", "Ethereum"])
+    assert rows == [0, 1]
+    btc = mapped.records(rows)[0]
+    assert btc["priceUsd"] == 60000.0
+    assert btc["price_change_percentage_1y_in_currency"] == 80.0
+    assert btc["market_cap_rank"] == 1
+    assert len(mapped.records()) == 3
+
+
+def test_rewrite_bumps_sequence_and_keeps_old_views_valid(tmp_path):
+    path = str(tmp_path / "market_data.snap")
+    write_snapshot(path, MARKET_DATA)
+    old = MarketSnapshotFile(path)
+
+    updated = dict(MARKET_DATA, prices=[dict(MARKET_DATA["prices"][0], priceUsd=61000.0)])
+    write_snapshot(path, updated)
+    new = MarketSnapshotFile(path)
+
+    assert new.sequence == 2
+    assert new.columns["price"].tolist() == [61000.0]
+    assert old.columns["price"].tolist() == [60000.0, 2000.0, 0.0]
+
+
+def test_invalid_files_are_rejected(tmp_path):
+    path = tmp_path / "market_data.snap"
+    path.write_bytes(b"{}")
+    with pytest.raises(ValueError):
+        MarketSnapshotFile(str(path))
+    path.write_bytes(b"x" * 200)
+    with pytest.raises(ValueError):
+        MarketSnapshotFile(str(path))
+
+
+def test_load_snapshot_prefers_the_newer_file(tmp_path):
+    json_path = str(tmp_path / "market_data.json")
+    save_json(json_path, MARKET_DATA)
+    assert load_snapshot(json_path).prices.flags.owndata
+
+    write_snapshot(snapshot_path(json_path), MARKET_DATA)
+    mapped = load_snapshot(json_path)
+    assert not mapped.prices.flags.owndata
+    assert load_snapshot(json_path) is mapped
+
+    # A JSON file written after the snapshot (e.g. by an older writer) wins
+    stat = os.stat(snapshot_path(json_path))
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_snapshot(json_path).prices.flags.owndata
@@ -0,0 +1,164 @@
+"""
+Tests for the incremental exchange/wallet sync engine and balance history.
+"""
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from app.core.persistence import load_json
+from app.services.blockchain.eth import EthereumService
+from app.services.exchanges.adapter import AsyncExchangeAdapter, RateBudget
+from app.services.portfolio.ledger import PortfolioLedger
+from app.services.portfolio.sync import (
+    BalanceHistory, ExchangeSyncSource, SyncEngine, WalletSyncSource, trade_entries
+)
+
+DAY_MS = 86_400_000
+# 2024-03-01T12:00:00Z: the same local date in every timezone within 12 hours of UTC
+START_MS = 1_709_294_400_000
+
+
+class FakeExchange:
+    id = "fake-sync"
+    rateLimit = 1
+
+    def __init__(self, trades):
+        self.trades = trades
+        self.since_calls = []
+
+    async def load_markets(self):
+        return {"BTC/USDT": {"base": "BTC", "quote": "USDT"}, "ETH/BTC": {"base": "ETH", "quote": "BTC"}}
+
+    async def fetch_balance(self):
+        return {"total": {"BTC": 1.0, "USDT": 10.0}}
+
+    async def fetch_my_trades(self, symbol, since=None, limit=None):
+        self.since_calls.append((symbol, since))
+        return [t for t in self.trades if t["symbol"] == symbol and (since is None or t["timestamp"] >= since)]
+
+
+class FakeExchangeService:
+    def __init__(self, exchange):
+        self.adapter = AsyncExchangeAdapter(exchange, "fake", budget=RateBudget(10_000, 100))
+
+
+def _trade(trade_id, day, side="buy", amount=0.1, price=50_000.0):
+    return {"id": trade_id, "symbol": "BTC/USDT", "timestamp": START_MS + day * DAY_MS + 1, "side": side,
+            "price": price, "amount": amount, "cost": amount * price, "fee": {"cost": 1.0, "currency": "USDT"}}
+
+
+def _engine(tmp_path, exchange, service=None, name="ledger"):
+    ledger = PortfolioLedger(str(tmp_path / name))
+    service = service or FakeExchangeService(exchange)
+    return SyncEngine(ledger, {"fake": ExchangeSyncSource(service)}, "u1"), service
+
+
+def test_trade_entries_cover_both_legs_and_fee():
+    trade = {"id": "1", "symbol": "ETH/BTC", "timestamp": START_MS, "side": "sell", "price": 0.05,
+             "amount": 2.0, "cost": 0.1, "fee": 0.0001, "fee_currency": "BTC"}
+    entries = trade_entries(trade, lambda symbol: {"BTC": 60_000.0}[symbol])
+
+    assert [(e["symbol"], e["transaction_type"], e["quantity"]) for e in entries] == [
+        ("ETH", "sell", 2.0), ("BTC", "buy", 0.1), ("BTC", "withdrawal", 0.0001)]
+    assert entries[0]["price_usd"] == pytest.approx(3_000.0)
+    # Local time, like manual entries
+    assert entries[0]["timestamp"] == datetime.fromtimestamp(START_MS / 1000).isoformat()
+
+
+@pytest.mark.asyncio
+async def test_sync_appends_only_new_trades(tmp_path):
+    exchange = FakeExchange([_trade("t1", 0), _trade("t2", 1)])
+    engine, _ = _engine(tmp_path, exchange)
+
+    assert await engine.sync_all() == {"fake": 2}
+    assert engine.ledger.get_position("BTC")["quantity"] == pytest.approx(0.2)
+    assert engine.ledger.get_position("USDT")["quantity"] == 0.0
+    assert engine.ledger.version == 6
+
+    exchange.trades.append(_trade("t3", 2, side="sell", amount=0.05, price=60_000.0))
+    assert await engine.sync_all() == {"fake": 1}
+    assert engine.ledger.get_position("BTC")["quantity"] == pytest.approx(0.15)
+
+    # A new engine resumes from the persisted cursor
+    state = load_json(str(tmp_path / "ledger" / "sync_state.json"))
+    assert state["sources"]["fake"]["markets"]["BTC/USDT"] == START_MS + 2 * DAY_MS + 1
+    resumed, _ = _engine(tmp_path, exchange)
+    exchange.since_calls.clear()
+    assert await resumed.sync_all() == {"fake": 0}
+    assert ("BTC/USDT", START_MS + 2 * DAY_MS + 1) in exchange.since_calls
+
+
+@pytest.mark.asyncio
+async def test_resync_after_lost_cursor_does_not_duplicate(tmp_path):
+    exchange = FakeExchange([_trade("t1", 0)])
+    engine, _ = _engine(tmp_path, exchange)
+    await engine.sync_all()
+
+    # Simulate a crash between appending and saving the cursor
+    engine.state["sources"] = {}
+    engine.state["ledger_offset"] = 0
+    engine._recent_ids = None
+
+    assert await engine.sync_all() == {"fake": 0}
+    assert engine.ledger.version == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_syncs_do_not_duplicate(tmp_path):
+    exchange = FakeExchange([_trade("t1", 0), _trade("t2", 1)])
+    engine, _ = _engine(tmp_path, exchange)
+
+    first, second = await asyncio.gather(engine.sync_source("fake"), engine.sync_source("fake"))
+    assert sorted([first, second]) == [0, 2]
+    assert engine.ledger.version == 6
+
+
+@pytest.mark.asyncio
+async def test_engines_sharing_a_service_keep_their_own_cursors(tmp_path):
+    exchange = FakeExchange([_trade("t1", 0)])
+    alice, service = _engine(tmp_path, exchange, name="alice")
+    bob, _ = _engine(tmp_path, exchange, service=service, name="bob")
+
+    assert await alice.sync_all() == {"fake": 1}
+    # Alice's sync does not advance Bob's cursor (or the service's own)
+    assert await bob.sync_all() == {"fake": 1}
+    assert bob.ledger.get_position("BTC")["quantity"] == pytest.approx(0.1)
+    assert service.adapter.cursors == {}
+    assert not hasattr(service, "balance_history")
+
+
+@pytest.mark.asyncio
+async def test_daily_balances_are_built_incrementally(tmp_path):
+    exchange = FakeExchange([_trade("t1", 0), _trade("t2", 2, side="sell", amount=0.04)])
+    engine, _ = _engine(tmp_path, exchange)
+    await engine.sync_all()
+
+    history = engine.history.daily_balances(4, end=date(2024, 3, 4))
+    assert [snapshot["date"] for snapshot in history] == ["2024-03-04", "2024-03-03", "2024-03-02", "2024-03-01"]
+    assert history[3]["balances"]["btc"] == pytest.approx(0.1)
+    assert history[2]["balances"]["btc"] == pytest.approx(0.1)
+    assert history[1]["balances"]["btc"] == pytest.approx(0.06)
+    assert history[0]["balances"]["usdt"] == pytest.approx(-5_000.0 + 2_000.0 - 2.0)
+
+    # Manual entries are folded in on the next update without rereading the ledger
+    engine.ledger.append({"symbol": "BTC", "transaction_type": "buy", "quantity": 1.0, "price_usd": 1.0,
+                          "timestamp": "2024-03-04T12:00:00"})
+    assert engine.history.update(engine.ledger) == 1
+    assert engine.history.daily_balances(1, end=date(2024, 3, 4))[0]["balances"]["btc"] == pytest.approx(1.06)
+    assert engine.history.daily_balances(1, source="fake", end=date(2024, 3, 4))[0]["balances"]["btc"] == pytest.approx(0.06)
+
+    reloaded = BalanceHistory(str(tmp_path / "ledger" / "balance_history.json"))
+    assert reloaded.offset == engine.ledger.offset
+
+
+@pytest.mark.asyncio
+async def test_wallet_sync_needs_an_rpc_endpoint(tmp_path, monkeypatch):
+    monkeypatch.delenv("ETHEREUM_RPC_URL", raising=False)
+    ledger = PortfolioLedger(str(tmp_path / "ledger"))
+    wallet = EthereumService()
+    engine = SyncEngine(ledger, {"ethereum": WalletSyncSource(wallet)}, "u1")
+
+    # Without a transfer index nothing (in particular no mock data) reaches the ledger
+    assert await engine.sync_all() == {"ethereum": -1}
+    assert ledger.version == 0
@@ -0,0 +1,216 @@
+"""
+Tests for the ERC20 Transfer log scanner against a local JSON-RPC stub.
+"""
+import random
+from datetime import date
+
+import pytest
+
+from app.services.blockchain.balances import DECIMALS_SELECTOR
+from app.services.blockchain.eth import EthereumService
+from app.services.blockchain.rpc import JsonRpcClient
+from app.services.blockchain.scanner import TRANSFER_TOPIC, TransferScanner
+from app.services.portfolio.ledger import PortfolioLedger
+from app.services.portfolio.sync import SyncEngine, WalletSyncSource
+
+# 2024-03-01T00:00:00Z, 12 second blocks
+GENESIS = 1_709_251_200
+BLOCKS_PER_DAY = 7_200
+WALLET = "0x" + "1" * 40
+OTHER = "0x" + "2" * 40
+USDC = "0x" + "a" * 40
+NFT = "0x" + "c" * 40
+
+
+def _topic(address):
+    return "0x" + address[2:].rjust(64, "0")
+
+
+def _chain(count=600, max_results=100, seed=0):
+    """Transfers of USDC (6 decimals) between WALLET and OTHER over ~4 days"""
+    rng = random.Random(seed)
+    logs = []
+    for i in range(count):
+        block = rng.randrange(0, 4 * BLOCKS_PER_DAY)
+        incoming = rng.random() < 0.6
+        sender, recipient = (OTHER, WALLET) if incoming else (WALLET, OTHER)
+        logs.append({"address": USDC, "blockNumber": hex(block), "logIndex": hex(i),
+                     "transactionHash": f"0x{i:064x}", "topics": [TRANSFER_TOPIC, _topic(sender), _topic(recipient)],
+                     "data": hex(rng.randrange(1, 1_000) * 10 ** 6)})
+    # An ERC721 transfer shares the event signature but indexes the token id
+    logs.append({"address": NFT, "blockNumber": hex(10), "logIndex": hex(count), "transactionHash": "0xnft",
+                 "topics": [TRANSFER_TOPIC, _topic(OTHER), _topic(WALLET), _topic("0x01")], "data": "0x"})
+    return logs
+
+
+def _serve(stub, logs, head, max_results=100):
+    state = {"head": head, "get_logs": 0, "fail_after": None}
+
+    def get_logs(query):
+        state["get_logs"] += 1
+        if state["fail_after"] is not None and state["get_logs"] > state["fail_after"]:
+            raise ValueError("upstream unavailable")
+        start, end = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+        addresses = query.get("address")
+        topics = query["topics"]
+        matched = []
+        for log in logs:
+            if not start <= int(log["blockNumber"], 16) <= end:
+                continue
+            if addresses and log["address"] not in addresses:
+                continue
+            if all(wanted is None or log["topics"][i] in (wanted if isinstance(wanted, list) else [wanted])
+                   for i, wanted in enumerate(topics)):
+                matched.append(log)
+        if len(matched) > max_results:
+            raise ValueError(f"query returned more than {max_results} results")
+        return matched
+
+    stub.methods.update({
+        "eth_blockNumber": lambda: hex(state["head"]),
+        "eth_getLogs": get_logs,
+        "eth_getBlockByNumber": lambda block, full: {"timestamp": hex(GENESIS + int(block, 16) * 12)},
+        "eth_call": lambda call, tag: hex(6) if call["data"] == DECIMALS_SELECTOR else "0x",
+    })
+    return state
+
+
+def _expected_daily(logs, days):
+    balances, result = 0.0, []
+    for day in range(days):
+        for log in logs:
+            if len(log["topics"]) == 3 and int(log["blockNumber"], 16) // BLOCKS_PER_DAY == day:
+                amount = int(log["data"], 16) / 10 ** 6
+                balances += amount if log["topics"][2] == _topic(WALLET) else -amount
+        result.append(balances)
+    return result
+
+
+@pytest.mark.asyncio
+async def test_scan_adapts_range_and_indexes_transfers(rpc_stub, tmp_path):
+    logs = _chain()
+    state = _serve(rpc_stub, logs, head=4 * BLOCKS_PER_DAY + 12)
+    rpc = JsonRpcClient(rpc_stub.url)
+    scanner = TransferScanner(rpc, str(tmp_path / "transfers.db"), [WALLET], initial_range=10_000)
+
+    stored = await scanner.scan()
+
+    assert stored == 600
+    assert scanner.checkpoints() == {WALLET: 4 * BLOCKS_PER_DAY}
+    assert scanner.block_range < 10_000
+    # Far fewer queries than one per block, even after shrinking
+    assert state["get_logs"] < 200
+
+    expected = _expected_daily(logs, 4)
+    history = scanner.historical_balances(4, end=date(2024, 3, 4))
+    assert [snapshot["date"] for snapshot in history] == ["2024-03-04", "2024-03-03", "2024-03-02", "2024-03-01"]
+    for snapshot, balance in zip(reversed(history), expected):
+        assert snapshot["balances"].get(USDC, 0.0) == pytest.approx(balance)
+    await rpc.close()
+
+
+@pytest.mark.asyncio
+async def test_scan_resumes_from_checkpoint(rpc_stub, tmp_path):
+    logs = _chain(count=300)
+    state = _serve(rpc_stub, logs, head=4 * BLOCKS_PER_DAY + 12)
+    db_path = str(tmp_path / "transfers.db")
+    rpc = JsonRpcClient(rpc_stub.url)
+
+    state["fail_after"] = 3
+    scanner = TransferScanner(rpc, db_path, [WALLET], tokens={"usdc": USDC}, initial_range=2_000)
+    with pytest.raises(Exception):
+        await scanner.scan()
+    checkpoint = scanner.checkpoints()[WALLET]
+    assert 0 < checkpoint < 4 * BLOCKS_PER_DAY
+
+    state["fail_after"] = None
+    resumed = TransferScanner(rpc, db_path, [WALLET], tokens={"usdc": USDC})
+    await resumed.scan()
+    history = resumed.historical_balances(4, end=date(2024, 3, 4))
+    assert history[0]["balances"]["usdc"] == pytest.approx(_expected_daily(logs, 4)[-1])
+
+    # Nothing new: only the head is queried
+    state["get_logs"] = 0
+    assert await resumed.scan() == 0
+    assert state["get_logs"] == 0
+    await rpc.close()
+
+
+@pytest.mark.asyncio
+async def test_unreadable_decimals_are_not_stored(rpc_stub, tmp_path):
+    logs = _chain(count=50)
+    _serve(rpc_stub, logs, head=2 * BLOCKS_PER_DAY + 12, max_results=1_000)
+    served_call = rpc_stub.methods["eth_call"]
+    state = {"fail": True}
+
+    def eth_call(call, tag):
+        if state["fail"]:
+            raise ValueError("upstream unavailable")
+        return served_call(call, tag)
+
+    rpc_stub.methods["eth_call"] = eth_call
+    rpc = JsonRpcClient(rpc_stub.url)
+    scanner = TransferScanner(rpc, str(tmp_path / "transfers.db"), [WALLET], initial_range=100_000)
+
+    with pytest.raises(RuntimeError):
+        await scanner.scan()
+    assert scanner.checkpoints()[WALLET] < 0
+    with scanner._connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tokens").fetchone()[0] == 0
+
+    # The range is retried once decimals can be read, at the right scale
+    state["fail"] = False
+    await scanner.scan()
+    history = scanner.historical_balances(2, end=date(2024, 3, 2))
+    assert history[0]["balances"][USDC] == pytest.approx(_expected_daily(logs, 2)[-1])
+    with scanner._connect() as conn:
+        # The ERC721 contract is never asked for decimals
+        assert [row[0] for row in conn.execute("SELECT address FROM tokens")] == [USDC]
+    await rpc.close()
+
+
+@pytest.mark.asyncio
+async def test_new_wallet_catches_up_before_joining(rpc_stub, tmp_path):
+    logs = _chain(count=100)
+    _serve(rpc_stub, logs, head=4 * BLOCKS_PER_DAY + 12, max_results=1_000)
+    db_path = str(tmp_path / "transfers.db")
+    rpc = JsonRpcClient(rpc_stub.url)
+
+    await TransferScanner(rpc, db_path, [OTHER]).scan(to_block=BLOCKS_PER_DAY)
+    scanner = TransferScanner(rpc, db_path, [OTHER, WALLET])
+    await scanner.scan(to_block=2 * BLOCKS_PER_DAY)
+
+    assert scanner.checkpoints() == {OTHER: 2 * BLOCKS_PER_DAY, WALLET: 2 * BLOCKS_PER_DAY}
+    total = scanner.historical_balances(1, end=date(2024, 3, 2))[0]["balances"].get(USDC, 0.0)
+    # Transfers between the two tracked wallets net to zero across both
+    assert total == pytest.approx(0.0)
+    await rpc.close()
+
+
+@pytest.mark.asyncio
+async def test_wallet_sync_appends_indexed_transfers_once(rpc_stub, tmp_path, monkeypatch):
+    logs = _chain(count=50)
+    state = _serve(rpc_stub, logs, head=2 * BLOCKS_PER_DAY + 12, max_results=1_000)
+    monkeypatch.setenv("ETHEREUM_RPC_URL", rpc_stub.url)
+    monkeypatch.setenv("ETH_WALLET_ADDRESSES", WALLET)
+    monkeypatch.setenv("ETH_TRANSFERS_DB_PATH", str(tmp_path / "transfers.db"))
+    wallets = EthereumService()
+    wallets.token_addresses = {"usdc": USDC}
+    ledger = PortfolioLedger(str(tmp_path / "ledger"))
+    engine = SyncEngine(ledger, {"ethereum": WalletSyncSource(wallets)}, "u1")
+
+    def transfers(first, last):
+        return [log for log in logs
+                if len(log["topics"]) == 3 and first < int(log["blockNumber"], 16) <= last]
+
+    assert await engine.sync_all() == {"ethereum": len(transfers(-1, 2 * BLOCKS_PER_DAY))}
+    assert engine.state["sources"]["ethereum"]["last_block"] == 2 * BLOCKS_PER_DAY
+    entries = ledger.page(100)[0]
+    assert {entry["symbol"] for entry in entries} == {"USDC"}
+    assert {entry["transaction_type"] for entry in entries} == {"deposit", "withdrawal"}
+
+    # The next sync reads only blocks mined since the cursor
+    state["head"] = 4 * BLOCKS_PER_DAY + 12
+    assert await engine.sync_all() == {"ethereum": len(transfers(2 * BLOCKS_PER_DAY, 4 * BLOCKS_PER_DAY))}
+    assert await engine.sync_all() == {"ethereum": 0}
+    await wallets.rpc.close()
@@ -0,0 +1,89 @@
+"""
+Tests for the vectorized portfolio valuation engine.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from app.services.portfolio.valuation import MarketSnapshot, PositionBatch, value_batch, value_positions
+
+MARKET_DATA = {
+    "updated": "2025-04-01T15:00:00",
+    "prices": [
+        {"symbol": "BTC", "name": "Bitcoin", "priceUsd": 60000.0, "change24h": 20.0, "change7d": 0.0, "change30d": -50.0},
+        {"symbol": "ETH", "name": "Ethereum", "priceUsd": 2000.0, "change24h": 0.0, "change7d": 100.0, "change30d": 0.0},
+        {"symbol": "btc", "name": "Duplicate", "priceUsd": 1.0},
+    ]
+}
+
+
+def _position(symbol, quantity, cost_basis, realized_pnl=0.0, last_price=0.0):
+    return {"symbol": symbol, "name": symbol, "quantity": quantity, "cost_basis": cost_basis,
+            "realized_pnl": realized_pnl, "last_price": last_price}
+
+
+def test_snapshot_keeps_first_symbol():
+    snapshot = MarketSnapshot.from_market_data(MARKET_DATA)
+    assert snapshot.symbols == ["BTC", "ETH"]
+    assert snapshot.prices.tolist() == [60000.0, 2000.0]
+
+
+def test_value_positions_totals_and_pnl():
+    snapshot = MarketSnapshot.from_market_data(MARKET_DATA)
+    result = value_positions([
+        _position("BTC", 0.5, 20000.0, realized_pnl=150.0),
+        _position("ETH", 10.0, 25000.0),
+        _position("XYZ", 100.0, 50.0, last_price=2.0),
+    ], snapshot)
+
+    assert result["total_value_usd"] == pytest.approx(30000.0 + 20000.0 + 200.0)
+    assert result["unrealized_pnl_usd"] == pytest.approx(10000.0 - 5000.0 + 150.0)
+    assert result["realized_pnl_usd"] == pytest.approx(150.0)
+
+    by_symbol = {row["symbol"]: row for row in result["positions"]}
+    assert by_symbol["BTC"]["allocation_percentage"] == pytest.approx(30000.0 / 50200.0 * 100)
+    # +20% on 30000 means the position was worth 25000 a day ago
+    assert by_symbol["BTC"]["change_24h_usd"] == pytest.approx(5000.0)
+    assert result["change_24h_pct"] == pytest.approx(5000.0 / 45200.0 * 100)
+    # Unknown symbols are priced at their last price with no change
+    assert by_symbol["XYZ"]["price_usd"] == 2.0
+    assert by_symbol["XYZ"]["change_24h_usd"] == 0.0
+    assert [row["symbol"] for row in result["positions"]] == ["BTC", "ETH", "XYZ"]
+
+
+def test_batch_matches_single_portfolio_valuation():
+    snapshot = MarketSnapshot.from_market_data(MARKET_DATA)
+    portfolios = {
+        "alice": [_position("BTC", 1.0, 50000.0)],
+        "bob": [_position("ETH", 3.0, 9000.0), _position("BTC", 0.1, 7000.0)],
+        "carol": [],
+    }
+    result = value_batch(PositionBatch.build(portfolios, snapshot))
+
+    for row, owner in enumerate(result["owners"]):
+        single = value_positions(portfolios[owner], snapshot)
+        assert result["total_value"][row] == pytest.approx(single["total_value_usd"])
+        assert result["total_change_7d_pct"][row] == pytest.approx(single["change_7d_pct"])
+    assert result["total_value"][2] == 0.0
+
+
+def test_batch_revalues_many_portfolios_quickly():
+    rng = np.random.default_rng(0)
+    symbols = [f"C{i}" for i in range(500)]
+    snapshot = MarketSnapshot.from_market_data({"prices": [
+        {"symbol": symbol, "priceUsd": float(price), "change24h": float(change)}
+        for symbol, price, change in zip(symbols, rng.uniform(0.1, 1000, 500), rng.uniform(-10, 10, 500))
+    ]})
+    portfolios = {
+        f"user{u}": [_position(symbols[i], 1.0, 10.0) for i in rng.choice(500, 10, replace=False)]
+        for u in range(10000)
+    }
+    batch = PositionBatch.build(portfolios, snapshot)
+
+    started = time.perf_counter()
+    result = value_batch(batch)
+    elapsed = time.perf_counter() - started
+
+    assert len(result["total_value"]) == 10000
+    assert elapsed < 0.5
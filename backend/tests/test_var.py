@@ -0,0 +1,71 @@
+"""
+Tests for historical and Monte Carlo VaR/CVaR.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from app.services.portfolio.var import historical_var, monte_carlo_var
+
+
+def test_historical_var_matches_quantiles():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0, 0.02, size=(500, 2))
+    weights = np.array([0.25, 0.75])
+
+    result = historical_var(returns, weights, 10_000.0)
+
+    losses = -(returns @ weights)
+    expected_var = np.quantile(losses, 0.95)
+    assert result["1d"]["95"]["var"] == pytest.approx(expected_var * 10_000.0)
+    assert result["1d"]["95"]["cvar"] == pytest.approx(losses[losses >= expected_var].mean() * 10_000.0)
+    assert result["1d"]["99"]["var"] > result["1d"]["95"]["var"]
+    assert result["7d"]["95"]["var"] > result["1d"]["95"]["var"]
+    assert result["observations"] == 500
+
+
+def test_monte_carlo_matches_normal_quantile():
+    sigma = 0.03
+    result = monte_carlo_var(np.zeros(1), np.array([[sigma ** 2]]), np.ones(1), 1.0,
+                             horizons=(1,), paths=200_000, seed=1)
+
+    # 99% quantile of a lognormal loss: 1 - exp(-2.326 sigma)
+    assert result["1d"]["99"]["var_pct"] == pytest.approx(1 - np.exp(-2.3263 * sigma), rel=0.03)
+    assert result["1d"]["99"]["cvar_pct"] > result["1d"]["99"]["var_pct"]
+
+
+def test_monte_carlo_diversification_and_correlation():
+    covariance_independent = np.diag([0.02 ** 2, 0.02 ** 2])
+    covariance_correlated = np.full((2, 2), 0.02 ** 2)
+    weights = np.array([0.5, 0.5])
+
+    independent = monte_carlo_var(np.zeros(2), covariance_independent, weights, 1.0, horizons=(1,), seed=2)
+    correlated = monte_carlo_var(np.zeros(2), covariance_correlated, weights, 1.0, horizons=(1,), seed=2)
+
+    # A singular (perfectly correlated) covariance is repaired and loses diversification
+    assert correlated["1d"]["95"]["var"] > independent["1d"]["95"]["var"] * 1.3
+
+
+def test_chunking_and_process_pool_are_deterministic():
+    covariance = np.diag([0.01, 0.02, 0.03]) ** 2
+    args = (np.zeros(3), covariance, np.full(3, 1 / 3), 100.0)
+
+    serial = monte_carlo_var(*args, paths=20_000, chunk_size=5_000, processes=0, seed=3)
+    pooled = monte_carlo_var(*args, paths=20_000, chunk_size=5_000, processes=2, seed=3)
+
+    assert pooled["7d"]["99"]["var"] == pytest.approx(serial["7d"]["99"]["var"])
+
+
+def test_monte_carlo_100k_paths_50_assets_under_a_second():
+    rng = np.random.default_rng(4)
+    factors = rng.normal(0, 0.02, size=(50, 50))
+    covariance = factors @ factors.T / 50
+    weights = np.full(50, 1 / 50)
+
+    started = time.perf_counter()
+    result = monte_carlo_var(np.zeros(50), covariance, weights, 1_000_000.0, horizons=(1,), paths=100_000, seed=5)
+    elapsed = time.perf_counter() - started
+
+    assert result["1d"]["95"]["var"] > 0
+    assert elapsed < 1.0